@@ -0,0 +1,28 @@
+-- CreateTable
+CREATE TABLE "message_compressions" (
+    "id" TEXT NOT NULL,
+    "messageId" TEXT NOT NULL,
+    "sessionId" TEXT NOT NULL,
+    "contentHash" TEXT NOT NULL,
+    "compressedContent" TEXT NOT NULL,
+    "originalChars" INTEGER NOT NULL DEFAULT 0,
+    "compressedChars" INTEGER NOT NULL DEFAULT 0,
+    "createdAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT "message_compressions_pkey" PRIMARY KEY ("id")
+);
+
+-- CreateIndex
+CREATE UNIQUE INDEX "message_compressions_messageId_key" ON "message_compressions"("messageId");
+
+-- CreateIndex
+CREATE INDEX "message_compressions_sessionId_idx" ON "message_compressions"("sessionId");
+
+-- CreateIndex
+CREATE INDEX "message_compressions_createdAt_idx" ON "message_compressions"("createdAt");
+
+-- AddForeignKey
+ALTER TABLE "message_compressions" ADD CONSTRAINT "message_compressions_messageId_fkey" FOREIGN KEY ("messageId") REFERENCES "messages"("id") ON DELETE CASCADE ON UPDATE CASCADE;
+
+-- AddForeignKey
+ALTER TABLE "message_compressions" ADD CONSTRAINT "message_compressions_sessionId_fkey" FOREIGN KEY ("sessionId") REFERENCES "sessions"("id") ON DELETE CASCADE ON UPDATE CASCADE;
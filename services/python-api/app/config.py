@@ -1,5 +1,6 @@
 """Configuration management for Python API service."""
 
+from typing import Dict, List, Optional, Tuple
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -22,12 +23,193 @@ class Settings(BaseSettings):
 
     # LLMLingua Model Configuration
     llmlingua_model_name: str = "microsoft/llmlingua-2-xlm-roberta-large-meetingbank"
+    # Inference backend: "pytorch" (full precision) or "onnx" (onnxruntime)
+    compression_backend: str = "pytorch"
+    onnx_model_dir: str = (
+        "models/llmlingua-2-onnx"  # Written by app.scripts.export_onnx
+    )
+    onnx_quantized: bool = True  # Use the dynamic int8 graph
+
+    # Inference Executor ("process" = one model copy per worker, "thread" = shared copy)
+    inference_executor_mode: str = "process"
+    inference_workers: int = 2
+    inference_start_method: str = "spawn"
+    # Torch threads per inference worker (default: cores / INFERENCE_WORKERS)
+    torch_intra_op_threads: Optional[int] = None
+    torch_inter_op_threads: Optional[int] = None
+
+    # Admission control (caps concurrent inferences, 429 + Retry-After when full)
+    inference_max_concurrency: Optional[int] = None  # Default: INFERENCE_WORKERS
+    inference_max_queue: int = 32
+    inference_queue_timeout_seconds: float = 10.0
+
+    # Preload-and-fork serving (python -m app.serve): the model is loaded once in
+    # the master and shared copy-on-write with the forked uvicorn workers
+    serve_host: str = "0.0.0.0"
+    serve_port: int = 8000
+    serve_workers: int = 1
+    serve_preload_model: bool = True
+    serve_torch_threads: Optional[int] = None  # Per worker (default: cores / workers)
+
+    # Compression Micro-Batching
+    compression_batch_max_size: int = 16
+    compression_batch_window_ms: float = 5.0
+    compression_batch_max_prompts: int = 64
+
+    # Long-prompt streaming (chunks compressed in parallel, streamed as NDJSON)
+    compression_stream_chunk_chars: int = 2000
+
+    # Session history sent to providers (long messages compressed once, reused)
+    history_max_messages: int = 20
+    history_max_chars: int = 12000  # Budget for the (compressed) history per turn
+    history_compression_rate: float = 0.5
+    history_compression_min_chars: int = 500  # Shorter messages are sent as-is
+    history_compression_max_per_session: int = 200  # Stored compressions per session
+
+    # Compression Gate (cost model replacing the fixed 500-char threshold)
+    # Defaults are calibrated so that, before any measurement, prompts under
+    # ~500 chars are never compressed and ~40k-char prompts are compressed for
+    # every default model (Gemini Flash included)
+    compression_gate_prior_tokens_per_second: float = 3000.0  # Until measured
+    compression_gate_overhead_ms: float = 60.0  # Pool dispatch + one forward pass
+    compression_gate_ms_per_usd: float = 6_000_000.0  # $0.001 saved is worth 6s
+    # (min_prompt_tokens, rate); nothing below 125 tokens (~500 chars) compresses
+    compression_gate_rate_tiers: List[Tuple[int, float]] = [(125, 0.5), (3000, 0.33)]
+    compression_gate_model_costs: Dict[str, Dict[str, float]] = {}
+    compression_gate_history_size: int = 200
+
+    # Compression Result Cache (memory LRU + optional SQLite tier on disk)
+    compression_cache_enabled: bool = True
+    compression_cache_max_entries: int = 2048
+    compression_cache_ttl_seconds: int = 3600
+    compression_cache_disk_path: Optional[str] = None
+    compression_cache_disk_max_entries: int = 100000
 
     # Intent Router Configuration
     intent_router_primary_model: str = "gpt-4o-mini"
     intent_router_fallback_model: str = "claude-3-haiku-20240307"
-    circuit_breaker_failure_threshold: int = 5
-    circuit_breaker_timeout: int = 60
+    # Local first-tier classifier (LLM is only called below the threshold)
+    intent_classifier_path: Optional[str] = "models/intent_classifier.npz"
+    intent_local_confidence_threshold: float = 0.85
+    intent_local_target_model: str = "gpt-4o"
+    # LLM classifications are appended here as training data - opt-in, the
+    # file contains raw user text (None = off)
+    intent_log_path: Optional[str] = None
+    # LLM classification cache keyed on normalized text (+ request coalescing)
+    intent_cache_enabled: bool = True
+    intent_cache_max_entries: int = 4096
+    intent_cache_ttl_seconds: int = 3600
+    # Hedging: start the fallback if the primary is slower than its live p95
+    intent_hedging_enabled: bool = True
+    intent_hedge_delay_ms: Optional[float] = None  # Fixed delay (None = live p95)
+    intent_hedge_quantile: float = 0.95
+    intent_hedge_initial_delay_ms: float = 1000.0  # Until enough samples
+    intent_hedge_min_delay_ms: float = 50.0
+    intent_hedge_max_ratio: float = 0.2  # Max share of requests hedged
+    intent_hedge_latency_window: int = 200
+    # Batching: jobs-pipeline LLM misses share one structured prompt per batch
+    intent_batch_enabled: bool = True
+    intent_batch_max_size: int = 16
+    intent_batch_max_wait_ms: float = 20.0
+    # Fused routing: skip classification on the job critical path when the
+    # intent cannot change the provider (auto/always/never)
+    fused_routing_mode: str = "auto"
+    fused_routing_greeting_max_chars: int = 40
+    fused_routing_greeting_pattern: str = (
+        r"(hi|hello|hey|hiya|yo|good (morning|afternoon|evening)|thanks|thank you"
+        r"|thx|ok|okay|bye|goodbye)( there| all| everyone| so much)?"
+    )
+
+    # Provider HTTP clients (app-scoped LLMRouter, one pool per provider)
+    llm_http2: bool = True  # Needs the h2 package
+    llm_max_connections: int = 100
+    llm_max_keepalive_connections: int = 20
+    llm_keepalive_expiry_seconds: float = 60.0
+    llm_connect_timeout_seconds: float = 5.0
+    llm_request_timeout_seconds: float = 60.0
+    llm_prewarm: bool = True  # Open provider connections at startup
+    llm_prewarm_timeout_seconds: float = 5.0
+    # Stream replies and publish deltas to session subscribers (event bus)
+    llm_streaming_enabled: bool = True
+    event_bus_max_queue: int = 1000  # Events buffered per subscriber
+    # Exact-match LLM response cache (opt-in); only low-temperature calls
+    response_cache_enabled: bool = False
+    response_cache_max_temperature: float = 0.2
+    response_cache_max_entries: int = 2048
+    response_cache_ttl_seconds: float = 600.0
+    response_cache_route_ttls: Dict[str, float] = {}  # "provider[:model]" -> TTL
+    response_cache_redis: bool = True  # Shared tier when REDIS_URL is set
+    # Semantic tier of the response cache: single-turn questions whose embedding
+    # is at least this cosine-similar to a cached question get its answer
+    semantic_cache_enabled: bool = False
+    semantic_cache_encoder: str = "llmlingua"  # llmlingua (shared backbone) | hashing
+    semantic_cache_threshold: float = 0.92
+    semantic_cache_max_entries: int = 10000
+    semantic_cache_ttl_seconds: float = 3600.0
+    semantic_cache_ivf_lists: int = 0  # IVF partitions (0 = exhaustive search)
+    semantic_cache_ivf_probes: int = 4
+    semantic_cache_top_k: int = 4
+    semantic_cache_hashing_dim: int = 1024
+    # Live session events (SSE); relayed between workers via Redis pub/sub
+    event_bus_redis: bool = True  # Used when REDIS_URL is set
+    event_bus_redis_retry_seconds: float = 5.0  # In-process only after an error
+    sse_keepalive_seconds: float = 15.0
+    sse_retry_ms: int = 3000  # Client reconnect delay
+
+    # Adaptive provider selection for messages without a provider-specific
+    # intent: EWMA latency/TTFT, error rate and token cost per provider/model
+    routing_adaptive: bool = True  # False: always the default provider (Gemini)
+    routing_objective: str = "latency"  # latency | cost | balanced
+    routing_latency_weight: float = 0.5  # balanced: latency share (rest: cost)
+    routing_latency_metric: str = "ttft"  # ttft | total
+    routing_ewma_alpha: float = 0.2
+    routing_exploration_rate: float = 0.05  # Share of picks to a random route
+    routing_min_samples: int = 3  # Calls per route before it is scored
+    routing_max_error_rate: float = 0.5
+    routing_token_prices: Dict[str, Tuple[float, float]] = {}  # model -> in/out $/1k
+    routing_trace_path: Optional[str] = None  # JSONL of observations (replay)
+
+    # Provider rate limits: RPM/TPM token buckets per "provider:model" (or a
+    # whole "provider"), shared by all workers via Redis when REDIS_URL is set
+    rate_limit_enabled: bool = True
+    rate_limits: Dict[str, Tuple[int, int]] = {}  # route -> (rpm, tpm); 0 = no limit
+    rate_limit_max_wait_seconds: float = 10.0  # Longer queues fail fast
+    rate_limit_burst_seconds: float = 6.0  # Bucket capacity in seconds of quota
+    rate_limit_local_share: float = 1.0  # Quota share per process without Redis
+    rate_limit_redis: bool = True
+    rate_limit_redis_retry_seconds: float = 5.0  # Local buckets after an error
+
+    # Fallback chain for job replies: on an error or a missed attempt timeout
+    # the next available provider is tried, with decorrelated-jitter backoff,
+    # until the job deadline (latency SLO); retries share a budget
+    llm_fallback_enabled: bool = True
+    llm_fallback_providers: List[str] = ["google", "openai", "anthropic"]
+    llm_attempt_timeout_seconds: float = 20.0  # Streams: time to first token
+    llm_job_deadline_seconds: float = 45.0
+    llm_retry_budget_ratio: float = 0.1  # Retries per first attempt
+    llm_retry_budget_min_per_second: float = 1.0  # Allowed at low traffic
+    llm_retry_budget_window_seconds: float = 10.0
+    llm_backoff_base_seconds: float = 0.1
+    llm_backoff_cap_seconds: float = 2.0
+
+    # Circuit breakers (one per provider/model): trip on the error rate or the
+    # slow-call rate over a sliding window, then probe after the open period
+    circuit_breaker_window_seconds: float = 60.0
+    circuit_breaker_minimum_calls: int = 10
+    circuit_breaker_failure_rate: float = 0.5
+    circuit_breaker_slow_call_rate: float = 0.5
+    circuit_breaker_slow_call_seconds: float = 10.0  # Generation calls
+    circuit_breaker_timeout: int = 60  # Seconds open before half-open probes
+    circuit_breaker_half_open_calls: int = 3
+    intent_slow_call_seconds: float = 2.0  # Classification calls
+    # Fleet-wide breaker state in Redis (used when REDIS_URL is set)
+    circuit_breaker_shared_state: bool = True
+    circuit_breaker_state_cache_ms: float = 50.0  # Local trust in a CLOSED state
+    circuit_breaker_redis_retry_seconds: float = 5.0  # Local-only after an error
+
+    # Redis (optional; shared state across workers and pods)
+    redis_url: Optional[str] = None
+    redis_socket_timeout_ms: float = 250.0
 
     model_config = SettingsConfigDict(
         env_file=(".env.local", ".env"),  # Try .env.local first, then .env
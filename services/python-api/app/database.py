@@ -91,16 +91,28 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
 # ========================================
 
 
+# Set once the tables exist; inherited by forked workers so they skip init_db()
+_tables_created = False
+
+
 async def init_db() -> None:
     """
     Initialize database tables.
 
     Creates all tables defined in SQLModel metadata.
-    Safe to call multiple times (idempotent).
+    Safe to call multiple times (idempotent). Runs once per process tree:
+    workers forked after a successful call (see app.serve) skip it, so they
+    do not race on CREATE TABLE against a fresh database.
 
-    Note: This is for development/testing. In production, use Alembic migrations.
+    Note: This is for development/testing. In production, the schema comes
+    from the Prisma migrations (prisma/migrations).
     """
-    from app.db_models import User, Session, Message  # noqa: F401
+    global _tables_created
+    if _tables_created:
+        logger.info("Database tables already created by the parent process")
+        return
+
+    from app.db_models import User, Session, Message, MessageCompression  # noqa: F401
 
     logger.info("Creating database tables...")
 
@@ -108,6 +120,7 @@ async def init_db() -> None:
         # Create all tables (idempotent - won't recreate existing tables)
         await conn.run_sync(SQLModel.metadata.create_all)
 
+    _tables_created = True
     logger.info("Database tables created successfully")
 
 
@@ -103,6 +103,28 @@ class Message(SQLModel, table=True):
     user: User = Relationship(back_populates="messages")
 
 
+# ========================================
+# Message Compression Model
+# ========================================
+class MessageCompression(SQLModel, table=True):
+    """Cached LLMLingua-2 compression of one message, reused across turns."""
+
+    __tablename__ = "message_compressions"
+
+    id: str = Field(default_factory=generate_cuid, primary_key=True)
+    messageId: str = Field(
+        foreign_key="messages.id", unique=True, index=True, ondelete="CASCADE"
+    )
+    sessionId: str = Field(foreign_key="sessions.id", index=True, ondelete="CASCADE")
+    contentHash: str = Field(
+        description="Compression key of (content, rate, compression model)"
+    )
+    compressedContent: str = Field(description="Compressed message content")
+    originalChars: int = Field(default=0)
+    compressedChars: int = Field(default=0)
+    createdAt: datetime = Field(default_factory=datetime.utcnow, index=True)
+
+
 # ========================================
 # Pydantic Models for API (Request/Response)
 # ========================================
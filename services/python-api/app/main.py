@@ -11,9 +11,19 @@ import asyncio
 from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
-from app.models import LLMLinguaModel
-from app.routers import intent_router, compression_router, jobs_router
+from app.routers import (
+    intent_router,
+    compression_router,
+    jobs_router,
+    providers_router,
+    resilience_router,
+    sessions_router,
+)
 from app.database import init_db, close_db
+from app.redis_client import close_redis
+from app.services.event_bus import event_bus
+from app.services.inference_executor import inference_executor
+from app.services.llm_router import close_llm_router, get_llm_router
 import logging
 
 logger = logging.getLogger(__name__)
@@ -28,22 +38,24 @@ async def load_models_background(app: FastAPI):
 
     RC#15 Fix: Prevents health check timeouts by decoupling model loading
     from server initialization.
+
+    The model is loaded inside the inference executor's workers (once per
+    worker process in process mode), never on the event loop. Requests that
+    arrive meanwhile await the same load instead of starting their own.
     """
     try:
         logger.info(
-            f"[Background] Loading LLMLingua-2 model: {settings.llmlingua_model_name}"
+            f"[Background] Loading LLMLingua-2 model: {settings.llmlingua_model_name} "
+            f"({inference_executor.mode} pool, {inference_executor.workers} workers)"
         )
-        LLMLinguaModel.get_instance()
+        await inference_executor.warmup()
         logger.info("✓ Model loaded successfully")
-
-        # Set readiness flag
-        app.state.models_ready = True
         logger.info("=" * 60)
         logger.info("Trimind Python API Service READY")
         logger.info("=" * 60)
     except Exception as e:
+        # Health stays 503 until a later warm-up (e.g. the next request) succeeds
         logger.error(f"✗ Failed to load models: {str(e)}", exc_info=True)
-        app.state.models_ready = False
 
 
 @asynccontextmanager
@@ -59,16 +71,20 @@ async def lifespan(app: FastAPI):
     logger.info("Starting Trimind Python API Service")
     logger.info("=" * 60)
 
-    # Initialize readiness flag (models NOT ready yet)
-    app.state.models_ready = False
-
     # 1. Initialize Database (SQLModel - create tables if not exist) - FAST
-    logger.info("[1/2] Initializing database (SQLModel)...")
+    logger.info("[1/3] Initializing database (SQLModel)...")
     await init_db()
     logger.info("✓ Database initialized successfully")
 
-    # 2. Load LLMLingua-2 model in BACKGROUND (non-blocking) - SLOW
-    logger.info("[2/2] Starting model loading in background...")
+    # 2. Create the app-scoped LLM router and pre-warm provider connections
+    logger.info("[2/3] Creating LLM router (pooled provider clients)...")
+    app.state.llm_router = get_llm_router()
+    if settings.llm_prewarm:
+        app.state.prewarm_task = asyncio.create_task(app.state.llm_router.prewarm())
+    logger.info("✓ LLM router ready (connections pre-warming in background)")
+
+    # 3. Load LLMLingua-2 model in BACKGROUND (non-blocking) - SLOW
+    logger.info("[3/3] Starting model loading in background...")
     asyncio.create_task(load_models_background(app))
     logger.info("✓ Model loading task started (runs in background)")
 
@@ -82,6 +98,12 @@ async def lifespan(app: FastAPI):
     logger.info("Shutting down Python API service...")
     await close_db()
     logger.info("✓ Database connections closed")
+    inference_executor.shutdown()
+    logger.info("✓ Inference executor stopped")
+    await close_llm_router()
+    logger.info("✓ LLM provider connections closed")
+    await event_bus.close()
+    await close_redis()
 
 
 # Create FastAPI application
@@ -108,7 +130,7 @@ async def root():
     return {
         "service": settings.service_name,
         "status": "healthy",
-        "model_loaded": LLMLinguaModel.is_loaded(),
+        "model_loaded": inference_executor.ready,
     }
 
 
@@ -120,22 +142,33 @@ async def health(response: Response):
     RC#15 Fix: Returns 503 while models are loading, 200 when ready.
     Docker health checks will wait for true readiness, not just server up.
 
+    The `load` field reports the load phase (not_started/loading/ready/failed)
+    and the elapsed (or total) load time in seconds.
+
     Returns:
         200 OK: Service fully ready (models loaded)
-        503 Service Unavailable: Service starting (models loading)
+        503 Service Unavailable: Service starting (models loading) or load failed
     """
-    # Check if models are ready
-    models_ready = getattr(app.state, "models_ready", False)
+    # Check if models are ready (set by whichever warm-up succeeded first)
+    models_ready = inference_executor.ready
 
     if not models_ready:
-        # Models still loading - return 503
+        # Models still loading (or failed to load) - return 503
         response.status_code = 503
+        load = inference_executor.load_status()
+        failed = load["phase"] == "failed"
         return {
-            "status": "loading_models",
-            "message": "Service is starting, ML models loading in background",
+            "status": "model_load_failed" if failed else "loading_models",
+            "message": (
+                f"ML model failed to load: {load['error']}"
+                if failed
+                else "Service is starting, ML models loading in background"
+            ),
             "models": {
                 "llmlingua": False,
             },
+            "load": load,
+            "inference": inference_executor.status(),
         }
 
     # Models ready - return 200 OK
@@ -143,8 +176,10 @@ async def health(response: Response):
         "status": "healthy",
         "message": "Service fully operational",
         "models": {
-            "llmlingua": LLMLinguaModel.is_loaded(),
+            "llmlingua": inference_executor.ready,
         },
+        "load": inference_executor.load_status(),
+        "inference": inference_executor.status(),
     }
 
 
@@ -154,3 +189,12 @@ app.include_router(
     compression_router.router, prefix=settings.api_v1_prefix, tags=["compression"]
 )
 app.include_router(jobs_router.router, prefix=settings.api_v1_prefix, tags=["jobs"])
+app.include_router(
+    providers_router.router, prefix=settings.api_v1_prefix, tags=["providers"]
+)
+app.include_router(
+    resilience_router.router, prefix=settings.api_v1_prefix, tags=["resilience"]
+)
+app.include_router(
+    sessions_router.router, prefix=settings.api_v1_prefix, tags=["sessions"]
+)
@@ -1,26 +1,177 @@
 """Singleton model loader for LLMLingua-2 compression."""
 
-from typing import Optional
+import logging
+import os
+import threading
+from typing import List, Optional
+import numpy as np
+import torch
 from llmlingua import PromptCompressor
 from app.config import settings
 
+logger = logging.getLogger(__name__)
+
+
+def inference_threads() -> int:
+    """Intra-op threads per inference worker (cores split between workers)."""
+    if settings.torch_intra_op_threads:
+        return settings.torch_intra_op_threads
+    return max(1, (os.cpu_count() or 1) // max(1, settings.inference_workers))
+
+
+def configure_torch_threads(intra_op_threads: Optional[int] = None) -> None:
+    """
+    Apply intra-/inter-op thread counts so workers don't oversubscribe cores.
+
+    Args:
+        intra_op_threads: Intra-op threads (default: ``inference_threads()``)
+    """
+    torch.set_num_threads(intra_op_threads or inference_threads())
+    if settings.torch_inter_op_threads:
+        try:
+            torch.set_num_interop_threads(settings.torch_inter_op_threads)
+        except RuntimeError as e:
+            # Only settable before the first inter-op parallel work in a process
+            logger.warning(f"Inter-op threads not changed: {str(e)}")
+
 
 class LLMLinguaModel:
     """Singleton wrapper for LLMLingua-2 model to avoid reloading."""
 
     _instance: Optional[PromptCompressor] = None
+    _loaded_pid: Optional[int] = None
+    _lock = threading.Lock()
 
     @classmethod
-    def get_instance(cls) -> PromptCompressor:
-        """Get or create the singleton LLMLingua-2 model instance."""
-        if cls._instance is None:
-            cls._instance = PromptCompressor(
+    def get_instance(cls, intra_op_threads: Optional[int] = None) -> PromptCompressor:
+        """
+        Get or create the singleton LLMLingua-2 model instance.
+
+        Thread-safe and once-only: concurrent callers block on the lock while
+        the first one loads, then all receive the same instance. Load progress
+        is tracked by the inference executor, which triggers the load.
+
+        Args:
+            intra_op_threads: Inference threads if this call loads the model
+                (default: ``inference_threads()``)
+        """
+        instance = cls._instance
+        if instance is not None:
+            return instance
+
+        with cls._lock:
+            # Another thread may have finished loading while we waited
+            if cls._instance is None:
+                cls._instance = cls._create(intra_op_threads)
+                cls._loaded_pid = os.getpid()
+            return cls._instance
+
+    @staticmethod
+    def _create(intra_op_threads: Optional[int] = None) -> PromptCompressor:
+        """Build the compressor for the configured inference backend."""
+        configure_torch_threads(intra_op_threads)
+        backend = settings.compression_backend.lower()
+        if backend == "onnx":
+            # Imported lazily: onnxruntime is only needed for this backend
+            from app.onnx_backend import OnnxPromptCompressor
+
+            return OnnxPromptCompressor(
+                model_dir=settings.onnx_model_dir,
                 model_name=settings.llmlingua_model_name,
-                device_map="cpu",  # Use CPU for compatibility
+                quantized=settings.onnx_quantized,
+                intra_op_threads=intra_op_threads or inference_threads(),
             )
-        return cls._instance
+        if backend != "pytorch":
+            raise ValueError(f"Unsupported compression backend: {backend}")
+
+        return PromptCompressor(
+            model_name=settings.llmlingua_model_name,
+            device_map="cpu",  # Use CPU for compatibility
+            use_llmlingua2=True,  # Token-classification compressor (per-chunk keep/drop)
+        )
+
+    @staticmethod
+    def model_id() -> str:
+        """Identify model + backend (quantized outputs may differ slightly)."""
+        backend = settings.compression_backend.lower()
+        if backend == "onnx":
+            backend += "-int8" if settings.onnx_quantized else "-fp32"
+        return f"{settings.llmlingua_model_name}:{backend}"
 
     @classmethod
     def is_loaded(cls) -> bool:
         """Check if the model is already loaded."""
         return cls._instance is not None
+
+    @classmethod
+    def loaded_in_parent(cls) -> bool:
+        """Check if the model was preloaded by a parent and inherited via fork."""
+        return cls._instance is not None and cls._loaded_pid != os.getpid()
+
+    @classmethod
+    def compress_batch(
+        cls, prompts: List[str], rate: float, force_tokens: List[str]
+    ) -> List[str]:
+        """
+        Compress several independent prompts in one batched forward pass.
+
+        LLMLingua-2 chunks every context and runs all chunks through the token
+        classifier in shared batches. The keep/drop threshold is computed per
+        chunk, so each prompt is compressed exactly as if it were sent alone.
+
+        Args:
+            prompts: Prompts to compress
+            rate: Target compression rate shared by the whole batch
+            force_tokens: Tokens that must be preserved in every prompt
+
+        Returns:
+            Compressed prompts, in the same order as ``prompts``
+        """
+        compressor = cls.get_instance()
+        result = compressor.compress_prompt(
+            list(prompts),
+            rate=rate,
+            force_tokens=list(force_tokens),
+            use_context_level_filter=False,  # Never drop whole prompts from a batch
+        )
+        compressed: List[str] = result["compressed_prompt_list"]
+        return compressed
+
+    @classmethod
+    def embed_batch(cls, texts: List[str], max_length: int = 256) -> np.ndarray:
+        """
+        Sentence embeddings from the loaded model's transformer backbone.
+
+        Mean-pools the last hidden states of the XLM-RoBERTa encoder under
+        the token classifier, so the semantic cache needs no second model.
+
+        Args:
+            texts: Texts to embed
+            max_length: Tokens per text (longer texts are truncated)
+
+        Returns:
+            L2-normalized float32 matrix, one row per text
+
+        Raises:
+            ValueError: With the ONNX backend (its graph only exports logits)
+        """
+        if settings.compression_backend.lower() != "pytorch":
+            raise ValueError(
+                "Backbone embeddings need COMPRESSION_BACKEND=pytorch "
+                "(use SEMANTIC_CACHE_ENCODER=hashing with onnx)"
+            )
+        compressor = cls.get_instance()
+        encoded = compressor.tokenizer(
+            list(texts),
+            padding=True,
+            truncation=True,
+            max_length=max_length,
+            return_tensors="pt",
+        )
+        with torch.inference_mode():
+            hidden = compressor.model.base_model(**encoded).last_hidden_state
+            mask = encoded["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+            pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1.0)
+            pooled = torch.nn.functional.normalize(pooled, dim=-1)
+        embeddings: np.ndarray = pooled.cpu().numpy().astype(np.float32)
+        return embeddings
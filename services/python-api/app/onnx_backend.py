@@ -0,0 +1,213 @@
+"""ONNX Runtime backend for the LLMLingua-2 token classifier.
+
+The xlm-roberta-large token classifier is exported once to ONNX and
+dynamically quantized to int8 (see ``python -m app.scripts.export_onnx``).
+At runtime ``OnnxPromptCompressor`` keeps LLMLingua-2's complete
+chunking / keep-drop pipeline and only swaps the PyTorch forward pass for an
+onnxruntime session, so the token-probability semantics are unchanged while
+the full-precision weights are never loaded.
+"""
+
+import json
+import logging
+import os
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+import numpy as np
+import torch
+from llmlingua import PromptCompressor
+from transformers import AutoConfig, AutoTokenizer
+
+logger = logging.getLogger(__name__)
+
+FP32_MODEL_FILE = "model.onnx"
+INT8_MODEL_FILE = "model.int8.onnx"
+METADATA_FILE = "onnx_export.json"
+
+
+class OnnxTokenClassifier:
+    """
+    Minimal stand-in for the PyTorch token-classification model.
+
+    Implements the two members LLMLingua-2 uses: calling the model with
+    ``input_ids``/``attention_mask`` (returning ``.logits``) and
+    ``resize_token_embeddings``.
+    """
+
+    def __init__(
+        self,
+        model_path: str,
+        vocab_size: Optional[int] = None,
+        intra_op_threads: Optional[int] = None,
+    ):
+        """
+        Create the inference session.
+
+        Args:
+            model_path: Path to the exported (optionally quantized) ONNX graph
+            vocab_size: Vocabulary size baked into the exported embeddings
+            intra_op_threads: onnxruntime intra-op thread count (None = default)
+        """
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+
+        self.model_path = model_path
+        self.vocab_size = vocab_size
+        self.session = ort.InferenceSession(
+            model_path, sess_options=options, providers=["CPUExecutionProvider"]
+        )
+
+    def __call__(
+        self, input_ids: torch.Tensor, attention_mask: torch.Tensor
+    ) -> SimpleNamespace:
+        """Run the forward pass and return an object with torch ``logits``."""
+        (logits,) = self.session.run(
+            ["logits"],
+            {
+                "input_ids": input_ids.cpu().numpy().astype(np.int64),
+                "attention_mask": attention_mask.cpu().numpy().astype(np.int64),
+            },
+        )
+        return SimpleNamespace(loss=None, logits=torch.from_numpy(logits))
+
+    def resize_token_embeddings(self, new_num_tokens: int) -> None:
+        """The vocabulary was fixed at export time - only verify it matches."""
+        if self.vocab_size is not None and new_num_tokens != self.vocab_size:
+            raise ValueError(
+                f"ONNX model vocabulary ({self.vocab_size}) does not match tokenizer "
+                f"({new_num_tokens}) - re-export the model"
+            )
+
+
+class OnnxPromptCompressor(PromptCompressor):
+    """LLMLingua-2 ``PromptCompressor`` running its classifier in onnxruntime."""
+
+    def __init__(
+        self,
+        model_dir: str,
+        model_name: str,
+        quantized: bool = True,
+        intra_op_threads: Optional[int] = None,
+    ):
+        """
+        Load tokenizer, config and ONNX session from an export directory.
+
+        Args:
+            model_dir: Directory written by ``export_onnx``
+            model_name: Original model name (LLMLingua keys behaviour off it)
+            quantized: Use the int8 graph instead of the fp32 one
+            intra_op_threads: onnxruntime intra-op thread count
+        """
+        self.onnx_model_dir = model_dir
+        self.onnx_model_file = INT8_MODEL_FILE if quantized else FP32_MODEL_FILE
+        self.onnx_intra_op_threads = intra_op_threads
+        super().__init__(model_name=model_name, device_map="cpu", use_llmlingua2=True)
+
+    def load_model(
+        self, model_name: str, device_map: str = "cpu", model_config: dict = {}
+    ) -> None:
+        """Replace PromptCompressor.load_model: no PyTorch weights are loaded."""
+        config = AutoConfig.from_pretrained(self.onnx_model_dir)
+        tokenizer = AutoTokenizer.from_pretrained(self.onnx_model_dir)
+        # Same tokenizer setup as PromptCompressor.load_model
+        tokenizer.padding_side = "left"
+        tokenizer.pad_token_id = (
+            config.pad_token_id if config.pad_token_id else tokenizer.eos_token_id
+        )
+
+        metadata: Dict[str, Any] = {}
+        metadata_path = os.path.join(self.onnx_model_dir, METADATA_FILE)
+        if os.path.exists(metadata_path):
+            with open(metadata_path, encoding="utf-8") as f:
+                metadata = json.load(f)
+
+        model_path = os.path.join(self.onnx_model_dir, self.onnx_model_file)
+        self.device = "cpu"
+        self.tokenizer = tokenizer
+        self.model = OnnxTokenClassifier(
+            model_path,
+            vocab_size=metadata.get("vocab_size"),
+            intra_op_threads=self.onnx_intra_op_threads,
+        )
+        self.context_idxs: List[Any] = []
+        self.max_position_embeddings = config.max_position_embeddings
+        logger.info(f"LLMLingua-2 ONNX backend loaded: {model_path}")
+
+
+def export_onnx(
+    model_name: str, output_dir: str, quantize: bool = True, opset: int = 17
+) -> Dict[str, str]:
+    """
+    Export the LLMLingua-2 token classifier to ONNX and quantize it to int8.
+
+    The export uses the model *after* LLMLingua-2 has added its force-token
+    placeholders, so the ONNX vocabulary matches the runtime tokenizer.
+
+    Args:
+        model_name: Hugging Face model name
+        output_dir: Destination directory
+        quantize: Also write the dynamically quantized int8 graph
+        opset: ONNX opset version
+
+    Returns:
+        Paths of the written model files
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    compressor = PromptCompressor(
+        model_name=model_name, device_map="cpu", use_llmlingua2=True
+    )
+    model = compressor.model.eval()
+    sample = compressor.tokenizer("Export sample sentence.", return_tensors="pt")
+
+    fp32_path = os.path.join(output_dir, FP32_MODEL_FILE)
+    logger.info(f"Exporting {model_name} to {fp32_path}")
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (sample["input_ids"], sample["attention_mask"]),
+            fp32_path,
+            input_names=["input_ids", "attention_mask"],
+            output_names=["logits"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "logits": {0: "batch", 1: "sequence"},
+            },
+            opset_version=opset,
+            do_constant_folding=True,
+            dynamo=False,  # TorchScript exporter: honours dynamic_axes, no onnxscript
+        )
+
+    # Save the *original* tokenizer: LLMLingua-2 re-adds its placeholders on load
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(output_dir)
+    AutoConfig.from_pretrained(model_name).save_pretrained(output_dir)
+
+    paths = {"fp32": fp32_path}
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        int8_path = os.path.join(output_dir, INT8_MODEL_FILE)
+        logger.info(f"Quantizing (dynamic int8) to {int8_path}")
+        quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+        paths["int8"] = int8_path
+
+    metadata_path = os.path.join(output_dir, METADATA_FILE)
+    with open(metadata_path, "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "model_name": model_name,
+                "vocab_size": len(compressor.tokenizer),
+                "opset": opset,
+                "quantized": quantize,
+            },
+            f,
+            indent=2,
+        )
+    paths["metadata"] = metadata_path
+
+    return paths
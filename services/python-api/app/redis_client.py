@@ -0,0 +1,71 @@
+"""Optional Redis connection shared by fleet-wide features.
+
+Redis is optional: without ``REDIS_URL`` (or without the ``redis`` package)
+``get_redis()`` returns None and every feature built on it runs in
+process-local mode. The client is created lazily - never in the preforking
+master - and re-created when used from a different event loop, because
+asyncio connections are bound to the loop that opened them.
+"""
+
+import asyncio
+import logging
+from typing import Any, Optional
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_client: Optional[Any] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+_unavailable_logged = False
+
+
+def get_redis() -> Optional[Any]:
+    """
+    Return the shared ``redis.asyncio.Redis`` client, or None if not configured.
+
+    Must be called from a running event loop.
+
+    Returns:
+        Client with short socket timeouts (callers fall back to local state
+        on errors), or None
+    """
+    global _client, _client_loop, _unavailable_logged
+    if not settings.redis_url:
+        return None
+
+    loop = asyncio.get_running_loop()
+    if _client is not None and _client_loop is loop:
+        return _client
+
+    try:
+        # Imported lazily: redis is only needed when REDIS_URL is set
+        import redis.asyncio as redis_asyncio
+    except ImportError:
+        if not _unavailable_logged:
+            logger.warning("REDIS_URL is set but the redis package is not installed")
+            _unavailable_logged = True
+        return None
+
+    timeout = settings.redis_socket_timeout_ms / 1000
+    _client = redis_asyncio.from_url(
+        settings.redis_url,
+        decode_responses=True,
+        socket_timeout=timeout,
+        socket_connect_timeout=timeout,
+    )
+    _client_loop = loop
+    logger.info("Redis client created")
+    return _client
+
+
+async def close_redis() -> None:
+    """Close the shared client (on shutdown)."""
+    global _client, _client_loop
+    if _client is None:
+        return
+    try:
+        await _client.aclose()
+    except Exception as e:
+        logger.warning(f"Closing Redis client failed: {str(e)}")
+    _client = None
+    _client_loop = None
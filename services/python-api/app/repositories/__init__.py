@@ -2,5 +2,6 @@
 
 from app.repositories.base import BaseRepository
 from app.repositories.message import MessageRepository
+from app.repositories.message_compression import MessageCompressionRepository
 
-__all__ = ["BaseRepository", "MessageRepository"]
+__all__ = ["BaseRepository", "MessageCompressionRepository", "MessageRepository"]
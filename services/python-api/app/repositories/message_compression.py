@@ -0,0 +1,95 @@
+"""Message compression repository.
+
+Stores the compressed form of individual messages so conversation history is
+compressed incrementally: each turn only compresses messages added since.
+"""
+
+from typing import Dict, List
+from sqlmodel import col, delete, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.db_models import MessageCompression
+from app.repositories.base import BaseRepository
+
+
+class MessageCompressionRepository(BaseRepository[MessageCompression]):
+    """Repository for cached per-message compressions."""
+
+    def __init__(self, session: AsyncSession):
+        """Initialize with MessageCompression model."""
+        super().__init__(MessageCompression, session)
+
+    async def get_for_messages(
+        self, message_ids: List[str]
+    ) -> Dict[str, MessageCompression]:
+        """
+        Get stored compressions for a set of messages.
+
+        Args:
+            message_ids: Message IDs to look up
+
+        Returns:
+            Mapping of message ID to its stored compression
+        """
+        if not message_ids:
+            return {}
+        result = await self.session.execute(
+            select(MessageCompression).where(
+                col(MessageCompression.messageId).in_(message_ids)
+            )
+        )
+        return {row.messageId: row for row in result.scalars().all()}
+
+    async def save_many(self, rows: List[MessageCompression]) -> None:
+        """
+        Insert or replace compressions in a single commit.
+
+        Args:
+            rows: New or updated compression rows
+        """
+        for row in rows:
+            self.session.add(row)
+        await self.session.commit()
+
+    async def delete_by_session(self, session_id: str) -> int:
+        """
+        Drop every stored compression of a session (e.g. history was rewritten).
+
+        Args:
+            session_id: Session ID
+
+        Returns:
+            Number of deleted rows
+        """
+        result = await self.session.execute(
+            delete(MessageCompression).where(
+                col(MessageCompression.sessionId) == session_id
+            )
+        )
+        await self.session.commit()
+        return int(result.rowcount or 0)  # type: ignore[attr-defined]
+
+    async def prune_session(self, session_id: str, keep: int) -> int:
+        """
+        Keep only the ``keep`` most recent compressions of a session.
+
+        Args:
+            session_id: Session ID
+            keep: Number of newest rows to retain
+
+        Returns:
+            Number of deleted rows
+        """
+        newest = (
+            select(MessageCompression.id)
+            .where(MessageCompression.sessionId == session_id)
+            .order_by(col(MessageCompression.createdAt).desc())
+            .limit(keep)
+        )
+        result = await self.session.execute(
+            delete(MessageCompression).where(
+                col(MessageCompression.sessionId) == session_id,
+                col(MessageCompression.id).not_in(newest.scalar_subquery()),
+            )
+        )
+        await self.session.commit()
+        return int(result.rowcount or 0)  # type: ignore[attr-defined]
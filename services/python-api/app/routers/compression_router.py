@@ -1,9 +1,16 @@
 """LLMLingua-2 Compression Router for aggressive prompt compression."""
 
-from fastapi import APIRouter, Depends
+import json
+from typing import Annotated, Any, AsyncIterator
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-from app.models import LLMLinguaModel
+from app.config import settings
 from app.dependencies import verify_shared_secret
+from app.services.admission import AdmissionRejected, admission_controller
+from app.services.compression import compression_service
+from app.services.compression_gate import compression_gate
+from app.services.inference_executor import inference_executor
 
 router = APIRouter()
 
@@ -38,6 +45,62 @@ class CompressionResponse(BaseModel):
     savings_tokens: int = Field(..., description="Number of tokens saved")
 
 
+class BatchCompressionRequest(BaseModel):
+    """Request model for compressing many prompts at once."""
+
+    prompts: list[Annotated[str, Field(min_length=1, max_length=50000)]] = Field(
+        ...,
+        min_length=1,
+        max_length=settings.compression_batch_max_prompts,
+        description="Prompts to compress (all share rate and force_tokens)",
+    )
+    rate: float = Field(
+        default=0.5,
+        ge=0.1,
+        le=0.9,
+        description="Compression rate (0.1-0.9). Lower = more aggressive compression",
+    )
+    force_tokens: list[str] = Field(
+        default_factory=list,
+        description="List of tokens that must be preserved in every compressed output",
+    )
+
+
+class BatchCompressionResponse(BaseModel):
+    """Response model for batch prompt compression."""
+
+    results: list[CompressionResponse] = Field(
+        ..., description="Per-prompt results, in request order"
+    )
+
+
+def overloaded(error: AdmissionRejected) -> HTTPException:
+    """Translate an admission rejection into 429 with Retry-After."""
+    return HTTPException(
+        status_code=429,
+        detail=str(error),
+        headers={"Retry-After": str(error.retry_after)},
+    )
+
+
+def build_compression_response(
+    original_prompt: str, compressed_text: str
+) -> CompressionResponse:
+    """Compute compression metrics for one prompt."""
+    original_tokens = len(original_prompt.split())  # Approximate token count
+    compressed_tokens = len(compressed_text.split())  # Approximate token count
+    actual_ratio = compressed_tokens / original_tokens if original_tokens > 0 else 0.0
+    savings = original_tokens - compressed_tokens
+
+    return CompressionResponse(
+        compressed_prompt=compressed_text,
+        original_length=original_tokens,
+        compressed_length=compressed_tokens,
+        compression_ratio=round(actual_ratio, 3),
+        savings_tokens=savings,
+    )
+
+
 @router.post(
     "/compress",
     response_model=CompressionResponse,
@@ -45,12 +108,18 @@ class CompressionResponse(BaseModel):
     summary="Compress prompt using LLMLingua-2",
     description="Compresses prompts using state-of-the-art LLMLingua-2 transformer model with quality preservation",
 )
-def compress_prompt(request: CompressionRequest) -> CompressionResponse:
+async def compress_prompt(request: CompressionRequest) -> CompressionResponse:
     """
     Compress prompt using LLMLingua-2 with aggressive compression and quality preservation.
 
-    **IMPORTANT:** This endpoint is synchronous (`def`, not `async def`) because model inference
-    is CPU-bound. FastAPI will automatically run it in a thread pool.
+    **Micro-batching:** Model inference is CPU-bound and runs off the event loop.
+    Concurrent requests with the same `rate` and `force_tokens` are grouped into a
+    single batched forward pass by the compression service.
+
+    **Backpressure:** At most `INFERENCE_MAX_CONCURRENCY` inferences run at once;
+    excess requests wait in a bounded queue. When the queue is full, or the wait
+    exceeds `INFERENCE_QUEUE_TIMEOUT_SECONDS`, the response is `429` with a
+    `Retry-After` header.
 
     **Model:** microsoft/llmlingua-2-xlm-roberta-large-meetingbank
 
@@ -80,40 +149,215 @@ def compress_prompt(request: CompressionRequest) -> CompressionResponse:
     ```
     """
     try:
-        # Get singleton model instance (loaded during startup)
-        compressor = LLMLinguaModel.get_instance()
-
-        # Perform compression
-        # Note: LLMLingua uses 'instruction' parameter for the prompt to compress
-        # and 'rate' for target compression ratio
-        compressed_result = compressor.compress_prompt(
-            [request.prompt],  # LLMLingua expects list of strings
+        compressed_text = await compression_service.compress(
+            request.prompt,
             rate=request.rate,
-            force_tokens=request.force_tokens if request.force_tokens else [],
-        )
-
-        # Extract metrics
-        compressed_text = compressed_result["compressed_prompt"]
-        original_tokens = len(request.prompt.split())  # Approximate token count
-        compressed_tokens = len(compressed_text.split())  # Approximate token count
-        actual_ratio = (
-            compressed_tokens / original_tokens if original_tokens > 0 else 0.0
-        )
-        savings = original_tokens - compressed_tokens
-
-        return CompressionResponse(
-            compressed_prompt=compressed_text,
-            original_length=original_tokens,
-            compressed_length=compressed_tokens,
-            compression_ratio=round(actual_ratio, 3),
-            savings_tokens=savings,
+            force_tokens=request.force_tokens,
         )
+        return build_compression_response(request.prompt, compressed_text)
+    except AdmissionRejected as e:
+        raise overloaded(e)
     except Exception as e:
         # LLMLingua may fail on Python 3.14 due to transformers compatibility
         # Return error via HTTPException
-        from fastapi import HTTPException
-
         raise HTTPException(
             status_code=500,
             detail=f"Compression model error (Python 3.14 compatibility): {str(e)}",
         )
+
+
+@router.post(
+    "/compress/batch",
+    response_model=BatchCompressionResponse,
+    dependencies=[Depends(verify_shared_secret)],
+    summary="Compress many prompts using LLMLingua-2",
+    description="Compresses a list of prompts in batched LLMLingua-2 inference passes",
+)
+async def compress_prompt_batch(
+    request: BatchCompressionRequest,
+) -> BatchCompressionResponse:
+    """
+    Compress many prompts at once with shared `rate` and `force_tokens`.
+
+    Prompts are packed into batches of up to `COMPRESSION_BATCH_MAX_SIZE` and
+    merged with any concurrent `/compress` traffic using the same settings.
+
+    **Example:**
+    ```json
+    {
+      "prompts": ["First long document...", "Second long document..."],
+      "rate": 0.5,
+      "force_tokens": ["Q3", "revenue"]
+    }
+    ```
+
+    **Response:**
+    ```json
+    {
+      "results": [
+        {"compressed_prompt": "...", "original_length": 100, ...},
+        {"compressed_prompt": "...", "original_length": 80, ...}
+      ]
+    }
+    ```
+    """
+    try:
+        compressed_texts = await compression_service.compress_many(
+            request.prompts,
+            rate=request.rate,
+            force_tokens=request.force_tokens,
+        )
+    except AdmissionRejected as e:
+        raise overloaded(e)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Compression model error: {str(e)}",
+        )
+
+    return BatchCompressionResponse(
+        results=[
+            build_compression_response(prompt, compressed)
+            for prompt, compressed in zip(request.prompts, compressed_texts)
+        ]
+    )
+
+
+@router.post(
+    "/compress/stream",
+    dependencies=[Depends(verify_shared_secret)],
+    summary="Stream compression of a very long prompt as NDJSON",
+    description="Splits a long prompt on paragraph/sentence boundaries, compresses chunks in parallel and streams them in order",
+    response_class=StreamingResponse,
+)
+async def compress_prompt_stream(request: CompressionRequest) -> StreamingResponse:
+    """
+    Long-prompt mode: parallel chunked compression with NDJSON streaming.
+
+    The prompt is split on paragraph, then sentence boundaries. Chunks are
+    compressed in parallel across the inference workers and each compressed
+    chunk is streamed back **in order** as soon as it (and every chunk before
+    it) is done. Every chunk uses the request's `rate` and `force_tokens`.
+
+    **Response (`application/x-ndjson`, one JSON object per line):**
+    ```
+    {"type": "chunk", "index": 0, "compressed_prompt": "...", "original_length": 310, "compressed_length": 150}
+    {"type": "chunk", "index": 1, "compressed_prompt": "...", "original_length": 290, "compressed_length": 141}
+    {"type": "summary", "chunks": 2, "compressed_prompt": "...", "original_length": 600, "compressed_length": 291, "compression_ratio": 0.485, "savings_tokens": 309}
+    ```
+
+    If compression fails mid-stream a final `{"type": "error", "detail": "..."}`
+    line is emitted (the HTTP status is already 200 at that point).
+    """
+    # Shed load before committing to a 200 streaming response
+    try:
+        admission_controller.ensure_capacity()
+    except AdmissionRejected as e:
+        raise overloaded(e)
+
+    async def ndjson_lines() -> AsyncIterator[str]:
+        compressed_chunks: list[str] = []
+        try:
+            index = 0
+            async for original, compressed in compression_service.compress_stream(
+                request.prompt, rate=request.rate, force_tokens=request.force_tokens
+            ):
+                chunk = build_compression_response(original, compressed)
+                compressed_chunks.append(compressed)
+                yield json.dumps(
+                    {
+                        "type": "chunk",
+                        "index": index,
+                        "compressed_prompt": chunk.compressed_prompt,
+                        "original_length": chunk.original_length,
+                        "compressed_length": chunk.compressed_length,
+                    }
+                ) + "\n"
+                index += 1
+        except AdmissionRejected as e:
+            yield json.dumps(
+                {"type": "error", "detail": str(e), "retry_after": e.retry_after}
+            ) + "\n"
+            return
+        except Exception as e:
+            yield json.dumps(
+                {"type": "error", "detail": f"Compression model error: {str(e)}"}
+            ) + "\n"
+            return
+
+        summary = build_compression_response(
+            request.prompt, "\n\n".join(compressed_chunks)
+        )
+        yield json.dumps(
+            {
+                "type": "summary",
+                "chunks": len(compressed_chunks),
+                **summary.model_dump(),
+            }
+        ) + "\n"
+
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+
+@router.get(
+    "/compress/stats",
+    dependencies=[Depends(verify_shared_secret)],
+    summary="Compression cache, batching and admission statistics",
+    description="Hit/miss/eviction counters of the compression cache plus micro-batching and admission stats",
+)
+async def compression_stats() -> dict[str, Any]:
+    """
+    Report compression cache and batching counters (used to size the cache).
+
+    **Response:**
+    ```json
+    {
+      "cache": {
+        "memory": {"hits": 120, "misses": 30, "evictions": 0, "hit_rate": 0.8, ...},
+        "disk": null
+      },
+      "batching": {"batches": 25, "items": 30, "avg_batch_size": 1.2, ...},
+      "admission": {"active": 2, "queued": 5, "rejected_queue_full": 3, ...},
+      "inference": {"mode": "process", "workers": 2, "ready": true, ...}
+    }
+    ```
+    """
+    cache = compression_service.cache
+    return {
+        "cache": cache.stats() if cache is not None else None,
+        "batching": compression_service.batcher.stats(),
+        "admission": admission_controller.stats(),
+        "inference": inference_executor.status(),
+    }
+
+
+@router.get(
+    "/compress/gate",
+    dependencies=[Depends(verify_shared_secret)],
+    summary="Compression gate cost model and recent decisions",
+    description="Measured LLMLingua-2 throughput and the last compress/skip decisions",
+)
+async def compression_gate_stats(last: int = 50) -> dict[str, Any]:
+    """
+    Report the compression gate's cost model and its recent decisions.
+
+    Use this to tune `COMPRESSION_GATE_*` settings: each decision lists the
+    estimated compression time, provider-side savings and net benefit.
+
+    **Response:**
+    ```json
+    {
+      "tokens_per_second": 1432.7,
+      "measurements": 87,
+      "overhead_ms": 15.0,
+      "rate_tiers": [[0, 0.5], [3000, 0.33]],
+      "decisions_kept": 200,
+      "compress_fraction": 0.12,
+      "recent_decisions": [
+        {"compress": false, "rate": null, "model": "gemini-2.0-flash-exp",
+         "prompt_tokens": 180, "net_benefit_ms": -132.4, ...}
+      ]
+    }
+    ```
+    """
+    return compression_gate.stats(last=last)
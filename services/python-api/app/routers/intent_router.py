@@ -1,15 +1,44 @@
-"""Intent Router with Circuit Breaker pattern for resilient LLM intent classification."""
+"""Intent Router with Circuit Breaker pattern for resilient LLM intent classification.
 
-from typing import Literal
+Texts are first classified by a local hashed n-gram model (sub-millisecond);
+the LLM tier (primary, then fallback, each behind a latency-aware circuit
+breaker that also trips on slow calls) is only called
+when the local model is missing or below the confidence threshold. LLM
+results are cached per normalized text and concurrent identical texts share
+one in-flight LLM call. LLM calls wait for their turn in the model's RPM/TPM
+budget (``rate_limiter``), shared with the generation calls. A primary call
+slower than its live p95 is hedged with the fallback model and the first
+valid answer wins.
+
+Under load, LLM misses are packed into one structured prompt per batch (a
+JSON array of classifications); items missing from or malformed in the batch
+answer are retried as single calls.
+"""
+
+import asyncio
+import json
+import logging
+import re
+import time
+from typing import Any, Dict, List, Literal, Optional, Union
 from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel, Field
-from circuitbreaker import circuit
 import litellm
 from app.config import settings
 from app.dependencies import verify_shared_secret
+from app.services import intent_classifier
+from app.services.circuit_breaker import AsyncCircuitBreaker, circuit_breakers
+from app.services.fused_routing import fused_routing_policy
+from app.services.hedging import HedgeFailed, intent_hedger
+from app.services.intent_cache import intent_cache
+from app.services.micro_batcher import MicroBatcher
+from app.services.rate_limiter import rate_limiter
 
+logger = logging.getLogger(__name__)
 router = APIRouter()
 
+LOCAL_SOURCE_MODEL = "local-ngram"
+
 
 class IntentRequest(BaseModel):
     """Request model for intent classification."""
@@ -23,21 +52,102 @@ class IntentResponse(BaseModel):
     """Response model for intent classification."""
 
     intent: str = Field(..., description="Classified intent category")
-    source_model: Literal["gpt-4o-mini", "claude-3-haiku-20240307"] = Field(
-        ..., description="Model used for classification"
+    source_model: Literal["gpt-4o-mini", "claude-3-haiku-20240307", "local-ngram"] = (
+        Field(..., description="Model used for classification")
     )
     target_model: str = Field(..., description="Recommended model for processing")
     confidence: float = Field(..., ge=0.0, le=1.0, description="Confidence score (0-1)")
 
 
-@circuit(
-    failure_threshold=settings.circuit_breaker_failure_threshold,
-    recovery_timeout=settings.circuit_breaker_timeout,
-    expected_exception=Exception,
-)
+class IntentBatchRequest(BaseModel):
+    """Request model for batch intent classification."""
+
+    texts: List[str] = Field(
+        ..., min_length=1, max_length=100, description="Texts to classify"
+    )
+
+
+class IntentBatchItem(BaseModel):
+    """Classification (or error) for one text of a batch."""
+
+    index: int = Field(..., description="Position of the text in the request")
+    intent: Optional[str] = Field(
+        default=None, description="Classified intent category"
+    )
+    source_model: Optional[str] = Field(default=None, description="Model used")
+    target_model: Optional[str] = Field(default=None, description="Recommended model")
+    confidence: Optional[float] = Field(default=None, ge=0.0, le=1.0)
+    error: Optional[str] = Field(default=None, description="Set if this text failed")
+
+
+class IntentBatchResponse(BaseModel):
+    """Response model for batch intent classification."""
+
+    results: List[IntentBatchItem]
+
+
+def intent_breaker(model: str) -> AsyncCircuitBreaker:
+    """Circuit breaker of one intent classification model."""
+    return circuit_breakers.get(
+        model, slow_call_seconds=settings.intent_slow_call_seconds
+    )
+
+
+# litellm provider names that differ from the LLMRouter's
+LITELLM_PROVIDERS = {"gemini": "google", "vertex_ai": "google"}
+
+
+def model_route(model: str) -> str:
+    """Rate limit route ("provider:model") of a litellm model name."""
+    try:
+        provider = litellm.get_llm_provider(model)[1]
+    except Exception:
+        return model
+    return f"{LITELLM_PROVIDERS.get(provider, provider)}:{model}"
+
+
+async def complete(model: str, messages: List[Dict[str, str]], max_tokens: int) -> Any:
+    """
+    Run one deterministic litellm completion within the model's rate limit.
+
+    The rate limit wait happens before the circuit breaker, so queueing is
+    not counted as a slow call.
+
+    Raises:
+        RateLimitExceeded: If the model's quota has no turn soon enough
+        CircuitOpenError: If the model's breaker is open
+        Exception: If the call fails (recorded by the circuit breaker)
+    """
+    reservation = await rate_limiter.acquire(
+        model_route(model), rate_limiter.estimate_tokens(messages, max_tokens)
+    )
+    response = await intent_breaker(model).call(
+        lambda: litellm.acompletion(
+            model=model, messages=messages, temperature=0.0, max_tokens=max_tokens
+        )
+    )
+    usage = getattr(response, "usage", None)
+    await rate_limiter.settle(reservation, getattr(usage, "total_tokens", None))
+    return response
+
+
+def validate_llm_result(result: object) -> dict:
+    """
+    Reject malformed LLM answers so a hedged call cannot win with one.
+
+    Raises:
+        ValueError: If the answer is not an object with an intent and confidence
+    """
+    if not isinstance(result, dict) or not result.get("intent"):
+        raise ValueError(f"Malformed intent classification: {result!r}")
+    if not isinstance(result.get("confidence"), (int, float)):
+        raise ValueError(f"Missing confidence in classification: {result!r}")
+    return result
+
+
 async def classify_with_primary(text: str) -> dict:
     """
-    Classify intent using primary model (gpt-4o-mini) with circuit breaker protection.
+    Classify intent using primary model (gpt-4o-mini) behind its circuit breaker.
 
     Args:
         text: Input text to classify
@@ -46,11 +156,12 @@ async def classify_with_primary(text: str) -> dict:
         dict: Classification result with intent, confidence, and model info
 
     Raises:
-        Exception: If primary model fails (circuit breaker will catch this)
+        CircuitOpenError: If the model's breaker is open
+        Exception: If primary model fails (recorded by the circuit breaker)
     """
-    response = await litellm.acompletion(
-        model=settings.intent_router_primary_model,
-        messages=[
+    response = await complete(
+        settings.intent_router_primary_model,
+        [
             {
                 "role": "system",
                 "content": (
@@ -62,15 +173,12 @@ async def classify_with_primary(text: str) -> dict:
             },
             {"role": "user", "content": text},
         ],
-        temperature=0.0,
         max_tokens=100,
     )
 
     # Extract and parse response
     content = response.choices[0].message.content
-    import json
-
-    result = json.loads(content)
+    result = validate_llm_result(json.loads(content))
     result["source_model"] = settings.intent_router_primary_model
     return result
 
@@ -88,9 +196,9 @@ async def classify_with_fallback(text: str) -> dict:
     Raises:
         Exception: If fallback model also fails
     """
-    response = await litellm.acompletion(
-        model=settings.intent_router_fallback_model,
-        messages=[
+    response = await complete(
+        settings.intent_router_fallback_model,
+        [
             {
                 "role": "system",
                 "content": (
@@ -102,19 +210,246 @@ async def classify_with_fallback(text: str) -> dict:
             },
             {"role": "user", "content": text},
         ],
-        temperature=0.0,
         max_tokens=100,
     )
 
     # Extract and parse response
     content = response.choices[0].message.content
-    import json
-
-    result = json.loads(content)
+    result = validate_llm_result(json.loads(content))
     result["source_model"] = settings.intent_router_fallback_model
     return result
 
 
+class IntentClassificationUnavailable(Exception):
+    """Both LLM tiers failed for a text the local model was not sure about."""
+
+    def __init__(self, primary_error: BaseException, fallback_error: BaseException):
+        """Keep both underlying errors for the 503 response."""
+        super().__init__(f"primary: {primary_error}; fallback: {fallback_error}")
+        self.primary_error = primary_error
+        self.fallback_error = fallback_error
+
+
+def classify_local(text: str) -> Optional[dict]:
+    """
+    Classify intent with the local model if it is confident enough.
+
+    Args:
+        text: Input text to classify
+
+    Returns:
+        dict: Classification result, or None to escalate to the LLM tier
+    """
+    classifier = intent_classifier.local_intent_classifier
+    if classifier is None:
+        return None
+
+    started = time.perf_counter()
+    intent, confidence = classifier.predict(text)
+    elapsed_us = (time.perf_counter() - started) * 1e6
+    if confidence < settings.intent_local_confidence_threshold:
+        logger.debug(
+            f"Local intent '{intent}' ({confidence:.2f}) below threshold - escalating"
+        )
+        return None
+
+    logger.debug(f"Local intent '{intent}' ({confidence:.2f}) in {elapsed_us:.0f}us")
+    return {
+        "intent": intent,
+        "confidence": round(confidence, 4),
+        "target_model": settings.intent_local_target_model,
+        "source_model": LOCAL_SOURCE_MODEL,
+    }
+
+
+async def classify_with_llm(text: str) -> dict:
+    """
+    Classify with the primary LLM, hedged by (or failing over to) the fallback.
+
+    Successful answers are appended to the classification log, which is the
+    training data for the local model.
+
+    Args:
+        text: Input text to classify
+
+    Returns:
+        dict: Classification result with intent, confidence, and model info
+
+    Raises:
+        IntentClassificationUnavailable: If both LLM tiers failed
+    """
+    try:
+        result = await intent_hedger.run(
+            settings.intent_router_primary_model,
+            lambda: classify_with_primary(text),
+            settings.intent_router_fallback_model,
+            lambda: classify_with_fallback(text),
+        )
+    except HedgeFailed as e:
+        raise IntentClassificationUnavailable(e.primary_error, e.fallback_error)
+
+    await intent_classifier.classification_log.record(text, result)
+    return result
+
+
+BATCH_SYSTEM_PROMPT = (
+    "You are an intent classifier. You receive a JSON array of messages, each "
+    "with an index and a text. Classify every message into ONE of these intents: "
+    "greeting, question, command, feedback, help, other. "
+    "Respond with ONLY a JSON array containing one object per message, in this "
+    'exact format: [{"index": 0, "intent": "category", "confidence": 0.95, '
+    '"target_model": "gpt-4o"}]'
+)
+
+_CODE_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+
+def parse_batch_answer(content: str, size: int) -> List[Optional[dict]]:
+    """
+    Split a batch answer into per-item results.
+
+    Args:
+        content: Raw model output (a JSON array, optionally in a code fence)
+        size: Number of texts in the batch
+
+    Returns:
+        One validated result per text, None where the item is missing or
+        malformed (those texts are retried as single calls)
+    """
+    results: List[Optional[dict]] = [None] * size
+    try:
+        items = json.loads(_CODE_FENCE.sub("", content.strip()))
+    except (TypeError, ValueError):
+        return results
+    if not isinstance(items, list):
+        return results
+
+    for position, item in enumerate(items):
+        index = item.get("index", position) if isinstance(item, dict) else None
+        if not isinstance(index, int) or not 0 <= index < size:
+            continue
+        try:
+            results[index] = validate_llm_result(item)
+        except ValueError:
+            continue
+    return results
+
+
+async def classify_batch_with_primary(texts: List[str]) -> List[Optional[dict]]:
+    """
+    Classify several texts with ONE primary model call.
+
+    Args:
+        texts: Texts to classify
+
+    Returns:
+        Per-text results (None where the batch answer was unusable)
+
+    Raises:
+        CircuitOpenError: If the primary model's breaker is open
+        Exception: If the call itself fails (recorded by the circuit breaker)
+    """
+    response = await complete(
+        settings.intent_router_primary_model,
+        [
+            {"role": "system", "content": BATCH_SYSTEM_PROMPT},
+            {
+                "role": "user",
+                "content": json.dumps(
+                    [{"index": i, "text": text} for i, text in enumerate(texts)],
+                    ensure_ascii=False,
+                ),
+            },
+        ],
+        max_tokens=50 + 40 * len(texts),
+    )
+
+    results = parse_batch_answer(response.choices[0].message.content, len(texts))
+    for result in results:
+        if result is not None:
+            result["source_model"] = settings.intent_router_primary_model
+    return results
+
+
+async def classify_batch_with_llm(texts: List[str]) -> List[Union[dict, Exception]]:
+    """
+    Classify a batch with one LLM call, retrying bad items as single calls.
+
+    Args:
+        texts: Texts to classify
+
+    Returns:
+        Per-text result, or the error of a text whose single call also failed
+    """
+    try:
+        results: List[Union[dict, Exception, None]] = list(
+            await classify_batch_with_primary(texts)
+        )
+    except Exception as e:
+        logger.warning(f"Batch intent call failed for {len(texts)} texts: {str(e)}")
+        results = [None] * len(texts)
+
+    for text, result in zip(texts, results):
+        if isinstance(result, dict):
+            await intent_classifier.classification_log.record(text, result)
+
+    retry = [i for i, result in enumerate(results) if result is None]
+    if retry and len(retry) < len(texts):
+        logger.info(f"Batch intent answer unusable for {len(retry)}/{len(texts)} texts")
+    singles = await asyncio.gather(
+        *(classify_with_llm(texts[i]) for i in retry), return_exceptions=True
+    )
+    for i, single in zip(retry, singles):
+        if isinstance(single, BaseException) and not isinstance(single, Exception):
+            raise single
+        results[i] = single
+    return [result for result in results if result is not None]
+
+
+# Collects concurrent LLM misses of the jobs pipeline into batch calls
+intent_batcher: MicroBatcher[str, str, Union[dict, Exception]] = MicroBatcher(
+    lambda key, texts: classify_batch_with_llm(texts),
+    max_batch_size=settings.intent_batch_max_size,
+    max_wait_ms=settings.intent_batch_max_wait_ms,
+    name="intent-batcher",
+)
+
+
+async def classify_with_llm_batched(text: str) -> dict:
+    """Classify one text through the batch collector."""
+    result = await intent_batcher.submit("llm", text)
+    if isinstance(result, Exception):
+        raise result
+    return result
+
+
+async def classify_intent(text: str, batch: bool = False) -> dict:
+    """
+    Tiered classification: local model, then cached/coalesced LLM tier.
+
+    Args:
+        text: Input text to classify
+        batch: Send LLM misses through the batch collector (one call for
+            all texts arriving within the collection window)
+
+    Returns:
+        dict: Classification result with intent, confidence, and model info
+
+    Raises:
+        IntentClassificationUnavailable: If the local model was not confident
+            and both LLM tiers failed
+    """
+    result = classify_local(text)
+    if result is not None:
+        return result
+    classify = (
+        classify_with_llm_batched
+        if batch and settings.intent_batch_enabled
+        else classify_with_llm
+    )
+    return await intent_cache.get_or_classify(text, classify)
+
+
 @router.post(
     "/intent-router-resilient",
     response_model=IntentResponse,
@@ -127,14 +462,22 @@ async def classify_intent_resilient(request: IntentRequest) -> IntentResponse:
     Classify user intent with circuit breaker protection and automatic fallback.
 
     **Architecture:**
+    - **Local (L0):** hashed n-gram classifier (answers when confidence >= threshold)
     - **Primary (P1):** gpt-4o-mini (OpenAI)
     - **Fallback (S1):** claude-3-haiku (Anthropic)
-    - **Circuit Breaker:** 5 failure threshold, 60s recovery timeout
+    - **Circuit Breakers:** per model; trip on error rate or slow-call rate
+      (calls over 2s) in a 60s window, half-open probes after 60s
+    - **Hedging:** if the primary is slower than its live p95, the fallback
+      is started in parallel and the first valid answer wins
+    - **Cache:** LLM results keyed on normalized text; concurrent identical
+      texts share one LLM call
 
     **Flow:**
-    1. Try primary model (gpt-4o-mini)
-    2. If circuit breaker open → fallback to Claude Haiku
-    3. If both fail → return 503 Service Unavailable
+    1. Local classifier - return immediately if confident
+    2. Cached LLM result for the normalized text - return it
+    3. Try primary model (gpt-4o-mini); hedge with Claude Haiku after the p95 delay
+    4. If circuit breaker open or primary fails → fallback to Claude Haiku
+    5. If both fail → return 503 Service Unavailable (not cached)
 
     **Response:**
     ```json
@@ -147,21 +490,109 @@ async def classify_intent_resilient(request: IntentRequest) -> IntentResponse:
     ```
     """
     try:
-        # Try primary model with circuit breaker protection
-        result = await classify_with_primary(request.text)
+        result = await classify_intent(request.text)
         return IntentResponse(**result)
-    except Exception as primary_error:
-        # Circuit breaker open or primary failed - try fallback
-        try:
-            result = await classify_with_fallback(request.text)
-            return IntentResponse(**result)
-        except Exception as fallback_error:
-            # Both models failed
-            raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail={
-                    "error": "All intent classification models unavailable",
-                    "primary_error": str(primary_error),
-                    "fallback_error": str(fallback_error),
-                },
+    except IntentClassificationUnavailable as e:
+        # Both models failed
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail={
+                "error": "All intent classification models unavailable",
+                "primary_error": str(e.primary_error),
+                "fallback_error": str(e.fallback_error),
+            },
+        )
+
+
+@router.post(
+    "/intent-router/batch",
+    response_model=IntentBatchResponse,
+    dependencies=[Depends(verify_shared_secret)],
+    summary="Classify many texts with batched LLM calls",
+    description="Classifies up to 100 texts; LLM misses are packed into one call per batch with per-item fallback to single calls",
+)
+async def classify_intent_batch(request: IntentBatchRequest) -> IntentBatchResponse:
+    """
+    Classify a list of texts.
+
+    Each text goes through the same tiers as `/intent-router-resilient`
+    (local model, cache). The remaining texts share one structured LLM
+    prompt per batch of `INTENT_BATCH_MAX_SIZE`. Texts missing or malformed
+    in the batch answer are retried as single calls. A text that still fails
+    gets an `error` instead of failing the whole request.
+
+    **Example:**
+    ```json
+    {"texts": ["hi!", "How do I reset my password?"]}
+    ```
+
+    **Response:**
+    ```json
+    {
+      "results": [
+        {"index": 0, "intent": "greeting", "source_model": "local-ngram",
+         "target_model": "gpt-4o", "confidence": 0.97, "error": null},
+        {"index": 1, "intent": "help", "source_model": "gpt-4o-mini",
+         "target_model": "gpt-4o", "confidence": 0.92, "error": null}
+      ]
+    }
+    ```
+    """
+    outcomes = await asyncio.gather(
+        *(classify_intent(text, batch=True) for text in request.texts),
+        return_exceptions=True,
+    )
+
+    results: List[IntentBatchItem] = []
+    for index, outcome in enumerate(outcomes):
+        if isinstance(outcome, BaseException):
+            results.append(IntentBatchItem(index=index, error=str(outcome)))
+            continue
+        results.append(
+            IntentBatchItem(
+                index=index,
+                intent=outcome.get("intent"),
+                source_model=outcome.get("source_model"),
+                target_model=outcome.get("target_model"),
+                confidence=outcome.get("confidence"),
             )
+        )
+    return IntentBatchResponse(results=results)
+
+
+@router.get(
+    "/intent-router/stats",
+    dependencies=[Depends(verify_shared_secret)],
+    summary="Intent classification cache, hedging, batching and fused routing statistics",
+    description="Intent cache hit rate, request coalescing, hedge fire/win rates, per-model latency, batch sizes and fused routing decisions",
+)
+async def intent_router_stats() -> dict[str, Any]:
+    """
+    Report intent cache and hedging counters.
+
+    **Response:**
+    ```json
+    {
+      "cache": {
+        "enabled": true, "hits": 940, "misses": 60, "hit_rate": 0.94,
+        "entries": 55, "max_entries": 4096,
+        "coalescing": {"calls": 60, "shared": 12, "in_flight": 0}
+      },
+      "hedging": {
+        "requests": 60, "hedges_fired": 3, "hedge_wins": 2,
+        "hedge_fire_rate": 0.05, "hedge_win_rate": 0.6667,
+        "latency": {"gpt-4o-mini": {"samples": 58, "p50_ms": 410.2, "p95_ms": 980.5, ...}}
+      },
+      "batching": {"batches": 12, "items": 80, "avg_batch_size": 6.67, ...},
+      "fused_routing": {"mode": "auto", "decisions": {"intent cannot change provider": 75, "greeting": 20}},
+      "local_classifier": true
+    }
+    ```
+    """
+    return {
+        "cache": intent_cache.stats(),
+        "hedging": intent_hedger.stats(),
+        "batching": intent_batcher.stats(),
+        "fused_routing": fused_routing_policy.stats(),
+        "local_classifier": intent_classifier.local_intent_classifier is not None,
+    }
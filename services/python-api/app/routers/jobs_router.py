@@ -1,20 +1,30 @@
 """Jobs Router for processing AI tasks from BullMQ Proxy - SQLModel Edition."""
 
+import asyncio
 from fastapi import APIRouter, BackgroundTasks, Depends
-from typing import Dict, Any
+from typing import Dict, Any, List, Set
 from pydantic import BaseModel, Field
+from app.config import settings
 from app.dependencies import verify_shared_secret
-from app.routers.intent_router import classify_with_primary
-from app.models import LLMLinguaModel
+from app.routers.intent_router import classify_intent
 from app.database import async_engine
 from app.repositories.message import MessageRepository
-from app.services.llm_router import LLMRouter
+from app.repositories.message_compression import MessageCompressionRepository
+from app.services.compression import compression_service
+from app.services.compression_gate import compression_gate
+from app.services.event_bus import event_bus
+from app.services.fused_routing import fused_routing_policy
+from app.services.history_compressor import history_compressor
+from app.services.llm_router import LLMRouter, get_llm_router
 from sqlmodel.ext.asyncio.session import AsyncSession
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# Deferred intent classifications of fused jobs (kept referenced until done)
+_deferred_classifications: Set["asyncio.Task[None]"] = set()
+
 
 class AIJobRequest(BaseModel):
     """Request model for AI job processing from BullMQ Proxy."""
@@ -36,6 +46,113 @@ class AIJobResponse(BaseModel):
     jobId: str = Field(..., description="Internal job tracking ID")
 
 
+async def load_session_history(
+    job_data: AIJobRequest, model: str
+) -> List[Dict[str, str]]:
+    """
+    Load the previous turns of the job's session for the provider call.
+
+    Args:
+        job_data: AI job data (the job's own message is excluded)
+        model: Target provider model (compression gate)
+
+    Returns:
+        Chronological ``{"role", "content"}`` messages, empty on failure
+    """
+    try:
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            messages = await MessageRepository(session).get_latest_by_session(
+                job_data.sessionId, count=settings.history_max_messages + 1
+            )
+            previous = [m for m in messages if m.id != job_data.messageId]
+            return await history_compressor.compress_messages(
+                previous[-settings.history_max_messages :],
+                MessageCompressionRepository(session),
+                model=model,
+            )
+    except Exception as e:
+        logger.warning(f"  History unavailable (sending message only): {str(e)}")
+        return []
+
+
+async def record_intent_deferred(job_data: AIJobRequest) -> None:
+    """Classify a fused job's message after routing (feeds logs, cache, stats)."""
+    try:
+        intent_result = await classify_intent(job_data.message, batch=True)
+        logger.info(
+            f"  Deferred intent for {job_data.messageId}: {intent_result['intent']} "
+            f"({intent_result['source_model']})"
+        )
+    except Exception as e:
+        logger.warning(f"  Deferred intent classification failed: {str(e)}")
+
+
+async def publish_job_state(job_data: AIJobRequest, state: str, **details: Any) -> None:
+    """Publish a job state change to the session's event subscribers."""
+    await event_bus.publish(
+        job_data.sessionId,
+        {"type": "job.state", "state": state, "replyTo": job_data.messageId, **details},
+    )
+
+
+async def generate_reply(
+    llm_router: LLMRouter,
+    provider: str,
+    messages: List[Dict[str, str]],
+    job_data: AIJobRequest,
+) -> Dict[str, Any]:
+    """
+    Generate the AI reply, publishing streamed deltas to the session's subscribers.
+
+    Args:
+        llm_router: Shared LLM router
+        provider: Provider to use
+        messages: Chat messages (history + prompt)
+        job_data: Job being processed
+
+    Returns:
+        The ``LLMRouter.route()`` response fields of the complete reply
+    """
+    # Fall back to the next provider on errors/timeouts within the job deadline
+    fallbacks = llm_router.fallback_chain(provider)
+    if not settings.llm_streaming_enabled:
+        return await llm_router.route(
+            provider=provider,
+            messages=messages,
+            temperature=0.7,
+            max_tokens=1000,
+            fallbacks=fallbacks,
+            attempt_timeout=settings.llm_attempt_timeout_seconds,
+            deadline=settings.llm_job_deadline_seconds,
+        )
+
+    final: Dict[str, Any] = {}
+    index = 0
+    async for event in llm_router.stream(
+        provider=provider,
+        messages=messages,
+        temperature=0.7,
+        max_tokens=1000,
+        fallbacks=fallbacks,
+        attempt_timeout=settings.llm_attempt_timeout_seconds,
+        deadline=settings.llm_job_deadline_seconds,
+    ):
+        if event["type"] == "delta":
+            await event_bus.publish(
+                job_data.sessionId,
+                {
+                    "type": "message.delta",
+                    "replyTo": job_data.messageId,
+                    "index": index,
+                    "content": event["content"],
+                },
+            )
+            index += 1
+        else:
+            final = event
+    return final
+
+
 async def process_ai_job_background(job_data: AIJobRequest):
     """
     Background task to process AI job - SQLModel Edition.
@@ -43,10 +160,14 @@ async def process_ai_job_background(job_data: AIJobRequest):
     This function runs asynchronously after the webhook returns 200 OK.
 
     Flow:
-    1. Run intent classification (NLU)
-    2. Compress prompt if needed (optional)
-    3. Route to appropriate LLM provider
-    4. Save AI response to database (SQLModel + AsyncSession)
+    1. Run intent classification (NLU) - or, in fused mode, defer it when the
+       intent cannot change the provider (the common case) or for greetings
+    2. Select the LLM provider and target model
+    3. Compress prompt if the compression gate predicts a net benefit
+    4. Load session history (incrementally compressed)
+    5. Stream the reply from the LLM provider (deltas go to session subscribers),
+       falling back to the next provider if it fails before the first token
+    6. Save AI response to database once (SQLModel + AsyncSession)
 
     Args:
         job_data: AI job data from BullMQ
@@ -58,38 +179,57 @@ async def process_ai_job_background(job_data: AIJobRequest):
     logger.info(f"[Background Task] Processing AI job for message {job_data.messageId}")
 
     try:
-        # Step 1: Intent Classification
-        intent_result = await classify_with_primary(job_data.message)
-        logger.info(
-            f"  Intent: {intent_result['intent']}, Target Model: {intent_result['target_model']}"
-        )
+        await publish_job_state(job_data, "processing")
+        llm_router = get_llm_router()
+
+        # Step 1: Intent Classification (local model first, LLM only if unsure;
+        # concurrent jobs share batched LLM calls) - skipped on the critical
+        # path when the intent could not change the provider anyway
+        fuse, reason = fused_routing_policy.decide(job_data.message, llm_router)
+        if fuse:
+            logger.info(f"  Fused routing ({reason}): intent classified afterwards")
+            task = asyncio.create_task(record_intent_deferred(job_data))
+            _deferred_classifications.add(task)
+            task.add_done_callback(_deferred_classifications.discard)
+            intent = None
+        else:
+            intent_result = await classify_intent(job_data.message, batch=True)
+            intent = intent_result.get("intent")
+            logger.info(
+                f"  Intent: {intent_result['intent']}, Target Model: {intent_result['target_model']}"
+            )
+
+        # Step 2: LLM provider selection
+        # Provider-specific intents first, otherwise the provider with the best
+        # live latency/error/cost score (routing policy)
+        provider = llm_router.select_provider(intent=intent)
+        target_model = LLMRouter.DEFAULT_MODELS[provider]
 
-        # Step 2: Prompt Compression (if message > 500 chars) - OPTIONAL
+        # Step 3: Prompt Compression - only when the cost model says it pays off
         prompt = job_data.message
-        if len(prompt) > 500:
+        decision = compression_gate.decide(prompt, target_model)
+        if decision.compress and decision.rate is not None:
             try:
-                compressor = LLMLinguaModel.get_instance()
-                compressed_result = compressor.compress_prompt(
-                    [prompt], rate=0.5, force_tokens=[]
-                )
-                prompt = compressed_result["compressed_prompt"]
+                # Runs in the inference executor - never blocks the event loop
+                prompt = await compression_service.compress(prompt, rate=decision.rate)
                 logger.info(
-                    f"  Compressed: {len(job_data.message)} -> {len(prompt)} chars"
+                    f"  Compressed: {len(job_data.message)} -> {len(prompt)} chars "
+                    f"(rate={decision.rate})"
                 )
             except Exception as e:
                 logger.warning(f"  Compression failed (using original): {str(e)}")
 
-        # Step 3: LLM Routing & Execution - NEW MULTI-PROVIDER ROUTER
-        llm_router = LLMRouter()
-
-        # Determine provider from intent or use default (Google Gemini)
-        provider = llm_router.select_provider(intent=intent_result.get("intent"))
-
-        llm_response: Dict[str, Any] = await llm_router.route(
-            provider=provider.value,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.7,
-            max_tokens=1000,
+        # Step 4: Session history - stored per-message compressions are reused,
+        # so only messages added since the previous turn are compressed (and
+        # only those the compression gate approves for the target model)
+        history = await load_session_history(job_data, target_model)
+
+        # Step 5: LLM Execution - streamed, subscribers see tokens as they arrive
+        llm_response = await generate_reply(
+            llm_router,
+            provider.value,
+            history + [{"role": "user", "content": prompt}],
+            job_data,
         )
 
         ai_message = llm_response["content"]
@@ -97,7 +237,7 @@ async def process_ai_job_background(job_data: AIJobRequest):
             f"  AI Response from {llm_response['provider']}/{llm_response['model']}: {ai_message[:50]}..."
         )
 
-        # Step 4: Save to Database - SQLModel + AsyncSession (NO MORE PRISMA!)
+        # Step 6: Save to Database - SQLModel + AsyncSession (NO MORE PRISMA!)
         async with AsyncSession(async_engine, expire_on_commit=False) as session:
             message_repo = MessageRepository(session)
 
@@ -117,9 +257,38 @@ async def process_ai_job_background(job_data: AIJobRequest):
             logger.info(
                 f"  ✓ Provider: {ai_message_record.provider}, Model: {ai_message_record.model}"
             )
+            await event_bus.publish(
+                job_data.sessionId,
+                {
+                    "type": "message.completed",
+                    "replyTo": job_data.messageId,
+                    "message": {
+                        "id": ai_message_record.id,
+                        "role": "assistant",
+                        "content": ai_message,
+                        "provider": ai_message_record.provider,
+                        "model": ai_message_record.model,
+                    },
+                },
+            )
+
+            await publish_job_state(
+                job_data, "completed", assistantMessageId=ai_message_record.id
+            )
+
+            # Compress the reply now so the next turn finds it ready
+            await history_compressor.compress_messages(
+                [ai_message_record],
+                MessageCompressionRepository(session),
+                model=target_model,
+            )
 
     except Exception as e:
         logger.error(f"  ✗ Error processing job: {str(e)}", exc_info=True)
+        try:
+            await publish_job_state(job_data, "failed", error=str(e))
+        except Exception as publish_error:
+            logger.warning(f"  Publishing job failure failed: {str(publish_error)}")
 
 
 @router.post(
@@ -141,11 +310,14 @@ async def process_ai_job_webhook(
     - BullMQ Proxy receives success response instantly
 
     **Background Processing:**
-    1. Intent Classification (NLU)
+    1. Intent Classification (NLU) - deferred when it cannot change the provider
     2. Prompt Compression (LLMLingua-2)
-    3. LLM Routing & Execution
+    3. LLM Routing & Execution (streamed to session subscribers)
     4. Database Write (save AI response)
 
+    Job state changes and the reply are pushed to
+    `GET /sessions/{sessionId}/events` subscribers.
+
     **Security:**
     - Requires shared secret authentication
     - Only BullMQ Proxy service can call this endpoint
@@ -177,6 +349,8 @@ async def process_ai_job_webhook(
         f"[Python Worker] Webhook received for Job {job_id} (message {job_data.messageId})"
     )
 
+    await publish_job_state(job_data, "queued", jobId=job_id)
+
     # Add AI processing to background tasks (runs after response sent)
     background_tasks.add_task(process_ai_job_background, job_data)
 
@@ -0,0 +1,79 @@
+"""Provider call statistics: cache savings and the live metrics behind provider routing."""
+
+from typing import Any, Dict
+from fastapi import APIRouter, Depends
+from app.dependencies import verify_shared_secret
+from app.services.fallback import fallback_runner
+from app.services.rate_limiter import rate_limiter
+from app.services.response_cache import response_cache
+from app.services.routing_policy import routing_policy
+
+router = APIRouter()
+
+
+@router.get(
+    "/providers/stats",
+    dependencies=[Depends(verify_shared_secret)],
+    summary="LLM provider call statistics",
+    description=(
+        "Response cache hit rate, tokens saved and coalesced calls of LLMRouter, "
+        "the live provider metrics used for adaptive routing, the rate limiter "
+        "queues and the fallback chain attempts"
+    ),
+)
+async def provider_stats() -> Dict[str, Any]:
+    """
+    Report statistics of the layers in front of the LLM providers.
+
+    **Response:**
+    ```json
+    {
+      "response_cache": {
+        "enabled": true,
+        "max_temperature": 0.2,
+        "hits": 420, "misses": 180, "hit_rate": 0.7, "redis_hits": 35,
+        "bypassed": 900, "tokens_saved": 151200,
+        "entries": 175, "max_entries": 2048,
+        "coalescing": {"calls": 180, "shared": 4, "in_flight": 0}
+      },
+      "routing": {
+        "objective": "latency",
+        "latency_metric": "ttft",
+        "exploration_rate": 0.05,
+        "decisions": {"warmup": 6, "best": 570, "explore": 31},
+        "routes": {
+          "google:gemini-2.0-flash-exp": {
+            "samples": 402, "failures": 3, "error_rate": 0.0, "chosen": 402,
+            "latency_ms": 1840.2, "ttft_ms": 310.5, "usd_per_1k": 0.000172
+          }
+        }
+      },
+      "rate_limits": {
+        "enabled": true,
+        "max_wait_seconds": 10.0,
+        "limits": {"openai:gpt-4o-mini": {"rpm": 5000, "tpm": 2000000}},
+        "store": {"backend": "redis", "connected": true, "available": true, "errors": 0},
+        "routes": {
+          "openai:gpt-4o-mini": {
+            "granted": 1200, "waited": 35, "wait_seconds": 4.2, "rejected": 0,
+            "reserved_tokens": 150000, "corrected_tokens": -98000
+          }
+        }
+      },
+      "fallback": {
+        "requests": 1450, "fallback_successes": 12, "exhausted": 1,
+        "outcomes": {"ok": 1449, "timeout": 9, "error": 4, "circuit_open": 21},
+        "retry_budget": {
+          "ratio": 0.1, "min_per_second": 1.0, "window_seconds": 10.0,
+          "requests": 48, "retries": 2, "rejected": 0
+        }
+      }
+    }
+    ```
+    """
+    return {
+        "response_cache": response_cache.status(),
+        "routing": routing_policy.stats(),
+        "rate_limits": rate_limiter.stats(),
+        "fallback": fallback_runner.stats(),
+    }
@@ -0,0 +1,58 @@
+"""Resilience endpoints: circuit breaker state for dashboards and scraping."""
+
+from typing import Any, List
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+from app.dependencies import verify_shared_secret
+from app.services.circuit_breaker import circuit_breakers
+
+router = APIRouter()
+
+
+@router.get(
+    "/circuit-breakers",
+    dependencies=[Depends(verify_shared_secret)],
+    summary="Circuit breaker states",
+    description="State, sliding-window error/slow-call rates, counters and recent transitions of every provider/model breaker",
+)
+async def list_circuit_breakers() -> List[dict[str, Any]]:
+    """
+    Report all circuit breakers.
+
+    **Response:**
+    ```json
+    [
+      {
+        "name": "gpt-4o-mini",
+        "state": "open",
+        "retry_after_seconds": 42.5,
+        "window": {"seconds": 60, "calls": 14, "failure_rate": 0.0, "slow_call_rate": 0.64},
+        "thresholds": {"minimum_calls": 10, "failure_rate": 0.5, "slow_call_rate": 0.5, "slow_call_seconds": 2.0},
+        "totals": {"calls": 310, "failures": 3, "slow_calls": 11, "rejected": 27},
+        "transition_counts": {"closed->open": 1},
+        "transitions": [{"from": "closed", "to": "open", "reason": "slow-call rate 64%", "at": 1760000000.0}]
+      }
+    ]
+    ```
+    """
+    return circuit_breakers.snapshot()
+
+
+@router.get(
+    "/circuit-breakers/metrics",
+    dependencies=[Depends(verify_shared_secret)],
+    response_class=PlainTextResponse,
+    summary="Circuit breaker metrics (Prometheus text format)",
+)
+async def circuit_breaker_metrics() -> str:
+    """
+    Export breaker state gauges and counters for a Prometheus scraper.
+
+    **Response:**
+    ```text
+    circuit_breaker_state{name="gpt-4o-mini",state="open"} 1
+    circuit_breaker_rejected_total{name="gpt-4o-mini"} 27
+    circuit_breaker_transitions_total{name="gpt-4o-mini",from="closed",to="open"} 1
+    ```
+    """
+    return circuit_breakers.prometheus_metrics()
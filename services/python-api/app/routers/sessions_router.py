@@ -0,0 +1,97 @@
+"""Session endpoints: live job events pushed as Server-Sent Events.
+
+Instead of polling the messages API until the assistant reply exists, the
+frontend (through the Next.js server, which holds the shared secret) keeps
+one SSE connection per open chat session and receives job state changes,
+streamed reply deltas and the saved assistant message as they happen.
+"""
+
+import asyncio
+import json
+import logging
+from typing import Any, AsyncIterator, Dict
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
+from app.config import settings
+from app.dependencies import verify_shared_secret
+from app.services.event_bus import Subscription, event_bus
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+
+def format_sse(event: Dict[str, Any]) -> str:
+    """Encode an event as an SSE frame (event name = event type)."""
+    return f"event: {event.get('type', 'message')}\ndata: {json.dumps(event)}\n\n"
+
+
+async def sse_stream(
+    request: Request, subscription: Subscription
+) -> AsyncIterator[str]:
+    """
+    Yield SSE frames for a subscription until the client disconnects.
+
+    A comment line is sent every ``sse_keepalive_seconds`` without events, so
+    proxies keep the connection open and disconnects are noticed.
+
+    Args:
+        request: Incoming request (disconnect detection)
+        subscription: Event bus subscription (released when the stream ends)
+
+    Yields:
+        SSE frames
+    """
+    try:
+        yield f"retry: {settings.sse_retry_ms}\n\n"
+        while True:
+            try:
+                event = await subscription.get(timeout=settings.sse_keepalive_seconds)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                yield ": keepalive\n\n"
+                continue
+            yield format_sse(event)
+    finally:
+        await event_bus.unsubscribe(subscription)
+
+
+@router.get(
+    "/sessions/{sessionId}/events",
+    dependencies=[Depends(verify_shared_secret)],
+    response_class=StreamingResponse,
+    summary="Live session events (Server-Sent Events)",
+    description="Push job state changes, streamed reply deltas and saved assistant messages of a chat session",
+)
+async def session_events(sessionId: str, request: Request) -> StreamingResponse:
+    """
+    Stream a chat session's events until the client disconnects.
+
+    Events (SSE event name = `type`):
+    - `job.state`: `queued` / `processing` / `completed` / `failed`
+    - `message.delta`: next fragment of the reply being generated
+    - `message.completed`: the saved assistant message
+
+    With Redis configured, events of jobs processed by any worker or pod
+    are delivered, whichever worker holds the connection.
+
+    **Example:**
+    ```text
+    event: job.state
+    data: {"type": "job.state", "state": "processing", "replyTo": "clzzz"}
+
+    event: message.delta
+    data: {"type": "message.delta", "replyTo": "clzzz", "index": 0, "content": "Hello"}
+
+    event: message.completed
+    data: {"type": "message.completed", "replyTo": "clzzz", "message": {"id": "claaa", "role": "assistant", "content": "Hello!", "provider": "google", "model": "gemini-2.0-flash-exp"}}
+    ```
+    """
+    # Subscribe before responding, so no event published after connect is lost
+    subscription = await event_bus.subscribe(sessionId)
+    logger.info(f"SSE subscriber connected to session {sessionId}")
+    return StreamingResponse(
+        sse_stream(request, subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1 @@
+"""Offline maintenance commands (run with ``python -m app.scripts.<name>``)."""
@@ -0,0 +1,114 @@
+"""Evaluate semantic cache similarity thresholds on labelled question pairs.
+
+Usage:
+    python -m app.scripts.evaluate_semantic_cache \\
+        --data data/semantic_pairs.jsonl --encoder llmlingua
+
+Every line of the input is a JSON object with ``query`` (incoming question),
+``cached`` (question whose answer is in the cache) and ``match`` (true if the
+cached answer is correct for the query). Precision is the share of cache
+answers that would have been correct, recall the share of correct answers
+that would have been served. The recommended threshold is the lowest one
+reaching ``--target-precision`` (set it as SEMANTIC_CACHE_THRESHOLD).
+"""
+
+import argparse
+import json
+import logging
+from typing import List, Tuple
+import numpy as np
+from app.config import settings
+from app.services.semantic_cache import HashingEncoder, evaluate_thresholds
+
+logger = logging.getLogger(__name__)
+
+
+def load_pairs(path: str) -> Tuple[List[str], List[str], List[bool]]:
+    """
+    Read labelled (query, cached question) pairs.
+
+    Args:
+        path: JSONL file
+
+    Returns:
+        Queries, cached questions and match labels
+    """
+    queries: List[str] = []
+    cached: List[str] = []
+    labels: List[bool] = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            queries.append(str(record["query"]))
+            cached.append(str(record["cached"]))
+            labels.append(bool(record["match"]))
+    logger.info(f"Loaded {len(labels)} pairs ({sum(labels)} matching)")
+    return queries, cached, labels
+
+
+def embed(texts: List[str], encoder: str, batch_size: int) -> np.ndarray:
+    """Embed texts in batches with the named encoder (in this process)."""
+    if encoder == "hashing":
+        return HashingEncoder(settings.semantic_cache_hashing_dim).encode_sync(texts)
+    # Imported lazily: loads torch and the LLMLingua-2 model
+    from app.models import LLMLinguaModel
+
+    return np.concatenate(
+        [
+            LLMLinguaModel.embed_batch(texts[start : start + batch_size])
+            for start in range(0, len(texts), batch_size)
+        ]
+    )
+
+
+def main() -> None:
+    """Parse arguments, embed the pairs and print the threshold table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data", required=True, help="Labelled pairs (JSONL)")
+    parser.add_argument(
+        "--encoder",
+        choices=["llmlingua", "hashing"],
+        default=settings.semantic_cache_encoder,
+    )
+    parser.add_argument(
+        "--thresholds",
+        default="0.80,0.84,0.88,0.90,0.92,0.94,0.96,0.98",
+        help="Comma-separated similarity thresholds",
+    )
+    parser.add_argument("--target-precision", type=float, default=0.98)
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    queries, cached, labels = load_pairs(args.data)
+    if not labels:
+        parser.error("No pairs found")
+    thresholds = sorted(float(t) for t in args.thresholds.split(","))
+
+    vectors = embed(queries + cached, args.encoder, args.batch_size)
+    similarities = np.sum(vectors[: len(queries)] * vectors[len(queries) :], axis=1)
+    rows = evaluate_thresholds(similarities.tolist(), labels, thresholds)
+
+    print(f"pairs: {len(labels)} ({sum(labels)} matching), encoder: {args.encoder}")
+    print("threshold  precision  recall  f1      hit_rate")
+    for row in rows:
+        print(
+            f"{row['threshold']:<10.2f} {row['precision']:<10.3f} "
+            f"{row['recall']:<7.3f} {row['f1']:<7.3f} {row['hit_rate']:.3f}"
+        )
+    recommended = next(
+        (row for row in rows if row["precision"] >= args.target_precision), None
+    )
+    if recommended is None:
+        print(f"No threshold reaches precision {args.target_precision}")
+    else:
+        print(
+            f"recommended: SEMANTIC_CACHE_THRESHOLD={recommended['threshold']} "
+            f"(precision {recommended['precision']}, recall {recommended['recall']})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Export the LLMLingua-2 token classifier to ONNX and quantize it to int8.
+
+Usage:
+    python -m app.scripts.export_onnx --output-dir models/llmlingua-2-onnx
+
+Then run the API with:
+    COMPRESSION_BACKEND=onnx ONNX_MODEL_DIR=models/llmlingua-2-onnx
+"""
+
+import argparse
+import logging
+from app.config import settings
+from app.onnx_backend import export_onnx
+
+
+def main() -> None:
+    """Parse arguments and run the one-shot export."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--model-name",
+        default=settings.llmlingua_model_name,
+        help="Hugging Face model to export",
+    )
+    parser.add_argument(
+        "--output-dir",
+        default=settings.onnx_model_dir,
+        help="Directory for model.onnx, model.int8.onnx and tokenizer files",
+    )
+    parser.add_argument(
+        "--no-quantize",
+        action="store_true",
+        help="Only write the fp32 graph",
+    )
+    parser.add_argument("--opset", type=int, default=17, help="ONNX opset version")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    paths = export_onnx(
+        args.model_name,
+        args.output_dir,
+        quantize=not args.no_quantize,
+        opset=args.opset,
+    )
+    for kind, path in paths.items():
+        print(f"{kind}: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""Replay recorded provider latency traces against routing policies.
+
+Usage:
+    python -m app.scripts.simulate_routing --trace logs/routing_trace.jsonl
+
+Every line of the input is one provider call as written to ROUTING_TRACE_PATH
+(``route``, ``timestamp``, ``latency``, ``ttft``, ``tokens``, ``failed``).
+Each route's calls are replayed in time order: a simulated request sent to a
+route gets that route's recorded outcome at the same relative point in time,
+so slowdowns and outages in the trace hit the policy as they happened. The
+static baseline sends everything to one route (the pre-adaptive behaviour).
+"""
+
+import argparse
+import json
+import logging
+from typing import Any, Dict, List
+from app.config import settings
+from app.services.routing_policy import (
+    LATENCY_METRICS,
+    OBJECTIVES,
+    RoutingPolicy,
+    TokenPrice,
+    replay_traces,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def load_traces(paths: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Read trace records, grouped by route and sorted by time.
+
+    Args:
+        paths: JSONL files
+
+    Returns:
+        Records per route
+    """
+    traces: Dict[str, List[Dict[str, Any]]] = {}
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                traces.setdefault(record["route"], []).append(record)
+    for records in traces.values():
+        records.sort(key=lambda record: record.get("timestamp", 0))
+    logger.info(
+        f"Loaded {sum(len(r) for r in traces.values())} calls on {len(traces)} routes"
+    )
+    return traces
+
+
+def main() -> None:
+    """Parse arguments, replay the traces and print one row per policy."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--trace",
+        action="append",
+        default=None,
+        help="Trace JSONL file (repeatable, default: ROUTING_TRACE_PATH)",
+    )
+    parser.add_argument(
+        "--requests",
+        type=int,
+        default=None,
+        help="Simulated requests (default: calls of the longest trace)",
+    )
+    parser.add_argument(
+        "--static-route",
+        default=None,
+        help="Baseline route (default: the Gemini route, else the first one)",
+    )
+    parser.add_argument(
+        "--objective",
+        action="append",
+        choices=OBJECTIVES,
+        default=None,
+        help="Objective to simulate (repeatable, default: all)",
+    )
+    parser.add_argument(
+        "--latency-metric",
+        choices=LATENCY_METRICS,
+        default=settings.routing_latency_metric,
+    )
+    parser.add_argument("--latency-weight", type=float, default=0.5)
+    parser.add_argument("--alpha", type=float, default=settings.routing_ewma_alpha)
+    parser.add_argument(
+        "--exploration-rate", type=float, default=settings.routing_exploration_rate
+    )
+    parser.add_argument("--min-samples", type=int, default=settings.routing_min_samples)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    paths = args.trace or (
+        [settings.routing_trace_path] if settings.routing_trace_path else []
+    )
+    if not paths:
+        parser.error("No trace given (--trace or ROUTING_TRACE_PATH)")
+    traces = load_traces(paths)
+    if not traces:
+        parser.error("No trace records found")
+    requests = args.requests or max(len(records) for records in traces.values())
+    static = args.static_route or next(
+        (route for route in sorted(traces) if route.startswith("google:")),
+        sorted(traces)[0],
+    )
+    if static not in traces:
+        parser.error(f"Unknown route: {static}")
+
+    def policy(objective: str) -> RoutingPolicy:
+        """A fresh policy with the command-line settings."""
+        return RoutingPolicy(
+            objective=objective,
+            latency_weight=args.latency_weight,
+            latency_metric=args.latency_metric,
+            alpha=args.alpha,
+            exploration_rate=args.exploration_rate,
+            min_samples=args.min_samples,
+            prices={
+                model: TokenPrice(*price)
+                for model, price in settings.routing_token_prices.items()
+            },
+            seed=args.seed,
+        )
+
+    results = {
+        f"static ({static})": replay_traces(
+            policy("latency"), {static: traces[static]}, requests
+        )
+    }
+    for objective in args.objective or list(OBJECTIVES):
+        results[objective] = replay_traces(policy(objective), traces, requests)
+
+    print(f"requests: {requests}, latency metric: {args.latency_metric}")
+    print(f"{'policy':<40} {'mean_ms':>9} {'p95_ms':>9} {'errors':>7} {'usd':>10}")
+    for name, result in results.items():
+        print(
+            f"{name:<40} {result['mean_latency_ms']:>9} {result['p95_latency_ms']:>9} "
+            f"{result['error_rate']:>7} {result['usd']:>10}"
+        )
+        for route, share in result["share"].items():
+            if share:
+                print(f"    {route:<36} {share:.1%}")
+
+
+if __name__ == "__main__":
+    main()
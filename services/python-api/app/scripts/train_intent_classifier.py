@@ -0,0 +1,155 @@
+"""Train the local intent classifier from logged LLM classifications.
+
+Usage:
+    python -m app.scripts.train_intent_classifier \\
+        --data logs/intent_classifications.jsonl \\
+        --output models/intent_classifier.npz
+
+Every line of the input is a JSON object with at least ``text`` and
+``intent`` (as written to INTENT_LOG_PATH by the intent router). A
+deterministic hash split holds out a test set; the evaluation report
+(accuracy, per-class metrics, confusion matrix and coverage at the router's
+confidence threshold) is printed and written next to the model.
+"""
+
+import argparse
+import json
+import logging
+import os
+import zlib
+from typing import Dict, List, Tuple
+from app.config import settings
+from app.services.intent_classifier import INTENTS, HashedNgramClassifier, evaluate
+
+logger = logging.getLogger(__name__)
+
+
+def load_examples(paths: List[str], min_confidence: float) -> Dict[str, str]:
+    """
+    Read labelled texts, keeping the latest label per distinct text.
+
+    Args:
+        paths: JSONL files
+        min_confidence: Skip LLM labels below this confidence
+
+    Returns:
+        Mapping of text to intent label
+    """
+    examples: Dict[str, str] = {}
+    skipped = 0
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                text = str(record.get("text", "")).strip()
+                intent = record.get("intent")
+                confidence = record.get("confidence")
+                if (
+                    not text
+                    or intent not in INTENTS
+                    or (confidence is not None and confidence < min_confidence)
+                ):
+                    skipped += 1
+                    continue
+                examples[text] = intent
+    logger.info(f"Loaded {len(examples)} distinct examples ({skipped} skipped)")
+    return examples
+
+
+def split_examples(
+    examples: Dict[str, str], test_percent: int
+) -> Tuple[List[Tuple[str, str]], List[Tuple[str, str]]]:
+    """Split deterministically by text hash so re-runs keep the same test set."""
+    train: List[Tuple[str, str]] = []
+    test: List[Tuple[str, str]] = []
+    for text, intent in examples.items():
+        bucket = zlib.crc32(text.encode("utf-8")) % 100
+        (test if bucket < test_percent else train).append((text, intent))
+    return train, test
+
+
+def main() -> None:
+    """Parse arguments, train, evaluate and export the model."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--data",
+        action="append",
+        default=None,
+        help="Labelled JSONL file (repeatable, default: INTENT_LOG_PATH)",
+    )
+    parser.add_argument(
+        "--output",
+        default=settings.intent_classifier_path,
+        help="Model file to write (.npz)",
+    )
+    parser.add_argument(
+        "--report", default=None, help="Report file (default: <output>.report.json)"
+    )
+    parser.add_argument("--test-percent", type=int, default=20)
+    parser.add_argument("--epochs", type=int, default=10)
+    parser.add_argument("--learning-rate", type=float, default=0.5)
+    parser.add_argument("--buckets", type=int, default=2**18)
+    parser.add_argument(
+        "--min-label-confidence",
+        type=float,
+        default=0.7,
+        help="Ignore LLM labels below this confidence",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=settings.intent_local_confidence_threshold,
+        help="Router confidence threshold to report coverage for",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    paths = args.data or (
+        [settings.intent_log_path] if settings.intent_log_path else []
+    )
+    if not paths:
+        parser.error("No training data given (--data or INTENT_LOG_PATH)")
+    examples = load_examples(paths, args.min_label_confidence)
+    train, test = split_examples(examples, args.test_percent)
+    if not train:
+        parser.error("No training examples found")
+
+    classifier = HashedNgramClassifier(n_buckets=args.buckets).fit(
+        [text for text, _ in train],
+        [intent for _, intent in train],
+        epochs=args.epochs,
+        learning_rate=args.learning_rate,
+    )
+
+    result = evaluate(
+        classifier,
+        [text for text, _ in test],
+        [intent for _, intent in test],
+        args.threshold,
+    )
+    report = {"train_examples": len(train), "test": result}
+    classifier.save(args.output)
+    report_path = args.report or f"{os.path.splitext(args.output)[0]}.report.json"
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"model:    {args.output}")
+    print(f"report:   {report_path}")
+    print(f"train/test: {len(train)}/{result['examples']}")
+    print(f"accuracy: {result['accuracy']}")
+    print(
+        f"at threshold {args.threshold}: coverage {result['coverage']}, "
+        f"accuracy {result['accuracy_above_threshold']}"
+    )
+    print(f"latency:  {result['avg_latency_us']}us per text")
+    for label, metrics in result["per_class"].items():
+        print(
+            f"  {label:<9} P={metrics['precision']:.3f} R={metrics['recall']:.3f} "
+            f"F1={metrics['f1']:.3f} n={metrics['support']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
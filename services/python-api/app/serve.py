@@ -0,0 +1,252 @@
+"""Preload-and-fork server: one LLMLingua-2 model copy shared by N uvicorn workers.
+
+Usage:
+    SERVE_WORKERS=4 python -m app.serve
+
+The master process loads the model once, creates the database tables, freezes
+the garbage collector (so collections in the workers never write to - and
+thereby copy - the pages of preloaded objects), binds the listening socket
+and forks the workers. Each worker runs its own event loop and uses the
+inherited model through an in-process thread executor, so the ~2GB of weights
+stay shared copy-on-write instead of being loaded once per worker. Workers
+that die are re-forked from the master, which is cheap because the model is
+already in memory. Nothing that must not cross fork() (database pools, SQLite
+connections) is open in the master when it forks.
+"""
+
+import argparse
+import asyncio
+import gc
+import logging
+import os
+import signal
+import socket
+import time
+from types import FrameType
+from typing import Dict, Optional
+import uvicorn
+from app.config import settings
+from app.models import LLMLinguaModel, configure_torch_threads
+
+logger = logging.getLogger(__name__)
+
+# Minimum delay between re-forks of crashing workers
+RESPAWN_DELAY_SECONDS = 1.0
+
+
+def preload_model() -> bool:
+    """
+    Load the model in the master so forked workers share it.
+
+    Returns:
+        True if the model was preloaded, False if workers load their own copy
+    """
+    if settings.compression_backend.lower() == "onnx":
+        # onnxruntime thread pools do not survive fork(); each worker opens its
+        # own session (the int8 graph is ~4x smaller than the PyTorch weights)
+        logger.warning("ONNX backend: model is loaded per worker, not preloaded")
+        return False
+
+    # No intra-op thread pool may exist in the master at fork time
+    LLMLinguaModel.get_instance(intra_op_threads=1)
+    logger.info(f"LLMLingua-2 model preloaded in master (pid {os.getpid()})")
+    return True
+
+
+def create_tables() -> None:
+    """
+    Create the database tables once, before any worker is forked.
+
+    Workers inherit the "created" flag and skip ``init_db()`` in their
+    lifespan. The engine's connections are closed again, so none is
+    inherited by the workers.
+    """
+    from app.database import close_db, init_db
+
+    async def create() -> None:
+        try:
+            await init_db()
+        finally:
+            await close_db()
+
+    asyncio.run(create())
+
+
+def worker_torch_threads(workers: int) -> int:
+    """Split the available cores between the workers' intra-op thread pools."""
+    if settings.serve_torch_threads:
+        return settings.serve_torch_threads
+    return max(1, (os.cpu_count() or 1) // workers)
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    """Create the listening socket shared by all workers."""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(sock: socket.socket, workers: int) -> None:
+    """
+    Serve the app in a forked worker until it is told to stop.
+
+    Args:
+        sock: Inherited listening socket
+        workers: Total number of workers (used to size torch threads)
+    """
+    # uvicorn installs its own handlers; drop the master's
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+
+    from app.main import app
+    from app.services.admission import admission_controller
+    from app.services.inference_executor import inference_executor
+
+    threads = worker_torch_threads(workers)
+    configure_torch_threads(threads)
+    # Parallelism comes from the forked workers: run inference on the
+    # in-process (shared) model, never in a pool that would re-load it
+    inference_executor.reconfigure(mode="thread", workers=1, intra_op_threads=threads)
+    admission_controller.max_concurrency = 1
+
+    config = uvicorn.Config(app, log_level="debug" if settings.debug else "info")
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+class PreforkServer:
+    """
+    Master process that forks and supervises uvicorn workers.
+
+    Example:
+        PreforkServer("0.0.0.0", 8000, workers=4).run()
+    """
+
+    def __init__(self, host: str, port: int, workers: int, preload: bool = True):
+        """
+        Initialize server configuration.
+
+        Args:
+            host: Bind address
+            port: Bind port
+            workers: Number of worker processes
+            preload: Load the model in the master before forking
+        """
+        self.host = host
+        self.port = port
+        self.workers = max(1, workers)
+        self.preload = preload
+        self.children: Dict[int, float] = {}  # pid -> start time
+        self.stopping = False
+        self._sock: Optional[socket.socket] = None
+
+    def spawn_worker(self) -> int:
+        """Fork one worker; returns its PID in the master."""
+        assert self._sock is not None
+        pid = os.fork()
+        if pid == 0:
+            exit_code = 0
+            try:
+                run_worker(self._sock, self.workers)
+            except BaseException:
+                logger.exception(f"[Worker {os.getpid()}] crashed")
+                exit_code = 1
+            finally:
+                os._exit(exit_code)
+
+        self.children[pid] = time.monotonic()
+        logger.info(f"Started worker {pid}")
+        return pid
+
+    def _handle_stop(self, signum: int, frame: Optional[FrameType]) -> None:
+        """Forward SIGTERM/SIGINT to the workers and stop re-forking."""
+        self.stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self) -> None:
+        """Preload, fork the workers and supervise them until stopped."""
+        if self.preload:
+            preload_model()
+
+        # Import the app before forking so module state is shared as well
+        from app.main import app  # noqa: F401
+
+        create_tables()
+
+        # Move everything allocated so far out of the collector's reach:
+        # the workers' GC would otherwise touch (and copy) every object page
+        gc.collect()
+        gc.freeze()
+
+        self._sock = bind_socket(self.host, self.port)
+        logger.info(
+            f"Listening on {self.host}:{self.port} with {self.workers} workers "
+            f"({worker_torch_threads(self.workers)} torch threads each)"
+        )
+
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        for _ in range(self.workers):
+            self.spawn_worker()
+
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            started = self.children.pop(pid, None)
+            if started is None:
+                continue
+
+            exit_code = os.waitstatus_to_exitcode(status)
+            if self.stopping:
+                logger.info(f"Worker {pid} stopped (exit code {exit_code})")
+                continue
+
+            logger.warning(f"Worker {pid} died (exit code {exit_code}) - re-forking")
+            if time.monotonic() - started < RESPAWN_DELAY_SECONDS:
+                time.sleep(RESPAWN_DELAY_SECONDS)
+            self.spawn_worker()
+
+        self._sock.close()
+        logger.info("All workers stopped")
+
+
+def main() -> None:
+    """Parse arguments and run the prefork server."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default=settings.serve_host, help="Bind address")
+    parser.add_argument(
+        "--port", type=int, default=settings.serve_port, help="Bind port"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=settings.serve_workers,
+        help="Number of forked uvicorn workers",
+    )
+    parser.add_argument(
+        "--no-preload",
+        action="store_true",
+        help="Let every worker load its own model copy",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    PreforkServer(
+        args.host,
+        args.port,
+        args.workers,
+        preload=settings.serve_preload_model and not args.no_preload,
+    ).run()
+
+
+if __name__ == "__main__":
+    main()
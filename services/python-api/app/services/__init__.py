@@ -1,5 +1,59 @@
 """Business logic services."""
 
+from app.services.admission import AdmissionController, admission_controller
+from app.services.circuit_breaker import AsyncCircuitBreaker, circuit_breakers
+from app.services.compression_cache import CompressionCache, compression_cache
+from app.services.compression_gate import CompressionGate, compression_gate
+from app.services.compression import CompressionService, compression_service
+from app.services.event_bus import EventBus, event_bus
+from app.services.fallback import FallbackRunner, fallback_runner
+from app.services.fused_routing import FusedRoutingPolicy, fused_routing_policy
+from app.services.hedging import Hedger, LatencyTracker, intent_hedger
+from app.services.history_compressor import HistoryCompressor, history_compressor
+from app.services.inference_executor import InferenceExecutor, inference_executor
+from app.services.intent_cache import IntentCache, intent_cache
 from app.services.llm_router import LLMRouter, ProviderEnum
+from app.services.micro_batcher import MicroBatcher
+from app.services.rate_limiter import RateLimiter, rate_limiter
+from app.services.response_cache import ResponseCache, response_cache
+from app.services.routing_policy import RoutingPolicy, routing_policy
+from app.services.semantic_cache import SemanticCache, semantic_cache
 
-__all__ = ["LLMRouter", "ProviderEnum"]
+__all__ = [
+    "AdmissionController",
+    "AsyncCircuitBreaker",
+    "CompressionCache",
+    "CompressionGate",
+    "CompressionService",
+    "EventBus",
+    "FallbackRunner",
+    "FusedRoutingPolicy",
+    "Hedger",
+    "HistoryCompressor",
+    "InferenceExecutor",
+    "IntentCache",
+    "LLMRouter",
+    "LatencyTracker",
+    "MicroBatcher",
+    "ProviderEnum",
+    "RateLimiter",
+    "ResponseCache",
+    "RoutingPolicy",
+    "SemanticCache",
+    "admission_controller",
+    "circuit_breakers",
+    "compression_cache",
+    "compression_gate",
+    "compression_service",
+    "event_bus",
+    "fallback_runner",
+    "fused_routing_policy",
+    "history_compressor",
+    "inference_executor",
+    "intent_cache",
+    "intent_hedger",
+    "rate_limiter",
+    "response_cache",
+    "routing_policy",
+    "semantic_cache",
+]
@@ -0,0 +1,194 @@
+"""Admission control for LLMLingua-2 inference.
+
+Caps the number of inferences running at once and holds the excess in a
+bounded FIFO queue with a per-request deadline. When the queue is full (or a
+waiter's deadline passes) the request is rejected with ``AdmissionRejected``
+carrying a ``Retry-After`` estimate, which the routers turn into HTTP 429.
+Under a burst, admitted requests keep their normal latency and the overflow
+is shed instead of every request slowing down together.
+"""
+
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted; maps to HTTP 429."""
+
+    def __init__(self, reason: str, retry_after: int):
+        """
+        Initialize rejection.
+
+        Args:
+            reason: Why the request was rejected ("queue full" / "deadline exceeded")
+            retry_after: Suggested client back-off in whole seconds
+        """
+        super().__init__(f"Inference overloaded ({reason}), retry in {retry_after}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Concurrency limit + bounded wait queue with deadlines.
+
+    Example:
+        async with admission_controller.slot():
+            result = await inference_executor.compress_batch(prompts, 0.5, [])
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 2,
+        max_queue: int = 32,
+        queue_timeout_seconds: float = 10.0,
+        name: str = "inference",
+    ):
+        """
+        Initialize controller.
+
+        Args:
+            max_concurrency: Inferences allowed to run at the same time
+            max_queue: Requests allowed to wait for a slot
+            queue_timeout_seconds: Default deadline for waiting in the queue
+            name: Name used in log messages
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be >= 1")
+        self.max_concurrency = max_concurrency
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self.name = name
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._active = 0
+        self._waiters: Deque["asyncio.Future[None]"] = deque()
+
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_deadline = 0
+        self.avg_service_seconds = 0.0
+
+    @asynccontextmanager
+    async def slot(self, timeout: Optional[float] = None) -> AsyncIterator[None]:
+        """
+        Hold one inference slot for the duration of the block.
+
+        Args:
+            timeout: Maximum time to wait in the queue (default: controller setting)
+
+        Raises:
+            AdmissionRejected: If the queue is full or the deadline passes
+        """
+        await self._acquire(self.queue_timeout_seconds if timeout is None else timeout)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - started
+            self.avg_service_seconds = (
+                elapsed
+                if self.avg_service_seconds == 0.0
+                else 0.2 * elapsed + 0.8 * self.avg_service_seconds
+            )
+            self._release()
+
+    def ensure_capacity(self) -> None:
+        """
+        Reject up front if a new request could not even be queued.
+
+        Used before committing to a streaming response.
+
+        Raises:
+            AdmissionRejected: If all slots are busy and the queue is full
+        """
+        if (
+            self._active >= self.max_concurrency
+            and len(self._waiters) >= self.max_queue
+        ):
+            self.rejected_queue_full += 1
+            raise AdmissionRejected("queue full", self.retry_after())
+
+    def retry_after(self) -> int:
+        """Estimate (whole seconds) until the current queue has drained."""
+        service = self.avg_service_seconds or 1.0
+        waves = (len(self._waiters) + 1) / self.max_concurrency
+        return max(1, math.ceil(service * waves))
+
+    def stats(self) -> Dict[str, Any]:
+        """Return admission counters for monitoring."""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "active": self._active,
+            "queued": len(self._waiters),
+            "admitted": self.admitted,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_deadline": self.rejected_deadline,
+            "avg_service_ms": round(self.avg_service_seconds * 1000, 1),
+        }
+
+    async def _acquire(self, timeout: float) -> None:
+        """Take a free slot or wait for one in FIFO order."""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Waiter futures are bound to a loop; start clean on a new one
+            self._loop = loop
+            self._waiters = deque()
+            self._active = 0
+
+        if self._active < self.max_concurrency and not self._waiters:
+            self._active += 1
+            self.admitted += 1
+            return
+
+        if len(self._waiters) >= self.max_queue:
+            self.rejected_queue_full += 1
+            logger.warning(f"{self.name}: queue full ({self.max_queue}), rejecting")
+            raise AdmissionRejected("queue full", self.retry_after())
+
+        waiter: "asyncio.Future[None]" = loop.create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as we gave up - pass it on
+                self._release()
+            else:
+                waiter.cancel()
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self.rejected_deadline += 1
+            logger.warning(f"{self.name}: queue deadline ({timeout}s) exceeded")
+            raise AdmissionRejected("deadline exceeded", self.retry_after()) from e
+        self.admitted += 1
+
+    def _release(self) -> None:
+        """Hand the slot to the next live waiter, or free it."""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._active = max(0, self._active - 1)
+
+
+# Global admission controller instance
+admission_controller = AdmissionController(
+    max_concurrency=settings.inference_max_concurrency or settings.inference_workers,
+    max_queue=settings.inference_max_queue,
+    queue_timeout_seconds=settings.inference_queue_timeout_seconds,
+)
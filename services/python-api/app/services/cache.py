@@ -0,0 +1,309 @@
+"""Reusable cache building blocks.
+
+- ``TTLLRUCache``: bounded in-memory LRU with per-entry TTL and counters
+- ``SqliteCacheStore``: optional on-disk tier that survives restarts
+- ``SingleFlight``: coalesces concurrent async calls for the same key
+"""
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, Generic, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
+
+
+@dataclass
+class CacheStats:
+    """Hit/miss/eviction counters used to size caches."""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    sets: int = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return counters plus the derived hit rate."""
+        lookups = self.hits + self.misses
+        data: Dict[str, Any] = asdict(self)
+        data["hit_rate"] = round(self.hits / lookups, 4) if lookups else 0.0
+        return data
+
+
+class TTLLRUCache(Generic[V]):
+    """
+    Thread-safe in-memory LRU cache with a time-to-live per entry.
+
+    Example:
+        cache: TTLLRUCache[str] = TTLLRUCache(max_entries=1024, ttl_seconds=3600)
+        cache.set("key", "value")
+        value = cache.get("key")
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: Optional[float] = None):
+        """
+        Initialize cache.
+
+        Args:
+            max_entries: Maximum number of entries before LRU eviction
+            ttl_seconds: Entry lifetime (None = no expiry)
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be >= 1")
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.stats = CacheStats()
+        self._data: "OrderedDict[str, Tuple[Optional[float], V]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[V]:
+        """Return the cached value (refreshing its LRU position) or None."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.stats.misses += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                self.stats.expirations += 1
+                self.stats.misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self.stats.hits += 1
+            return value
+
+    def set(self, key: str, value: V, ttl_seconds: Optional[float] = None) -> None:
+        """
+        Store a value, evicting the least recently used entries if full.
+
+        Args:
+            key: Cache key
+            value: Value to store
+            ttl_seconds: Optional per-entry TTL override
+        """
+        ttl = ttl_seconds if ttl_seconds is not None else self.ttl_seconds
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            self.stats.sets += 1
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.stats.evictions += 1
+
+    def delete(self, key: str) -> bool:
+        """Remove an entry; returns True if it existed."""
+        with self._lock:
+            return self._data.pop(key, None) is not None
+
+    def clear(self) -> None:
+        """Remove all entries (counters are kept)."""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        """Number of entries currently held (including not-yet-purged expired ones)."""
+        return len(self._data)
+
+
+class SqliteCacheStore:
+    """
+    On-disk key/value tier backed by SQLite.
+
+    Values are strings; expiry uses wall-clock time so entries survive
+    restarts. Calls are blocking - run them off the event loop.
+
+    The connection is opened on first use in each process: SQLite
+    connections must not be used across ``fork()``, so a store created in a
+    prefork master gets a fresh connection in every worker.
+    """
+
+    def __init__(
+        self, path: str, ttl_seconds: Optional[float] = None, max_entries: int = 100000
+    ):
+        """
+        Create the cache database if needed (the connection is opened lazily).
+
+        Args:
+            path: SQLite file path
+            ttl_seconds: Entry lifetime (None = no expiry)
+            max_entries: Maximum rows before the oldest entries are evicted
+        """
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_pid: Optional[int] = None
+        # Fail early on an unusable path, without keeping a connection open
+        self._open().close()
+
+    def _open(self) -> sqlite3.Connection:
+        """Open a connection and create the schema if needed."""
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " expires_at REAL,"
+            " created_at REAL NOT NULL)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS cache_created_at ON cache (created_at)"
+        )
+        conn.commit()
+        return conn
+
+    @property
+    def _db(self) -> sqlite3.Connection:
+        """This process's connection (call with the lock held)."""
+        if self._conn is None or self._conn_pid != os.getpid():
+            # A connection inherited through fork() is abandoned, never used
+            # or closed: closing it could release the parent's file locks
+            self._conn = self._open()
+            self._conn_pid = os.getpid()
+        return self._conn
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the stored value or None if missing or expired."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.stats.misses += 1
+                return None
+
+            value, expires_at = row
+            if expires_at is not None and expires_at <= time.time():
+                self._db.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self._db.commit()
+                self.stats.expirations += 1
+                self.stats.misses += 1
+                return None
+
+            self.stats.hits += 1
+            return str(value)
+
+    def set(self, key: str, value: str) -> None:
+        """Store a value, evicting the oldest rows beyond ``max_entries``."""
+        now = time.time()
+        expires_at = now + self.ttl_seconds if self.ttl_seconds is not None else None
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at, created_at)"
+                " VALUES (?, ?, ?, ?)",
+                (key, value, expires_at, now),
+            )
+            self.stats.sets += 1
+
+            (count,) = self._db.execute("SELECT COUNT(*) FROM cache").fetchone()
+            overflow = count - self.max_entries
+            if overflow > 0:
+                self._db.execute(
+                    "DELETE FROM cache WHERE key IN"
+                    " (SELECT key FROM cache ORDER BY created_at LIMIT ?)",
+                    (overflow,),
+                )
+                self.stats.evictions += overflow
+            self._db.commit()
+
+    def purge_expired(self) -> int:
+        """Delete all expired rows; returns the number removed."""
+        with self._lock:
+            cursor = self._db.execute(
+                "DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at <= ?",
+                (time.time(),),
+            )
+            self._db.commit()
+            self.stats.expirations += cursor.rowcount
+            return cursor.rowcount
+
+    def __len__(self) -> int:
+        """Number of rows currently stored."""
+        with self._lock:
+            (count,) = self._db.execute("SELECT COUNT(*) FROM cache").fetchone()
+            return int(count)
+
+    def close(self) -> None:
+        """Close this process's database connection (reopened on next use)."""
+        with self._lock:
+            if self._conn is not None and self._conn_pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+
+
+class SingleFlight(Generic[V]):
+    """
+    Run at most one in-flight call per key; concurrent callers share its result.
+
+    The shared call runs as its own task, so a caller that is cancelled does
+    not cancel it for the others. Exceptions are delivered to every waiter
+    and nothing is remembered once the call finishes.
+
+    Example:
+        flight: SingleFlight[dict] = SingleFlight()
+        result = await flight.do(key, lambda: classify_with_primary(text))
+    """
+
+    def __init__(self) -> None:
+        """Initialize with no calls in flight."""
+        self._calls: "Dict[str, asyncio.Future[V]]" = {}
+        self.calls = 0
+        self.shared = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[V]]) -> V:
+        """
+        Await ``fn()``, or the call already in flight for ``key``.
+
+        Args:
+            key: Coalescing key
+            fn: Coroutine factory, only invoked if no call is in flight
+
+        Returns:
+            Result of the (possibly shared) call
+        """
+        call = self._calls.get(key)
+        if call is not None and not call.done():
+            self.shared += 1
+            return await asyncio.shield(call)
+
+        async def run() -> V:
+            return await fn()
+
+        call = asyncio.ensure_future(run())
+        self._calls[key] = call
+        self.calls += 1
+        call.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(call)
+
+    def in_flight(self) -> int:
+        """Number of keys with a call currently running."""
+        return len(self._calls)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return coalescing counters."""
+        return {
+            "calls": self.calls,
+            "shared": self.shared,
+            "in_flight": self.in_flight(),
+        }
+
+    def _forget(self, key: str, done: "asyncio.Future[V]") -> None:
+        """Drop a finished call (unless a newer one replaced it)."""
+        if self._calls.get(key) is done:
+            del self._calls[key]
+        if not done.cancelled():
+            # Mark the exception as retrieved even if every waiter went away
+            done.exception()
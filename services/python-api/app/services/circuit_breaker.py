@@ -0,0 +1,507 @@
+"""Latency-aware async circuit breaker with sliding-window statistics.
+
+A breaker trips (CLOSED -> OPEN) when, over the last ``window_seconds`` and
+at least ``minimum_calls`` calls, either the error rate or the share of
+calls slower than ``slow_call_seconds`` reaches its threshold. An upstream
+that keeps answering, but only after 8 seconds, is therefore shed as well
+as one that fails outright. While OPEN, calls fail immediately with
+``CircuitOpenError``. After ``open_seconds`` the breaker lets up to
+``half_open_max_calls`` probe calls through (HALF_OPEN): if they all
+succeed quickly it closes, otherwise it opens again.
+
+One breaker exists per provider/model (see ``circuit_breakers``); states,
+counters and recent transitions are exported for scraping.
+
+With ``REDIS_URL`` set, admission and result recording go through the shared
+``RedisBreakerStore``, so all workers and pods see one state per breaker and
+an outage found by one process protects the whole fleet. The process-local
+state machine is used when Redis is not configured or unavailable.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from enum import Enum
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+)
+from app.config import settings
+from app.redis_client import get_redis
+from app.services.circuit_breaker_store import RedisBreakerStore, SharedState
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class CircuitState(str, Enum):
+    """Breaker states."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose breaker is open."""
+
+    def __init__(self, name: str, retry_after: float):
+        """
+        Initialize error.
+
+        Args:
+            name: Breaker name (provider/model)
+            retry_after: Seconds until probe calls are allowed again
+        """
+        super().__init__(f"Circuit '{name}' is open, retry in {retry_after:.1f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class AsyncCircuitBreaker:
+    """
+    Circuit breaker tripping on error rate or slow-call rate.
+
+    Example:
+        breaker = circuit_breakers.get("openai:gpt-4o-mini")
+        result = await breaker.call(lambda: litellm.acompletion(...))
+    """
+
+    def __init__(
+        self,
+        name: str,
+        window_seconds: float = 60.0,
+        minimum_calls: int = 10,
+        failure_rate_threshold: float = 0.5,
+        slow_call_rate_threshold: float = 0.5,
+        slow_call_seconds: float = 10.0,
+        open_seconds: float = 60.0,
+        half_open_max_calls: int = 3,
+        store: Optional[RedisBreakerStore] = None,
+    ):
+        """
+        Initialize breaker (CLOSED).
+
+        Args:
+            name: Breaker name used in errors, logs and metrics
+            window_seconds: Sliding window for the rate statistics
+            minimum_calls: Calls in the window before the breaker may trip
+            failure_rate_threshold: Error share that trips the breaker
+            slow_call_rate_threshold: Slow-call share that trips the breaker
+            slow_call_seconds: Calls taking at least this long count as slow
+            open_seconds: Time spent OPEN before probing
+            half_open_max_calls: Probe calls allowed (and required) in HALF_OPEN
+            store: Shared state store (None = process-local only)
+        """
+        self.name = name
+        self.window_seconds = window_seconds
+        self.minimum_calls = max(1, minimum_calls)
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = max(1, half_open_max_calls)
+        self.store = store
+
+        self.state = CircuitState.CLOSED
+        self._opened_at = 0.0
+        self._calls: Deque[Tuple[float, bool, bool]] = deque()  # (at, failed, slow)
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self._shared_seen = float("-inf")  # When the shared state was last read
+        self._shared_open_until = 0.0
+        self._reports: Set["asyncio.Task[None]"] = set()
+
+        self.total_calls = 0
+        self.total_failures = 0
+        self.total_slow_calls = 0
+        self.total_rejected = 0
+        self.transitions: Deque[Dict[str, Any]] = deque(maxlen=20)
+        self.transition_counts: Dict[str, int] = {}
+
+    async def call(self, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run ``fn()`` through the breaker.
+
+        Args:
+            fn: Coroutine factory performing the upstream call
+
+        Returns:
+            Result of ``fn()``
+
+        Raises:
+            CircuitOpenError: If the breaker is open (``fn`` is not called)
+            Exception: Whatever ``fn()`` raised (recorded as a failure)
+        """
+        probe, shared = await self._admit()
+        started = time.monotonic()
+        try:
+            result = await fn()
+        except Exception:
+            await self._report(time.monotonic() - started, True, False, probe, shared)
+            raise
+        except BaseException:
+            # Cancelled (e.g. a hedge won): only the latency says anything.
+            # A cancelled task must not await again - report in the background.
+            elapsed = time.monotonic() - started
+            if shared:
+                task = asyncio.ensure_future(
+                    self._report(elapsed, False, True, probe, shared)
+                )
+                self._reports.add(task)
+                task.add_done_callback(self._reports.discard)
+            else:
+                self._record_cancelled(elapsed, probe=probe)
+            raise
+        await self._report(time.monotonic() - started, False, False, probe, shared)
+        return result
+
+    def allows_calls(self) -> bool:
+        """True if a call would currently be let through."""
+        self._maybe_half_open()
+        if self.state == CircuitState.OPEN:
+            return False
+        if self.state == CircuitState.HALF_OPEN:
+            return self._probes_in_flight < self.half_open_max_calls
+        return True
+
+    def retry_after(self) -> float:
+        """Seconds until the breaker starts probing (0 unless OPEN)."""
+        if self.state != CircuitState.OPEN:
+            return 0.0
+        return max(0.0, self._opened_at + self.open_seconds - time.monotonic())
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return state, window rates, counters and recent transitions."""
+        self._maybe_half_open()
+        calls, failure_rate, slow_rate = self._window_rates()
+        return {
+            "name": self.name,
+            "state": self.state.value,
+            "retry_after_seconds": round(self.retry_after(), 2),
+            "window": {
+                "seconds": self.window_seconds,
+                "calls": calls,
+                "failure_rate": round(failure_rate, 4),
+                "slow_call_rate": round(slow_rate, 4),
+            },
+            "thresholds": {
+                "minimum_calls": self.minimum_calls,
+                "failure_rate": self.failure_rate_threshold,
+                "slow_call_rate": self.slow_call_rate_threshold,
+                "slow_call_seconds": self.slow_call_seconds,
+            },
+            "totals": {
+                "calls": self.total_calls,
+                "failures": self.total_failures,
+                "slow_calls": self.total_slow_calls,
+                "rejected": self.total_rejected,
+            },
+            "transition_counts": dict(self.transition_counts),
+            "transitions": list(self.transitions),
+            "store": self.store.status() if self.store is not None else None,
+        }
+
+    async def _admit(self) -> Tuple[bool, bool]:
+        """
+        Admit a call via the shared store (or the local state machine).
+
+        Returns:
+            (is_probe, admitted_by_shared_store)
+
+        Raises:
+            CircuitOpenError: If the breaker is open
+        """
+        if self.store is None or not self.store.available():
+            return self._before_call(), False
+
+        now = time.monotonic()
+        synced = now - self._shared_seen < self.store.cache_ttl_seconds
+        if self.state == CircuitState.OPEN and now < self._shared_open_until:
+            # Nothing can close an open breaker before its open period ends
+            self.total_rejected += 1
+            raise CircuitOpenError(self.name, self._shared_open_until - now)
+        if synced and self.state == CircuitState.CLOSED:
+            return False, True
+
+        try:
+            shared = await self.store.acquire(
+                self.name, self.open_seconds, self.half_open_max_calls
+            )
+        except Exception as e:
+            self.store.degrade(e)
+            return self._before_call(), False
+        if shared is None:
+            return self._before_call(), False
+
+        self._apply_shared(shared)
+        if not shared.admitted:
+            self.total_rejected += 1
+            raise CircuitOpenError(self.name, shared.retry_after)
+        return shared.state == CircuitState.HALF_OPEN.value, True
+
+    async def _report(
+        self, elapsed: float, failed: bool, cancelled: bool, probe: bool, shared: bool
+    ) -> None:
+        """Record a finished call where it was admitted (store or local)."""
+        if not shared or self.store is None:
+            self._record(elapsed, failed=failed, probe=probe)
+            return
+
+        slow = elapsed >= self.slow_call_seconds
+        if cancelled and not slow and not probe:
+            return
+        if not (cancelled and not slow):
+            self.total_calls += 1
+            self.total_failures += failed
+            self.total_slow_calls += slow
+            if not probe:
+                # Kept so the local state machine is current if Redis goes away
+                self._calls.append((time.monotonic(), failed, slow))
+
+        try:
+            result = await self.store.record(
+                self.name,
+                failed=failed,
+                slow=slow,
+                probe=probe,
+                cancelled=cancelled and not slow,
+                window_seconds=self.window_seconds,
+                minimum_calls=self.minimum_calls,
+                failure_rate_threshold=self.failure_rate_threshold,
+                slow_call_rate_threshold=self.slow_call_rate_threshold,
+                half_open_max_calls=self.half_open_max_calls,
+                open_seconds=self.open_seconds,
+            )
+        except Exception as e:
+            self.store.degrade(e)
+            return
+        if result is not None:
+            self._apply_shared(result)
+
+    def _apply_shared(self, shared: SharedState) -> None:
+        """Mirror the shared state locally (and cache it)."""
+        now = time.monotonic()
+        self._shared_seen = now
+        state = CircuitState(shared.state)
+        if state != self.state:
+            self._transition(state, shared.reason or "shared state")
+        if state == CircuitState.OPEN:
+            self._shared_open_until = now + shared.retry_after
+            self._opened_at = now - max(0.0, self.open_seconds - shared.retry_after)
+
+    def _before_call(self) -> bool:
+        """Admit or reject a call; returns True if it is a half-open probe."""
+        self._maybe_half_open()
+        if self.state == CircuitState.OPEN:
+            self.total_rejected += 1
+            raise CircuitOpenError(self.name, self.retry_after())
+        if self.state == CircuitState.HALF_OPEN:
+            if self._probes_in_flight >= self.half_open_max_calls:
+                self.total_rejected += 1
+                raise CircuitOpenError(self.name, 0.0)
+            self._probes_in_flight += 1
+            return True
+        return False
+
+    def _record(self, elapsed: float, failed: bool, probe: bool) -> None:
+        """Account for a finished call and update the state."""
+        slow = elapsed >= self.slow_call_seconds
+        now = time.monotonic()
+        self.total_calls += 1
+        self.total_failures += failed
+        self.total_slow_calls += slow
+
+        if probe:
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+            if self.state != CircuitState.HALF_OPEN:
+                return  # Another probe already decided
+            if failed or slow:
+                self._transition(
+                    CircuitState.OPEN, "probe failed" if failed else "probe slow"
+                )
+                return
+            self._probe_successes += 1
+            if self._probe_successes >= self.half_open_max_calls:
+                self._transition(CircuitState.CLOSED, "probes succeeded")
+            return
+
+        self._calls.append((now, failed, slow))
+        if self.state != CircuitState.CLOSED:
+            return
+        calls, failure_rate, slow_rate = self._window_rates(now)
+        if calls < self.minimum_calls:
+            return
+        if failure_rate >= self.failure_rate_threshold:
+            self._transition(CircuitState.OPEN, f"failure rate {failure_rate:.0%}")
+        elif slow_rate >= self.slow_call_rate_threshold:
+            self._transition(CircuitState.OPEN, f"slow-call rate {slow_rate:.0%}")
+
+    def _record_cancelled(self, elapsed: float, probe: bool) -> None:
+        """A cancelled call counts only if it was already slow."""
+        if elapsed >= self.slow_call_seconds:
+            self._record(elapsed, failed=False, probe=probe)
+        elif probe:
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+
+    def _window_rates(self, now: Optional[float] = None) -> Tuple[int, float, float]:
+        """Drop calls outside the window; return (calls, failure rate, slow rate)."""
+        now = time.monotonic() if now is None else now
+        horizon = now - self.window_seconds
+        while self._calls and self._calls[0][0] < horizon:
+            self._calls.popleft()
+        calls = len(self._calls)
+        if not calls:
+            return 0, 0.0, 0.0
+        failures = sum(1 for _, failed, _ in self._calls if failed)
+        slow = sum(1 for _, _, is_slow in self._calls if is_slow)
+        return calls, failures / calls, slow / calls
+
+    def _maybe_half_open(self) -> None:
+        """Move OPEN -> HALF_OPEN once the open period has passed."""
+        if (
+            self.state == CircuitState.OPEN
+            and time.monotonic() - self._opened_at >= self.open_seconds
+        ):
+            self._transition(CircuitState.HALF_OPEN, "open period elapsed")
+
+    def _transition(self, state: CircuitState, reason: str) -> None:
+        """Change state, reset per-state bookkeeping and record the transition."""
+        previous = self.state
+        self.state = state
+        if state == CircuitState.OPEN:
+            self._opened_at = time.monotonic()
+        if state == CircuitState.HALF_OPEN:
+            self._probes_in_flight = 0
+            self._probe_successes = 0
+        if state == CircuitState.CLOSED:
+            self._calls.clear()
+
+        key = f"{previous.value}->{state.value}"
+        self.transition_counts[key] = self.transition_counts.get(key, 0) + 1
+        self.transitions.append(
+            {
+                "from": previous.value,
+                "to": state.value,
+                "reason": reason,
+                "at": time.time(),
+            }
+        )
+        log = logger.warning if state == CircuitState.OPEN else logger.info
+        log(f"Circuit '{self.name}' {previous.value} -> {state.value} ({reason})")
+
+
+class CircuitBreakerRegistry:
+    """
+    One breaker per provider/model, created on first use.
+
+    Example:
+        breaker = circuit_breakers.get("anthropic:claude-3-haiku-20240307")
+    """
+
+    def __init__(self, store: Optional[RedisBreakerStore] = None, **defaults: Any):
+        """
+        Initialize registry.
+
+        Args:
+            store: Shared state store for all breakers (None = local only)
+            **defaults: Keyword arguments for every new ``AsyncCircuitBreaker``
+        """
+        self.store = store
+        self.defaults = defaults
+        self._breakers: Dict[str, AsyncCircuitBreaker] = {}
+
+    def get(self, name: str, **overrides: Any) -> AsyncCircuitBreaker:
+        """
+        Return the breaker for ``name``, creating it if needed.
+
+        Args:
+            name: Provider/model identifier
+            **overrides: Settings for a newly created breaker (e.g. a tighter
+                ``slow_call_seconds`` for classification calls)
+        """
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            breaker = AsyncCircuitBreaker(
+                name, store=self.store, **{**self.defaults, **overrides}
+            )
+            self._breakers[name] = breaker
+        return breaker
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Return the snapshots of all breakers."""
+        return [breaker.snapshot() for breaker in self._breakers.values()]
+
+    def prometheus_metrics(self) -> str:
+        """Render breaker state and counters in the Prometheus text format."""
+        lines = [
+            "# HELP circuit_breaker_state 1 for the breaker's current state",
+            "# TYPE circuit_breaker_state gauge",
+        ]
+        snapshots = self.snapshot()
+        for snap in snapshots:
+            for state in CircuitState:
+                value = 1 if snap["state"] == state.value else 0
+                lines.append(
+                    f'circuit_breaker_state{{name="{snap["name"]}",state="{state.value}"}} {value}'
+                )
+        for metric, key, kind in (
+            ("circuit_breaker_window_failure_rate", "failure_rate", "gauge"),
+            ("circuit_breaker_window_slow_call_rate", "slow_call_rate", "gauge"),
+        ):
+            lines += [f"# TYPE {metric} {kind}"]
+            lines += [
+                f'{metric}{{name="{snap["name"]}"}} {snap["window"][key]}'
+                for snap in snapshots
+            ]
+        for metric, key in (
+            ("circuit_breaker_calls_total", "calls"),
+            ("circuit_breaker_failures_total", "failures"),
+            ("circuit_breaker_slow_calls_total", "slow_calls"),
+            ("circuit_breaker_rejected_total", "rejected"),
+        ):
+            lines += [f"# TYPE {metric} counter"]
+            lines += [
+                f'{metric}{{name="{snap["name"]}"}} {snap["totals"][key]}'
+                for snap in snapshots
+            ]
+        lines += ["# TYPE circuit_breaker_transitions_total counter"]
+        for snap in snapshots:
+            for transition, count in snap["transition_counts"].items():
+                source, target = transition.split("->")
+                lines.append(
+                    f'circuit_breaker_transitions_total{{name="{snap["name"]}",'
+                    f'from="{source}",to="{target}"}} {count}'
+                )
+        return "\n".join(lines) + "\n"
+
+
+# Global breaker registry (one breaker per provider/model)
+circuit_breakers = CircuitBreakerRegistry(
+    store=(
+        RedisBreakerStore(
+            get_redis,
+            cache_ttl_seconds=settings.circuit_breaker_state_cache_ms / 1000,
+            retry_seconds=settings.circuit_breaker_redis_retry_seconds,
+        )
+        if settings.circuit_breaker_shared_state
+        else None
+    ),
+    window_seconds=settings.circuit_breaker_window_seconds,
+    minimum_calls=settings.circuit_breaker_minimum_calls,
+    failure_rate_threshold=settings.circuit_breaker_failure_rate,
+    slow_call_rate_threshold=settings.circuit_breaker_slow_call_rate,
+    slow_call_seconds=settings.circuit_breaker_slow_call_seconds,
+    open_seconds=settings.circuit_breaker_timeout,
+    half_open_max_calls=settings.circuit_breaker_half_open_calls,
+)
@@ -0,0 +1,302 @@
+"""Fleet-wide circuit breaker state in Redis.
+
+Each breaker is one Redis hash holding its state, the time it opened,
+half-open probe bookkeeping and per-second call/failure/slow-call buckets
+for the sliding window. Admission and result recording are Lua scripts, so
+every state transition is atomic across all workers and pods, and times
+come from the Redis server clock (no cross-host clock skew).
+
+Workers cache the last state they saw for ``cache_ttl_seconds``: a CLOSED
+breaker admits calls without a round trip, an OPEN one rejects them locally
+until its open period ends. Every recorded result refreshes the cache, so
+an outage discovered by one process is visible to the others on their next
+call or cache refresh.
+
+Redis errors put the store into a degraded mode for ``retry_seconds``:
+breakers use their process-local state machine until Redis is retried.
+"""
+
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# KEYS[1] = breaker hash; ARGV = open_ms, half_open_max
+# Returns {state, retry_after_ms, admitted}
+ACQUIRE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local state = redis.call('HGET', KEYS[1], 'state') or 'closed'
+if state == 'open' then
+  local opened = tonumber(redis.call('HGET', KEYS[1], 'opened_at') or '0')
+  local remaining = opened + tonumber(ARGV[1]) - now
+  if remaining > 0 then
+    return {'open', remaining, 0}
+  end
+  state = 'half_open'
+  redis.call('HSET', KEYS[1], 'state', state, 'probes', 0, 'successes', 0)
+end
+if state == 'half_open' then
+  local probes = tonumber(redis.call('HGET', KEYS[1], 'probes') or '0')
+  if probes >= tonumber(ARGV[2]) then
+    return {'half_open', 0, 0}
+  end
+  redis.call('HINCRBY', KEYS[1], 'probes', 1)
+  return {'half_open', 0, 1}
+end
+return {'closed', 0, 1}
+"""
+
+# KEYS[1] = breaker hash
+# ARGV = failed, slow, probe, cancelled, window_ms, bucket_ms, minimum_calls,
+#        failure_rate, slow_call_rate, half_open_max, open_ms, key_ttl_ms
+# Returns {state, retry_after_ms, transition_reason}
+RECORD_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local key = KEYS[1]
+local failed = tonumber(ARGV[1]) == 1
+local slow = tonumber(ARGV[2]) == 1
+local probe = tonumber(ARGV[3]) == 1
+local cancelled = tonumber(ARGV[4]) == 1
+local open_ms = tonumber(ARGV[11])
+local state = redis.call('HGET', key, 'state') or 'closed'
+redis.call('PEXPIRE', key, tonumber(ARGV[12]))
+
+local function clear_buckets()
+  for _, field in ipairs(redis.call('HKEYS', key)) do
+    if string.sub(field, 1, 2) == 'b:' then
+      redis.call('HDEL', key, field)
+    end
+  end
+end
+
+local function open(reason)
+  redis.call('HSET', key, 'state', 'open', 'opened_at', now)
+  return {'open', open_ms, reason}
+end
+
+if probe then
+  if state ~= 'half_open' then
+    return {state, 0, ''}
+  end
+  local probes = redis.call('HINCRBY', key, 'probes', -1)
+  if probes < 0 then
+    redis.call('HSET', key, 'probes', 0)
+  end
+  if cancelled then
+    return {'half_open', 0, ''}
+  end
+  if failed then
+    return open('probe failed')
+  end
+  if slow then
+    return open('probe slow')
+  end
+  local successes = redis.call('HINCRBY', key, 'successes', 1)
+  if successes >= tonumber(ARGV[10]) then
+    clear_buckets()
+    redis.call('HSET', key, 'state', 'closed')
+    return {'closed', 0, 'probes succeeded'}
+  end
+  return {'half_open', 0, ''}
+end
+
+local bucket_ms = tonumber(ARGV[6])
+local buckets = math.ceil(tonumber(ARGV[5]) / bucket_ms)
+local bucket = math.floor(now / bucket_ms)
+local prefix = 'b:' .. bucket .. ':'
+local first_in_bucket = redis.call('HINCRBY', key, prefix .. 'c', 1) == 1
+if failed then redis.call('HINCRBY', key, prefix .. 'f', 1) end
+if slow then redis.call('HINCRBY', key, prefix .. 's', 1) end
+if first_in_bucket then
+  -- New bucket: drop every bucket that left the window (including ones
+  -- skipped during traffic gaps, which an exact-age HDEL would never hit)
+  local oldest = bucket - buckets + 1
+  for _, field in ipairs(redis.call('HKEYS', key)) do
+    local b = tonumber(string.match(field, '^b:(%-?%d+):'))
+    if b and b < oldest then
+      redis.call('HDEL', key, field)
+    end
+  end
+end
+
+if state ~= 'closed' then
+  local remaining = 0
+  if state == 'open' then
+    local opened = tonumber(redis.call('HGET', key, 'opened_at') or '0')
+    remaining = math.max(0, opened + open_ms - now)
+  end
+  return {state, remaining, ''}
+end
+
+local calls, failures, slow_calls = 0, 0, 0
+for b = bucket - buckets + 1, bucket do
+  local p = 'b:' .. b .. ':'
+  local v = redis.call('HMGET', key, p .. 'c', p .. 'f', p .. 's')
+  calls = calls + (tonumber(v[1]) or 0)
+  failures = failures + (tonumber(v[2]) or 0)
+  slow_calls = slow_calls + (tonumber(v[3]) or 0)
+end
+if calls >= tonumber(ARGV[7]) then
+  if failures / calls >= tonumber(ARGV[8]) then
+    return open('failure rate')
+  end
+  if slow_calls / calls >= tonumber(ARGV[9]) then
+    return open('slow-call rate')
+  end
+end
+return {'closed', 0, ''}
+"""
+
+
+@dataclass
+class SharedState:
+    """Breaker state as last seen in Redis."""
+
+    state: str
+    retry_after: float = 0.0  # Seconds until probing (OPEN only)
+    admitted: bool = True
+    reason: str = ""  # Set when this call caused a transition
+
+
+class RedisBreakerStore:
+    """
+    Shared breaker state for all processes using the same Redis.
+
+    Example:
+        store = RedisBreakerStore(get_redis)
+        registry = CircuitBreakerRegistry(store=store)
+    """
+
+    def __init__(
+        self,
+        client_factory: Callable[[], Optional[Any]],
+        prefix: str = "trimind:circuit:",
+        cache_ttl_seconds: float = 0.05,
+        retry_seconds: float = 5.0,
+        bucket_seconds: float = 1.0,
+    ):
+        """
+        Initialize store.
+
+        Args:
+            client_factory: Returns the ``redis.asyncio`` client (or None)
+            prefix: Key prefix of the breaker hashes
+            cache_ttl_seconds: How long a worker trusts the last state it saw
+            retry_seconds: Local-only period after a Redis error
+            bucket_seconds: Granularity of the sliding-window buckets
+        """
+        self.client_factory = client_factory
+        self.prefix = prefix
+        self.cache_ttl_seconds = cache_ttl_seconds
+        self.retry_seconds = retry_seconds
+        self.bucket_seconds = bucket_seconds
+        self._degraded_until = 0.0
+        self.errors = 0
+        self._client: Optional[Any] = None
+        self._acquire: Any = None
+        self._record: Any = None
+
+    def available(self) -> bool:
+        """False while degraded after a Redis error."""
+        return time.monotonic() >= self._degraded_until
+
+    def status(self) -> Dict[str, Any]:
+        """Return backend availability for breaker snapshots."""
+        return {
+            "backend": "redis",
+            "connected": self._client is not None,
+            "available": self.available(),
+            "errors": self.errors,
+        }
+
+    def degrade(self, error: Exception) -> None:
+        """Fall back to local breaker state for ``retry_seconds``."""
+        self.errors += 1
+        if self.available():
+            logger.warning(
+                f"Circuit breaker store unavailable, using local state for "
+                f"{self.retry_seconds}s: {str(error)}"
+            )
+        self._degraded_until = time.monotonic() + self.retry_seconds
+
+    async def acquire(
+        self, name: str, open_seconds: float, half_open_max_calls: int
+    ) -> Optional[SharedState]:
+        """
+        Atomically admit a call (moving OPEN -> HALF_OPEN when due).
+
+        Returns:
+            Shared state, or None if Redis is not configured
+
+        Raises:
+            Exception: Redis errors (callers degrade to local state)
+        """
+        if not self._scripts():
+            return None
+        state, retry_ms, admitted = await self._acquire(
+            keys=[self.prefix + name],
+            args=[int(open_seconds * 1000), half_open_max_calls],
+        )
+        return SharedState(
+            state=state, retry_after=int(retry_ms) / 1000, admitted=bool(admitted)
+        )
+
+    async def record(
+        self,
+        name: str,
+        failed: bool,
+        slow: bool,
+        probe: bool,
+        cancelled: bool,
+        window_seconds: float,
+        minimum_calls: int,
+        failure_rate_threshold: float,
+        slow_call_rate_threshold: float,
+        half_open_max_calls: int,
+        open_seconds: float,
+    ) -> Optional[SharedState]:
+        """
+        Atomically record a call result and apply the resulting transition.
+
+        Returns:
+            Shared state after the call, or None if Redis is not configured
+
+        Raises:
+            Exception: Redis errors (callers degrade to local state)
+        """
+        if not self._scripts():
+            return None
+        key_ttl_ms = int(max(window_seconds, open_seconds) * 1000 * 10)
+        state, retry_ms, reason = await self._record(
+            keys=[self.prefix + name],
+            args=[
+                int(failed),
+                int(slow),
+                int(probe),
+                int(cancelled),
+                int(window_seconds * 1000),
+                int(self.bucket_seconds * 1000),
+                minimum_calls,
+                failure_rate_threshold,
+                slow_call_rate_threshold,
+                half_open_max_calls,
+                int(open_seconds * 1000),
+                key_ttl_ms,
+            ],
+        )
+        return SharedState(state=state, retry_after=int(retry_ms) / 1000, reason=reason)
+
+    def _scripts(self) -> bool:
+        """Bind the Lua scripts (EVALSHA with reload) to the current client."""
+        client = self.client_factory()
+        if client is None:
+            return False
+        if client is not self._client:
+            self._client = client
+            self._acquire = client.register_script(ACQUIRE_SCRIPT)
+            self._record = client.register_script(RECORD_SCRIPT)
+        return True
@@ -0,0 +1,305 @@
+"""Prompt compression service shared by the compression and jobs routers.
+
+All LLMLingua-2 calls go through this service so that concurrent requests are
+micro-batched into a single batched inference instead of each running its own
+transformer forward pass. Results are served from the content-addressed
+compression cache when the same prompt was compressed before.
+
+Very long prompts can instead be split on paragraph/sentence boundaries and
+compressed chunk-by-chunk in parallel across the inference workers, with the
+compressed chunks streamed back in order (see ``compress_stream``).
+"""
+
+import asyncio
+import logging
+import math
+import re
+import time
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+from app.config import settings
+from app.models import LLMLinguaModel
+from app.services.admission import admission_controller
+from app.services.compression_cache import (
+    CompressionCache,
+    compression_cache,
+    make_compression_key,
+)
+from app.services.compression_gate import compression_gate
+from app.services.inference_executor import inference_executor
+from app.services.micro_batcher import MicroBatcher
+
+logger = logging.getLogger(__name__)
+
+# Requests are only batched together when they share rate and force_tokens
+BatchKey = Tuple[float, Tuple[str, ...]]
+
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?;])\s+")
+
+
+def _split_words(text: str, max_chars: int) -> List[str]:
+    """Hard-split an over-long sentence on whitespace."""
+    parts: List[str] = []
+    current = ""
+    for word in text.split():
+        if current and len(current) + 1 + len(word) > max_chars:
+            parts.append(current)
+            current = word
+        else:
+            current = f"{current} {word}" if current else word
+    if current:
+        parts.append(current)
+    return parts
+
+
+def split_prompt(prompt: str, max_chars: int) -> List[str]:
+    """
+    Split a prompt into chunks of at most ~``max_chars`` characters.
+
+    Splits on paragraph boundaries first, then on sentence boundaries, and only
+    on whitespace for sentences longer than ``max_chars``. Words are never cut,
+    so force tokens always stay intact inside one chunk. Consecutive pieces are
+    packed back together up to the size limit.
+
+    Args:
+        prompt: Text to split
+        max_chars: Target maximum chunk size
+
+    Returns:
+        Non-empty chunks in original order
+    """
+    # (separator to use before this piece, piece text)
+    pieces: List[Tuple[str, str]] = []
+    for paragraph in _PARAGRAPH_BREAK.split(prompt):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        separator = "\n\n"
+        sentences = (
+            [paragraph]
+            if len(paragraph) <= max_chars
+            else _SENTENCE_BREAK.split(paragraph)
+        )
+        for sentence in sentences:
+            for part in (
+                [sentence]
+                if len(sentence) <= max_chars
+                else _split_words(sentence, max_chars)
+            ):
+                pieces.append((separator, part))
+                separator = " "
+
+    chunks: List[str] = []
+    current = ""
+    for separator, piece in pieces:
+        if current and len(current) + len(separator) + len(piece) > max_chars:
+            chunks.append(current)
+            current = piece
+        else:
+            current = f"{current}{separator}{piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class CompressionService:
+    """
+    Async facade over LLMLingua-2 with result caching and micro-batching.
+
+    Example:
+        compressed = await compression_service.compress(
+            "You are a helpful assistant...", rate=0.5
+        )
+    """
+
+    def __init__(self, cache: Optional[CompressionCache] = None):
+        """
+        Initialize the micro-batcher from settings.
+
+        Args:
+            cache: Result cache (default: global cache if COMPRESSION_CACHE_ENABLED)
+        """
+        if cache is None and settings.compression_cache_enabled:
+            cache = compression_cache
+        self.cache = cache
+        self.batcher: MicroBatcher[BatchKey, str, str] = MicroBatcher(
+            self._compress_batch,
+            max_batch_size=settings.compression_batch_max_size,
+            max_wait_ms=settings.compression_batch_window_ms,
+            name="compression-batcher",
+        )
+
+    async def compress(
+        self, prompt: str, rate: float = 0.5, force_tokens: Optional[List[str]] = None
+    ) -> str:
+        """
+        Compress a single prompt.
+
+        Args:
+            prompt: Prompt to compress
+            rate: Target compression rate
+            force_tokens: Tokens that must be preserved
+
+        Returns:
+            Compressed prompt text
+        """
+        (compressed,) = await self.compress_many([prompt], rate, force_tokens)
+        return compressed
+
+    async def compress_many(
+        self,
+        prompts: List[str],
+        rate: float = 0.5,
+        force_tokens: Optional[List[str]] = None,
+    ) -> List[str]:
+        """
+        Compress several prompts sharing the same settings.
+
+        Args:
+            prompts: Prompts to compress
+            rate: Target compression rate
+            force_tokens: Tokens that must be preserved in every prompt
+
+        Returns:
+            Compressed prompts in input order
+        """
+        batch_key = self._key(rate, force_tokens)
+        return await self._compress_cached(
+            batch_key,
+            prompts,
+            lambda missing: self.batcher.submit_many(batch_key, missing),
+        )
+
+    async def compress_stream(
+        self,
+        prompt: str,
+        rate: float = 0.5,
+        force_tokens: Optional[List[str]] = None,
+        max_chunk_chars: Optional[int] = None,
+    ) -> AsyncIterator[Tuple[str, str]]:
+        """
+        Compress a long prompt chunk-by-chunk, yielding chunks in order.
+
+        Chunks are dispatched in contiguous groups directly to the inference
+        executor (bypassing the micro-batcher) so that the groups run in
+        parallel on different workers. Every chunk is compressed with the same
+        ``rate`` and ``force_tokens``; LLMLingua-2 already thresholds per
+        512-token chunk, so the overall rate and force-token guarantees match a
+        single-shot compression.
+
+        Args:
+            prompt: Prompt to compress
+            rate: Target compression rate
+            force_tokens: Tokens that must be preserved
+            max_chunk_chars: Chunk size (default: COMPRESSION_STREAM_CHUNK_CHARS)
+
+        Yields:
+            (original_chunk, compressed_chunk) tuples in prompt order
+        """
+        chunks = split_prompt(
+            prompt, max_chunk_chars or settings.compression_stream_chunk_chars
+        )
+        if not chunks:
+            return
+
+        batch_key = self._key(rate, force_tokens)
+        # Two waves per worker: early groups finish sooner -> lower time-to-first-chunk
+        group_size = max(1, math.ceil(len(chunks) / (2 * inference_executor.workers)))
+        groups = [
+            chunks[start : start + group_size]
+            for start in range(0, len(chunks), group_size)
+        ]
+        tasks = [
+            asyncio.create_task(
+                self._compress_cached(
+                    batch_key,
+                    group,
+                    lambda missing: self._compress_batch(batch_key, missing),
+                )
+            )
+            for group in groups
+        ]
+
+        try:
+            for group, task in zip(groups, tasks):
+                for original, compressed in zip(group, await task):
+                    yield original, compressed
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _compress_cached(
+        self,
+        batch_key: BatchKey,
+        prompts: List[str],
+        compress_missing: Callable[[List[str]], Awaitable[List[str]]],
+    ) -> List[str]:
+        """
+        Serve prompts from the cache and compress only the misses.
+
+        Args:
+            batch_key: Shared (rate, force_tokens)
+            prompts: Prompts to compress
+            compress_missing: Coroutine factory compressing uncached prompts
+
+        Returns:
+            Compressed prompts in input order
+        """
+        if self.cache is None:
+            return await compress_missing(prompts)
+
+        rate = batch_key[0]
+        cache_keys = [
+            make_compression_key(
+                prompt, rate, list(batch_key[1]), LLMLinguaModel.model_id()
+            )
+            for prompt in prompts
+        ]
+        results: List[Optional[str]] = [
+            await self.cache.get(cache_key) for cache_key in cache_keys
+        ]
+
+        # Compress each distinct missing prompt once
+        missing: Dict[str, str] = {}
+        for prompt, cache_key, result in zip(prompts, cache_keys, results):
+            if result is None:
+                missing.setdefault(cache_key, prompt)
+
+        fresh: Dict[str, str] = {}
+        if missing:
+            compressed = await compress_missing(list(missing.values()))
+            fresh = dict(zip(missing.keys(), compressed))
+            for cache_key, value in fresh.items():
+                await self.cache.set(cache_key, value)
+
+        return [
+            cached if cached is not None else fresh[cache_key]
+            for cache_key, cached in zip(cache_keys, results)
+        ]
+
+    @staticmethod
+    def _key(rate: float, force_tokens: Optional[List[str]]) -> BatchKey:
+        """Build the batch key for a request."""
+        return (rate, tuple(force_tokens or []))
+
+    @staticmethod
+    async def _compress_batch(key: BatchKey, prompts: List[str]) -> List[str]:
+        """Run one admitted, batched inference in the dedicated executor."""
+        rate, force_tokens = key
+        logger.debug(f"Compressing batch of {len(prompts)} prompts (rate={rate})")
+        # Bounded concurrency: excess batches queue briefly or are shed (429)
+        async with admission_controller.slot():
+            started = time.perf_counter()
+            compressed = await inference_executor.compress_batch(
+                prompts, rate, list(force_tokens)
+            )
+        # Feed live throughput into the compression gate's cost model
+        compression_gate.record_compression(
+            sum(compression_gate.estimate_tokens(prompt) for prompt in prompts),
+            time.perf_counter() - started,
+        )
+        return compressed
+
+
+# Global service instance
+compression_service = CompressionService()
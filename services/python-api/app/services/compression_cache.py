@@ -0,0 +1,129 @@
+"""Content-addressed cache for LLMLingua-2 compression results.
+
+Keys are a SHA-256 over (prompt, rate, force_tokens, model name), so repeated
+system prompts and pasted documents are compressed once. Lookups hit a bounded
+in-memory LRU first and fall back to an optional SQLite tier on disk.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+from typing import Any, Dict, List, Optional
+from app.config import settings
+from app.services.cache import SqliteCacheStore, TTLLRUCache
+
+logger = logging.getLogger(__name__)
+
+
+def make_compression_key(
+    prompt: str, rate: float, force_tokens: List[str], model_name: str
+) -> str:
+    """
+    Build the content hash identifying one compression result.
+
+    Args:
+        prompt: Original prompt
+        rate: Target compression rate
+        force_tokens: Tokens preserved in the output (order-insensitive)
+        model_name: Compression model identifier
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    payload = json.dumps(
+        [model_name, round(rate, 4), sorted(set(force_tokens)), prompt],
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CompressionCache:
+    """
+    Two-tier (memory + optional disk) compression result cache.
+
+    Example:
+        key = make_compression_key(prompt, 0.5, [], settings.llmlingua_model_name)
+        compressed = await compression_cache.get(key)
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 2048,
+        ttl_seconds: Optional[float] = 3600,
+        disk_path: Optional[str] = None,
+        disk_max_entries: int = 100000,
+    ):
+        """
+        Initialize cache tiers.
+
+        Args:
+            max_entries: In-memory LRU capacity
+            ttl_seconds: Entry lifetime for both tiers (None = no expiry)
+            disk_path: SQLite file for the persistent tier (None = memory only)
+            disk_max_entries: Persistent tier capacity
+        """
+        self.memory: TTLLRUCache[str] = TTLLRUCache(max_entries, ttl_seconds)
+        self.disk: Optional[SqliteCacheStore] = None
+        if disk_path:
+            try:
+                self.disk = SqliteCacheStore(disk_path, ttl_seconds, disk_max_entries)
+                logger.info(f"Compression cache disk tier: {disk_path}")
+            except Exception as e:
+                logger.warning(
+                    f"Compression cache disk tier disabled ({disk_path}): {str(e)}"
+                )
+
+    async def get(self, key: str) -> Optional[str]:
+        """Look up a result in memory, then on disk (promoting disk hits)."""
+        value = self.memory.get(key)
+        if value is not None or self.disk is None:
+            return value
+
+        try:
+            value = await asyncio.to_thread(self.disk.get, key)
+        except Exception as e:
+            logger.warning(f"Compression cache disk read failed: {str(e)}")
+            return None
+
+        if value is not None:
+            self.memory.set(key, value)
+        return value
+
+    async def set(self, key: str, value: str) -> None:
+        """Store a result in memory and (if enabled) on disk."""
+        self.memory.set(key, value)
+        if self.disk is not None:
+            try:
+                await asyncio.to_thread(self.disk.set, key, value)
+            except Exception as e:
+                logger.warning(f"Compression cache disk write failed: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return per-tier counters and sizes."""
+        data: Dict[str, Any] = {
+            "memory": {
+                **self.memory.stats.as_dict(),
+                "entries": len(self.memory),
+                "max_entries": self.memory.max_entries,
+            },
+            "disk": None,
+        }
+        if self.disk is not None:
+            data["disk"] = {
+                **self.disk.stats.as_dict(),
+                "entries": len(self.disk),
+                "max_entries": self.disk.max_entries,
+                "path": self.disk.path,
+            }
+        return data
+
+
+# Global cache instance
+compression_cache = CompressionCache(
+    max_entries=settings.compression_cache_max_entries,
+    ttl_seconds=settings.compression_cache_ttl_seconds,
+    disk_path=settings.compression_cache_disk_path,
+    disk_max_entries=settings.compression_cache_disk_max_entries,
+)
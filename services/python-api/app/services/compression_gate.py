@@ -0,0 +1,226 @@
+"""Cost-model-driven gating for prompt compression.
+
+Replaces the fixed "compress if > 500 chars at rate 0.5" rule. For each prompt
+the gate estimates:
+
+- compression CPU time, from the prompt's token count and the live measured
+  LLMLingua-2 throughput (EWMA of tokens/second), and
+- provider-side savings, from the target model's per-token prefill latency
+  and input price,
+
+then compresses only when the savings outweigh the cost, at the rate that
+maximizes the net benefit. Recent decisions are kept for tuning.
+"""
+
+import logging
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Rough chars-per-token ratio for English text (tokenizer-free estimate)
+CHARS_PER_TOKEN = 4.0
+
+
+@dataclass(frozen=True)
+class ModelCost:
+    """Provider-side cost of one input token for a target model."""
+
+    usd_per_1k_input_tokens: float
+    prefill_ms_per_token: float
+
+
+# Defaults; override per model with COMPRESSION_GATE_MODEL_COSTS (JSON)
+DEFAULT_MODEL_COSTS: Dict[str, ModelCost] = {
+    "gpt-4o": ModelCost(usd_per_1k_input_tokens=0.0025, prefill_ms_per_token=0.08),
+    "gpt-4o-mini": ModelCost(
+        usd_per_1k_input_tokens=0.00015, prefill_ms_per_token=0.04
+    ),
+    "claude-3-7-sonnet-20250219": ModelCost(
+        usd_per_1k_input_tokens=0.003, prefill_ms_per_token=0.1
+    ),
+    "gemini-2.0-flash-exp": ModelCost(
+        usd_per_1k_input_tokens=0.0001, prefill_ms_per_token=0.05
+    ),
+}
+FALLBACK_MODEL_COST = ModelCost(
+    usd_per_1k_input_tokens=0.0025, prefill_ms_per_token=0.08
+)
+
+
+@dataclass
+class GateDecision:
+    """One compression decision with the numbers that produced it."""
+
+    compress: bool
+    rate: Optional[float]
+    model: str
+    prompt_tokens: int
+    est_compression_ms: float
+    est_savings_ms: float
+    est_savings_usd: float
+    net_benefit_ms: float
+    reason: str
+    timestamp: float
+
+
+class CompressionGate:
+    """
+    Decide whether (and how hard) to compress a prompt.
+
+    Example:
+        decision = compression_gate.decide(prompt, model="gemini-2.0-flash-exp")
+        if decision.compress:
+            prompt = await compression_service.compress(prompt, rate=decision.rate)
+    """
+
+    def __init__(
+        self,
+        prior_tokens_per_second: float = 1500.0,
+        overhead_ms: float = 15.0,
+        ms_per_usd: float = 1_000_000.0,
+        rate_tiers: Optional[List[Tuple[int, float]]] = None,
+        model_costs: Optional[Dict[str, ModelCost]] = None,
+        history_size: int = 200,
+        ewma_alpha: float = 0.2,
+    ):
+        """
+        Initialize the cost model.
+
+        Args:
+            prior_tokens_per_second: Throughput assumed before any measurement
+            overhead_ms: Fixed per-call compression overhead (dispatch, IPC)
+            ms_per_usd: Value of one dollar saved, in milliseconds of latency
+            rate_tiers: (min_prompt_tokens, rate) candidates
+            model_costs: Per-model token price and prefill latency
+            history_size: Number of recent decisions to keep
+            ewma_alpha: Smoothing factor for throughput measurements
+        """
+        self.tokens_per_second = prior_tokens_per_second
+        self.overhead_ms = overhead_ms
+        self.ms_per_usd = ms_per_usd
+        self.rate_tiers = sorted(rate_tiers or [(0, 0.5)])
+        self.model_costs = {**DEFAULT_MODEL_COSTS, **(model_costs or {})}
+        self.ewma_alpha = ewma_alpha
+        self.measurements = 0
+        self.decisions: Deque[GateDecision] = deque(maxlen=history_size)
+
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        """Estimate the token count of a text."""
+        return max(1, round(len(text) / CHARS_PER_TOKEN))
+
+    def record_compression(self, tokens: int, seconds: float) -> None:
+        """
+        Feed a measured compression run into the throughput estimate.
+
+        Args:
+            tokens: Estimated tokens compressed
+            seconds: Wall time of the inference call
+        """
+        if tokens <= 0 or seconds <= 0:
+            return
+        observed = tokens / seconds
+        self.tokens_per_second = (
+            self.ewma_alpha * observed + (1 - self.ewma_alpha) * self.tokens_per_second
+        )
+        self.measurements += 1
+
+    def decide(self, prompt: str, model: str) -> GateDecision:
+        """
+        Decide whether to compress a prompt for a target model, and at what rate.
+
+        Args:
+            prompt: Prompt about to be sent to the provider
+            model: Target provider model
+
+        Returns:
+            The decision (also appended to the decision history)
+        """
+        tokens = self.estimate_tokens(prompt)
+        cost = self.model_costs.get(model, FALLBACK_MODEL_COST)
+        compression_ms = self.overhead_ms + tokens / self.tokens_per_second * 1000.0
+
+        best: Optional[Tuple[float, float, float, float]] = None
+        for min_tokens, rate in self.rate_tiers:
+            if tokens < min_tokens:
+                continue
+            saved_tokens = tokens * (1.0 - rate)
+            savings_ms = saved_tokens * cost.prefill_ms_per_token
+            savings_usd = saved_tokens / 1000.0 * cost.usd_per_1k_input_tokens
+            net_ms = savings_ms + savings_usd * self.ms_per_usd - compression_ms
+            if best is None or net_ms > best[3]:
+                best = (rate, savings_ms, savings_usd, net_ms)
+
+        if best is None:
+            decision = GateDecision(
+                compress=False,
+                rate=None,
+                model=model,
+                prompt_tokens=tokens,
+                est_compression_ms=round(compression_ms, 2),
+                est_savings_ms=0.0,
+                est_savings_usd=0.0,
+                net_benefit_ms=round(-compression_ms, 2),
+                reason="no eligible rate tier",
+                timestamp=time.time(),
+            )
+        else:
+            rate, savings_ms, savings_usd, net_ms = best
+            compress = net_ms > 0
+            decision = GateDecision(
+                compress=compress,
+                rate=rate if compress else None,
+                model=model,
+                prompt_tokens=tokens,
+                est_compression_ms=round(compression_ms, 2),
+                est_savings_ms=round(savings_ms, 2),
+                est_savings_usd=round(savings_usd, 6),
+                net_benefit_ms=round(net_ms, 2),
+                reason=(
+                    "savings exceed compression cost"
+                    if compress
+                    else "compression costs more than it saves"
+                ),
+                timestamp=time.time(),
+            )
+
+        self.decisions.append(decision)
+        logger.info(
+            f"Compression gate: compress={decision.compress} rate={decision.rate} "
+            f"tokens={tokens} model={model} net={decision.net_benefit_ms}ms"
+        )
+        return decision
+
+    def stats(self, last: int = 50) -> Dict[str, Any]:
+        """Return the cost model state and the most recent decisions."""
+        recent = list(self.decisions)[-last:] if last > 0 else []
+        compressed = sum(1 for d in self.decisions if d.compress)
+        return {
+            "tokens_per_second": round(self.tokens_per_second, 1),
+            "measurements": self.measurements,
+            "overhead_ms": self.overhead_ms,
+            "rate_tiers": self.rate_tiers,
+            "decisions_kept": len(self.decisions),
+            "compress_fraction": (
+                round(compressed / len(self.decisions), 3) if self.decisions else 0.0
+            ),
+            "recent_decisions": [asdict(d) for d in recent],
+        }
+
+
+# Global gate instance
+compression_gate = CompressionGate(
+    prior_tokens_per_second=settings.compression_gate_prior_tokens_per_second,
+    overhead_ms=settings.compression_gate_overhead_ms,
+    ms_per_usd=settings.compression_gate_ms_per_usd,
+    rate_tiers=settings.compression_gate_rate_tiers,
+    model_costs={
+        model: ModelCost(**values)
+        for model, values in settings.compression_gate_model_costs.items()
+    },
+    history_size=settings.compression_gate_history_size,
+)
@@ -0,0 +1,365 @@
+"""Publish/subscribe for live job events.
+
+Jobs publish events (job state changes, streamed reply deltas, the saved
+assistant message) on a channel per chat session; subscribers receive them
+through a bounded queue each. A subscriber that falls behind loses events
+instead of slowing the job down - the final ``message.completed`` event
+carries the full reply, so it can always resynchronize.
+
+Fan-out is in-process. With Redis configured, events are relayed through
+Redis pub/sub instead, so a subscriber connected to one worker sees jobs
+processed by any worker or pod. Each process subscribes only to the channels
+its own subscribers listen on. Redis errors fall back to in-process delivery
+for ``retry_seconds``.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Callable, Dict, Optional, Set
+from app.config import settings
+from app.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """
+    One subscriber's queue on a channel.
+
+    Example:
+        subscription = event_bus.subscribe(session_id)
+        try:
+            async for event in subscription:
+                ...
+        finally:
+            event_bus.unsubscribe(subscription)
+    """
+
+    def __init__(self, channel: str, max_queue: int):
+        """
+        Initialize subscription.
+
+        Args:
+            channel: Channel name (session ID)
+            max_queue: Events buffered before new ones are dropped
+        """
+        self.channel = channel
+        self.queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(max_queue)
+        self.dropped = 0
+
+    def deliver(self, event: Dict[str, Any]) -> bool:
+        """Queue an event without blocking (False if the queue is full)."""
+        try:
+            self.queue.put_nowait(event)
+            return True
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+
+    async def get(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Wait for the next event.
+
+        Raises:
+            asyncio.TimeoutError: If no event arrived within ``timeout``
+        """
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def __aiter__(self) -> "Subscription":
+        """Iterate over events as they arrive."""
+        return self
+
+    async def __anext__(self) -> Dict[str, Any]:
+        """Return the next event."""
+        return await self.queue.get()
+
+
+class RedisEventRelay:
+    """
+    Relay events between processes through Redis pub/sub.
+
+    The relay keeps the set of channels this process wants. After a Redis
+    error it delivers in-process only, and the next publish or watch after
+    ``retry_seconds`` re-subscribes all of them.
+
+    Example:
+        bus = EventBus(relay=RedisEventRelay(get_redis))
+    """
+
+    def __init__(
+        self,
+        client_factory: Callable[[], Optional[Any]],
+        prefix: str = "trimind:events:",
+        retry_seconds: float = 5.0,
+    ):
+        """
+        Initialize relay.
+
+        Args:
+            client_factory: Returns the ``redis.asyncio`` client (or None)
+            prefix: Pub/sub channel prefix
+            retry_seconds: In-process-only period after a Redis error
+        """
+        self.client_factory = client_factory
+        self.prefix = prefix
+        self.retry_seconds = retry_seconds
+        self.errors = 0
+        self._deliver: Optional[Callable[[str, Dict[str, Any]], Any]] = None
+        self._degraded_until = 0.0
+        self._client: Optional[Any] = None
+        self._pubsub: Optional[Any] = None
+        self._listener: Optional["asyncio.Task[None]"] = None
+        self._wanted: Set[str] = set()
+        self._watched: Set[str] = set()
+
+    def bind(self, deliver: Callable[[str, Dict[str, Any]], Any]) -> None:
+        """Set the callback that receives relayed events (the bus's ``deliver``)."""
+        self._deliver = deliver
+
+    def available(self) -> bool:
+        """False while degraded after a Redis error."""
+        return time.monotonic() >= self._degraded_until
+
+    def watching(self, channel: str) -> bool:
+        """True if this process receives the channel's events from Redis."""
+        return channel in self._watched
+
+    async def publish(self, channel: str, event: Dict[str, Any]) -> bool:
+        """
+        Publish an event to every process watching the channel.
+
+        Returns:
+            False if Redis is not configured or unavailable (deliver locally)
+        """
+        client = await self._ensure()
+        if client is None:
+            return False
+        try:
+            await client.publish(self.prefix + channel, json.dumps(event))
+            return True
+        except Exception as e:
+            await self._degrade(e)
+            return False
+
+    async def watch(self, channel: str) -> None:
+        """Receive a channel's events from every process."""
+        self._wanted.add(channel)
+        if await self._ensure() is None or channel in self._watched:
+            return
+        assert self._pubsub is not None
+        try:
+            await self._pubsub.subscribe(self.prefix + channel)
+            self._watched.add(channel)
+        except Exception as e:
+            await self._degrade(e)
+
+    async def unwatch(self, channel: str) -> None:
+        """Stop receiving a channel's events."""
+        self._wanted.discard(channel)
+        if channel not in self._watched or self._pubsub is None:
+            return
+        self._watched.discard(channel)
+        try:
+            await self._pubsub.unsubscribe(self.prefix + channel)
+        except Exception as e:
+            await self._degrade(e)
+
+    async def close(self) -> None:
+        """Stop listening (on shutdown)."""
+        self._wanted.clear()
+        await self._reset()
+
+    def status(self) -> Dict[str, Any]:
+        """Return backend availability for bus stats."""
+        return {
+            "backend": "redis",
+            "connected": self._pubsub is not None,
+            "available": self.available(),
+            "watched_channels": len(self._watched),
+            "errors": self.errors,
+        }
+
+    async def _ensure(self) -> Optional[Any]:
+        """
+        Return the client, (re)subscribing the wanted channels when needed.
+
+        Returns:
+            Redis client, or None if not configured or degraded
+        """
+        client = self.client_factory() if self.available() else None
+        if client is None:
+            return None
+        if client is self._client and self._pubsub is not None:
+            return client
+        await self._reset()
+        try:
+            self._client = client
+            self._pubsub = client.pubsub()
+            if self._wanted:
+                await self._pubsub.subscribe(*(self.prefix + c for c in self._wanted))
+                self._watched = set(self._wanted)
+            self._listener = asyncio.create_task(self._listen(self._pubsub))
+        except Exception as e:
+            await self._degrade(e)
+            return None
+        return client
+
+    async def _listen(self, pubsub: Any) -> None:
+        """Pass relayed events to local subscribers until cancelled or failed."""
+        try:
+            while True:
+                if not pubsub.subscribed:
+                    # get_message needs a subscription; none yet or all removed
+                    await asyncio.sleep(0.1)
+                    continue
+                message = await pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=1.0
+                )
+                if message is None or message["type"] != "message":
+                    continue
+                if self._deliver is not None:
+                    channel = message["channel"][len(self.prefix) :]
+                    self._deliver(channel, json.loads(message["data"]))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await self._degrade(e)
+
+    async def _degrade(self, error: Exception) -> None:
+        """Fall back to in-process delivery for ``retry_seconds``."""
+        self.errors += 1
+        if self.available():
+            logger.warning(
+                f"Event relay unavailable, delivering in-process for "
+                f"{self.retry_seconds}s: {str(error)}"
+            )
+        self._degraded_until = time.monotonic() + self.retry_seconds
+        await self._reset()
+
+    async def _reset(self) -> None:
+        """Drop the listener and the pub/sub connection."""
+        listener, self._listener = self._listener, None
+        if listener is not None and listener is not asyncio.current_task():
+            listener.cancel()
+        pubsub, self._pubsub = self._pubsub, None
+        self._client = None
+        self._watched.clear()
+        if pubsub is not None:
+            try:
+                await pubsub.aclose()
+            except Exception as e:
+                logger.debug(f"Closing event relay pub/sub failed: {str(e)}")
+
+
+class EventBus:
+    """
+    Fan events out to the subscribers of a channel.
+
+    Example:
+        await event_bus.publish(session_id, {"type": "message.delta", ...})
+    """
+
+    def __init__(self, max_queue: int = 1000, relay: Optional[RedisEventRelay] = None):
+        """
+        Initialize bus.
+
+        Args:
+            max_queue: Per-subscriber buffer size
+            relay: Cross-process relay (None = in-process only)
+        """
+        self.max_queue = max_queue
+        self.relay = relay
+        if relay is not None:
+            relay.bind(self.deliver)
+        self._channels: Dict[str, Set[Subscription]] = {}
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+
+    async def subscribe(self, channel: str) -> Subscription:
+        """Start receiving events published on a channel (by any process)."""
+        subscription = Subscription(channel, self.max_queue)
+        subscribers = self._channels.setdefault(channel, set())
+        subscribers.add(subscription)
+        if self.relay is not None and len(subscribers) == 1:
+            await self.relay.watch(channel)
+        return subscription
+
+    async def unsubscribe(self, subscription: Subscription) -> None:
+        """Stop delivering events to a subscription."""
+        subscribers = self._channels.get(subscription.channel)
+        if subscribers is None:
+            return
+        subscribers.discard(subscription)
+        if not subscribers:
+            del self._channels[subscription.channel]
+            if self.relay is not None:
+                await self.relay.unwatch(subscription.channel)
+
+    async def publish(self, channel: str, event: Dict[str, Any]) -> int:
+        """
+        Publish an event to every current subscriber of a channel.
+
+        Args:
+            channel: Channel name (session ID)
+            event: JSON-serializable event
+
+        Returns:
+            Number of local subscribers the event was queued for directly
+            (0 when it was relayed through Redis)
+        """
+        self.published += 1
+        if self.relay is not None and await self.relay.publish(channel, event):
+            if self.relay.watching(channel) or channel not in self._channels:
+                return 0
+        return self.deliver(channel, event)
+
+    def deliver(self, channel: str, event: Dict[str, Any]) -> int:
+        """Queue an event for this process's subscribers of a channel."""
+        delivered = 0
+        for subscription in list(self._channels.get(channel, ())):
+            if subscription.deliver(event):
+                delivered += 1
+            else:
+                self.dropped += 1
+                if subscription.dropped == 1:
+                    logger.warning(
+                        f"Subscriber on {channel} is lagging - dropping events"
+                    )
+        self.delivered += delivered
+        return delivered
+
+    def subscriber_count(self, channel: Optional[str] = None) -> int:
+        """Number of subscribers (on one channel, or in total)."""
+        if channel is not None:
+            return len(self._channels.get(channel, ()))
+        return sum(len(subscribers) for subscribers in self._channels.values())
+
+    def stats(self) -> Dict[str, Any]:
+        """Return channel/subscriber counts and event counters."""
+        return {
+            "channels": len(self._channels),
+            "subscribers": self.subscriber_count(),
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "relay": self.relay.status() if self.relay is not None else None,
+        }
+
+    async def close(self) -> None:
+        """Stop relaying (on shutdown)."""
+        if self.relay is not None:
+            await self.relay.close()
+
+
+# Global event bus instance
+event_bus = EventBus(
+    max_queue=settings.event_bus_max_queue,
+    relay=(
+        RedisEventRelay(get_redis, retry_seconds=settings.event_bus_redis_retry_seconds)
+        if settings.event_bus_redis
+        else None
+    ),
+)
@@ -0,0 +1,366 @@
+"""Fallback chains for LLM calls: retry budget, decorrelated jitter, deadlines.
+
+A failed provider call used to fail the whole job. With a chain, the call
+moves on to the next provider/model:
+
+- Every attempt gets a timeout (``attempt_timeout``), capped by what is left
+  of the overall ``deadline``, so a hanging provider cannot eat the job's
+  latency SLO.
+- After a real failure (error or timeout) the next attempt waits a
+  decorrelated-jitter backoff, ``min(cap, uniform(base, 3 * previous))``,
+  which spreads retries of concurrent jobs instead of synchronizing them.
+- Retries after real failures draw from a per-process retry budget: at most
+  ``ratio`` of the recent calls (plus a small floor) may be retries, so
+  during an outage retries add at most ~10% load instead of multiplying it.
+- Entries whose circuit breaker is open, whose rate limit has no turn, or
+  whose provider is not configured are skipped at once - no call was made,
+  so there is nothing to back off from and no budget is spent.
+
+Each attempt is recorded (outcome, error, elapsed, backoff) and returned
+with the result; aggregate counters are exposed on ``/providers/stats``.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+from app.config import settings
+from app.services.circuit_breaker import CircuitOpenError
+from app.services.rate_limiter import RateLimitExceeded
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Outcomes after which the next attempt backs off and spends retry budget
+FAILED_OUTCOMES = ("error", "timeout")
+
+# Attempts enforce their own timeout; the runner cancels them only this much
+# later (attempts that ignore it)
+TIMEOUT_GRACE_SECONDS = 0.5
+
+
+@dataclass
+class Attempt:
+    """One step of a fallback chain."""
+
+    provider: str
+    model: Optional[str]
+    outcome: str  # ok | error | timeout | circuit_open | rate_limited | unavailable
+    elapsed_ms: float
+    backoff_ms: float = 0.0
+    error: Optional[str] = None
+
+
+class FallbackExhausted(Exception):
+    """Every entry of a fallback chain failed (or the deadline/budget ran out)."""
+
+    def __init__(self, attempts: List[Attempt], reason: str):
+        """
+        Initialize error.
+
+        Args:
+            attempts: Attempts made, in order
+            reason: Why the chain stopped
+        """
+        summary = "; ".join(
+            f"{a.provider}:{a.model or 'default'} {a.outcome}" for a in attempts
+        )
+        super().__init__(f"All providers failed ({reason}): {summary}")
+        self.attempts = attempts
+        self.reason = reason
+
+
+class RetryBudget:
+    """
+    Cap retries at a share of recent traffic.
+
+    Example:
+        budget = RetryBudget(ratio=0.1)
+        budget.record_request()
+        if budget.try_spend():
+            ...  # retry
+    """
+
+    def __init__(
+        self,
+        ratio: float = 0.1,
+        min_per_second: float = 1.0,
+        window_seconds: float = 10.0,
+    ):
+        """
+        Initialize budget.
+
+        Args:
+            ratio: Retries allowed per request over the window
+            min_per_second: Retries always allowed (low traffic)
+            window_seconds: Sliding window length
+        """
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.window_seconds = window_seconds
+        self._requests: Deque[float] = deque()
+        self._retries: Deque[float] = deque()
+        self.rejected = 0
+
+    def record_request(self) -> None:
+        """Count one first attempt."""
+        self._requests.append(time.monotonic())
+
+    def try_spend(self) -> bool:
+        """Take one retry from the budget if any is left."""
+        now = time.monotonic()
+        self._prune(now)
+        allowed = self.min_per_second * self.window_seconds + self.ratio * len(
+            self._requests
+        )
+        if len(self._retries) + 1 > allowed:
+            self.rejected += 1
+            return False
+        self._retries.append(now)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """Return configuration and window counts."""
+        self._prune(time.monotonic())
+        return {
+            "ratio": self.ratio,
+            "min_per_second": self.min_per_second,
+            "window_seconds": self.window_seconds,
+            "requests": len(self._requests),
+            "retries": len(self._retries),
+            "rejected": self.rejected,
+        }
+
+    def _prune(self, now: float) -> None:
+        """Drop entries older than the window."""
+        cutoff = now - self.window_seconds
+        for samples in (self._requests, self._retries):
+            while samples and samples[0] < cutoff:
+                samples.popleft()
+
+
+class DecorrelatedJitter:
+    """
+    Backoff delays ``min(cap, uniform(base, 3 * previous))``.
+
+    Example:
+        backoff = DecorrelatedJitter(base=0.1, cap=2.0)
+        await asyncio.sleep(backoff.next())
+    """
+
+    def __init__(self, base: float, cap: float, rng: Optional[random.Random] = None):
+        """
+        Initialize backoff (one instance per request).
+
+        Args:
+            base: Minimum delay in seconds
+            cap: Maximum delay in seconds
+            rng: Random source (tests)
+        """
+        self.base = base
+        self.cap = cap
+        self.previous = base
+        self._rng = rng or random.Random()
+
+    def next(self) -> float:
+        """Return the next delay."""
+        self.previous = min(self.cap, self._rng.uniform(self.base, self.previous * 3))
+        return self.previous
+
+
+class FallbackRunner:
+    """
+    Run a call along a chain of providers until one succeeds.
+
+    Example:
+        result, attempts = await fallback_runner.run(
+            [("google", None), ("openai", "gpt-4o-mini")],
+            lambda provider, model, timeout: call(provider, model, timeout),
+            attempt_timeout=20, deadline=45,
+        )
+    """
+
+    def __init__(
+        self,
+        budget: Optional[RetryBudget] = None,
+        backoff_base_seconds: float = 0.1,
+        backoff_cap_seconds: float = 2.0,
+    ):
+        """
+        Initialize runner.
+
+        Args:
+            budget: Retry budget shared by all chains (default: new budget)
+            backoff_base_seconds: Decorrelated jitter base
+            backoff_cap_seconds: Decorrelated jitter cap
+        """
+        self.budget = budget or RetryBudget()
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_cap_seconds = backoff_cap_seconds
+        self.requests = 0
+        self.fallback_successes = 0  # Answered by a later entry of the chain
+        self.exhausted = 0
+        self.outcomes: Dict[str, int] = {}
+
+    async def run(
+        self,
+        chain: List[Tuple[str, Optional[str]]],
+        attempt: Callable[[str, Optional[str], Optional[float]], Awaitable[T]],
+        attempt_timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
+    ) -> Tuple[T, List[Attempt]]:
+        """
+        Call ``attempt(provider, model, timeout)`` for each entry until one succeeds.
+
+        The attempt gives up by raising ``asyncio.TimeoutError`` after
+        ``timeout`` seconds (None: no limit). Timing out inside the attempt,
+        rather than being cancelled from outside, lets the provider call fail
+        where the circuit breaker and routing policy record it.
+
+        Args:
+            chain: (provider, model or None) entries, primary first
+            attempt: Makes one call
+            attempt_timeout: Seconds per attempt (None: no per-attempt limit)
+            deadline: Seconds for the whole chain, backoffs included
+
+        Returns:
+            (result, attempts)
+
+        Raises:
+            FallbackExhausted: If no entry succeeded within deadline and budget
+        """
+        started = time.monotonic()
+        backoff = DecorrelatedJitter(
+            self.backoff_base_seconds, self.backoff_cap_seconds
+        )
+        attempts: List[Attempt] = []
+        last_error: Optional[BaseException] = None
+        reason = "all failed"
+        self.requests += 1
+        self.budget.record_request()
+
+        for provider, model in chain:
+            delay = 0.0
+            if attempts and attempts[-1].outcome in FAILED_OUTCOMES:
+                if not self.budget.try_spend():
+                    reason = "retry budget exhausted"
+                    break
+                delay = backoff.next()
+            remaining = (
+                deadline - (time.monotonic() - started)
+                if deadline is not None
+                else None
+            )
+            if remaining is not None and remaining <= delay:
+                reason = "deadline exceeded"
+                break
+            if delay:
+                await asyncio.sleep(delay)
+                if remaining is not None:
+                    remaining -= delay
+            timeout = min(
+                (t for t in (attempt_timeout, remaining) if t is not None), default=None
+            )
+
+            attempt_started = time.monotonic()
+            outcome, error = "ok", None
+            try:
+                result = await asyncio.wait_for(
+                    attempt(provider, model, timeout),
+                    None if timeout is None else timeout + TIMEOUT_GRACE_SECONDS,
+                )
+            except asyncio.TimeoutError as e:
+                outcome, error, last_error = (
+                    "timeout",
+                    f"no answer in {timeout:.1f}s" if timeout else "timed out",
+                    e,
+                )
+            except CircuitOpenError as e:
+                outcome, error, last_error = "circuit_open", str(e), e
+            except RateLimitExceeded as e:
+                outcome, error, last_error = "rate_limited", str(e), e
+            except ValueError as e:
+                outcome, error, last_error = "unavailable", str(e), e
+            except Exception as e:
+                outcome, error, last_error = "error", str(e), e
+
+            attempts.append(
+                Attempt(
+                    provider=provider,
+                    model=model,
+                    outcome=outcome,
+                    elapsed_ms=round((time.monotonic() - attempt_started) * 1000, 1),
+                    backoff_ms=round(delay * 1000, 1),
+                    error=error,
+                )
+            )
+            self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+            if outcome == "ok":
+                if len(attempts) > 1:
+                    self.fallback_successes += 1
+                    logger.info(
+                        f"Fallback to {provider}:{model or 'default'} succeeded "
+                        f"after {len(attempts) - 1} failed attempt(s)"
+                    )
+                return result, attempts
+            logger.warning(
+                f"LLM attempt {provider}:{model or 'default'} failed ({outcome}): {error}"
+            )
+
+        self.exhausted += 1
+        raise FallbackExhausted(attempts, reason) from last_error
+
+    def stats(self) -> Dict[str, Any]:
+        """Return chain counters, attempt outcomes and the retry budget."""
+        return {
+            "requests": self.requests,
+            "fallback_successes": self.fallback_successes,
+            "exhausted": self.exhausted,
+            "outcomes": dict(self.outcomes),
+            "retry_budget": self.budget.stats(),
+        }
+
+
+def parse_chain_entry(entry: str) -> Tuple[str, Optional[str]]:
+    """
+    Split a "provider" or "provider:model" chain entry.
+
+    Args:
+        entry: Chain entry
+
+    Returns:
+        (provider, model or None for the provider's default)
+    """
+    provider, _, model = entry.partition(":")
+    return provider.strip().lower(), model.strip() or None
+
+
+def attempts_as_dicts(attempts: List[Attempt]) -> List[Dict[str, Any]]:
+    """Serialize attempts for responses and events."""
+    return [asdict(attempt) for attempt in attempts]
+
+
+# Global fallback runner instance (shared retry budget)
+fallback_runner = FallbackRunner(
+    budget=RetryBudget(
+        ratio=settings.llm_retry_budget_ratio,
+        min_per_second=settings.llm_retry_budget_min_per_second,
+        window_seconds=settings.llm_retry_budget_window_seconds,
+    ),
+    backoff_base_seconds=settings.llm_backoff_base_seconds,
+    backoff_cap_seconds=settings.llm_backoff_cap_seconds,
+)
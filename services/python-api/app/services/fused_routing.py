@@ -0,0 +1,122 @@
+"""Decide when intent classification can be skipped on the job critical path.
+
+The jobs pipeline classifies intent and then calls ``LLMRouter.route``. The
+classification only matters if it can change the provider, which
+``select_provider`` decides from a few keywords (code/creative/image). The
+intent classifier emits none of these, so for most messages the serial
+classification round trip changes nothing. In fused mode such jobs go straight
+to ``route`` and the intent is classified afterwards, off the critical path.
+
+Modes (``FUSED_ROUTING_MODE``):
+- ``auto``: fuse when no classifier intent changes the provider, or for
+  short greeting-like messages
+- ``always``: never classify before routing
+- ``never``: always classify before routing (previous behaviour)
+"""
+
+import logging
+import re
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+from app.config import settings
+from app.services.intent_cache import normalize_intent_text
+from app.services.intent_classifier import INTENTS
+from app.services.llm_router import LLMRouter
+
+logger = logging.getLogger(__name__)
+
+FUSED_MODES = ("auto", "always", "never")
+
+
+class FusedRoutingPolicy:
+    """
+    Rules for routing a job without classifying its intent first.
+
+    Example:
+        fuse, reason = fused_routing_policy.decide(message, llm_router)
+        if fuse:
+            provider = llm_router.select_provider()
+    """
+
+    def __init__(
+        self,
+        mode: str = "auto",
+        intents: Optional[Iterable[str]] = None,
+        greeting_pattern: str = "",
+        greeting_max_chars: int = 40,
+    ):
+        """
+        Initialize policy.
+
+        Args:
+            mode: "auto", "always" or "never"
+            intents: Labels the classifier can emit (default: router intents)
+            greeting_pattern: Regex matched against the normalized message
+            greeting_max_chars: Only messages up to this length count as greetings
+        """
+        if mode not in FUSED_MODES:
+            raise ValueError(f"mode must be one of {FUSED_MODES}, got {mode!r}")
+        self.mode = mode
+        self.intents = list(intents or INTENTS)
+        self.greeting = re.compile(greeting_pattern) if greeting_pattern else None
+        self.greeting_max_chars = greeting_max_chars
+        self._sensitive: Dict[type, Set[str]] = {}
+        self.counts: Dict[str, int] = {}
+
+    def provider_sensitive_intents(self, router: LLMRouter) -> Set[str]:
+        """Intents for which ``select_provider`` picks a non-default provider."""
+        key = type(router)
+        if key not in self._sensitive:
+            # Static rules only: the adaptive choice does not depend on intent
+            default = router.select_provider(adaptive=False)
+            self._sensitive[key] = {
+                intent
+                for intent in self.intents
+                if router.select_provider(intent=intent, adaptive=False) != default
+            }
+            logger.info(
+                f"Fused routing: provider-sensitive intents = "
+                f"{sorted(self._sensitive[key]) or 'none'}"
+            )
+        return self._sensitive[key]
+
+    def is_greeting(self, message: str) -> bool:
+        """Short greeting/acknowledgement-like message."""
+        if self.greeting is None or len(message) > self.greeting_max_chars:
+            return False
+        return self.greeting.fullmatch(normalize_intent_text(message)) is not None
+
+    def decide(self, message: str, router: LLMRouter) -> Tuple[bool, str]:
+        """
+        Decide whether to route without classifying first.
+
+        Args:
+            message: User message
+            router: Router whose ``select_provider`` would consume the intent
+
+        Returns:
+            (fuse, reason)
+        """
+        if self.mode == "never":
+            fuse, reason = False, "disabled"
+        elif self.mode == "always":
+            fuse, reason = True, "always"
+        elif self.is_greeting(message):
+            fuse, reason = True, "greeting"
+        elif not self.provider_sensitive_intents(router):
+            fuse, reason = True, "intent cannot change provider"
+        else:
+            fuse, reason = False, "intent may change provider"
+        self.counts[reason] = self.counts.get(reason, 0) + 1
+        return fuse, reason
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the mode and decision counts per reason."""
+        return {"mode": self.mode, "decisions": dict(self.counts)}
+
+
+# Global fused routing policy instance
+fused_routing_policy = FusedRoutingPolicy(
+    mode=settings.fused_routing_mode,
+    greeting_pattern=settings.fused_routing_greeting_pattern,
+    greeting_max_chars=settings.fused_routing_greeting_max_chars,
+)
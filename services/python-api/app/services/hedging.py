@@ -0,0 +1,300 @@
+"""Hedged requests between a primary and a fallback LLM.
+
+The primary is called first. If it has not answered after a hedge delay
+(by default the live p95 of its own latency), the fallback is started in
+parallel and the first valid answer wins; the slower call is cancelled. Only
+the slowest ~5% of requests pay for a second call, while the primary's tail
+latency is capped at roughly ``delay + fallback latency``.
+
+Latencies are tracked per model in a sliding window. A primary call that is
+cancelled after losing a race is recorded with its elapsed time as a lower
+bound, so cancelled stragglers keep the p95 (and thereby the hedge rate)
+from drifting down.
+"""
+
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, TypeVar
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class LatencyTracker:
+    """
+    Sliding-window latency samples per model.
+
+    Example:
+        tracker = LatencyTracker(window=200)
+        tracker.record("gpt-4o-mini", 0.42)
+        p95 = tracker.quantile("gpt-4o-mini", 0.95)
+    """
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        """
+        Initialize tracker.
+
+        Args:
+            window: Samples kept per model
+            min_samples: Samples required before quantiles are reported
+        """
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def record(self, model: str, seconds: float) -> None:
+        """Add one latency sample for a model."""
+        samples = self._samples.get(model)
+        if samples is None:
+            samples = self._samples[model] = deque(maxlen=self.window)
+        samples.append(seconds)
+
+    def quantile(self, model: str, q: float) -> Optional[float]:
+        """
+        Return the q-quantile (nearest rank) of a model's recent latencies.
+
+        Returns:
+            Latency in seconds, or None until ``min_samples`` are collected
+        """
+        samples = self._samples.get(model)
+        if not samples or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        rank = min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))
+        return ordered[rank]
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return sample count and p50/p95/p99 (ms) per model."""
+        data: Dict[str, Dict[str, Any]] = {}
+        for model, samples in self._samples.items():
+            data[model] = {"samples": len(samples)}
+            for name, q in (("p50_ms", 0.5), ("p95_ms", 0.95), ("p99_ms", 0.99)):
+                value = self.quantile(model, q)
+                data[model][name] = (
+                    round(value * 1000, 1) if value is not None else None
+                )
+        return data
+
+
+class HedgeFailed(Exception):
+    """Both the primary and the fallback call failed."""
+
+    def __init__(self, primary_error: BaseException, fallback_error: BaseException):
+        """Keep both underlying errors."""
+        super().__init__(f"primary: {primary_error}; fallback: {fallback_error}")
+        self.primary_error = primary_error
+        self.fallback_error = fallback_error
+
+
+class Hedger:
+    """
+    Run a primary call and hedge it with a fallback call after a delay.
+
+    Example:
+        result = await intent_hedger.run(
+            "gpt-4o-mini", lambda: classify_with_primary(text),
+            "claude-3-haiku-20240307", lambda: classify_with_fallback(text),
+        )
+    """
+
+    def __init__(
+        self,
+        tracker: Optional[LatencyTracker] = None,
+        quantile: float = 0.95,
+        delay_seconds: Optional[float] = None,
+        initial_delay_seconds: float = 1.0,
+        min_delay_seconds: float = 0.05,
+        max_hedge_ratio: float = 0.2,
+        enabled: bool = True,
+    ):
+        """
+        Initialize hedger.
+
+        Args:
+            tracker: Per-model latency samples (default: new tracker)
+            quantile: Primary latency quantile used as the hedge delay
+            delay_seconds: Fixed hedge delay (None = live quantile)
+            initial_delay_seconds: Delay until enough samples are collected
+            min_delay_seconds: Lower bound for the hedge delay
+            max_hedge_ratio: Upper bound on hedges fired / requests
+            enabled: When False the fallback only runs after the primary fails
+        """
+        self.tracker = tracker or LatencyTracker()
+        self.quantile = quantile
+        self.delay_seconds = delay_seconds
+        self.initial_delay_seconds = initial_delay_seconds
+        self.min_delay_seconds = min_delay_seconds
+        self.max_hedge_ratio = max_hedge_ratio
+        self.enabled = enabled
+
+        self.requests = 0
+        self.hedges_fired = 0
+        self.hedges_skipped = 0  # over the ratio budget
+        self.hedge_wins = 0  # fallback answered first after a hedge
+        self.failovers = 0  # primary failed before the hedge delay
+        self.failures = 0  # both calls failed
+
+    def hedge_delay(self, primary: str) -> float:
+        """Current delay (seconds) before the fallback is fired."""
+        if self.delay_seconds is not None:
+            return self.delay_seconds
+        measured = self.tracker.quantile(primary, self.quantile)
+        if measured is None:
+            return self.initial_delay_seconds
+        return max(self.min_delay_seconds, measured)
+
+    async def run(
+        self,
+        primary: str,
+        primary_call: Callable[[], Awaitable[T]],
+        fallback: str,
+        fallback_call: Callable[[], Awaitable[T]],
+    ) -> T:
+        """
+        Return the first successful result of the primary or the hedge.
+
+        Args:
+            primary: Primary model name (latency tracking key)
+            primary_call: Coroutine factory for the primary call
+            fallback: Fallback model name
+            fallback_call: Coroutine factory for the fallback call
+
+        Returns:
+            Result of whichever call succeeded first
+
+        Raises:
+            HedgeFailed: If both calls failed
+        """
+        self.requests += 1
+        primary_task = asyncio.ensure_future(
+            self._timed(primary, primary_call, time.monotonic())
+        )
+        try:
+            delay = self.hedge_delay(primary) if self.enabled else None
+            done, _ = await asyncio.wait({primary_task}, timeout=delay)
+
+            if done:
+                primary_error = primary_task.exception()
+                if primary_error is None:
+                    return primary_task.result()
+                self.failovers += 1
+                return await self._fallback_only(fallback, fallback_call, primary_error)
+
+            if not self._hedge_allowed():
+                self.hedges_skipped += 1
+                try:
+                    return await primary_task
+                except Exception as e:
+                    self.failovers += 1
+                    return await self._fallback_only(fallback, fallback_call, e)
+
+            self.hedges_fired += 1
+            logger.debug(f"Hedging {primary} with {fallback} after {delay}s")
+            return await self._race(primary_task, fallback, fallback_call)
+        finally:
+            if not primary_task.done():
+                primary_task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hedge counters, rates and per-model latency quantiles."""
+        return {
+            "enabled": self.enabled,
+            "requests": self.requests,
+            "hedges_fired": self.hedges_fired,
+            "hedges_skipped": self.hedges_skipped,
+            "hedge_wins": self.hedge_wins,
+            "hedge_fire_rate": (
+                round(self.hedges_fired / self.requests, 4) if self.requests else 0.0
+            ),
+            "hedge_win_rate": (
+                round(self.hedge_wins / self.hedges_fired, 4)
+                if self.hedges_fired
+                else 0.0
+            ),
+            "failovers": self.failovers,
+            "failures": self.failures,
+            "latency": self.tracker.stats(),
+        }
+
+    def _hedge_allowed(self) -> bool:
+        """Keep the share of doubled calls within ``max_hedge_ratio``."""
+        return self.hedges_fired < self.max_hedge_ratio * self.requests + 1
+
+    async def _timed(
+        self, model: str, call: Callable[[], Awaitable[T]], started: float
+    ) -> T:
+        """Await a call and record its latency (lower bound if cancelled)."""
+        try:
+            result = await call()
+        except asyncio.CancelledError:
+            self.tracker.record(model, time.monotonic() - started)
+            raise
+        self.tracker.record(model, time.monotonic() - started)
+        return result
+
+    async def _fallback_only(
+        self,
+        fallback: str,
+        fallback_call: Callable[[], Awaitable[T]],
+        primary_error: BaseException,
+    ) -> T:
+        """Classic failover after the primary failed."""
+        try:
+            return await self._timed(fallback, fallback_call, time.monotonic())
+        except Exception as fallback_error:
+            self.failures += 1
+            raise HedgeFailed(primary_error, fallback_error) from fallback_error
+
+    async def _race(
+        self,
+        primary_task: "asyncio.Future[T]",
+        fallback: str,
+        fallback_call: Callable[[], Awaitable[T]],
+    ) -> T:
+        """Wait for the first successful result of the two running calls."""
+        fallback_task = asyncio.ensure_future(
+            self._timed(fallback, fallback_call, time.monotonic())
+        )
+        pending = {primary_task, fallback_task}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                # exception() on every finished task also marks errors retrieved
+                winners = [task for task in done if task.exception() is None]
+                if winners:
+                    winner = primary_task if primary_task in winners else winners[0]
+                    if winner is fallback_task:
+                        self.hedge_wins += 1
+                    return winner.result()
+            self.failures += 1
+            primary_error = primary_task.exception()
+            fallback_error = fallback_task.exception()
+            assert primary_error is not None and fallback_error is not None
+            raise HedgeFailed(primary_error, fallback_error) from fallback_error
+        finally:
+            for task in (primary_task, fallback_task):
+                if not task.done():
+                    task.cancel()
+
+
+# Global hedger for the intent router
+intent_hedger = Hedger(
+    tracker=LatencyTracker(window=settings.intent_hedge_latency_window),
+    quantile=settings.intent_hedge_quantile,
+    delay_seconds=(
+        settings.intent_hedge_delay_ms / 1000
+        if settings.intent_hedge_delay_ms is not None
+        else None
+    ),
+    initial_delay_seconds=settings.intent_hedge_initial_delay_ms / 1000,
+    min_delay_seconds=settings.intent_hedge_min_delay_ms / 1000,
+    max_hedge_ratio=settings.intent_hedge_max_ratio,
+    enabled=settings.intent_hedging_enabled,
+)
@@ -0,0 +1,199 @@
+"""Incremental compression of session history.
+
+Every long message is compressed once and the result is stored next to the
+message row (``message_compressions``). Building the history for a new turn
+reuses the stored compressions, so only messages added since the previous
+turn are compressed and per-turn compression work stays constant as the
+session grows.
+
+A stored compression is keyed by the hash of (content, rate, compression
+model): edited messages, a changed rate or a new model invalidate it and it is
+recompressed on the next turn. Deleted messages drop their compression via
+``ON DELETE CASCADE``.
+
+Whether a message without a stored compression is compressed at all is up to
+the compression gate for the turn's target model: short messages, or cheap
+models whose token savings do not pay for the LLMLingua time, are sent as-is.
+Stored compressions are always reused - they cost nothing to send.
+"""
+
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional
+from app.config import settings
+from app.db_models import Message, MessageCompression
+from app.models import LLMLinguaModel
+from app.repositories.message_compression import MessageCompressionRepository
+from app.services.compression import CompressionService, compression_service
+from app.services.compression_cache import make_compression_key
+from app.services.compression_gate import CompressionGate, compression_gate
+
+logger = logging.getLogger(__name__)
+
+
+class HistoryCompressor:
+    """
+    Build provider-ready session history from cached per-message compressions.
+
+    Example:
+        repo = MessageCompressionRepository(session)
+        history = await history_compressor.compress_messages(
+            messages, repo, model="gpt-4o"
+        )
+        # [{"role": "user", "content": "..."}, {"role": "assistant", ...}]
+    """
+
+    def __init__(
+        self,
+        service: Optional[CompressionService] = None,
+        rate: float = 0.5,
+        min_chars: int = 500,
+        max_chars: int = 12000,
+        max_per_session: int = 200,
+        gate: Optional[CompressionGate] = None,
+    ):
+        """
+        Initialize compressor.
+
+        Args:
+            service: Compression service (default: global service)
+            rate: Compression rate for history messages
+            min_chars: Messages shorter than this are sent uncompressed
+            max_chars: Character budget for the returned history
+            max_per_session: Stored compressions kept per session
+            gate: Cost model deciding which new messages to compress
+                (default: global gate)
+        """
+        self.service = service or compression_service
+        self.rate = rate
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self.max_per_session = max_per_session
+        self.gate = gate or compression_gate
+
+    def content_hash(self, content: str) -> str:
+        """Identify a stored compression (content, rate and model)."""
+        return make_compression_key(content, self.rate, [], LLMLinguaModel.model_id())
+
+    async def compress_messages(
+        self,
+        messages: List[Message],
+        repo: MessageCompressionRepository,
+        model: Optional[str] = None,
+    ) -> List[Dict[str, str]]:
+        """
+        Replace long messages with their (cached) compressed form.
+
+        Only messages without a valid stored compression are compressed, in a
+        single batch; the results are stored for the following turns.
+
+        Args:
+            messages: Session messages in chronological order
+            repo: Repository for stored compressions
+            model: Target provider model; new compressions are limited to the
+                messages the compression gate approves for it (None: all)
+
+        Returns:
+            ``{"role", "content"}`` dicts, trimmed to the newest messages that
+            fit the character budget
+        """
+        long_messages = [m for m in messages if len(m.content) >= self.min_chars]
+        stored = await repo.get_for_messages([m.id for m in long_messages])
+
+        compressed: Dict[str, str] = {}
+        stale: List[Message] = []
+        for message in long_messages:
+            row = stored.get(message.id)
+            if row is not None and row.contentHash == self.content_hash(
+                message.content
+            ):
+                compressed[message.id] = row.compressedContent
+            elif model is None or self.gate.decide(message.content, model).compress:
+                stale.append(message)
+
+        reused = len(compressed)
+        if stale:
+            try:
+                fresh = await self.service.compress_many(
+                    [m.content for m in stale], rate=self.rate
+                )
+            except Exception as e:
+                # Send the originals this turn; the next turn retries
+                logger.warning(
+                    f"History compression failed (using originals): {str(e)}"
+                )
+            else:
+                await self._store(stale, fresh, stored, repo)
+                compressed.update((m.id, text) for m, text in zip(stale, fresh))
+
+        logger.debug(
+            f"History: {len(messages)} messages, {reused} "
+            f"compressions reused, {len(stale)} compressed"
+        )
+        history = [
+            {"role": m.role, "content": compressed.get(m.id, m.content)}
+            for m in messages
+        ]
+        return self._fit_budget(history)
+
+    async def invalidate_session(
+        self, session_id: str, repo: MessageCompressionRepository
+    ) -> int:
+        """Drop all stored compressions of a session (e.g. history rewritten)."""
+        return await repo.delete_by_session(session_id)
+
+    async def _store(
+        self,
+        messages: List[Message],
+        compressed: List[str],
+        stored: Dict[str, MessageCompression],
+        repo: MessageCompressionRepository,
+    ) -> None:
+        """Insert new compressions, overwrite invalidated ones, enforce the cap."""
+        rows: List[MessageCompression] = []
+        for message, text in zip(messages, compressed):
+            row = stored.get(message.id) or MessageCompression(
+                messageId=message.id, sessionId=message.sessionId
+            )
+            row.contentHash = self.content_hash(message.content)
+            row.compressedContent = text
+            row.originalChars = len(message.content)
+            row.compressedChars = len(text)
+            row.createdAt = datetime.utcnow()
+            rows.append(row)
+
+        try:
+            await repo.save_many(rows)
+            for session_id in {m.sessionId for m in messages}:
+                await repo.prune_session(session_id, self.max_per_session)
+        except Exception as e:
+            await repo.session.rollback()
+            logger.warning(f"Storing history compressions failed: {str(e)}")
+
+    def _fit_budget(self, history: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """
+        Keep the newest messages whose total length fits ``max_chars``.
+
+        The result never starts with an assistant turn (Anthropic rejects
+        conversations that do), so leading assistant messages are dropped too.
+        """
+        kept: List[Dict[str, str]] = []
+        total = 0
+        for entry in reversed(history):
+            total += len(entry["content"])
+            if total > self.max_chars:
+                break
+            kept.append(entry)
+        kept.reverse()
+        while kept and kept[0]["role"] == "assistant":
+            kept.pop(0)
+        return kept
+
+
+# Global history compressor instance
+history_compressor = HistoryCompressor(
+    rate=settings.history_compression_rate,
+    min_chars=settings.history_compression_min_chars,
+    max_chars=settings.history_max_chars,
+    max_per_session=settings.history_compression_max_per_session,
+)
@@ -0,0 +1,235 @@
+"""Dedicated executor for CPU-bound LLMLingua-2 inference.
+
+Model inference never runs on the event loop. By default it runs in a process
+pool, where each worker process loads the model once in its initializer, so
+compression scales across cores without contending for the GIL. A thread pool
+mode is available for memory-constrained deployments (one shared model copy).
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+from app.config import settings
+from app.models import LLMLinguaModel
+
+logger = logging.getLogger(__name__)
+
+R = TypeVar("R")
+
+
+def _init_worker(intra_op_threads: Optional[int] = None) -> None:
+    """Process pool initializer: load the model once per worker process."""
+    try:
+        LLMLinguaModel.get_instance(intra_op_threads)
+        logger.info(f"[Inference worker {os.getpid()}] LLMLingua-2 model loaded")
+    except Exception as e:
+        # Keep the pool usable - the first task retries the load and surfaces the error
+        logger.error(f"[Inference worker {os.getpid()}] Model load failed: {str(e)}")
+
+
+def _worker_ready(intra_op_threads: Optional[int] = None) -> int:
+    """Ensure the model is loaded in the current worker and return its PID."""
+    LLMLinguaModel.get_instance(intra_op_threads)
+    return os.getpid()
+
+
+class InferenceExecutor:
+    """
+    Awaitable front-end for a process (default) or thread pool running inference.
+
+    Example:
+        compressed = await inference_executor.compress_batch(
+            ["long prompt..."], rate=0.5, force_tokens=[]
+        )
+    """
+
+    def __init__(
+        self,
+        mode: Optional[str] = None,
+        workers: Optional[int] = None,
+        intra_op_threads: Optional[int] = None,
+    ):
+        """
+        Initialize executor configuration (the pool itself is created lazily).
+
+        Args:
+            mode: "process" or "thread" (default: INFERENCE_EXECUTOR_MODE)
+            workers: Number of workers (default: INFERENCE_WORKERS)
+            intra_op_threads: Torch threads of a model loaded by this executor
+                (default: ``inference_threads()``)
+        """
+        self.mode = (mode or settings.inference_executor_mode).lower()
+        if self.mode not in ("process", "thread"):
+            raise ValueError(f"Unsupported inference executor mode: {self.mode}")
+        self.workers = max(1, workers or settings.inference_workers)
+        self.intra_op_threads = intra_op_threads
+        self.ready = False
+        self._executor: Optional[Executor] = None
+
+        # Shared model load: every caller awaits the same task
+        self._load_task: Optional["asyncio.Task[None]"] = None
+        self._load_loop: Optional[asyncio.AbstractEventLoop] = None
+        self.load_phase = "not_started"  # not_started -> loading -> ready | failed
+        self._load_started: Optional[float] = None
+        self._load_seconds: Optional[float] = None
+        self.load_error: Optional[str] = None
+
+    def _get_executor(self) -> Executor:
+        """Create the underlying pool on first use."""
+        if self._executor is None:
+            if self.mode == "process":
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    # spawn: never fork a process that already holds torch threads
+                    mp_context=multiprocessing.get_context(
+                        settings.inference_start_method
+                    ),
+                    initializer=_init_worker,
+                    initargs=(self.intra_op_threads,),
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="inference"
+                )
+            logger.info(
+                f"Inference executor started ({self.mode} pool, {self.workers} workers)"
+            )
+        return self._executor
+
+    async def run(self, fn: Callable[..., R], *args: Any) -> R:
+        """
+        Run a picklable callable in the pool and await its result.
+
+        Args:
+            fn: Module-level function (or classmethod) to execute
+            *args: Positional arguments for ``fn``
+
+        Returns:
+            Return value of ``fn``
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self._get_executor(), partial(fn, *args))
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed) - replace the pool for future calls
+            logger.error("Inference process pool broken - recreating on next call")
+            self.shutdown(wait=False)
+            raise
+
+    async def compress_batch(
+        self, prompts: List[str], rate: float, force_tokens: List[str]
+    ) -> List[str]:
+        """Compress a batch of prompts in a worker (waiting for the model load)."""
+        if not self.ready:
+            await self.warmup()
+        return await self.run(
+            LLMLinguaModel.compress_batch, prompts, rate, force_tokens
+        )
+
+    async def warmup(self) -> None:
+        """
+        Start all workers and wait until each has loaded the model.
+
+        Concurrent callers (startup task, early requests) share one load. A
+        failed load is retried by the next caller.
+
+        Raises:
+            Exception: If the model cannot be loaded
+        """
+        loop = asyncio.get_running_loop()
+        task = self._load_task
+        if (
+            task is None
+            or self._load_loop is not loop
+            or (task.done() and self.load_phase == "failed")
+        ):
+            self._load_loop = loop
+            task = self._load_task = loop.create_task(self._load())
+        # Shielded: a cancelled waiter must not abort the load for the others
+        await asyncio.shield(task)
+
+    async def _load(self) -> None:
+        """Load the model in every worker, tracking phase and elapsed time."""
+        self.load_phase = "loading"
+        self.load_error = None
+        self._load_started = time.monotonic()
+        try:
+            pids = await asyncio.gather(
+                *(
+                    self.run(_worker_ready, self.intra_op_threads)
+                    for _ in range(self.workers)
+                )
+            )
+        except Exception as e:
+            self.load_phase = "failed"
+            self.load_error = str(e)
+            raise
+        finally:
+            self._load_seconds = time.monotonic() - self._load_started
+        self.ready = True
+        self.load_phase = "ready"
+        logger.info(
+            f"Inference workers ready in {self._load_seconds:.1f}s "
+            f"(pids: {sorted(set(pids))})"
+        )
+
+    def load_status(self) -> Dict[str, Any]:
+        """Return model load phase and elapsed (or total) load time."""
+        elapsed = self._load_seconds
+        if self.load_phase == "loading" and self._load_started is not None:
+            elapsed = time.monotonic() - self._load_started
+        return {
+            "phase": self.load_phase,
+            "elapsed_seconds": round(elapsed, 2) if elapsed is not None else None,
+            "error": self.load_error,
+        }
+
+    def reconfigure(
+        self, mode: str, workers: int, intra_op_threads: Optional[int] = None
+    ) -> None:
+        """
+        Switch pool type and size (stops the current pool, if any).
+
+        Args:
+            mode: "process" or "thread"
+            workers: Number of workers
+            intra_op_threads: Torch threads of a model loaded by this executor
+        """
+        if mode not in ("process", "thread"):
+            raise ValueError(f"Unsupported inference executor mode: {mode}")
+        self.shutdown(wait=False)
+        self.mode = mode
+        self.workers = max(1, workers)
+        self.intra_op_threads = intra_op_threads
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the pool; a new one is created on the next call."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+        self.ready = False
+        self._load_task = None
+        self.load_phase = "not_started"
+
+    def status(self) -> Dict[str, Any]:
+        """Return executor configuration and readiness for health reporting."""
+        return {
+            "mode": self.mode,
+            "workers": self.workers,
+            "intra_op_threads": self.intra_op_threads,
+            "started": self._executor is not None,
+            "ready": self.ready,
+            "load": self.load_status(),
+            "pid": os.getpid(),
+            "model_preloaded": LLMLinguaModel.loaded_in_parent(),
+        }
+
+
+# Global executor instance
+inference_executor = InferenceExecutor()
@@ -0,0 +1,137 @@
+"""Result cache and request coalescing for LLM intent classification.
+
+Chat traffic is dominated by a small head of near-identical messages ("hi",
+"Thanks!", "help"). Texts are normalized (Unicode form, case, whitespace and
+punctuation) before lookup, so these share one cache entry, and concurrent
+misses for the same normalized text share a single in-flight LLM call.
+Failed classifications are never cached.
+"""
+
+import hashlib
+import logging
+import re
+import unicodedata
+from typing import Any, Awaitable, Callable, Dict, Optional
+from app.config import settings
+from app.services.cache import SingleFlight, TTLLRUCache
+
+logger = logging.getLogger(__name__)
+
+# Runs of punctuation/symbols other than "?" (which marks questions)
+_PUNCTUATION = re.compile(r"[^\w\s?]+")
+_QUESTION_MARKS = re.compile(r"\?+")
+_WHITESPACE = re.compile(r"\s+")
+
+# Normalized texts longer than this are keyed by their hash
+MAX_PLAIN_KEY_CHARS = 256
+
+
+def normalize_intent_text(text: str) -> str:
+    """
+    Canonical form of a message for intent caching.
+
+    Case, whitespace and punctuation do not change the intent of a message;
+    a trailing question mark can, so "?" is kept (collapsed to one).
+
+    Args:
+        text: Raw user message
+
+    Returns:
+        Normalized text
+
+    Example:
+        normalize_intent_text("  Hi!!  THERE ")  # "hi there"
+        normalize_intent_text("Help??")         # "help?"
+    """
+    text = unicodedata.normalize("NFKC", text).casefold()
+    text = _PUNCTUATION.sub(" ", text)
+    text = _QUESTION_MARKS.sub("?", text)
+    text = _WHITESPACE.sub(" ", text).strip()
+    return text.replace(" ?", "?")
+
+
+def make_intent_key(text: str) -> str:
+    """Cache key of a message: its normalized text, hashed when long."""
+    normalized = normalize_intent_text(text)
+    if len(normalized) <= MAX_PLAIN_KEY_CHARS:
+        return normalized
+    return "sha256:" + hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+class IntentCache:
+    """
+    Bounded LRU/TTL cache plus singleflight in front of the LLM classifiers.
+
+    Example:
+        result = await intent_cache.get_or_classify(text, classify_with_llm)
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 4096,
+        ttl_seconds: Optional[float] = 3600,
+        enabled: bool = True,
+    ):
+        """
+        Initialize cache.
+
+        Args:
+            max_entries: LRU capacity (distinct normalized texts)
+            ttl_seconds: Entry lifetime (None = no expiry)
+            enabled: When False every call goes to the classifier (still coalesced)
+        """
+        self.enabled = enabled
+        self.memory: TTLLRUCache[Dict[str, Any]] = TTLLRUCache(max_entries, ttl_seconds)
+        self.flight: SingleFlight[Dict[str, Any]] = SingleFlight()
+
+    async def get_or_classify(
+        self, text: str, classify: Callable[[str], Awaitable[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """
+        Return the cached classification or compute it once per key.
+
+        Args:
+            text: Raw user message
+            classify: LLM classification coroutine (only called on a miss)
+
+        Returns:
+            Classification result (a copy - callers may modify it)
+
+        Raises:
+            Exception: Whatever ``classify`` raised (shared by coalesced callers)
+        """
+        key = make_intent_key(text)
+        if self.enabled:
+            cached = self.memory.get(key)
+            if cached is not None:
+                return dict(cached)
+
+        async def load() -> Dict[str, Any]:
+            result = await classify(text)
+            if self.enabled:
+                self.memory.set(key, dict(result))
+            return result
+
+        return dict(await self.flight.do(key, load))
+
+    def clear(self) -> None:
+        """Drop all cached classifications (e.g. after a prompt change)."""
+        self.memory.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache and coalescing counters."""
+        return {
+            "enabled": self.enabled,
+            **self.memory.stats.as_dict(),
+            "entries": len(self.memory),
+            "max_entries": self.memory.max_entries,
+            "coalescing": self.flight.stats(),
+        }
+
+
+# Global intent cache instance
+intent_cache = IntentCache(
+    max_entries=settings.intent_cache_max_entries,
+    ttl_seconds=settings.intent_cache_ttl_seconds,
+    enabled=settings.intent_cache_enabled,
+)
@@ -0,0 +1,300 @@
+"""Local first-tier intent classifier.
+
+A multinomial logistic regression over hashed word uni-/bi-grams and
+character trigrams (the "hashing trick"), trained offline from logged LLM
+classifications (see ``python -m app.scripts.train_intent_classifier``).
+Prediction is a handful of row lookups in a small weight matrix, well under a
+millisecond, so the intent router only pays for an LLM round trip when the
+local model is not confident.
+"""
+
+import asyncio
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+INTENTS = ["greeting", "question", "command", "feedback", "help", "other"]
+
+_TOKEN = re.compile(r"[a-z0-9']+|[?!]")
+
+
+def extract_features(text: str, n_buckets: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Hash a text into sparse feature indices and L2-normalized values.
+
+    Args:
+        text: Input text
+        n_buckets: Size of the hashed feature space
+
+    Returns:
+        (indices, values) arrays of equal length
+    """
+    tokens = _TOKEN.findall(text.lower())
+    grams = [f"w:{t}" for t in tokens]
+    bounded = ["<s>"] + tokens + ["</s>"]
+    grams += [f"b:{a} {b}" for a, b in zip(bounded, bounded[1:])]
+    for token in tokens:
+        padded = f"^{token}$"
+        grams += [f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+
+    counts: Dict[int, float] = {}
+    for gram in grams:
+        # crc32 is stable across processes (unlike hash()) and fast
+        index = zlib.crc32(gram.encode("utf-8")) % n_buckets
+        counts[index] = counts.get(index, 0.0) + 1.0
+
+    indices = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+    values = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+    norm = float(np.linalg.norm(values))
+    if norm > 0:
+        values /= norm
+    return indices, values
+
+
+class HashedNgramClassifier:
+    """
+    Softmax regression over hashed n-gram features.
+
+    Example:
+        classifier = HashedNgramClassifier.load("models/intent_classifier.npz")
+        intent, confidence = classifier.predict("Hi there!")
+    """
+
+    def __init__(self, labels: Optional[List[str]] = None, n_buckets: int = 2**18):
+        """
+        Initialize an untrained (all-zero) model.
+
+        Args:
+            labels: Class labels (default: the six router intents)
+            n_buckets: Size of the hashed feature space
+        """
+        self.labels = list(labels or INTENTS)
+        self.n_buckets = n_buckets
+        self.weights = np.zeros((n_buckets, len(self.labels)), dtype=np.float32)
+        self.bias = np.zeros(len(self.labels), dtype=np.float32)
+
+    def predict_proba(self, text: str) -> np.ndarray:
+        """Return class probabilities for a text."""
+        indices, values = extract_features(text, self.n_buckets)
+        logits = values @ self.weights[indices] + self.bias
+        logits -= logits.max()
+        exp = np.exp(logits)
+        return exp / exp.sum()
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        """
+        Classify a text.
+
+        Returns:
+            (intent, confidence) of the most likely class
+        """
+        probs = self.predict_proba(text)
+        best = int(np.argmax(probs))
+        return self.labels[best], float(probs[best])
+
+    def fit(
+        self,
+        texts: Sequence[str],
+        labels: Sequence[str],
+        epochs: int = 10,
+        learning_rate: float = 0.5,
+        l2: float = 1e-5,
+        seed: int = 0,
+    ) -> "HashedNgramClassifier":
+        """
+        Train with plain SGD on the cross-entropy loss.
+
+        Args:
+            texts: Training texts
+            labels: Intent label per text
+            epochs: Passes over the data
+            learning_rate: Initial step size (decays as 1/sqrt(epoch))
+            l2: Weight decay on the rows touched by each example
+            seed: Shuffle seed
+
+        Returns:
+            self
+        """
+        label_index = {label: i for i, label in enumerate(self.labels)}
+        examples = [
+            (*extract_features(text, self.n_buckets), label_index[label])
+            for text, label in zip(texts, labels)
+        ]
+        rng = np.random.default_rng(seed)
+        for epoch in range(epochs):
+            step = learning_rate / math.sqrt(epoch + 1)
+            for i in rng.permutation(len(examples)):
+                indices, values, target = examples[i]
+                rows = self.weights[indices]
+                logits = values @ rows + self.bias
+                logits -= logits.max()
+                probs = np.exp(logits)
+                probs /= probs.sum()
+                probs[target] -= 1.0  # d(loss)/d(logits)
+                self.weights[indices] = rows * (1 - step * l2) - step * np.outer(
+                    values, probs
+                )
+                self.bias -= step * probs
+        return self
+
+    def save(self, path: str) -> None:
+        """Write the model to a compressed ``.npz`` file."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        np.savez_compressed(
+            path,
+            weights=self.weights,
+            bias=self.bias,
+            labels=np.array(self.labels),
+            n_buckets=np.array(self.n_buckets),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "HashedNgramClassifier":
+        """Read a model written by ``save``."""
+        with np.load(path) as data:
+            model = cls(labels=[str(label) for label in data["labels"]])
+            model.n_buckets = int(data["n_buckets"])
+            model.weights = data["weights"].astype(np.float32)
+            model.bias = data["bias"].astype(np.float32)
+        return model
+
+
+def evaluate(
+    classifier: HashedNgramClassifier,
+    texts: Sequence[str],
+    labels: Sequence[str],
+    threshold: float,
+) -> Dict[str, Any]:
+    """
+    Build an evaluation report for a held-out set.
+
+    Besides overall and per-class metrics, the report shows what the router
+    would do at ``threshold``: the share of messages answered locally
+    (coverage) and the accuracy on exactly those messages.
+
+    Args:
+        classifier: Trained model
+        texts: Evaluation texts
+        labels: Reference labels (LLM classifications)
+        threshold: Confidence threshold used by the router
+
+    Returns:
+        JSON-serializable report
+    """
+    started = time.perf_counter()
+    predictions = [classifier.predict(text) for text in texts]
+    per_item_us = (time.perf_counter() - started) / max(1, len(texts)) * 1e6
+
+    confusion = {
+        gold: {pred: 0 for pred in classifier.labels} for gold in classifier.labels
+    }
+    for gold, (pred, _) in zip(labels, predictions):
+        confusion[gold][pred] += 1
+
+    per_class: Dict[str, Dict[str, float]] = {}
+    for label in classifier.labels:
+        true_pos = confusion[label][label]
+        predicted = sum(confusion[gold][label] for gold in classifier.labels)
+        support = sum(confusion[label].values())
+        precision = true_pos / predicted if predicted else 0.0
+        recall = true_pos / support if support else 0.0
+        f1 = (
+            2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        )
+        per_class[label] = {
+            "precision": round(precision, 4),
+            "recall": round(recall, 4),
+            "f1": round(f1, 4),
+            "support": support,
+        }
+
+    correct = [pred == gold for gold, (pred, _) in zip(labels, predictions)]
+    confident = [conf >= threshold for _, conf in predictions]
+    covered = sum(confident)
+    covered_correct = sum(c for c, ok in zip(correct, confident) if ok)
+    return {
+        "examples": len(texts),
+        "accuracy": round(sum(correct) / len(texts), 4) if texts else 0.0,
+        "threshold": threshold,
+        "coverage": round(covered / len(texts), 4) if texts else 0.0,
+        "accuracy_above_threshold": (
+            round(covered_correct / covered, 4) if covered else 0.0
+        ),
+        "avg_latency_us": round(per_item_us, 1),
+        "per_class": per_class,
+        "confusion": confusion,
+    }
+
+
+class ClassificationLog:
+    """Append-only JSONL log of LLM classifications (training data)."""
+
+    def __init__(self, path: Optional[str]):
+        """
+        Initialize log.
+
+        Args:
+            path: JSONL file (None disables logging)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+
+    async def record(self, text: str, result: Dict[str, Any]) -> None:
+        """Append one LLM classification; failures are logged, never raised."""
+        if not self.path:
+            return
+        line = json.dumps(
+            {
+                "text": text,
+                "intent": result.get("intent"),
+                "confidence": result.get("confidence"),
+                "source_model": result.get("source_model"),
+                "timestamp": time.time(),
+            },
+            ensure_ascii=False,
+        )
+        try:
+            await asyncio.to_thread(self._append, line)
+        except Exception as e:
+            logger.warning(f"Intent classification log write failed: {str(e)}")
+
+    def _append(self, line: str) -> None:
+        """Blocking append (run off the event loop)."""
+        assert self.path is not None
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+
+def load_local_classifier(path: Optional[str]) -> Optional[HashedNgramClassifier]:
+    """Load the exported model, or return None if it is not available."""
+    if not path or not os.path.exists(path):
+        logger.info("Local intent classifier not found - every text goes to the LLM")
+        return None
+    try:
+        classifier = HashedNgramClassifier.load(path)
+        logger.info(f"Local intent classifier loaded: {path}")
+        return classifier
+    except Exception as e:
+        logger.warning(f"Local intent classifier disabled ({path}): {str(e)}")
+        return None
+
+
+# Global instances
+local_intent_classifier = load_local_classifier(settings.intent_classifier_path)
+classification_log = ClassificationLog(settings.intent_log_path)
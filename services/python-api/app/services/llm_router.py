@@ -1,16 +1,69 @@
 """Multi-provider LLM Router with OpenAI, Anthropic, and Google Gemini support.
 
 This module routes requests to appropriate LLM providers based on configuration.
-Supports all three major providers with unified interface.
+Supports all three major providers with unified interface. Every call goes
+through the circuit breaker of its provider/model, so a failing or slow
+upstream is shed instead of holding up every job.
+
+The router is application-scoped (``get_llm_router()``, created in the
+lifespan manager): its provider clients keep pooled keep-alive (HTTP/2 when
+``h2`` is installed) connections, so jobs reuse warm TLS sessions instead of
+handshaking on every message. Connections are pre-warmed at startup and
+closed on shutdown.
+
+``stream()`` yields the reply as it is generated (``delta`` events, then one
+``done`` event carrying the same fields as ``route()``), so callers can show
+the first tokens instead of waiting for the whole generation.
+
+Low-temperature calls are answered from the exact-match response cache when
+it is enabled (``RESPONSE_CACHE_ENABLED``); see ``response_cache``.
+
+Calls wait for their turn in the provider's RPM/TPM budget first (shared by
+all workers, see ``rate_limiter``), so bursts queue briefly instead of
+triggering 429s. Every provider call is reported to the routing policy (latency, time to
+first token, errors, token usage), which ``select_provider`` consults for
+messages without a provider-specific intent; see ``routing_policy``.
+
+Jobs pass a fallback chain (``fallback_chain()``): when the chosen provider
+errors or misses the per-attempt timeout, the next available provider is
+tried within the job's deadline and a per-process retry budget; see
+``fallback``. A timed-out attempt counts as a failure for the circuit
+breaker and the routing policy, so a hung provider is not picked again.
 """
 
-from typing import Dict, Optional, List, Any
+from typing import (
+    AsyncGenerator,
+    AsyncIterator,
+    Dict,
+    Optional,
+    List,
+    Any,
+    Tuple,
+)
 from enum import Enum
+import asyncio
 import os
 import logging
+import time
+import httpx
+import numpy as np
 from openai import AsyncOpenAI
 from anthropic import AsyncAnthropic
 import google.generativeai as genai
+from app.config import settings
+from app.services.circuit_breaker import CircuitOpenError, circuit_breakers
+from app.services.fallback import (
+    attempts_as_dicts,
+    fallback_runner,
+    parse_chain_entry,
+)
+from app.services.response_cache import (
+    make_response_key,
+    response_cache,
+    semantic_query,
+)
+from app.services.rate_limiter import rate_limiter
+from app.services.routing_policy import routing_policy
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +76,80 @@ class ProviderEnum(str, Enum):
     GOOGLE = "google"
 
 
+def build_http_client() -> httpx.AsyncClient:
+    """
+    Create a pooled HTTP client for one provider SDK.
+
+    Returns:
+        ``httpx.AsyncClient`` with the configured pool limits and timeouts;
+        HTTP/2 if enabled and the ``h2`` package is installed
+    """
+    http2 = settings.llm_http2
+    if http2:
+        try:
+            # Optional: httpx only speaks HTTP/2 with the h2 package installed
+            import h2  # noqa: F401
+        except ImportError:
+            logger.warning("h2 not installed - provider clients use HTTP/1.1")
+            http2 = False
+
+    return httpx.AsyncClient(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=settings.llm_max_connections,
+            max_keepalive_connections=settings.llm_max_keepalive_connections,
+            keepalive_expiry=settings.llm_keepalive_expiry_seconds,
+        ),
+        timeout=httpx.Timeout(
+            settings.llm_request_timeout_seconds,
+            connect=settings.llm_connect_timeout_seconds,
+        ),
+    )
+
+
+def time_left(expires_at: Optional[float]) -> Optional[float]:
+    """
+    Seconds until ``expires_at`` (monotonic clock), None without a limit.
+
+    Raises:
+        asyncio.TimeoutError: If the time is already up
+    """
+    if expires_at is None:
+        return None
+    remaining = expires_at - time.monotonic()
+    if remaining <= 0:
+        raise asyncio.TimeoutError()
+    return remaining
+
+
+def to_gemini_contents(
+    messages: List[Dict[str, str]],
+) -> Tuple[Optional[str], List[Dict[str, Any]]]:
+    """
+    Convert chat messages to Gemini ``contents`` and a system instruction.
+
+    Gemini names the assistant role "model" and takes system text separately;
+    consecutive turns of the same role are merged into one content.
+
+    Args:
+        messages: Chat messages ({"role", "content"})
+
+    Returns:
+        (system instruction or None, contents)
+    """
+    system = [m["content"] for m in messages if m["role"] == "system"]
+    contents: List[Dict[str, Any]] = []
+    for message in messages:
+        if message["role"] == "system":
+            continue
+        role = "model" if message["role"] == "assistant" else "user"
+        if contents and contents[-1]["role"] == role:
+            contents[-1]["parts"].append(message["content"])
+        else:
+            contents.append({"role": role, "parts": [message["content"]]})
+    return ("\n\n".join(system) or None), contents
+
+
 class LLMRouter:
     """
     Multi-provider LLM router with intelligent routing.
@@ -32,8 +159,11 @@ class LLMRouter:
     - Anthropic Claude 3.7 Sonnet
     - Google Gemini 2.0 Flash
 
+    Create it once per process (``get_llm_router()``) - every instance owns
+    its own connection pools.
+
     Example:
-        router = LLMRouter()
+        router = get_llm_router()
         response = await router.route(
             provider="openai",
             messages=[{"role": "user", "content": "Hello!"}]
@@ -41,15 +171,29 @@ class LLMRouter:
         print(response["content"])
     """
 
+    # Model used when route() is called without a model override
+    DEFAULT_MODELS: Dict[ProviderEnum, str] = {
+        ProviderEnum.OPENAI: "gpt-4o",
+        ProviderEnum.ANTHROPIC: "claude-3-7-sonnet-20250219",
+        ProviderEnum.GOOGLE: "gemini-2.0-flash-exp",
+    }
+
     def __init__(self):
-        """Initialize LLM clients for all providers."""
+        """Initialize LLM clients (with pooled HTTP clients) for all providers."""
+        self._http_clients: Dict[ProviderEnum, httpx.AsyncClient] = {}
+
         # OpenAI Client
         openai_api_key = os.getenv("OPENAI_API_KEY")
         if not openai_api_key:
             logger.warning("OPENAI_API_KEY not set - OpenAI provider disabled")
             self.openai_client = None
         else:
-            self.openai_client = AsyncOpenAI(api_key=openai_api_key)
+            http_client = self._http_clients[ProviderEnum.OPENAI] = build_http_client()
+            self.openai_client = AsyncOpenAI(
+                api_key=openai_api_key,
+                http_client=http_client,
+                timeout=settings.llm_request_timeout_seconds,
+            )
             logger.info("OpenAI client initialized")
 
         # Anthropic Client
@@ -58,7 +202,14 @@ class LLMRouter:
             logger.warning("ANTHROPIC_API_KEY not set - Anthropic provider disabled")
             self.anthropic_client = None
         else:
-            self.anthropic_client = AsyncAnthropic(api_key=anthropic_api_key)
+            http_client = self._http_clients[ProviderEnum.ANTHROPIC] = (
+                build_http_client()
+            )
+            self.anthropic_client = AsyncAnthropic(
+                api_key=anthropic_api_key,
+                http_client=http_client,
+                timeout=settings.llm_request_timeout_seconds,
+            )
             logger.info("Anthropic client initialized")
 
         # Google Gemini Client
@@ -67,10 +218,60 @@ class LLMRouter:
             logger.warning("GOOGLE_API_KEY not set - Google provider disabled")
             self.gemini_model = None
         else:
+            # gRPC channel is opened on first use and kept by this model
             genai.configure(api_key=google_api_key)
             self.gemini_model = genai.GenerativeModel("gemini-2.0-flash-exp")
             logger.info("Google Gemini client initialized")
 
+    async def prewarm(self) -> Dict[str, bool]:
+        """
+        Open one pooled connection (TCP + TLS) to each enabled HTTP provider.
+
+        Any HTTP status counts as warm - only the connection matters, so no
+        tokens are spent. Failures are logged and leave the pool cold.
+
+        Returns:
+            Provider name -> whether its connection was established
+        """
+        targets = {
+            ProviderEnum.OPENAI: self.openai_client,
+            ProviderEnum.ANTHROPIC: self.anthropic_client,
+        }
+        warm = [
+            (provider, self._http_clients[provider], str(client.base_url))
+            for provider, client in targets.items()
+            if client is not None
+        ]
+        results = await asyncio.gather(
+            *(self._prewarm_one(provider, http, url) for provider, http, url in warm)
+        )
+        return {provider.value: ok for (provider, _, _), ok in zip(warm, results)}
+
+    async def _prewarm_one(
+        self, provider: ProviderEnum, http_client: httpx.AsyncClient, url: str
+    ) -> bool:
+        """Issue a HEAD request so the connection lands in the keep-alive pool."""
+        try:
+            response = await asyncio.wait_for(
+                http_client.head(url), settings.llm_prewarm_timeout_seconds
+            )
+            logger.info(
+                f"Pre-warmed {provider.value} connection ({response.http_version})"
+            )
+            return True
+        except Exception as e:
+            logger.warning(f"Pre-warming {provider.value} failed: {str(e)}")
+            return False
+
+    async def aclose(self) -> None:
+        """Close the pooled HTTP clients (on shutdown)."""
+        for provider, http_client in self._http_clients.items():
+            try:
+                await http_client.aclose()
+            except Exception as e:
+                logger.warning(f"Closing {provider.value} client failed: {str(e)}")
+        self._http_clients.clear()
+
     async def route(
         self,
         provider: str,
@@ -78,17 +279,32 @@ class LLMRouter:
         model: Optional[str] = None,
         temperature: float = 0.7,
         max_tokens: int = 1000,
+        cache: Optional[str] = None,
+        fallbacks: Optional[List[str]] = None,
+        attempt_timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
         **kwargs,
     ) -> Dict[str, Any]:
         """
         Route request to appropriate LLM provider.
 
+        With ``fallbacks``, ``attempt_timeout`` or ``deadline`` the call runs
+        as a fallback chain (see ``fallback``): a failed or timed-out attempt
+        moves on to the next entry after a jittered backoff, within the
+        shared retry budget.
+
         Args:
             provider: Provider to use (openai/anthropic/google)
             messages: List of message dicts with "role" and "content"
             model: Optional model override
             temperature: Sampling temperature (0.0-1.0)
             max_tokens: Maximum tokens to generate
+            cache: Response cache option: None, "no-cache" (refresh) or
+                "no-store" (bypass)
+            fallbacks: Ordered "provider" or "provider:model" entries tried
+                after the primary (see ``fallback_chain()``)
+            attempt_timeout: Seconds per attempt
+            deadline: Seconds for the whole chain, backoffs included
             **kwargs: Additional provider-specific parameters
 
         Returns:
@@ -97,28 +313,476 @@ class LLMRouter:
                 - model: Model used
                 - provider: Provider used
                 - tokens: Token usage stats
+                - cached: True if answered from the response cache
+                - attempts: Attempts made (fallback chains only)
 
         Raises:
             ValueError: If provider is unsupported or disabled
+            CircuitOpenError: If the provider/model circuit breaker is open
+            RateLimitExceeded: If the provider/model quota has no turn within
+                RATE_LIMIT_MAX_WAIT_SECONDS
+            FallbackExhausted: If no entry of a fallback chain succeeded
             Exception: If LLM API call fails
         """
+        if not fallbacks and attempt_timeout is None and deadline is None:
+            return await self._route_once(
+                provider, messages, model, temperature, max_tokens, cache, **kwargs
+            )
+
+        async def attempt(
+            attempt_provider: str,
+            attempt_model: Optional[str],
+            timeout: Optional[float],
+        ) -> Dict[str, Any]:
+            return await self._route_once(
+                attempt_provider,
+                messages,
+                attempt_model,
+                temperature,
+                max_tokens,
+                cache,
+                expires_at=None if timeout is None else time.monotonic() + timeout,
+                **kwargs,
+            )
+
+        response, attempts = await fallback_runner.run(
+            [(provider, model)] + [parse_chain_entry(f) for f in fallbacks or []],
+            attempt,
+            attempt_timeout,
+            deadline,
+        )
+        return {**response, "attempts": attempts_as_dicts(attempts)}
+
+    async def _route_once(
+        self,
+        provider: str,
+        messages: List[Dict[str, str]],
+        model: Optional[str],
+        temperature: float,
+        max_tokens: int,
+        cache: Optional[str],
+        expires_at: Optional[float] = None,
+        **kwargs,
+    ) -> Dict[str, Any]:
+        """
+        One provider call: response cache, rate limit, breaker (``route()``).
+
+        With ``expires_at`` (monotonic clock) the provider call raises
+        ``asyncio.TimeoutError`` when time is up, inside the breaker, so the
+        timeout is recorded as a failed call.
+        """
         provider_enum = ProviderEnum(provider.lower())
 
         if provider_enum == ProviderEnum.OPENAI:
-            return await self._call_openai(
-                messages, model, temperature, max_tokens, **kwargs
-            )
+            call = self._call_openai
         elif provider_enum == ProviderEnum.ANTHROPIC:
-            return await self._call_anthropic(
-                messages, model, temperature, max_tokens, **kwargs
-            )
+            call = self._call_anthropic
         elif provider_enum == ProviderEnum.GOOGLE:
-            return await self._call_gemini(
-                messages, model, temperature, max_tokens, **kwargs
+            call = self._call_gemini
+        else:
+            raise ValueError(f"Unsupported provider: {provider}")
+
+        model_name = model or self.DEFAULT_MODELS[provider_enum]
+        route = f"{provider_enum.value}:{model_name}"
+        breaker = circuit_breakers.get(route)
+
+        async def invoke() -> Dict[str, Any]:
+            reservation = await rate_limiter.acquire(
+                route, rate_limiter.estimate_tokens(messages, max_tokens)
             )
+            timeout = time_left(expires_at)
+            started = time.monotonic()
+            try:
+                response = await breaker.call(
+                    lambda: asyncio.wait_for(
+                        call(messages, model, temperature, max_tokens, **kwargs),
+                        timeout,
+                    )
+                )
+            except CircuitOpenError:
+                raise
+            except Exception:
+                await routing_policy.record(
+                    route, time.monotonic() - started, failed=True
+                )
+                raise
+            await routing_policy.record(
+                route, time.monotonic() - started, tokens=response.get("tokens")
+            )
+            await rate_limiter.settle(
+                reservation, (response.get("tokens") or {}).get("total")
+            )
+            return response
+
+        if not response_cache.cacheable(temperature, cache):
+            if response_cache.enabled:
+                response_cache.record_bypass()
+            return await invoke()
+        key = make_response_key(
+            provider_enum.value, model_name, messages, temperature, max_tokens, kwargs
+        )
+        query = semantic_query(
+            provider_enum.value, model_name, messages, temperature, max_tokens, kwargs
+        )
+        return await response_cache.get_or_call(key, invoke, route, cache, query)
+
+    async def stream(
+        self,
+        provider: str,
+        messages: List[Dict[str, str]],
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 1000,
+        cache: Optional[str] = None,
+        fallbacks: Optional[List[str]] = None,
+        attempt_timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
+        **kwargs,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream a reply from the given LLM provider.
+
+        The circuit breaker guards the call up to the first event, so its
+        slow-call threshold applies to the time to first token. A response
+        cache hit is replayed as one delta.
+
+        A fallback chain (``fallbacks``, ``attempt_timeout``, ``deadline``;
+        see ``route()``) also ends at the first event: once text has been
+        yielded the reply cannot switch providers, so timeouts and deadline
+        bound the time to first token and later errors are raised.
+
+        Args:
+            provider: Provider to use (openai/anthropic/google)
+            messages: List of message dicts with "role" and "content"
+            model: Optional model override
+            temperature: Sampling temperature (0.0-1.0)
+            max_tokens: Maximum tokens to generate
+            cache: Response cache option (see ``route()``)
+            fallbacks: Ordered "provider" or "provider:model" entries tried
+                after the primary
+            attempt_timeout: Seconds per attempt until its first event
+            deadline: Seconds until the first event of the whole chain
+            **kwargs: Additional provider-specific parameters
+
+        Yields:
+            {"type": "delta", "content": str} for each text fragment, then
+            {"type": "done", ...} with the full content, model, provider and
+            tokens (the ``route()`` response fields, including ``attempts``
+            for fallback chains)
+
+        Raises:
+            ValueError: If provider is unsupported or disabled
+            CircuitOpenError: If the provider/model circuit breaker is open
+            RateLimitExceeded: If the provider/model quota has no turn within
+                RATE_LIMIT_MAX_WAIT_SECONDS
+            FallbackExhausted: If no entry of a fallback chain succeeded
+            Exception: If LLM API call fails
+
+        Example:
+            async for event in router.stream("openai", messages):
+                if event["type"] == "delta":
+                    print(event["content"], end="")
+        """
+        if not fallbacks and attempt_timeout is None and deadline is None:
+            async for event in self._stream_once(
+                provider, messages, model, temperature, max_tokens, cache, **kwargs
+            ):
+                yield event
+            return
+
+        async def open_stream(
+            attempt_provider: str,
+            attempt_model: Optional[str],
+            timeout: Optional[float],
+        ) -> Tuple[AsyncGenerator[Dict[str, Any], None], Dict[str, Any]]:
+            events = self._stream_once(
+                attempt_provider,
+                messages,
+                attempt_model,
+                temperature,
+                max_tokens,
+                cache,
+                expires_at=None if timeout is None else time.monotonic() + timeout,
+                **kwargs,
+            )
+            try:
+                return events, await events.__anext__()
+            except BaseException:
+                await events.aclose()
+                raise
+
+        (events, first), attempts = await fallback_runner.run(
+            [(provider, model)] + [parse_chain_entry(f) for f in fallbacks or []],
+            open_stream,
+            attempt_timeout,
+            deadline,
+        )
+        record = attempts_as_dicts(attempts)
+
+        def with_attempts(event: Dict[str, Any]) -> Dict[str, Any]:
+            if event["type"] == "done":
+                return {**event, "attempts": record}
+            return event
+
+        try:
+            yield with_attempts(first)
+            async for event in events:
+                yield with_attempts(event)
+        finally:
+            await events.aclose()
+
+    async def _stream_once(
+        self,
+        provider: str,
+        messages: List[Dict[str, str]],
+        model: Optional[str],
+        temperature: float,
+        max_tokens: int,
+        cache: Optional[str],
+        expires_at: Optional[float] = None,
+        **kwargs,
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        One streamed provider call: cache, rate limit, breaker (``stream()``).
+
+        ``expires_at`` limits the time to the first event (see ``_route_once``).
+        """
+        provider_enum = ProviderEnum(provider.lower())
+
+        if provider_enum == ProviderEnum.OPENAI:
+            call = self._stream_openai
+        elif provider_enum == ProviderEnum.ANTHROPIC:
+            call = self._stream_anthropic
+        elif provider_enum == ProviderEnum.GOOGLE:
+            call = self._stream_gemini
         else:
             raise ValueError(f"Unsupported provider: {provider}")
 
+        model_name = model or self.DEFAULT_MODELS[provider_enum]
+        route = f"{provider_enum.value}:{model_name}"
+        key: Optional[str] = None
+        query: Optional[Tuple[str, str]] = None
+        vector: Optional[np.ndarray] = None
+        if response_cache.cacheable(temperature, cache):
+            key = make_response_key(
+                provider_enum.value,
+                model_name,
+                messages,
+                temperature,
+                max_tokens,
+                kwargs,
+            )
+            query = semantic_query(
+                provider_enum.value,
+                model_name,
+                messages,
+                temperature,
+                max_tokens,
+                kwargs,
+            )
+            cached, vector = await response_cache.lookup(key, route, cache, query)
+            if cached is not None:
+                yield {"type": "delta", "content": cached["content"]}
+                yield {**cached, "type": "done"}
+                return
+        elif response_cache.enabled:
+            response_cache.record_bypass()
+
+        breaker = circuit_breakers.get(route)
+        reservation = await rate_limiter.acquire(
+            route, rate_limiter.estimate_tokens(messages, max_tokens)
+        )
+        timeout = time_left(expires_at)
+        events = call(messages, model, temperature, max_tokens, **kwargs)
+        started = time.monotonic()
+        ttft: Optional[float] = None
+        try:
+            first = await breaker.call(
+                lambda: asyncio.wait_for(events.__anext__(), timeout)
+            )
+            ttft = time.monotonic() - started
+            yield first
+            async for event in events:
+                if event["type"] == "done":
+                    await routing_policy.record(
+                        route,
+                        time.monotonic() - started,
+                        ttft=ttft,
+                        tokens=event.get("tokens"),
+                    )
+                    await rate_limiter.settle(
+                        reservation, (event.get("tokens") or {}).get("total")
+                    )
+                    if key is not None:
+                        response = {k: v for k, v in event.items() if k != "type"}
+                        await response_cache.store(key, route, response, query, vector)
+                yield event
+        except CircuitOpenError:
+            raise
+        except Exception:
+            await routing_policy.record(
+                route, time.monotonic() - started, ttft=ttft, failed=True
+            )
+            raise
+        finally:
+            await events.aclose()
+
+    def _gemini_for(self, system: Optional[str]) -> Any:
+        """The Gemini model, with ``system`` as its system instruction if given."""
+        if system is None:
+            return self.gemini_model
+        # Cheap wrapper - the gRPC client is shared by all model objects
+        return genai.GenerativeModel(
+            self.gemini_model.model_name, system_instruction=system
+        )
+
+    async def _stream_openai(
+        self,
+        messages: List[Dict[str, str]],
+        model: Optional[str],
+        temperature: float,
+        max_tokens: int,
+        **kwargs,
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """Stream OpenAI chat completion chunks (usage arrives in the last one)."""
+        if not self.openai_client:
+            raise ValueError("OpenAI client not initialized - check OPENAI_API_KEY")
+
+        model = model or self.DEFAULT_MODELS[ProviderEnum.OPENAI]
+        logger.info(f"Streaming OpenAI {model}")
+
+        try:
+            response = await self.openai_client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True,
+                stream_options={"include_usage": True},
+                **kwargs,
+            )
+            parts: List[str] = []
+            usage = None
+            async for chunk in response:
+                model = chunk.model or model
+                if chunk.usage:
+                    usage = chunk.usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+                    yield {"type": "delta", "content": parts[-1]}
+        except Exception as e:
+            logger.error(f"OpenAI API error: {str(e)}", exc_info=True)
+            raise
+
+        yield {
+            "type": "done",
+            "content": "".join(parts),
+            "model": model,
+            "provider": "openai",
+            "tokens": {
+                "prompt": usage.prompt_tokens if usage else 0,
+                "completion": usage.completion_tokens if usage else 0,
+                "total": usage.total_tokens if usage else 0,
+            },
+        }
+
+    async def _stream_anthropic(
+        self,
+        messages: List[Dict[str, str]],
+        model: Optional[str],
+        temperature: float,
+        max_tokens: int,
+        **kwargs,
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """Stream Anthropic message text deltas (usage from the final message)."""
+        if not self.anthropic_client:
+            raise ValueError(
+                "Anthropic client not initialized - check ANTHROPIC_API_KEY"
+            )
+
+        model = model or self.DEFAULT_MODELS[ProviderEnum.ANTHROPIC]
+        logger.info(f"Streaming Anthropic {model}")
+
+        try:
+            async with self.anthropic_client.messages.stream(
+                model=model,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                messages=messages,
+                **kwargs,
+            ) as stream:
+                async for text in stream.text_stream:
+                    if text:
+                        yield {"type": "delta", "content": text}
+                final = await stream.get_final_message()
+        except Exception as e:
+            logger.error(f"Anthropic API error: {str(e)}", exc_info=True)
+            raise
+
+        yield {
+            "type": "done",
+            "content": "".join(
+                block.text for block in final.content if block.type == "text"
+            ),
+            "model": final.model,
+            "provider": "anthropic",
+            "tokens": {
+                "prompt": final.usage.input_tokens,
+                "completion": final.usage.output_tokens,
+                "total": final.usage.input_tokens + final.usage.output_tokens,
+            },
+        }
+
+    async def _stream_gemini(
+        self,
+        messages: List[Dict[str, str]],
+        model: Optional[str],
+        temperature: float,
+        max_tokens: int,
+        **kwargs,
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """Stream Gemini response chunks (usage metadata of the last chunk)."""
+        if not self.gemini_model:
+            raise ValueError("Gemini client not initialized - check GOOGLE_API_KEY")
+
+        model = model or self.DEFAULT_MODELS[ProviderEnum.GOOGLE]
+        logger.info(f"Streaming Google Gemini {model}")
+
+        try:
+            system, contents = to_gemini_contents(messages)
+            response = await self._gemini_for(system).generate_content_async(
+                contents,
+                generation_config=genai.types.GenerationConfig(
+                    temperature=temperature,
+                    max_output_tokens=max_tokens,
+                ),
+                stream=True,
+            )
+            parts: List[str] = []
+            usage = None
+            async for chunk in response:
+                usage = chunk.usage_metadata or usage
+                # Chunks without text parts (e.g. safety metadata) have no .text
+                text = chunk.text if chunk.parts else ""
+                if text:
+                    parts.append(text)
+                    yield {"type": "delta", "content": text}
+        except Exception as e:
+            logger.error(f"Google Gemini API error: {str(e)}", exc_info=True)
+            raise
+
+        yield {
+            "type": "done",
+            "content": "".join(parts),
+            "model": model,
+            "provider": "google",
+            "tokens": {
+                "prompt": usage.prompt_token_count if usage else 0,
+                "completion": usage.candidates_token_count if usage else 0,
+                "total": usage.total_token_count if usage else 0,
+            },
+        }
+
     async def _call_openai(
         self,
         messages: List[Dict[str, str]],
@@ -147,7 +811,7 @@ class LLMRouter:
         if not self.openai_client:
             raise ValueError("OpenAI client not initialized - check OPENAI_API_KEY")
 
-        model = model or "gpt-4o"
+        model = model or self.DEFAULT_MODELS[ProviderEnum.OPENAI]
         logger.info(f"Calling OpenAI {model}")
 
         try:
@@ -203,7 +867,7 @@ class LLMRouter:
                 "Anthropic client not initialized - check ANTHROPIC_API_KEY"
             )
 
-        model = model or "claude-3-7-sonnet-20250219"
+        model = model or self.DEFAULT_MODELS[ProviderEnum.ANTHROPIC]
         logger.info(f"Calling Anthropic {model}")
 
         try:
@@ -257,17 +921,16 @@ class LLMRouter:
         if not self.gemini_model:
             raise ValueError("Gemini client not initialized - check GOOGLE_API_KEY")
 
-        model = model or "gemini-2.0-flash-exp"
+        model = model or self.DEFAULT_MODELS[ProviderEnum.GOOGLE]
         logger.info(f"Calling Google Gemini {model}")
 
         try:
-            # Convert chat messages to Gemini format (simple concatenation for now)
-            # Gemini API has different message format - we'll use the user's last message
-            user_message = messages[-1]["content"] if messages else ""
+            # Gemini format: user/model turns, system text as system instruction
+            system, contents = to_gemini_contents(messages)
 
             # Generate response
-            response = await self.gemini_model.generate_content_async(
-                user_message,
+            response = await self._gemini_for(system).generate_content_async(
+                contents,
                 generation_config=genai.types.GenerationConfig(
                     temperature=temperature,
                     max_output_tokens=max_tokens,
@@ -288,15 +951,57 @@ class LLMRouter:
             logger.error(f"Google Gemini API error: {str(e)}", exc_info=True)
             raise
 
+    def available_providers(self) -> List[ProviderEnum]:
+        """Providers with an initialized client."""
+        clients = {
+            ProviderEnum.GOOGLE: self.gemini_model,
+            ProviderEnum.OPENAI: self.openai_client,
+            ProviderEnum.ANTHROPIC: self.anthropic_client,
+        }
+        return [provider for provider, client in clients.items() if client]
+
+    def fallback_chain(self, provider: str) -> List[str]:
+        """
+        Fallback entries for a call to ``provider`` (LLM_FALLBACK_PROVIDERS).
+
+        Args:
+            provider: Primary provider (called with its default model)
+
+        Returns:
+            Entries of available providers, in configured order, without the
+            primary; empty when LLM_FALLBACK_ENABLED is off
+        """
+        if not settings.llm_fallback_enabled:
+            return []
+        available = {p.value for p in self.available_providers()}
+        primary = (provider.lower(), None)
+        chain = []
+        for entry in settings.llm_fallback_providers:
+            entry_provider, entry_model = parse_chain_entry(entry)
+            if entry_provider not in available:
+                continue
+            if (entry_provider, entry_model) == primary or (
+                entry_provider == primary[0]
+                and entry_model == self.DEFAULT_MODELS[ProviderEnum(entry_provider)]
+            ):
+                continue
+            chain.append(entry)
+        return chain
+
     def select_provider(
-        self, user_preference: Optional[str] = None, intent: Optional[str] = None
+        self,
+        user_preference: Optional[str] = None,
+        intent: Optional[str] = None,
+        adaptive: Optional[bool] = None,
     ) -> ProviderEnum:
         """
-        Intelligent provider selection based on preferences and intent.
+        Intelligent provider selection based on preferences, intent and live metrics.
 
         Args:
             user_preference: User's preferred provider
             intent: Classified intent (code/creative/general/etc.)
+            adaptive: Consult the routing policy for the default case
+                (default: ROUTING_ADAPTIVE); False gives the static choice
 
         Returns:
             Selected provider enum
@@ -307,7 +1012,10 @@ class LLMRouter:
                - code → Anthropic (Claude excels at code)
                - creative → OpenAI (GPT-4 for creative tasks)
                - multimodal → Google (Gemini for vision)
-            3. Default: Google Gemini 2.0 Flash (fast + cheap)
+            3. Adaptive: the available provider with the best live score for
+               ROUTING_OBJECTIVE (latency, cost or balanced) whose circuit
+               breaker is closed
+            4. Default: Google Gemini 2.0 Flash (fast + cheap)
         """
         # Honor user preference
         if user_preference:
@@ -328,5 +1036,55 @@ class LLMRouter:
             elif "image" in intent_lower or "vision" in intent_lower:
                 return ProviderEnum.GOOGLE
 
+        # Live metrics: fastest (or cheapest) healthy provider right now
+        if settings.routing_adaptive if adaptive is None else adaptive:
+            routes = {
+                f"{provider.value}:{self.DEFAULT_MODELS[provider]}": provider
+                for provider in self.available_providers()
+            }
+            if routes:
+                route, reason = routing_policy.choose(
+                    list(routes),
+                    available=lambda r: circuit_breakers.get(r).allows_calls(),
+                )
+                logger.debug(f"Adaptive routing: {route} ({reason})")
+                return routes[route]
+
         # Default: Gemini 2.0 Flash (best balance of speed/cost/quality)
         return ProviderEnum.GOOGLE
+
+
+_llm_router: Optional[LLMRouter] = None
+_llm_router_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_llm_router() -> LLMRouter:
+    """
+    Return the process-wide router, creating it on first use.
+
+    Pooled connections belong to the event loop that opened them, so a
+    router first used on another loop is replaced (only happens in tests;
+    the server creates it in its lifespan on the serving loop).
+
+    Returns:
+        Shared LLMRouter
+    """
+    global _llm_router, _llm_router_loop
+    try:
+        loop: Optional[asyncio.AbstractEventLoop] = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    if _llm_router is None or (loop is not None and _llm_router_loop is not loop):
+        _llm_router = LLMRouter()
+        _llm_router_loop = loop
+    return _llm_router
+
+
+async def close_llm_router() -> None:
+    """Close the shared router's connection pools (on shutdown)."""
+    global _llm_router, _llm_router_loop
+    if _llm_router is None:
+        return
+    await _llm_router.aclose()
+    _llm_router = None
+    _llm_router_loop = None
@@ -0,0 +1,192 @@
+"""Generic asyncio micro-batcher.
+
+Groups concurrent submissions that share a batch key into a single call of an
+async batch handler. A batch is flushed when it reaches ``max_batch_size`` or
+when the short collection window (``max_wait_ms``) elapses, whichever comes
+first. Results are split back out to each caller in submission order.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Generic,
+    Hashable,
+    List,
+    Optional,
+    Set,
+    TypeVar,
+)
+
+logger = logging.getLogger(__name__)
+
+K = TypeVar("K", bound=Hashable)
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+@dataclass
+class _PendingBatch(Generic[T, R]):
+    """Items collected for one batch key that have not been flushed yet."""
+
+    items: List[T] = field(default_factory=list)
+    futures: List["asyncio.Future[R]"] = field(default_factory=list)
+    timer: Optional[asyncio.TimerHandle] = None
+
+
+class MicroBatcher(Generic[K, T, R]):
+    """
+    Coalesce concurrent single-item calls into batched handler calls.
+
+    The handler receives the batch key and the list of items and must return
+    one result per item, in the same order.
+
+    Example:
+        async def handle(key, items):
+            return [item.upper() for item in items]
+
+        batcher = MicroBatcher(handle, max_batch_size=16, max_wait_ms=5)
+        result = await batcher.submit("default", "hello")
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[K, List[T]], Awaitable[List[R]]],
+        max_batch_size: int = 16,
+        max_wait_ms: float = 5.0,
+        name: str = "micro-batcher",
+    ):
+        """
+        Initialize batcher.
+
+        Args:
+            handler: Async callable processing one batch
+            max_batch_size: Flush as soon as a batch holds this many items
+            max_wait_ms: Maximum time the first item of a batch waits for company
+            name: Name used in log messages
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be >= 1")
+
+        self.handler = handler
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.name = name
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: Dict[K, _PendingBatch[T, R]] = {}
+        self._running: Set["asyncio.Task[None]"] = set()
+
+        self.batches_run = 0
+        self.items_processed = 0
+        self.largest_batch = 0
+
+    async def submit(self, key: K, item: T) -> R:
+        """
+        Submit one item and wait for its result.
+
+        Args:
+            key: Batch key - only items with equal keys are batched together
+            item: Item to process
+
+        Returns:
+            Result produced by the handler for this item
+        """
+        return await self._enqueue(key, item)
+
+    async def submit_many(self, key: K, items: List[T]) -> List[R]:
+        """
+        Submit several items at once and wait for all results.
+
+        Items are split across as many batches as ``max_batch_size`` requires.
+
+        Args:
+            key: Batch key shared by all items
+            items: Items to process
+
+        Returns:
+            Results in the same order as ``items``
+        """
+        futures = [self._enqueue(key, item) for item in items]
+        return list(await asyncio.gather(*futures))
+
+    def stats(self) -> Dict[str, Any]:
+        """Return batching counters for monitoring."""
+        return {
+            "batches": self.batches_run,
+            "items": self.items_processed,
+            "largest_batch": self.largest_batch,
+            "avg_batch_size": (
+                round(self.items_processed / self.batches_run, 2)
+                if self.batches_run
+                else 0.0
+            ),
+            "pending_batches": len(self._pending),
+        }
+
+    def _enqueue(self, key: K, item: T) -> "asyncio.Future[R]":
+        """Add an item to the pending batch for its key and return its future."""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Futures and timers are bound to a loop; start clean on a new one
+            self._loop = loop
+            self._pending = {}
+
+        batch = self._pending.get(key)
+        if batch is None:
+            batch = _PendingBatch()
+            batch.timer = loop.call_later(
+                self.max_wait_ms / 1000.0, self._flush, key, batch
+            )
+            self._pending[key] = batch
+
+        future: "asyncio.Future[R]" = loop.create_future()
+        batch.items.append(item)
+        batch.futures.append(future)
+
+        if len(batch.items) >= self.max_batch_size:
+            self._flush(key, batch)
+
+        return future
+
+    def _flush(self, key: K, batch: _PendingBatch[T, R]) -> None:
+        """Detach a pending batch and schedule its processing."""
+        if self._pending.get(key) is not batch:
+            return  # Already flushed (size limit reached before the timer fired)
+        del self._pending[key]
+
+        if batch.timer is not None:
+            batch.timer.cancel()
+
+        assert self._loop is not None
+        task = self._loop.create_task(self._run(key, batch))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _run(self, key: K, batch: _PendingBatch[T, R]) -> None:
+        """Run the handler for one batch and resolve the callers' futures."""
+        size = len(batch.items)
+        self.batches_run += 1
+        self.items_processed += size
+        self.largest_batch = max(self.largest_batch, size)
+
+        try:
+            results = await self.handler(key, batch.items)
+            if len(results) != size:
+                raise RuntimeError(
+                    f"{self.name}: handler returned {len(results)} results for {size} items"
+                )
+        except Exception as e:
+            logger.warning(f"{self.name}: batch of {size} failed: {str(e)}")
+            for future in batch.futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for future, result in zip(batch.futures, results):
+            if not future.done():
+                future.set_result(result)
@@ -0,0 +1,442 @@
+"""Fleet-wide provider rate limiting with RPM/TPM token buckets.
+
+Providers enforce requests-per-minute (RPM) and tokens-per-minute (TPM)
+quotas per model. Exceeding them returns 429s, and each 429 costs a round
+trip plus a retry. This limiter keeps the fleet under the quota before
+calling the provider.
+
+- Every configured route ("provider:model" or a whole "provider") has two
+  token buckets refilled continuously at RPM/60 and TPM/60 per second,
+  holding at most ``burst_seconds`` worth of quota.
+- A call reserves one request and its estimated tokens (prompt length plus
+  ``max_tokens``, which is how providers count TPM at admission). Buckets
+  may go into debt: the reservation returns how long the caller must wait
+  for its turn, so waiting callers form a FIFO queue without polling.
+  Reservations that would wait longer than ``max_wait_seconds`` are not
+  made and fail fast with ``RateLimitExceeded``.
+- After the call, the reported ``usage`` corrects the token bucket
+  (unused ``max_tokens`` are given back).
+
+With Redis the buckets are one hash per route, updated by an atomic Lua
+script using the Redis server clock, so all workers and pods share the
+budget. Without Redis (or while it is unavailable) each process uses local
+buckets sized to ``local_share`` of the quota.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from app.config import settings
+from app.redis_client import get_redis
+from app.services.compression_gate import CHARS_PER_TOKEN
+
+logger = logging.getLogger(__name__)
+
+# KEYS[1] = bucket hash
+# ARGV = request_rate, request_capacity, token_rate, token_capacity (rates
+#        per ms, 0 = unlimited), requests, tokens, max_wait_ms (-1 = apply
+#        unconditionally, used for corrections and refunds), key_ttl_ms
+# Returns {granted, wait_ms}
+RESERVE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local data = redis.call('HMGET', KEYS[1], 'requests', 'tokens', 'ts')
+local elapsed = math.max(0, now - (tonumber(data[3]) or now))
+local max_wait = tonumber(ARGV[7])
+local wait = 0
+local levels = {0, 0}
+for i = 1, 2 do
+  local rate = tonumber(ARGV[2 * i - 1])
+  local capacity = tonumber(ARGV[2 * i])
+  local cost = tonumber(ARGV[4 + i])
+  if rate > 0 then
+    local level = math.min(capacity, (tonumber(data[i]) or capacity) + elapsed * rate)
+    if cost > 0 and level < cost then
+      wait = math.max(wait, (cost - level) / rate)
+    end
+    levels[i] = math.min(capacity, level - cost)
+  end
+end
+if max_wait >= 0 and wait > max_wait then
+  return {0, math.ceil(wait)}
+end
+redis.call('HSET', KEYS[1], 'requests', levels[1], 'tokens', levels[2], 'ts', now)
+redis.call('PEXPIRE', KEYS[1], tonumber(ARGV[8]))
+return {1, math.ceil(wait)}
+"""
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """Provider quota of one route."""
+
+    rpm: int  # 0 = unlimited
+    tpm: int  # 0 = unlimited
+
+
+class RateLimitExceeded(Exception):
+    """Raised instead of calling a provider whose quota is exhausted."""
+
+    def __init__(self, name: str, retry_after: float):
+        """
+        Initialize error.
+
+        Args:
+            name: Rate-limited route
+            retry_after: Seconds until the reservation would have been served
+        """
+        super().__init__(
+            f"Rate limit of '{name}' exhausted, retry in {retry_after:.1f}s"
+        )
+        self.name = name
+        self.retry_after = retry_after
+
+
+@dataclass
+class Reservation:
+    """Requests and tokens reserved for one call."""
+
+    key: str
+    limit: RateLimit
+    tokens: int
+
+
+@dataclass
+class LocalBuckets:
+    """Process-local request and token buckets of one route."""
+
+    requests: Optional[float] = None  # None = full
+    tokens: Optional[float] = None
+    updated: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class RouteCounters:
+    """Limiter counters of one route."""
+
+    granted: int = 0
+    waited: int = 0
+    wait_seconds: float = 0.0
+    rejected: int = 0
+    reserved_tokens: int = 0
+    corrected_tokens: int = 0  # Actual minus estimated (negative: returned)
+
+
+class RedisRateStore:
+    """
+    Shared token buckets for all processes using the same Redis.
+
+    Example:
+        limiter = RateLimiter(limits, store=RedisRateStore(get_redis))
+    """
+
+    def __init__(
+        self,
+        client_factory: Callable[[], Optional[Any]],
+        prefix: str = "trimind:ratelimit:",
+        retry_seconds: float = 5.0,
+    ):
+        """
+        Initialize store.
+
+        Args:
+            client_factory: Returns the ``redis.asyncio`` client (or None)
+            prefix: Key prefix of the bucket hashes
+            retry_seconds: Local-only period after a Redis error
+        """
+        self.client_factory = client_factory
+        self.prefix = prefix
+        self.retry_seconds = retry_seconds
+        self._degraded_until = 0.0
+        self.errors = 0
+        self._client: Optional[Any] = None
+        self._reserve: Any = None
+
+    def available(self) -> bool:
+        """False while degraded after a Redis error."""
+        return time.monotonic() >= self._degraded_until
+
+    def status(self) -> Dict[str, Any]:
+        """Return backend availability."""
+        return {
+            "backend": "redis",
+            "connected": self._client is not None,
+            "available": self.available(),
+            "errors": self.errors,
+        }
+
+    def degrade(self, error: Exception) -> None:
+        """Fall back to local buckets for ``retry_seconds``."""
+        self.errors += 1
+        if self.available():
+            logger.warning(
+                f"Rate limit store unavailable, using local buckets for "
+                f"{self.retry_seconds}s: {str(error)}"
+            )
+        self._degraded_until = time.monotonic() + self.retry_seconds
+
+    async def reserve(
+        self,
+        key: str,
+        rates: List[float],
+        requests: int,
+        tokens: int,
+        max_wait: Optional[float],
+    ) -> Optional[Tuple[bool, float]]:
+        """
+        Atomically reserve (or give back) requests and tokens.
+
+        Args:
+            key: Bucket name
+            rates: Request rate, request capacity, token rate, token capacity
+                (per second)
+            requests: Requests to take (negative: give back)
+            tokens: Tokens to take (negative: give back)
+            max_wait: Longest acceptable wait in seconds (None: unconditional)
+
+        Returns:
+            (granted, wait seconds), or None if Redis is not configured
+
+        Raises:
+            Exception: Redis errors (callers degrade to local buckets)
+        """
+        client = self.client_factory()
+        if client is None:
+            return None
+        if client is not self._client:
+            self._client = client
+            self._reserve = client.register_script(RESERVE_SCRIPT)
+        request_rate, request_capacity, token_rate, token_capacity = rates
+        # Keys outlive a full refill, after which they would be full anyway
+        refill_seconds = max(
+            request_capacity / request_rate if request_rate else 0,
+            token_capacity / token_rate if token_rate else 0,
+        )
+        granted, wait_ms = await self._reserve(
+            keys=[self.prefix + key],
+            args=[
+                request_rate / 1000,
+                request_capacity,
+                token_rate / 1000,
+                token_capacity,
+                requests,
+                tokens,
+                -1 if max_wait is None else int(max_wait * 1000),
+                int(refill_seconds * 1000) + 60_000,
+            ],
+        )
+        return bool(granted), int(wait_ms) / 1000
+
+
+class RateLimiter:
+    """
+    RPM/TPM admission control in front of the LLM providers.
+
+    Example:
+        reservation = await rate_limiter.acquire("openai:gpt-4o", tokens=1200)
+        response = await call_provider()
+        await rate_limiter.settle(reservation, response["tokens"]["total"])
+    """
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, RateLimit]] = None,
+        enabled: bool = True,
+        max_wait_seconds: float = 10.0,
+        burst_seconds: float = 6.0,
+        local_share: float = 1.0,
+        store: Optional[RedisRateStore] = None,
+    ):
+        """
+        Initialize limiter.
+
+        Args:
+            limits: Quota per "provider:model" or "provider" (unlisted: unlimited)
+            enabled: Master switch
+            max_wait_seconds: Longest wait for a turn before failing fast
+            burst_seconds: Bucket capacity in seconds of quota
+            local_share: Share of the quota a process uses without Redis
+            store: Shared buckets (None = process-local only)
+        """
+        self.limits = limits or {}
+        self.enabled = enabled
+        self.max_wait_seconds = max_wait_seconds
+        self.burst_seconds = burst_seconds
+        self.local_share = local_share
+        self.store = store
+        self.counters: Dict[str, RouteCounters] = {}
+        self._local: Dict[str, LocalBuckets] = {}
+
+    @staticmethod
+    def estimate_tokens(messages: List[Dict[str, str]], max_tokens: int) -> int:
+        """Tokens a call may consume: prompt estimate plus ``max_tokens``."""
+        chars = sum(len(str(message.get("content", ""))) for message in messages)
+        return round(chars / CHARS_PER_TOKEN) + 4 * len(messages) + max_tokens
+
+    def limit_for(self, route: str) -> Optional[Tuple[str, RateLimit]]:
+        """Bucket key and quota of a route ("provider:model", then "provider")."""
+        if not self.enabled:
+            return None
+        if route in self.limits:
+            return route, self.limits[route]
+        provider = route.split(":", 1)[0]
+        if provider in self.limits:
+            return provider, self.limits[provider]
+        return None
+
+    async def acquire(self, route: str, tokens: int) -> Optional[Reservation]:
+        """
+        Wait for a turn to call a route's provider.
+
+        Args:
+            route: "provider:model"
+            tokens: Estimated tokens (see ``estimate_tokens``)
+
+        Returns:
+            Reservation to ``settle`` after the call, or None if the route is
+            not limited
+
+        Raises:
+            RateLimitExceeded: If the turn is more than ``max_wait_seconds`` away
+        """
+        match = self.limit_for(route)
+        if match is None:
+            return None
+        key, limit = match
+        counters = self.counters.setdefault(key, RouteCounters())
+        granted, wait = await self._reserve(
+            key, limit, 1, tokens, self.max_wait_seconds
+        )
+        if not granted:
+            counters.rejected += 1
+            raise RateLimitExceeded(key, wait)
+
+        counters.granted += 1
+        counters.reserved_tokens += tokens
+        reservation = Reservation(key, limit, tokens)
+        if wait > 0:
+            counters.waited += 1
+            counters.wait_seconds += wait
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                # Give the turn back (e.g. a hedged call that lost the race)
+                await self._reserve(key, limit, -1, -tokens, None)
+                raise
+        return reservation
+
+    async def settle(
+        self, reservation: Optional[Reservation], actual_tokens: Optional[int]
+    ) -> None:
+        """
+        Correct the token bucket with the usage the provider reported.
+
+        Args:
+            reservation: Result of ``acquire`` (None: nothing to do)
+            actual_tokens: Reported total tokens (None: keep the estimate)
+        """
+        if reservation is None or actual_tokens is None:
+            return
+        delta = int(actual_tokens) - reservation.tokens
+        if delta == 0:
+            return
+        self.counters[reservation.key].corrected_tokens += delta
+        await self._reserve(reservation.key, reservation.limit, 0, delta, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return configuration, backend state and counters per bucket."""
+        return {
+            "enabled": self.enabled,
+            "max_wait_seconds": self.max_wait_seconds,
+            "limits": {
+                key: {"rpm": limit.rpm, "tpm": limit.tpm}
+                for key, limit in self.limits.items()
+            },
+            "store": self.store.status() if self.store else {"backend": "local"},
+            "routes": {
+                key: {
+                    **vars(counters),
+                    "wait_seconds": round(counters.wait_seconds, 3),
+                }
+                for key, counters in self.counters.items()
+            },
+        }
+
+    def _rates(self, limit: RateLimit, share: float) -> List[float]:
+        """Per-second rates and capacities of both buckets."""
+        rates: List[float] = []
+        for per_minute in (limit.rpm, limit.tpm):
+            rate = per_minute * share / 60
+            rates += [rate, max(rate * self.burst_seconds, 1.0)]
+        return rates
+
+    async def _reserve(
+        self,
+        key: str,
+        limit: RateLimit,
+        requests: int,
+        tokens: int,
+        max_wait: Optional[float],
+    ) -> Tuple[bool, float]:
+        """Reserve in Redis, or in the local buckets without it."""
+        if self.store is not None and self.store.available():
+            try:
+                result = await self.store.reserve(
+                    key, self._rates(limit, 1.0), requests, tokens, max_wait
+                )
+            except Exception as e:
+                self.store.degrade(e)
+                result = None
+            if result is not None:
+                return result
+        return self._reserve_local(key, limit, requests, tokens, max_wait)
+
+    def _reserve_local(
+        self,
+        key: str,
+        limit: RateLimit,
+        requests: int,
+        tokens: int,
+        max_wait: Optional[float],
+    ) -> Tuple[bool, float]:
+        """Process-local version of ``RESERVE_SCRIPT``."""
+        buckets = self._local.setdefault(key, LocalBuckets())
+        now = time.monotonic()
+        elapsed = max(0.0, now - buckets.updated)
+        rates = self._rates(limit, self.local_share)
+        wait = 0.0
+        levels: List[Optional[float]] = [None, None]
+        for i, (current, cost) in enumerate(
+            ((buckets.requests, requests), (buckets.tokens, tokens))
+        ):
+            rate, capacity = rates[2 * i], rates[2 * i + 1]
+            if rate <= 0:
+                continue
+            level = min(
+                capacity, (capacity if current is None else current) + elapsed * rate
+            )
+            if cost > 0 and level < cost:
+                wait = max(wait, (cost - level) / rate)
+            levels[i] = min(capacity, level - cost)
+        if max_wait is not None and wait > max_wait:
+            return False, wait
+        buckets.requests, buckets.tokens = levels
+        buckets.updated = now
+        return True, wait
+
+
+# Global rate limiter instance
+rate_limiter = RateLimiter(
+    limits={route: RateLimit(*quota) for route, quota in settings.rate_limits.items()},
+    enabled=settings.rate_limit_enabled,
+    max_wait_seconds=settings.rate_limit_max_wait_seconds,
+    burst_seconds=settings.rate_limit_burst_seconds,
+    local_share=settings.rate_limit_local_share,
+    store=(
+        RedisRateStore(get_redis, retry_seconds=settings.rate_limit_redis_retry_seconds)
+        if settings.rate_limit_redis
+        else None
+    ),
+)
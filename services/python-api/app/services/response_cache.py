@@ -0,0 +1,350 @@
+"""Exact-match cache for deterministic LLMRouter calls.
+
+A request is identified by a SHA-256 over its canonical form (provider,
+model, messages, temperature, max_tokens and extra parameters, with sorted
+keys), so an identical question answered minutes ago is served from memory
+without spending tokens. Only low-temperature calls are cached - sampling at
+higher temperatures is supposed to vary - and callers can opt out per call:
+
+- ``cache="no-cache"``: skip the lookup, still store the fresh answer
+- ``cache="no-store"``: neither look up nor store
+
+Lookups hit a bounded in-memory LRU first and fall back to an optional Redis
+tier shared by all workers, then to the semantic tier (similar single-turn
+questions, see ``semantic_cache``). Concurrent identical misses share one
+provider call. Entry lifetimes can be set per route (``provider`` or
+``provider:model``).
+"""
+
+import hashlib
+import json
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import numpy as np
+from app.config import settings
+from app.redis_client import get_redis
+from app.services.cache import CacheStats, SingleFlight, TTLLRUCache
+from app.services.semantic_cache import SemanticCache, semantic_cache
+
+logger = logging.getLogger(__name__)
+
+CACHE_MODES = (None, "no-cache", "no-store")
+
+
+def make_response_key(
+    provider: str,
+    model: str,
+    messages: List[Dict[str, str]],
+    temperature: float,
+    max_tokens: int,
+    params: Optional[Dict[str, Any]] = None,
+) -> str:
+    """
+    Build the canonical hash identifying one completion request.
+
+    Args:
+        provider: Provider name
+        model: Resolved model name
+        messages: Chat messages
+        temperature: Sampling temperature
+        max_tokens: Maximum tokens to generate
+        params: Additional provider parameters
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    payload = json.dumps(
+        {
+            "provider": provider,
+            "model": model,
+            "messages": messages,
+            "temperature": round(temperature, 4),
+            "max_tokens": max_tokens,
+            "params": params or {},
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def semantic_query(
+    provider: str,
+    model: str,
+    messages: List[Dict[str, str]],
+    temperature: float,
+    max_tokens: int,
+    params: Optional[Dict[str, Any]] = None,
+) -> Optional[Tuple[str, str]]:
+    """
+    Namespace and question of a request, if it may be answered semantically.
+
+    Only single-turn requests qualify (system messages plus one user
+    message) - with history, the same words can ask something else.
+
+    Returns:
+        (namespace, question), or None
+    """
+    if not messages or messages[-1].get("role") != "user":
+        return None
+    context = messages[:-1]
+    if any(message.get("role") != "system" for message in context):
+        return None
+    namespace = make_response_key(
+        provider, model, context, temperature, max_tokens, params
+    )
+    return namespace, messages[-1]["content"]
+
+
+@dataclass
+class ResponseCacheStats(CacheStats):
+    """Cache counters plus the provider usage avoided by hits."""
+
+    redis_hits: int = 0
+    semantic_hits: int = 0
+    redis_errors: int = 0
+    bypassed: int = 0  # not cacheable (temperature or cache option)
+    tokens_saved: int = 0
+
+
+class ResponseCache:
+    """
+    Two-tier (memory + optional Redis) exact-match LLM response cache.
+
+    Example:
+        response = await response_cache.get_or_call(
+            key, lambda: call_provider(), route="openai:gpt-4o-mini"
+        )
+    """
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        max_entries: int = 2048,
+        ttl_seconds: float = 600,
+        max_temperature: float = 0.2,
+        route_ttls: Optional[Dict[str, float]] = None,
+        client_factory: Optional[Callable[[], Optional[Any]]] = None,
+        prefix: str = "trimind:llm-cache:",
+        semantic: Optional[SemanticCache] = None,
+    ):
+        """
+        Initialize cache.
+
+        Args:
+            enabled: Opt-in switch (disabled: every call goes to the provider)
+            max_entries: In-memory LRU capacity
+            ttl_seconds: Default entry lifetime
+            max_temperature: Calls sampled above this are never cached
+            route_ttls: Lifetime per "provider" or "provider:model"
+            client_factory: Returns the ``redis.asyncio`` client (or None)
+            prefix: Redis key prefix
+            semantic: Similar-question tier (single-turn requests only)
+        """
+        self.enabled = enabled
+        self.ttl_seconds = ttl_seconds
+        self.max_temperature = max_temperature
+        self.route_ttls = route_ttls or {}
+        self.client_factory = client_factory
+        self.prefix = prefix
+        self.semantic = semantic
+        self.memory: TTLLRUCache[Dict[str, Any]] = TTLLRUCache(max_entries, ttl_seconds)
+        self.flight: SingleFlight[Dict[str, Any]] = SingleFlight()
+        self.stats = ResponseCacheStats()
+
+    def cacheable(self, temperature: float, cache: Optional[str] = None) -> bool:
+        """
+        Whether a call may be answered from (or stored in) the cache.
+
+        Raises:
+            ValueError: If ``cache`` is not a known option
+        """
+        if cache not in CACHE_MODES:
+            raise ValueError(f"cache must be one of {CACHE_MODES}, got {cache!r}")
+        return (
+            self.enabled and cache != "no-store" and temperature <= self.max_temperature
+        )
+
+    def ttl_for(self, route: str) -> float:
+        """Entry lifetime of a route ("provider:model", then "provider")."""
+        if route in self.route_ttls:
+            return self.route_ttls[route]
+        provider = route.split(":", 1)[0]
+        return self.route_ttls.get(provider, self.ttl_seconds)
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up a response in memory, then in Redis (promoting Redis hits)."""
+        value = self.memory.get(key)
+        if value is not None:
+            self.stats.hits += 1
+            return value
+
+        client = self.client_factory() if self.client_factory else None
+        if client is not None:
+            try:
+                raw = await client.get(self.prefix + key)
+            except Exception as e:
+                self.stats.redis_errors += 1
+                logger.warning(f"Response cache Redis read failed: {str(e)}")
+                raw = None
+            if raw is not None:
+                value = json.loads(raw)
+                ttl = await self._remaining_ttl(client, key)
+                self.memory.set(key, value, ttl)
+                self.stats.hits += 1
+                self.stats.redis_hits += 1
+                return value
+
+        self.stats.misses += 1
+        return None
+
+    async def set(self, key: str, value: Dict[str, Any], ttl_seconds: float) -> None:
+        """Store a response in memory and (if configured) in Redis."""
+        self.memory.set(key, value, ttl_seconds)
+        self.stats.sets += 1
+        client = self.client_factory() if self.client_factory else None
+        if client is not None:
+            try:
+                await client.set(
+                    self.prefix + key, json.dumps(value), px=int(ttl_seconds * 1000)
+                )
+            except Exception as e:
+                self.stats.redis_errors += 1
+                logger.warning(f"Response cache Redis write failed: {str(e)}")
+
+    async def lookup(
+        self,
+        key: str,
+        route: str,
+        cache: Optional[str] = None,
+        semantic_query: Optional[Tuple[str, str]] = None,
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[np.ndarray]]:
+        """
+        Look up a response in the exact tiers, then in the semantic tier.
+
+        Args:
+            key: ``make_response_key`` digest
+            route: "provider:model" (selects the TTL)
+            cache: None, "no-cache" or "no-store"
+            semantic_query: (namespace, question) of single-turn requests
+
+        Returns:
+            (response or None, question vector for ``store`` or None);
+            responses carry ``"cached": True`` (and ``similarity`` for
+            semantic hits)
+        """
+        if cache == "no-cache":
+            return None, None
+        cached = await self.get(key)
+        if cached is not None:
+            self.stats.tokens_saved += cached.get("tokens", {}).get("total", 0)
+            return {**cached, "cached": True}, None
+        if self.semantic is None or semantic_query is None:
+            return None, None
+
+        hit, vector = await self.semantic.lookup(*semantic_query)
+        if hit is None:
+            return None, vector
+        self.stats.semantic_hits += 1
+        self.stats.tokens_saved += hit.response.get("tokens", {}).get("total", 0)
+        # The paraphrase is answered exactly from now on
+        await self.set(key, hit.response, self.ttl_for(route))
+        return {
+            **hit.response,
+            "cached": True,
+            "similarity": round(hit.similarity, 4),
+        }, None
+
+    async def store(
+        self,
+        key: str,
+        route: str,
+        response: Dict[str, Any],
+        semantic_query: Optional[Tuple[str, str]] = None,
+        vector: Optional[np.ndarray] = None,
+    ) -> None:
+        """Store a fresh provider response in every tier it qualifies for."""
+        await self.set(key, response, self.ttl_for(route))
+        if self.semantic is not None and semantic_query is not None:
+            namespace, question = semantic_query
+            await self.semantic.add(namespace, question, response, vector)
+
+    async def get_or_call(
+        self,
+        key: str,
+        call: Callable[[], Awaitable[Dict[str, Any]]],
+        route: str,
+        cache: Optional[str] = None,
+        semantic_query: Optional[Tuple[str, str]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Return the cached response or call the provider once per key.
+
+        Args:
+            key: ``make_response_key`` digest
+            call: Provider call (only awaited on a miss)
+            route: "provider:model" (selects the TTL)
+            cache: None, "no-cache" or "no-store"
+            semantic_query: (namespace, question) of single-turn requests
+
+        Returns:
+            Response dict; hits carry ``"cached": True``
+        """
+        cached, vector = await self.lookup(key, route, cache, semantic_query)
+        if cached is not None:
+            return cached
+
+        async def load() -> Dict[str, Any]:
+            response = await call()
+            await self.store(key, route, response, semantic_query, vector)
+            return response
+
+        return dict(await self.flight.do(key, load))
+
+    def record_bypass(self) -> None:
+        """Count a call that was not cacheable."""
+        self.stats.bypassed += 1
+
+    def clear(self) -> None:
+        """Drop all in-memory entries (Redis entries expire on their own)."""
+        self.memory.clear()
+        if self.semantic is not None:
+            self.semantic.clear()
+
+    def status(self) -> Dict[str, Any]:
+        """Return configuration, counters and sizes."""
+        return {
+            "enabled": self.enabled,
+            "max_temperature": self.max_temperature,
+            "ttl_seconds": self.ttl_seconds,
+            "route_ttls": self.route_ttls,
+            "redis": self.client_factory is not None and bool(settings.redis_url),
+            **self.stats.as_dict(),
+            "entries": len(self.memory),
+            "max_entries": self.memory.max_entries,
+            "coalescing": self.flight.stats(),
+            "semantic": self.semantic.stats() if self.semantic is not None else None,
+        }
+
+    async def _remaining_ttl(self, client: Any, key: str) -> Optional[float]:
+        """Remaining Redis lifetime of a key (memory copies expire with it)."""
+        try:
+            ms = await client.pttl(self.prefix + key)
+        except Exception:
+            return None
+        return ms / 1000 if ms and ms > 0 else None
+
+
+# Global response cache instance
+response_cache = ResponseCache(
+    enabled=settings.response_cache_enabled,
+    max_entries=settings.response_cache_max_entries,
+    ttl_seconds=settings.response_cache_ttl_seconds,
+    max_temperature=settings.response_cache_max_temperature,
+    route_ttls=settings.response_cache_route_ttls,
+    client_factory=get_redis if settings.response_cache_redis else None,
+    semantic=semantic_cache,
+)
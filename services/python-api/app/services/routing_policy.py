@@ -0,0 +1,420 @@
+"""Adaptive provider selection from live latency, error rate and price.
+
+``LLMRouter.select_provider`` used to send every message without a
+provider-specific intent to Gemini, whether Gemini was fast, slow or failing
+at the moment. The routing policy keeps exponentially weighted moving
+averages (EWMA) per route ("provider:model") of:
+
+- total latency and time to first token (TTFT, streamed calls)
+- error rate (failed calls count 1, successful ones 0)
+- cost per 1k tokens (reported usage times the route's token prices)
+
+and picks the eligible route with the best score for the objective:
+
+- ``latency``: expected latency (TTFT by default) inflated by retries,
+  ``latency / (1 - error_rate)``
+- ``cost``: ``usd_per_1k / (1 - error_rate)``
+- ``balanced``: weighted sum of both, each relative to the best candidate
+
+Routes whose circuit breaker is open or whose error rate exceeds
+``max_error_rate`` are not eligible (unless no route is). Routes with fewer
+than ``min_samples`` observations are tried first (warm-up), and a small
+``exploration_rate`` of picks goes to a random other route, so a provider
+that recovers is noticed. Observations can be written to a JSONL trace and
+replayed offline with ``python -m app.scripts.simulate_routing``.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+OBJECTIVES = ("latency", "cost", "balanced")
+LATENCY_METRICS = ("ttft", "total")
+
+
+@dataclass(frozen=True)
+class TokenPrice:
+    """List price of a model, USD per 1k tokens."""
+
+    input_per_1k: float
+    output_per_1k: float
+
+
+# Defaults; override per model with ROUTING_TOKEN_PRICES (JSON)
+DEFAULT_TOKEN_PRICES: Dict[str, TokenPrice] = {
+    "gpt-4o": TokenPrice(input_per_1k=0.0025, output_per_1k=0.01),
+    "gpt-4o-mini": TokenPrice(input_per_1k=0.00015, output_per_1k=0.0006),
+    "claude-3-7-sonnet-20250219": TokenPrice(input_per_1k=0.003, output_per_1k=0.015),
+    "claude-3-haiku-20240307": TokenPrice(input_per_1k=0.00025, output_per_1k=0.00125),
+    "gemini-2.0-flash-exp": TokenPrice(input_per_1k=0.0001, output_per_1k=0.0004),
+}
+FALLBACK_TOKEN_PRICE = TokenPrice(input_per_1k=0.0025, output_per_1k=0.01)
+
+
+@dataclass
+class RouteStats:
+    """Moving averages of one provider/model route."""
+
+    samples: int = 0
+    failures: int = 0
+    latency: Optional[float] = None  # seconds
+    ttft: Optional[float] = None  # seconds
+    error_rate: float = 0.0
+    usd_per_1k: Optional[float] = None
+    chosen: int = 0
+
+
+class RoutingPolicy:
+    """
+    Choose a provider/model route from live measurements.
+
+    Example:
+        route, reason = routing_policy.choose(
+            ["openai:gpt-4o", "google:gemini-2.0-flash-exp"]
+        )
+        routing_policy.observe(route, latency=1.2, ttft=0.3, tokens=usage)
+    """
+
+    def __init__(
+        self,
+        objective: str = "latency",
+        latency_weight: float = 0.5,
+        latency_metric: str = "ttft",
+        alpha: float = 0.2,
+        exploration_rate: float = 0.05,
+        min_samples: int = 3,
+        max_error_rate: float = 0.5,
+        prices: Optional[Dict[str, TokenPrice]] = None,
+        trace_path: Optional[str] = None,
+        seed: Optional[int] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Initialize policy.
+
+        Args:
+            objective: "latency", "cost" or "balanced"
+            latency_weight: Share of latency in the balanced score (rest: cost)
+            latency_metric: "ttft" (falls back to total) or "total"
+            alpha: EWMA smoothing factor (weight of the newest observation)
+            exploration_rate: Share of picks going to a random other route
+            min_samples: Observations before a route is scored (warm-up)
+            max_error_rate: Routes erroring more often are not eligible
+            prices: Token prices per model (merged over the defaults)
+            trace_path: JSONL file receiving every observation (None: off)
+            seed: Random seed for exploration (tests, simulations)
+            clock: Timestamp source for trace records
+        """
+        if objective not in OBJECTIVES:
+            raise ValueError(
+                f"objective must be one of {OBJECTIVES}, got {objective!r}"
+            )
+        if latency_metric not in LATENCY_METRICS:
+            raise ValueError(
+                f"latency_metric must be one of {LATENCY_METRICS}, got {latency_metric!r}"
+            )
+        self.objective = objective
+        self.latency_weight = latency_weight
+        self.latency_metric = latency_metric
+        self.alpha = alpha
+        self.exploration_rate = exploration_rate
+        self.min_samples = min_samples
+        self.max_error_rate = max_error_rate
+        self.prices = {**DEFAULT_TOKEN_PRICES, **(prices or {})}
+        self.trace_path = trace_path
+        self.clock = clock
+        self.routes: Dict[str, RouteStats] = {}
+        self.decisions: Dict[str, int] = {}
+        self._rng = random.Random(seed)
+        self._trace_lock = threading.Lock()
+
+    def price(self, route: str) -> TokenPrice:
+        """Token price of a route's model."""
+        model = route.split(":", 1)[-1]
+        return self.prices.get(model, FALLBACK_TOKEN_PRICE)
+
+    def observe(
+        self,
+        route: str,
+        latency: float,
+        ttft: Optional[float] = None,
+        tokens: Optional[Dict[str, int]] = None,
+        failed: bool = False,
+    ) -> None:
+        """
+        Fold one provider call into the route's moving averages.
+
+        Args:
+            route: "provider:model"
+            latency: Seconds until the call completed (or failed)
+            ttft: Seconds until the first streamed token
+            tokens: Reported usage ({"prompt", "completion", "total"})
+            failed: The provider call raised
+        """
+        stats = self.routes.setdefault(route, RouteStats())
+        stats.samples += 1
+        stats.error_rate = self._ewma(stats.error_rate, 1.0 if failed else 0.0)
+        if failed:
+            stats.failures += 1
+            return
+        stats.latency = self._ewma(stats.latency, latency)
+        if ttft is not None:
+            stats.ttft = self._ewma(stats.ttft, ttft)
+        tokens = tokens or {}
+        total = tokens.get("total") or 0
+        if total > 0:
+            price = self.price(route)
+            usd_per_token = (
+                tokens.get("prompt", 0) * price.input_per_1k
+                + tokens.get("completion", 0) * price.output_per_1k
+            ) / (1000 * total)
+            stats.usd_per_1k = self._ewma(stats.usd_per_1k, usd_per_token * 1000)
+
+    async def record(
+        self,
+        route: str,
+        latency: float,
+        ttft: Optional[float] = None,
+        tokens: Optional[Dict[str, int]] = None,
+        failed: bool = False,
+    ) -> None:
+        """``observe`` a call and append it to the trace (if configured)."""
+        self.observe(route, latency, ttft, tokens, failed)
+        if not self.trace_path:
+            return
+        line = json.dumps(
+            {
+                "timestamp": self.clock(),
+                "route": route,
+                "latency": round(latency, 4),
+                "ttft": round(ttft, 4) if ttft is not None else None,
+                "tokens": tokens,
+                "failed": failed,
+            }
+        )
+        try:
+            await asyncio.to_thread(self._append, line)
+        except Exception as e:
+            logger.warning(f"Routing trace write failed: {str(e)}")
+
+    def choose(
+        self,
+        candidates: Sequence[str],
+        available: Optional[Callable[[str], bool]] = None,
+    ) -> Tuple[str, str]:
+        """
+        Pick a route among candidates.
+
+        Args:
+            candidates: "provider:model" routes (in order of preference on ties)
+            available: Returns False for routes that must not be used now
+                (e.g. open circuit breaker)
+
+        Returns:
+            (route, reason): reason is "only", "warmup", "explore" or "best"
+
+        Raises:
+            ValueError: If there are no candidates
+        """
+        if not candidates:
+            raise ValueError("No candidate routes")
+        eligible = [r for r in candidates if available is None or available(r)]
+        eligible = eligible or list(candidates)
+        healthy = [
+            r for r in eligible if self._stats(r).error_rate <= self.max_error_rate
+        ]
+        pool = healthy or eligible
+        cold = [r for r in pool if self._stats(r).samples < self.min_samples]
+
+        if len(eligible) == 1:
+            route, reason = eligible[0], "only"
+        elif cold:
+            route = min(cold, key=lambda r: self._stats(r).samples)
+            reason = "warmup"
+        else:
+            scores = self.scores(pool)
+            best = min(pool, key=lambda r: scores[r])
+            if self._rng.random() < self.exploration_rate:
+                # Unhealthy routes too: their error rate only recovers when used
+                route = self._rng.choice([r for r in eligible if r != best])
+                reason = "explore"
+            else:
+                route, reason = best, "best"
+
+        self._stats(route).chosen += 1
+        self.decisions[reason] = self.decisions.get(reason, 0) + 1
+        return route, reason
+
+    def scores(self, routes: Sequence[str]) -> Dict[str, float]:
+        """Objective score per route (lower is better)."""
+        latencies = {r: self._expected_latency(r) for r in routes}
+        costs = {r: self._expected_cost(r) for r in routes}
+        if self.objective == "latency":
+            return latencies
+        if self.objective == "cost":
+            return costs
+        best_latency = max(min(latencies.values()), 1e-9)
+        best_cost = max(min(costs.values()), 1e-12)
+        return {
+            r: self.latency_weight * latencies[r] / best_latency
+            + (1 - self.latency_weight) * costs[r] / best_cost
+            for r in routes
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Return configuration, decision counts and per-route averages."""
+        routes: Dict[str, Dict[str, Any]] = {}
+        for route, stats in self.routes.items():
+            data = asdict(stats)
+            for name in ("latency", "ttft"):
+                value = data.pop(name)
+                data[f"{name}_ms"] = (
+                    round(value * 1000, 1) if value is not None else None
+                )
+            data["error_rate"] = round(stats.error_rate, 4)
+            if stats.usd_per_1k is not None:
+                data["usd_per_1k"] = round(stats.usd_per_1k, 6)
+            routes[route] = data
+        return {
+            "objective": self.objective,
+            "latency_metric": self.latency_metric,
+            "exploration_rate": self.exploration_rate,
+            "decisions": dict(self.decisions),
+            "routes": routes,
+        }
+
+    def reset(self) -> None:
+        """Forget all measurements."""
+        self.routes.clear()
+        self.decisions.clear()
+
+    def _stats(self, route: str) -> RouteStats:
+        """Stats of a route (created empty)."""
+        return self.routes.setdefault(route, RouteStats())
+
+    def _ewma(self, current: Optional[float], value: float) -> float:
+        """Blend a new observation into a moving average."""
+        if current is None:
+            return value
+        return self.alpha * value + (1 - self.alpha) * current
+
+    def _retry_factor(self, route: str) -> float:
+        """Expected attempts per success (errors capped at 90%)."""
+        return 1.0 / (1.0 - min(self._stats(route).error_rate, 0.9))
+
+    def _expected_latency(self, route: str) -> float:
+        """Latency metric of a route, scaled by its expected attempts."""
+        stats = self._stats(route)
+        latency = stats.ttft if self.latency_metric == "ttft" else None
+        if latency is None:
+            latency = stats.latency
+        if latency is None:
+            return float("inf")
+        return latency * self._retry_factor(route)
+
+    def _expected_cost(self, route: str) -> float:
+        """USD per 1k tokens of a route (list price until usage is reported)."""
+        usd = self._stats(route).usd_per_1k
+        if usd is None:
+            price = self.price(route)
+            usd = (price.input_per_1k + price.output_per_1k) / 2
+        return usd * self._retry_factor(route)
+
+    def _append(self, line: str) -> None:
+        """Blocking append (run off the event loop)."""
+        assert self.trace_path is not None
+        with self._trace_lock:
+            directory = os.path.dirname(self.trace_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.trace_path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+
+def replay_traces(
+    policy: RoutingPolicy,
+    traces: Dict[str, List[Dict[str, Any]]],
+    requests: int,
+) -> Dict[str, Any]:
+    """
+    Replay recorded per-route traces against a policy.
+
+    Request ``i`` happens at the same relative point in every trace
+    (``i / requests`` of its length); the chosen route answers with its
+    recorded observation at that point, which the policy then observes - so
+    a route's latency only becomes visible to the policy when it is chosen.
+
+    Args:
+        policy: Policy to evaluate (fresh, its measurements are updated)
+        traces: Observations per route, in time order ("latency", "ttft",
+            "tokens", "failed")
+        requests: Number of requests to simulate
+
+    Returns:
+        Mean/p95 latency, error rate, cost, and the share of requests per route
+    """
+    routes = sorted(traces)
+    latencies: List[float] = []
+    failures = 0
+    usd = 0.0
+    chosen: Dict[str, int] = {route: 0 for route in routes}
+    for i in range(requests):
+        route, _ = policy.choose(routes)
+        trace = traces[route]
+        record = trace[min(len(trace) - 1, i * len(trace) // requests)]
+        latency = float(record["latency"])
+        ttft = record.get("ttft")
+        failed = bool(record.get("failed"))
+        tokens = record.get("tokens") or {}
+        policy.observe(route, latency, ttft, tokens, failed)
+        chosen[route] += 1
+        latencies.append(
+            float(ttft) if policy.latency_metric == "ttft" and ttft else latency
+        )
+        if failed:
+            failures += 1
+        else:
+            price = policy.price(route)
+            usd += (
+                tokens.get("prompt", 0) * price.input_per_1k
+                + tokens.get("completion", 0) * price.output_per_1k
+            ) / 1000
+    ordered = sorted(latencies)
+    return {
+        "requests": requests,
+        "mean_latency_ms": round(1000 * sum(ordered) / max(len(ordered), 1), 1),
+        "p95_latency_ms": (
+            round(1000 * ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))], 1)
+            if ordered
+            else None
+        ),
+        "error_rate": round(failures / max(requests, 1), 4),
+        "usd": round(usd, 6),
+        "share": {route: round(n / max(requests, 1), 4) for route, n in chosen.items()},
+    }
+
+
+# Global routing policy instance
+routing_policy = RoutingPolicy(
+    objective=settings.routing_objective,
+    latency_weight=settings.routing_latency_weight,
+    latency_metric=settings.routing_latency_metric,
+    alpha=settings.routing_ewma_alpha,
+    exploration_rate=settings.routing_exploration_rate,
+    min_samples=settings.routing_min_samples,
+    max_error_rate=settings.routing_max_error_rate,
+    prices={
+        model: TokenPrice(*price)
+        for model, price in settings.routing_token_prices.items()
+    },
+    trace_path=settings.routing_trace_path,
+)
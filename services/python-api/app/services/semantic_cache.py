@@ -0,0 +1,444 @@
+"""Semantic tier of the LLM response cache.
+
+The exact-match tier misses paraphrases ("how do I reset my password" vs
+"password reset how?"). This tier embeds the question of single-turn
+requests and looks for a cached answer whose question embedding has a
+cosine similarity of at least ``threshold``.
+
+- Encoders: the transformer backbone of the already-loaded LLMLingua-2 model
+  (mean-pooled, run in the inference executor), or hashed word/character
+  n-grams (numpy only, for the ONNX backend or tests)
+- Index: one contiguous float32 matrix of L2-normalized vectors; a search is
+  a single matrix-vector product plus an ``argpartition`` top-k. With IVF
+  enabled, rows are grouped around k-means centroids and only the nearest
+  ``n_probe`` groups are scanned
+- Bounded: expired rows are reused first, then the least recently used one
+
+Only requests with the same provider, model, system prompt and parameters
+share answers (the namespace, see ``response_cache.semantic_query``). Tune
+the threshold offline with
+``python -m app.scripts.evaluate_semantic_cache``.
+"""
+
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from app.config import settings
+from app.models import LLMLinguaModel
+from app.services.inference_executor import inference_executor
+from app.services.intent_classifier import extract_features
+
+logger = logging.getLogger(__name__)
+
+
+class HashingEncoder:
+    """
+    Dense hashed n-gram vectors (the intent classifier's features).
+
+    Example:
+        vectors = await HashingEncoder(dim=1024).encode(["reset my password"])
+    """
+
+    name = "hashing"
+
+    def __init__(self, dim: int = 1024):
+        """
+        Initialize encoder.
+
+        Args:
+            dim: Vector size (hashed feature buckets)
+        """
+        self.dim = dim
+
+    def ready(self) -> bool:
+        """Always usable (no model to load)."""
+        return True
+
+    def encode_sync(self, texts: Sequence[str]) -> np.ndarray:
+        """Return L2-normalized vectors, one row per text."""
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            indices, values = extract_features(text, self.dim)
+            np.add.at(vectors[row], indices, values)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    async def encode(self, texts: Sequence[str]) -> np.ndarray:
+        """Return L2-normalized vectors, one row per text."""
+        return self.encode_sync(texts)
+
+
+class LLMLinguaEncoder:
+    """
+    Mean-pooled embeddings from the LLMLingua-2 backbone (inference executor).
+
+    Example:
+        vectors = await LLMLinguaEncoder().encode(["reset my password"])
+    """
+
+    name = "llmlingua"
+
+    def ready(self) -> bool:
+        """False until the model is loaded (lookups are skipped meanwhile)."""
+        return inference_executor.ready
+
+    async def encode(self, texts: Sequence[str]) -> np.ndarray:
+        """Return L2-normalized vectors, one row per text."""
+        return await inference_executor.run(LLMLinguaModel.embed_batch, list(texts))
+
+
+class VectorIndex:
+    """
+    Bounded cosine-similarity index over a contiguous matrix.
+
+    Example:
+        index = VectorIndex(dim=1024, capacity=10000, n_lists=64)
+        slot = index.add("ns", vector, payload, ttl_seconds=3600)
+        matches = index.search("ns", vector, k=4)  # [(slot, similarity), ...]
+    """
+
+    def __init__(
+        self,
+        dim: int,
+        capacity: int,
+        n_lists: int = 0,
+        n_probe: int = 4,
+        seed: int = 0,
+    ):
+        """
+        Initialize index.
+
+        Args:
+            dim: Vector size
+            capacity: Maximum number of vectors
+            n_lists: IVF partitions (0 = exhaustive search)
+            n_probe: Partitions scanned per search
+            seed: k-means initialization seed
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be >= 1")
+        self.dim = dim
+        self.capacity = capacity
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self.namespaces = np.full(capacity, -1, dtype=np.int64)  # -1 = free
+        self.expires = np.full(capacity, np.inf)
+        self.last_used = np.zeros(capacity)
+        self.lists = np.zeros(capacity, dtype=np.int32)
+        self.payloads: List[Any] = [None] * capacity
+        self.centroids: Optional[np.ndarray] = None
+        self.size = 0  # Slots handed out so far (high-water mark)
+        self.evictions = 0
+        self._namespace_ids: Dict[str, int] = {}
+        self._rng = np.random.default_rng(seed)
+        self._added_since_training = 0
+
+    def __len__(self) -> int:
+        """Number of live (unexpired) vectors."""
+        return int(self._live(time.monotonic()).sum())
+
+    def add(
+        self, namespace: str, vector: np.ndarray, payload: Any, ttl_seconds: float
+    ) -> int:
+        """
+        Insert a vector, evicting an expired or the least recently used row.
+
+        Returns:
+            Slot of the new row
+        """
+        now = time.monotonic()
+        slot = self._free_slot(now)
+        self.vectors[slot] = vector
+        self.namespaces[slot] = self._namespace_ids.setdefault(
+            namespace, len(self._namespace_ids)
+        )
+        self.expires[slot] = now + ttl_seconds
+        self.last_used[slot] = now
+        self.payloads[slot] = payload
+        if self.centroids is not None:
+            self.lists[slot] = int(np.argmax(self.centroids @ vector))
+
+        self._added_since_training += 1
+        if self.n_lists and self._added_since_training >= max(
+            self.n_lists * 8, self.capacity // 4
+        ):
+            self.train()
+        return slot
+
+    def search(
+        self, namespace: str, vector: np.ndarray, k: int = 4
+    ) -> List[Tuple[int, float]]:
+        """
+        Return the k most similar live rows of a namespace.
+
+        Returns:
+            (slot, cosine similarity) pairs, most similar first
+        """
+        namespace_id = self._namespace_ids.get(namespace)
+        if namespace_id is None:
+            return []
+        candidates = self._live(time.monotonic()) & (
+            self.namespaces[: self.size] == namespace_id
+        )
+        if self.centroids is not None:
+            probe = np.argsort(self.centroids @ vector)[-self.n_probe :]
+            candidates &= np.isin(self.lists[: self.size], probe)
+        rows = np.flatnonzero(candidates)
+        if rows.size == 0:
+            return []
+
+        scores = self.vectors[rows] @ vector
+        k = min(k, rows.size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(rows[i]), float(scores[i])) for i in top]
+
+    def touch(self, slot: int) -> None:
+        """Mark a row as recently used."""
+        self.last_used[slot] = time.monotonic()
+
+    def train(self, iterations: int = 10) -> None:
+        """(Re)compute IVF centroids with spherical k-means over live rows."""
+        self._added_since_training = 0
+        rows = np.flatnonzero(self._live(time.monotonic()))
+        if not self.n_lists or rows.size < self.n_lists * 4:
+            return
+        data = self.vectors[rows]
+        centroids = data[self._rng.choice(rows.size, self.n_lists, replace=False)]
+        for _ in range(iterations):
+            assignment = np.argmax(data @ centroids.T, axis=1)
+            for cluster in range(self.n_lists):
+                members = data[assignment == cluster]
+                if len(members):
+                    center = members.sum(axis=0)
+                    centroids[cluster] = center / max(
+                        float(np.linalg.norm(center)), 1e-12
+                    )
+        self.centroids = centroids
+        self.lists[: self.size] = np.argmax(
+            self.vectors[: self.size] @ centroids.T, axis=1
+        )
+
+    def _live(self, now: float) -> np.ndarray:
+        """Mask of used, unexpired slots (first ``size`` slots)."""
+        return (self.namespaces[: self.size] >= 0) & (self.expires[: self.size] > now)
+
+    def _free_slot(self, now: float) -> int:
+        """Next slot: never used, expired, or least recently used."""
+        if self.size < self.capacity:
+            self.size += 1
+            return self.size - 1
+        expired = np.flatnonzero(self.expires <= now)
+        if expired.size:
+            return int(expired[0])
+        self.evictions += 1
+        return int(np.argmin(self.last_used))
+
+
+@dataclass
+class SemanticHit:
+    """Cached answer of a similar question."""
+
+    response: Dict[str, Any]
+    similarity: float
+
+
+class SemanticCache:
+    """
+    Nearest-question lookup in front of the LLM providers.
+
+    Example:
+        hit, vector = await semantic_cache.lookup(namespace, question)
+        if hit is None:
+            response = await call_provider()
+            await semantic_cache.add(namespace, question, response, vector)
+    """
+
+    def __init__(
+        self,
+        encoder: Any,
+        enabled: bool = False,
+        threshold: float = 0.92,
+        max_entries: int = 10000,
+        ttl_seconds: float = 3600,
+        n_lists: int = 0,
+        n_probe: int = 4,
+        top_k: int = 4,
+    ):
+        """
+        Initialize cache.
+
+        Args:
+            encoder: ``HashingEncoder`` or ``LLMLinguaEncoder``
+            enabled: Opt-in switch
+            threshold: Minimum cosine similarity for a hit
+            max_entries: Index capacity
+            ttl_seconds: Entry lifetime
+            n_lists: IVF partitions (0 = exhaustive search)
+            n_probe: IVF partitions scanned per lookup
+            top_k: Candidates retrieved per lookup
+        """
+        self.encoder = encoder
+        self.enabled = enabled
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.top_k = top_k
+        self.index: Optional[VectorIndex] = None  # Sized on the first vector
+        self.hits = 0
+        self.misses = 0
+        self.skipped = 0  # encoder not ready or failed
+        self.similarity_sum = 0.0
+
+    async def lookup(
+        self, namespace: str, question: str
+    ) -> Tuple[Optional[SemanticHit], Optional[np.ndarray]]:
+        """
+        Find the cached answer of the most similar question.
+
+        Returns:
+            (hit or None, question vector for a later ``add`` or None)
+        """
+        vector = await self._encode(question)
+        if vector is None:
+            return None, None
+        matches = self.index.search(namespace, vector, self.top_k) if self.index else []
+        if matches and matches[0][1] >= self.threshold:
+            slot, similarity = matches[0]
+            assert self.index is not None
+            self.index.touch(slot)
+            self.hits += 1
+            self.similarity_sum += similarity
+            return SemanticHit(dict(self.index.payloads[slot]), similarity), vector
+        self.misses += 1
+        return None, vector
+
+    async def add(
+        self,
+        namespace: str,
+        question: str,
+        response: Dict[str, Any],
+        vector: Optional[np.ndarray] = None,
+    ) -> None:
+        """Store an answer under its question's vector (encoded if not given)."""
+        if vector is None:
+            vector = await self._encode(question)
+            if vector is None:
+                return
+        if self.index is None:
+            self.index = VectorIndex(
+                vector.shape[0], self.max_entries, self.n_lists, self.n_probe
+            )
+        self.index.add(namespace, vector, dict(response), self.ttl_seconds)
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        self.index = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit rate, mean hit similarity and index size."""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "encoder": self.encoder.name,
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "avg_hit_similarity": (
+                round(self.similarity_sum / self.hits, 4) if self.hits else None
+            ),
+            "skipped": self.skipped,
+            "entries": len(self.index) if self.index else 0,
+            "max_entries": self.max_entries,
+            "evictions": self.index.evictions if self.index else 0,
+            "ivf_lists": self.n_lists,
+            "ivf_trained": bool(self.index and self.index.centroids is not None),
+        }
+
+    async def _encode(self, text: str) -> Optional[np.ndarray]:
+        """Embed one text (None while the encoder is unavailable)."""
+        if not self.enabled or not self.encoder.ready():
+            self.skipped += 1
+            return None
+        try:
+            vectors = await self.encoder.encode([text])
+        except Exception as e:
+            self.skipped += 1
+            logger.warning(f"Semantic cache encoding failed: {str(e)}")
+            return None
+        vector: np.ndarray = vectors[0]
+        return vector
+
+
+def evaluate_thresholds(
+    similarities: Sequence[float], labels: Sequence[bool], thresholds: Sequence[float]
+) -> List[Dict[str, float]]:
+    """
+    Precision/recall of answering paraphrase pairs from the cache.
+
+    Args:
+        similarities: Cosine similarity per (query, cached question) pair
+        labels: True if the cached answer is correct for the query
+        thresholds: Candidate similarity thresholds
+
+    Returns:
+        One row per threshold: precision, recall, f1 and hit rate
+    """
+    scores = np.asarray(similarities, dtype=np.float64)
+    gold = np.asarray(labels, dtype=bool)
+    rows: List[Dict[str, float]] = []
+    for threshold in thresholds:
+        predicted = scores >= threshold
+        true_pos = int((predicted & gold).sum())
+        precision = true_pos / int(predicted.sum()) if predicted.any() else 1.0
+        recall = true_pos / int(gold.sum()) if gold.any() else 0.0
+        f1 = (
+            2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        )
+        rows.append(
+            {
+                "threshold": round(float(threshold), 4),
+                "precision": round(precision, 4),
+                "recall": round(recall, 4),
+                "f1": round(f1, 4),
+                "hit_rate": round(float(predicted.mean()) if len(scores) else 0.0, 4),
+            }
+        )
+    return rows
+
+
+def build_encoder(name: str) -> Any:
+    """
+    Create the configured encoder.
+
+    Raises:
+        ValueError: For an unknown encoder name
+    """
+    if name == "llmlingua":
+        if settings.compression_backend == "pytorch":
+            return LLMLinguaEncoder()
+        # The ONNX export only has the classification head's logits
+        logger.warning("Semantic cache: LLMLingua encoder needs the PyTorch backend")
+        name = "hashing"
+    if name == "hashing":
+        return HashingEncoder(settings.semantic_cache_hashing_dim)
+    raise ValueError(f"Unsupported semantic cache encoder: {name}")
+
+
+# Global semantic cache instance (tier of ``response_cache``)
+semantic_cache = SemanticCache(
+    encoder=build_encoder(settings.semantic_cache_encoder),
+    enabled=settings.semantic_cache_enabled,
+    threshold=settings.semantic_cache_threshold,
+    max_entries=settings.semantic_cache_max_entries,
+    ttl_seconds=settings.semantic_cache_ttl_seconds,
+    n_lists=settings.semantic_cache_ivf_lists,
+    n_probe=settings.semantic_cache_ivf_probes,
+    top_k=settings.semantic_cache_top_k,
+)
@@ -4,7 +4,6 @@ import os
 import pytest
 from fastapi.testclient import TestClient
 
-
 # Set test environment variables BEFORE importing app
 # This ensures Settings loads test values instead of empty strings
 os.environ["SHARED_SECRET"] = "test-secret-for-testing-only"
@@ -25,6 +24,18 @@ if "ANTHROPIC_API_KEY" not in os.environ:
 from app.main import app  # noqa: E402
 
 
+@pytest.fixture(autouse=True)
+def intent_log_in_tmp_path(tmp_path, monkeypatch):
+    """Keep classification logs written by tests out of the working tree."""
+    from app.config import settings
+    from app.services.intent_classifier import classification_log
+
+    path = str(tmp_path / "intent_classifications.jsonl")
+    monkeypatch.setattr(settings, "intent_log_path", path)
+    monkeypatch.setattr(classification_log, "path", path)
+    return path
+
+
 @pytest.fixture
 def client():
     """Test client fixture for FastAPI application."""
@@ -0,0 +1,106 @@
+"""Local fake LLM provider server for streaming tests.
+
+Speaks the OpenAI chat-completions and Anthropic messages streaming (SSE)
+wire formats, so the real SDK clients can be pointed at it through an
+in-process ASGI transport.
+"""
+
+import json
+from typing import Iterator, List
+
+import httpx
+from anthropic import AsyncAnthropic
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from openai import AsyncOpenAI
+
+REPLY_PARTS = ["Hello", ", ", "world", "!"]
+
+fake_provider = FastAPI()
+
+
+def openai_events(model: str, parts: List[str]) -> Iterator[str]:
+    """Chat completion chunks, then a usage-only chunk and [DONE]."""
+    base = {"id": "chatcmpl-1", "object": "chat.completion.chunk", "created": 1}
+    for part in parts:
+        chunk = {
+            **base,
+            "model": model,
+            "choices": [
+                {"index": 0, "delta": {"content": part}, "finish_reason": None}
+            ],
+        }
+        yield f"data: {json.dumps(chunk)}\n\n"
+    usage = {"prompt_tokens": 7, "completion_tokens": len(parts), "total_tokens": 11}
+    yield f"data: {json.dumps({**base, 'model': model, 'choices': [], 'usage': usage})}\n\n"
+    yield "data: [DONE]\n\n"
+
+
+def anthropic_events(model: str, parts: List[str]) -> Iterator[str]:
+    """Anthropic message stream: start, text deltas, usage, stop."""
+
+    def event(name: str, data: dict) -> str:
+        return f"event: {name}\ndata: {json.dumps({'type': name, **data})}\n\n"
+
+    yield event(
+        "message_start",
+        {
+            "message": {
+                "id": "msg_1",
+                "type": "message",
+                "role": "assistant",
+                "content": [],
+                "model": model,
+                "stop_reason": None,
+                "stop_sequence": None,
+                "usage": {"input_tokens": 9, "output_tokens": 1},
+            }
+        },
+    )
+    yield event(
+        "content_block_start",
+        {"index": 0, "content_block": {"type": "text", "text": ""}},
+    )
+    for part in parts:
+        yield event(
+            "content_block_delta",
+            {"index": 0, "delta": {"type": "text_delta", "text": part}},
+        )
+    yield event("content_block_stop", {"index": 0})
+    yield event(
+        "message_delta",
+        {
+            "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+            "usage": {"output_tokens": len(parts)},
+        },
+    )
+    yield event("message_stop", {})
+
+
+@fake_provider.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    """OpenAI streaming chat completion."""
+    body = await request.json()
+    return StreamingResponse(
+        openai_events(body["model"], REPLY_PARTS), media_type="text/event-stream"
+    )
+
+
+@fake_provider.post("/v1/messages")
+async def messages(request: Request):
+    """Anthropic streaming message."""
+    body = await request.json()
+    return StreamingResponse(
+        anthropic_events(body["model"], REPLY_PARTS), media_type="text/event-stream"
+    )
+
+
+def attach_fake_provider(router) -> None:
+    """Point a router's OpenAI and Anthropic clients at the fake server."""
+    http_client = httpx.AsyncClient(transport=httpx.ASGITransport(app=fake_provider))
+    router.openai_client = AsyncOpenAI(
+        api_key="fake", base_url="http://fake-provider/v1", http_client=http_client
+    )
+    router.anthropic_client = AsyncAnthropic(
+        api_key="fake", base_url="http://fake-provider", http_client=http_client
+    )
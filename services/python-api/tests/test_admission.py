@@ -0,0 +1,92 @@
+"""Tests for inference admission control."""
+
+import asyncio
+import pytest
+from app.services.admission import AdmissionController, AdmissionRejected
+
+
+async def test_concurrency_is_capped_and_waiters_run_in_order():
+    """No more than max_concurrency holders at once; queued requests run FIFO."""
+    controller = AdmissionController(max_concurrency=2, max_queue=10)
+    running = 0
+    peak = 0
+    order = []
+
+    async def work(i: int) -> None:
+        nonlocal running, peak
+        async with controller.slot():
+            running += 1
+            peak = max(peak, running)
+            order.append(i)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+    await asyncio.gather(*(work(i) for i in range(6)))
+
+    assert peak == 2
+    assert order == list(range(6))
+    assert controller.stats()["admitted"] == 6
+    assert controller.stats()["active"] == 0
+
+
+async def test_full_queue_rejects_with_retry_after():
+    """Requests beyond the queue bound are rejected immediately."""
+    controller = AdmissionController(max_concurrency=1, max_queue=1)
+    release = asyncio.Event()
+
+    async def hold() -> None:
+        async with controller.slot():
+            await release.wait()
+
+    holder = asyncio.create_task(hold())
+    queued = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+
+    with pytest.raises(AdmissionRejected) as exc_info:
+        async with controller.slot():
+            pass
+    assert exc_info.value.reason == "queue full"
+    assert exc_info.value.retry_after >= 1
+
+    release.set()
+    await asyncio.gather(holder, queued)
+
+
+async def test_queue_deadline_rejects_and_frees_queue_position():
+    """A waiter past its deadline is rejected and removed from the queue."""
+    controller = AdmissionController(max_concurrency=1, max_queue=5)
+    release = asyncio.Event()
+
+    async def hold() -> None:
+        async with controller.slot():
+            await release.wait()
+
+    holder = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+
+    with pytest.raises(AdmissionRejected) as exc_info:
+        async with controller.slot(timeout=0.01):
+            pass
+    assert exc_info.value.reason == "deadline exceeded"
+    assert controller.stats()["queued"] == 0
+
+    release.set()
+    await holder
+    async with controller.slot(timeout=0.01):
+        assert controller.stats()["active"] == 1
+
+
+def test_compress_returns_429_when_overloaded(client, auth_headers, monkeypatch):
+    """Rejected admissions surface as 429 with a Retry-After header."""
+    from app.services.compression import compression_service
+
+    async def reject(*args, **kwargs):
+        raise AdmissionRejected("queue full", 3)
+
+    monkeypatch.setattr(compression_service, "compress", reject)
+    response = client.post(
+        "/api/v1/compress", json={"prompt": "Some prompt"}, headers=auth_headers
+    )
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "3"
@@ -0,0 +1,132 @@
+"""Tests for the latency-aware async circuit breaker."""
+
+import asyncio
+from contextlib import nullcontext
+import pytest
+from app.services.circuit_breaker import (
+    AsyncCircuitBreaker,
+    CircuitBreakerRegistry,
+    CircuitOpenError,
+    CircuitState,
+)
+
+
+async def ok(delay=0.0):
+    """Upstream answering after ``delay`` seconds."""
+    await asyncio.sleep(delay)
+    return "ok"
+
+
+async def boom():
+    """Upstream failing immediately."""
+    raise RuntimeError("upstream error")
+
+
+def breaker(**kwargs):
+    """Breaker with small thresholds and short timings."""
+    defaults = dict(
+        minimum_calls=4,
+        failure_rate_threshold=0.5,
+        slow_call_rate_threshold=0.5,
+        slow_call_seconds=0.05,
+        open_seconds=0.1,
+        half_open_max_calls=2,
+    )
+    return AsyncCircuitBreaker("test", **{**defaults, **kwargs})
+
+
+async def test_trips_on_error_rate_and_rejects_fast():
+    """Half the calls failing opens the breaker; further calls are not made."""
+    cb = breaker()
+    for fn in (ok, boom, ok, boom):
+        with pytest.raises(RuntimeError) if fn is boom else nullcontext():
+            await cb.call(fn)
+
+    assert cb.state == CircuitState.OPEN
+    called = False
+
+    async def upstream():
+        nonlocal called
+        called = True
+
+    with pytest.raises(CircuitOpenError) as exc_info:
+        await cb.call(upstream)
+    assert not called
+    assert exc_info.value.retry_after > 0
+    assert cb.snapshot()["totals"]["rejected"] == 1
+
+
+async def test_trips_on_slow_calls_without_errors():
+    """An upstream that always answers, but slowly, is shed too."""
+    cb = breaker()
+    for _ in range(4):
+        assert await cb.call(lambda: ok(0.06)) == "ok"
+
+    snap = cb.snapshot()
+    assert snap["state"] == "open"
+    assert snap["transitions"][-1]["reason"].startswith("slow-call rate")
+
+
+async def test_minimum_calls_and_window():
+    """Too few calls never trip; calls outside the window are forgotten."""
+    cb = breaker(window_seconds=0.05)
+    for _ in range(3):
+        with pytest.raises(RuntimeError):
+            await cb.call(boom)
+    assert cb.state == CircuitState.CLOSED
+
+    await asyncio.sleep(0.06)
+    with pytest.raises(RuntimeError):
+        await cb.call(boom)
+    assert cb.state == CircuitState.CLOSED
+    assert cb.snapshot()["window"]["calls"] == 1
+
+
+async def test_half_open_probes_close_or_reopen():
+    """Probes are limited; all fast successes close, a failure reopens."""
+    cb = breaker()
+    cb._transition(CircuitState.OPEN, "test")
+    await asyncio.sleep(0.11)
+    assert cb.allows_calls()
+
+    # Only half_open_max_calls concurrent probes are let through
+    probes = [asyncio.ensure_future(cb.call(lambda: ok(0.01))) for _ in range(2)]
+    await asyncio.sleep(0)
+    with pytest.raises(CircuitOpenError):
+        await cb.call(ok)
+    await asyncio.gather(*probes)
+    assert cb.state == CircuitState.CLOSED
+
+    cb._transition(CircuitState.OPEN, "test")
+    await asyncio.sleep(0.11)
+    with pytest.raises(RuntimeError):
+        await cb.call(boom)
+    assert cb.state == CircuitState.OPEN
+    assert cb.transition_counts["half_open->open"] == 1
+
+
+async def test_registry_keeps_one_breaker_per_model_and_exports_metrics():
+    """Breakers are created once per name; metrics cover every breaker."""
+    registry = CircuitBreakerRegistry(minimum_calls=1)
+    first = registry.get("openai:gpt-4o", slow_call_seconds=1.0)
+    assert registry.get("openai:gpt-4o") is first
+    assert first.slow_call_seconds == 1.0
+
+    with pytest.raises(RuntimeError):
+        await registry.get("anthropic:claude").call(boom)
+
+    metrics = registry.prometheus_metrics()
+    assert 'circuit_breaker_state{name="anthropic:claude",state="open"} 1' in metrics
+    assert 'circuit_breaker_state{name="openai:gpt-4o",state="closed"} 1' in metrics
+    assert (
+        'circuit_breaker_transitions_total{name="anthropic:claude",'
+        'from="closed",to="open"} 1' in metrics
+    )
+
+
+def test_circuit_breaker_endpoints_require_auth(client, auth_headers):
+    """Breaker state is exported as JSON and Prometheus text."""
+    assert client.get("/api/v1/circuit-breakers").status_code == 403
+    response = client.get("/api/v1/circuit-breakers/metrics", headers=auth_headers)
+    assert response.status_code == 200
+    assert "circuit_breaker_state" in response.text
@@ -0,0 +1,141 @@
+"""Tests for fleet-wide circuit breaker state in Redis (fakeredis)."""
+
+import asyncio
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from app.services.circuit_breaker import (  # noqa: E402
+    CircuitBreakerRegistry,
+    CircuitOpenError,
+    CircuitState,
+)
+from app.services.circuit_breaker_store import RedisBreakerStore  # noqa: E402
+
+SETTINGS = dict(
+    minimum_calls=4,
+    failure_rate_threshold=0.5,
+    slow_call_seconds=1.0,
+    open_seconds=0.3,
+    half_open_max_calls=1,
+)
+
+
+def worker(server, **overrides):
+    """A registry as one worker process would build it, on a shared server."""
+    client = fakeredis.aioredis.FakeRedis(server=server, decode_responses=True)
+    store = RedisBreakerStore(lambda: client, cache_ttl_seconds=0.05)
+    return CircuitBreakerRegistry(store=store, **{**SETTINGS, **overrides})
+
+
+async def ok():
+    """Upstream answering immediately."""
+    return "ok"
+
+
+async def boom():
+    """Upstream failing immediately."""
+    raise RuntimeError("upstream error")
+
+
+async def test_failures_are_counted_fleet_wide():
+    """Two workers with two failures each trip the shared breaker together."""
+    server = fakeredis.FakeServer()
+    a, b = worker(server).get("gpt-4o-mini"), worker(server).get("gpt-4o-mini")
+
+    for breaker in (a, b, a):
+        with pytest.raises(RuntimeError):
+            await breaker.call(boom)
+    assert a.state == CircuitState.CLOSED
+    with pytest.raises(RuntimeError):
+        await b.call(boom)
+    assert b.state == CircuitState.OPEN
+
+
+async def test_one_worker_tripping_protects_the_others():
+    """After A trips, B rejects without calling the upstream."""
+    server = fakeredis.FakeServer()
+    a, b = worker(server).get("gpt-4o-mini"), worker(server).get("gpt-4o-mini")
+    await b.call(ok)  # B has seen CLOSED (and that call counts fleet-wide)
+
+    for _ in range(3):
+        with pytest.raises(RuntimeError):
+            await a.call(boom)
+    await asyncio.sleep(0.06)  # B's cached CLOSED state expires
+
+    called = False
+
+    async def upstream():
+        nonlocal called
+        called = True
+
+    with pytest.raises(CircuitOpenError) as exc_info:
+        await b.call(upstream)
+    assert not called
+    assert 0 < exc_info.value.retry_after <= 0.3
+    assert b.state == CircuitState.OPEN
+
+    # Further rejections come from B's local cache of the OPEN state
+    with pytest.raises(CircuitOpenError):
+        await b.call(upstream)
+
+
+async def test_half_open_probe_is_shared_and_closes_fleet_wide():
+    """Only one probe runs across workers; its success closes the breaker."""
+    server = fakeredis.FakeServer()
+    a, b = worker(server).get("m"), worker(server).get("m")
+    for _ in range(4):
+        with pytest.raises(RuntimeError):
+            await a.call(boom)
+    await asyncio.sleep(0.31)
+
+    release = asyncio.Event()
+
+    async def slow_ok():
+        await release.wait()
+        return "ok"
+
+    probe = asyncio.ensure_future(a.call(slow_ok))
+    await asyncio.sleep(0.01)
+    with pytest.raises(CircuitOpenError):
+        await b.call(ok)  # probe slot taken by A
+    release.set()
+    assert await probe == "ok"
+
+    await asyncio.sleep(0.06)
+    assert await b.call(ok) == "ok"
+    assert b.state == CircuitState.CLOSED
+
+
+async def test_redis_outage_degrades_to_local_state():
+    """Redis errors switch to the local state machine instead of failing calls."""
+    server = fakeredis.FakeServer()
+    registry = worker(server)
+    breaker = registry.get("m")
+    server.connected = False
+
+    assert await breaker.call(ok) == "ok"
+    assert not registry.store.available()
+    for _ in range(3):
+        with pytest.raises(RuntimeError):
+            await breaker.call(boom)
+    assert breaker.state == CircuitState.OPEN
+    assert breaker.snapshot()["store"]["errors"] >= 1
+
+
+async def test_buckets_outside_the_window_are_dropped_after_gaps():
+    """Buckets skipped during a traffic gap do not linger in the hash."""
+    server = fakeredis.FakeServer()
+    client = fakeredis.aioredis.FakeRedis(server=server, decode_responses=True)
+    store = RedisBreakerStore(lambda: client, bucket_seconds=0.1)
+    breaker = CircuitBreakerRegistry(
+        store=store, **{**SETTINGS, "window_seconds": 0.3}
+    ).get("gpt-4o-mini")
+
+    await breaker.call(ok)
+    await asyncio.sleep(0.55)  # Several buckets without traffic
+    await breaker.call(ok)
+
+    fields = await client.hkeys("trimind:circuit:gpt-4o-mini")
+    buckets = {field.split(":")[1] for field in fields if field.startswith("b:")}
+    assert len(buckets) == 1
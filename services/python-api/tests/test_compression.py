@@ -81,3 +81,54 @@ def test_compress_endpoint_validates_prompt_length(client, auth_headers):
         headers=auth_headers,
     )
     assert response.status_code == 422  # Validation error
+
+
+def test_compress_batch_endpoint_requires_auth(client):
+    """Test that batch compression endpoint requires authentication."""
+    response = client.post(
+        "/api/v1/compress/batch",
+        json={"prompts": ["First prompt to compress.", "Second prompt."]},
+    )
+    assert response.status_code == 403
+
+
+def test_compress_batch_endpoint_validates_prompts(client, auth_headers):
+    """Test that batch compression rejects empty lists and empty prompts."""
+    response = client.post(
+        "/api/v1/compress/batch", json={"prompts": []}, headers=auth_headers
+    )
+    assert response.status_code == 422
+
+    response = client.post(
+        "/api/v1/compress/batch",
+        json={"prompts": ["Valid prompt", ""]},
+        headers=auth_headers,
+    )
+    assert response.status_code == 422
+
+
+def test_compress_batch_endpoint_with_valid_auth(client, auth_headers):
+    """Test batch compression returns one result per prompt (or fails gracefully)."""
+    prompts = [
+        "This is the first prompt that needs to be compressed for efficiency.",
+        "This is the second prompt that should also be compressed.",
+    ]
+    response = client.post(
+        "/api/v1/compress/batch",
+        json={"prompts": prompts, "rate": 0.5},
+        headers=auth_headers,
+    )
+
+    assert response.status_code in [200, 500]
+    if response.status_code == 200:
+        results = response.json()["results"]
+        assert len(results) == len(prompts)
+
+
+def test_compress_stats_endpoint(client, auth_headers):
+    """Test that compression stats expose cache and batching counters."""
+    response = client.get("/api/v1/compress/stats", headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert "hits" in data["cache"]["memory"]
+    assert "batches" in data["batching"]
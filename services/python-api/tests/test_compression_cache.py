@@ -0,0 +1,64 @@
+"""Tests for the compression result cache."""
+
+import time
+from app.models import LLMLinguaModel
+from app.services.cache import SqliteCacheStore, TTLLRUCache
+from app.services.compression import CompressionService
+from app.services.compression_cache import CompressionCache, make_compression_key
+
+
+def test_lru_evicts_least_recently_used_and_counts():
+    """The LRU keeps the most recently used entries within its bound."""
+    cache: TTLLRUCache[str] = TTLLRUCache(max_entries=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    assert cache.get("a") == "1"  # 'a' becomes most recently used
+    cache.set("c", "3")  # evicts 'b'
+
+    assert cache.get("b") is None
+    assert cache.get("c") == "3"
+    stats = cache.stats.as_dict()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["evictions"] == 1
+
+
+def test_entries_expire_after_ttl():
+    """Expired entries are treated as misses."""
+    cache: TTLLRUCache[str] = TTLLRUCache(max_entries=10, ttl_seconds=0.01)
+    cache.set("a", "1")
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert cache.stats.expirations == 1
+
+
+def test_disk_tier_survives_reopen(tmp_path):
+    """The SQLite tier persists entries across instances (restarts)."""
+    path = str(tmp_path / "compression-cache.sqlite")
+    store = SqliteCacheStore(path, ttl_seconds=60)
+    store.set("key", "compressed")
+    store.close()
+
+    reopened = SqliteCacheStore(path, ttl_seconds=60)
+    assert reopened.get("key") == "compressed"
+    reopened.close()
+
+
+def test_key_depends_on_all_inputs():
+    """Keys change with rate and model, but not with force_tokens order."""
+    base = make_compression_key("prompt", 0.5, ["a", "b"], "model")
+    assert base == make_compression_key("prompt", 0.5, ["b", "a"], "model")
+    assert base != make_compression_key("prompt", 0.4, ["a", "b"], "model")
+    assert base != make_compression_key("prompt", 0.5, ["a", "b"], "other-model")
+
+
+async def test_service_serves_cached_results_without_inference():
+    """A cached prompt is returned without touching the model."""
+    cache = CompressionCache(max_entries=10)
+    key = make_compression_key("long prompt", 0.5, [], LLMLinguaModel.model_id())
+    await cache.set(key, "short")
+
+    service = CompressionService(cache=cache)
+    assert await service.compress("long prompt", rate=0.5) == "short"
+    assert service.batcher.stats()["batches"] == 0
+    assert cache.stats()["memory"]["hits"] == 1
@@ -0,0 +1,80 @@
+"""Tests for the cost-model compression gate."""
+
+from app.services.compression_gate import CompressionGate, ModelCost
+
+
+def test_short_prompt_is_not_compressed():
+    """Compressing a short prompt costs more than the provider time it saves."""
+    gate = CompressionGate(prior_tokens_per_second=1500.0)
+
+    decision = gate.decide("Hello, how are you? " * 30, "gemini-2.0-flash-exp")
+
+    assert decision.compress is False
+    assert decision.rate is None
+    assert decision.net_benefit_ms < 0
+
+
+def test_long_prompt_on_expensive_model_is_compressed_at_best_tier():
+    """Large prompts for pricey models compress, at the most aggressive paying rate."""
+    gate = CompressionGate(
+        prior_tokens_per_second=1500.0,
+        rate_tiers=[(0, 0.5), (3000, 0.33)],
+        model_costs={"pricey": ModelCost(0.01, 0.1)},
+    )
+
+    decision = gate.decide("word " * 20000, "pricey")
+
+    assert decision.compress is True
+    assert decision.rate == 0.33
+    assert decision.est_savings_usd > 0
+
+
+def test_measured_throughput_changes_the_decision():
+    """A slow measured compressor turns a compress decision into a skip."""
+    gate = CompressionGate(
+        prior_tokens_per_second=1500.0, model_costs={"pricey": ModelCost(0.01, 0.1)}
+    )
+    prompt = "word " * 4000
+    assert gate.decide(prompt, "pricey").compress is True
+
+    for _ in range(50):
+        gate.record_compression(tokens=1000, seconds=10.0)  # 100 tokens/s
+
+    assert gate.tokens_per_second < 200
+    assert gate.decide(prompt, "pricey").compress is False
+
+
+def test_decision_history_is_bounded():
+    """Only the most recent decisions are kept for tuning."""
+    gate = CompressionGate(history_size=3)
+    for _ in range(5):
+        gate.decide("short", "gpt-4o")
+
+    stats = gate.stats()
+    assert stats["decisions_kept"] == 3
+    assert len(stats["recent_decisions"]) == 3
+    assert stats["compress_fraction"] == 0.0
+
+
+def test_default_calibration_for_every_default_model(monkeypatch):
+    """The shipped gate skips short prompts and compresses large ones everywhere."""
+    from app.config import settings
+    from app.services.compression_gate import compression_gate
+    from app.services.llm_router import LLMRouter
+
+    # Throughput measured by earlier tests must not leak into the priors
+    monkeypatch.setattr(
+        compression_gate,
+        "tokens_per_second",
+        settings.compression_gate_prior_tokens_per_second,
+    )
+
+    for model in LLMRouter.DEFAULT_MODELS.values():
+        short = compression_gate.decide("x" * 200, model)
+        medium = compression_gate.decide("x" * 2000, model)
+        large = compression_gate.decide("x" * 40000, model)
+
+        assert short.compress is False, model
+        assert large.compress is True and large.rate == 0.33, model
+        # Medium prompts only pay off where input tokens are expensive
+        assert medium.compress is (model != "gemini-2.0-flash-exp"), model
@@ -0,0 +1,71 @@
+"""Tests for long-prompt chunked compression and NDJSON streaming."""
+
+import json
+from app.models import LLMLinguaModel
+from app.services.compression import CompressionService, split_prompt
+from app.services.compression_cache import CompressionCache, make_compression_key
+
+LONG_PROMPT = (
+    "First paragraph opens here. It has a second sentence about revenue.\n\n"
+    "Second paragraph is short.\n\n"
+    "Third paragraph talks about the Q3 roadmap. It keeps going for a while. "
+    "And it ends with a final remark."
+)
+
+
+def test_split_prompt_respects_boundaries_and_size():
+    """Chunks stay under the limit and never cut words."""
+    chunks = split_prompt(LONG_PROMPT, max_chars=80)
+
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 80 for chunk in chunks)
+    assert " ".join(chunks).split() == LONG_PROMPT.split()
+
+
+def test_split_prompt_hard_splits_giant_sentences():
+    """A sentence longer than the limit is split on whitespace."""
+    chunks = split_prompt("word " * 100, max_chars=50)
+    assert all(len(chunk) <= 50 for chunk in chunks)
+    assert sum(len(chunk.split()) for chunk in chunks) == 100
+
+
+async def test_compress_stream_yields_chunks_in_order():
+    """Chunks are yielded in prompt order (served from cache here)."""
+    chunks = split_prompt(LONG_PROMPT, max_chars=80)
+    cache = CompressionCache(max_entries=100)
+    for i, chunk in enumerate(chunks):
+        key = make_compression_key(chunk, 0.5, [], LLMLinguaModel.model_id())
+        await cache.set(key, f"compressed-{i}")
+
+    service = CompressionService(cache=cache)
+    streamed = [
+        item
+        async for item in service.compress_stream(
+            LONG_PROMPT, rate=0.5, max_chunk_chars=80
+        )
+    ]
+
+    assert [original for original, _ in streamed] == chunks
+    assert [compressed for _, compressed in streamed] == [
+        f"compressed-{i}" for i in range(len(chunks))
+    ]
+
+
+def test_compress_stream_endpoint_returns_ndjson(client, auth_headers):
+    """The stream endpoint emits NDJSON chunk/summary (or error) lines."""
+    response = client.post(
+        "/api/v1/compress/stream",
+        json={"prompt": LONG_PROMPT, "rate": 0.5},
+        headers=auth_headers,
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines() if line]
+    assert lines[-1]["type"] in ["summary", "error"]
+
+
+def test_compress_stream_endpoint_requires_auth(client):
+    """Test that the stream endpoint requires authentication."""
+    response = client.post("/api/v1/compress/stream", json={"prompt": LONG_PROMPT})
+    assert response.status_code == 403
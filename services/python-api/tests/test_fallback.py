@@ -0,0 +1,202 @@
+"""Tests for LLM fallback chains (retry budget, jittered backoff, deadlines)."""
+
+import asyncio
+import random
+import time
+
+import pytest
+
+from app.config import settings
+from app.services import llm_router as llm_router_module
+from app.services.circuit_breaker import CircuitOpenError, circuit_breakers
+from app.services.fallback import (
+    DecorrelatedJitter,
+    FallbackExhausted,
+    FallbackRunner,
+    RetryBudget,
+)
+from app.services.llm_router import LLMRouter
+from app.services.routing_policy import RoutingPolicy
+from tests.fake_provider import REPLY_PARTS, attach_fake_provider
+
+CHAIN = [("openai", None), ("anthropic", None)]
+
+
+def runner(ratio=1.0, min_per_second=1.0):
+    """Runner with millisecond backoffs and its own budget."""
+    return FallbackRunner(
+        budget=RetryBudget(ratio=ratio, min_per_second=min_per_second),
+        backoff_base_seconds=0.001,
+        backoff_cap_seconds=0.005,
+    )
+
+
+def scripted(outcomes):
+    """Attempt function acting per provider: "ok", "hang" or an exception."""
+
+    async def attempt(provider, model, timeout):
+        outcome = outcomes[provider]
+        if outcome == "hang":
+            await asyncio.wait_for(asyncio.sleep(10), timeout)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return f"{provider} answer"
+
+    return attempt
+
+
+def test_retry_budget_caps_retries_at_a_share_of_requests():
+    """Retries beyond ratio * requests (plus the floor) are refused."""
+    budget = RetryBudget(ratio=0.5, min_per_second=0.0, window_seconds=10)
+    for _ in range(4):
+        budget.record_request()
+
+    assert [budget.try_spend() for _ in range(3)] == [True, True, False]
+    assert budget.stats()["retries"] == 2
+    assert budget.stats()["rejected"] == 1
+
+
+def test_decorrelated_jitter_stays_within_base_and_cap():
+    """Delays are spread, never below the base and never above the cap."""
+    backoff = DecorrelatedJitter(base=0.1, cap=2.0, rng=random.Random(7))
+
+    delays = [backoff.next() for _ in range(50)]
+
+    assert all(0.1 <= delay <= 2.0 for delay in delays)
+    assert len(set(delays)) > 10
+    assert max(delays) == 2.0
+
+
+async def test_timed_out_attempt_falls_back_within_the_deadline():
+    """A hanging primary is cut at the attempt timeout and the next entry answers."""
+    chain = runner()
+    started = time.monotonic()
+
+    result, attempts = await chain.run(
+        CHAIN,
+        scripted({"openai": "hang", "anthropic": "ok"}),
+        attempt_timeout=0.05,
+        deadline=1.0,
+    )
+
+    assert result == "anthropic answer"
+    assert time.monotonic() - started < 0.5
+    assert [a.outcome for a in attempts] == ["timeout", "ok"]
+    assert attempts[1].backoff_ms > 0
+    assert chain.stats()["fallback_successes"] == 1
+
+
+async def test_deadline_stops_the_chain():
+    """Without an attempt timeout, the deadline bounds the whole chain."""
+    chain = runner()
+
+    with pytest.raises(FallbackExhausted) as error:
+        await chain.run(
+            CHAIN, scripted({"openai": "hang", "anthropic": "ok"}), deadline=0.05
+        )
+
+    assert error.value.reason == "deadline exceeded"
+    assert [a.outcome for a in error.value.attempts] == ["timeout"]
+    assert isinstance(error.value.__cause__, asyncio.TimeoutError)
+
+
+async def test_open_circuit_is_skipped_without_budget_but_errors_need_it():
+    """Skipped entries cost nothing; a real failure needs budget to retry."""
+    chain = runner(ratio=0.0, min_per_second=0.0)
+
+    result, attempts = await chain.run(
+        CHAIN,
+        scripted({"openai": CircuitOpenError("openai:gpt-4o", 5.0), "anthropic": "ok"}),
+    )
+    assert result == "anthropic answer"
+    assert attempts[1].backoff_ms == 0
+
+    with pytest.raises(FallbackExhausted) as error:
+        await chain.run(
+            CHAIN, scripted({"openai": RuntimeError("upstream 500"), "anthropic": "ok"})
+        )
+    assert error.value.reason == "retry budget exhausted"
+    assert isinstance(error.value.__cause__, RuntimeError)
+    assert chain.stats()["retry_budget"]["rejected"] == 1
+
+
+async def test_stream_falls_back_before_the_first_token(monkeypatch):
+    """A provider failing before its first event is replaced by the next one."""
+    monkeypatch.setattr(llm_router_module, "fallback_runner", runner())
+    router = LLMRouter()
+    attach_fake_provider(router)
+
+    async def failing_openai(*args, **kwargs):
+        raise RuntimeError("upstream 503")
+        yield  # pragma: no cover
+
+    router._stream_openai = failing_openai
+    events = [
+        event
+        async for event in router.stream(
+            "openai",
+            [{"role": "user", "content": "Hi"}],
+            fallbacks=["anthropic"],
+            attempt_timeout=5.0,
+        )
+    ]
+
+    assert [e["content"] for e in events[:-1]] == REPLY_PARTS
+    done = events[-1]
+    assert done["provider"] == "anthropic"
+    assert [(a["provider"], a["outcome"]) for a in done["attempts"]] == [
+        ("openai", "error"),
+        ("anthropic", "ok"),
+    ]
+
+
+async def test_timed_out_attempt_counts_as_a_failed_call(monkeypatch):
+    """A hung provider is recorded as failing, so routing stops warming it up."""
+    policy = RoutingPolicy(exploration_rate=0.0)
+    monkeypatch.setattr(llm_router_module, "routing_policy", policy)
+    monkeypatch.setattr(llm_router_module, "fallback_runner", runner())
+    router = LLMRouter()
+    attach_fake_provider(router)
+    breaker = circuit_breakers.get("openai:gpt-4o")
+    failures = breaker.total_failures
+
+    async def hanging_openai(*args, **kwargs):
+        await asyncio.sleep(10)
+        yield  # pragma: no cover
+
+    router._stream_openai = hanging_openai
+    events = [
+        event
+        async for event in router.stream(
+            "openai",
+            [{"role": "user", "content": "Hi"}],
+            fallbacks=["anthropic"],
+            attempt_timeout=0.05,
+        )
+    ]
+
+    assert [a["outcome"] for a in events[-1]["attempts"]] == ["timeout", "ok"]
+    assert policy.routes["openai:gpt-4o"].failures == 1
+    assert breaker.total_failures == failures + 1
+
+
+def test_fallback_chain_keeps_available_providers_in_order(monkeypatch):
+    """The chain follows the setting, skipping the primary and missing clients."""
+    monkeypatch.setattr(
+        settings,
+        "llm_fallback_providers",
+        ["google", "openai", "anthropic:claude-3-5-haiku-latest", "openai:gpt-4o"],
+    )
+    router = LLMRouter()
+    attach_fake_provider(router)
+    router.gemini_model = None
+
+    assert router.fallback_chain("openai") == ["anthropic:claude-3-5-haiku-latest"]
+    assert router.fallback_chain("anthropic") == [
+        "openai",
+        "anthropic:claude-3-5-haiku-latest",
+        "openai:gpt-4o",
+    ]
+
+    monkeypatch.setattr(settings, "llm_fallback_enabled", False)
+    assert router.fallback_chain("openai") == []
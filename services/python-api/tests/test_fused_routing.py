@@ -0,0 +1,82 @@
+"""Tests for fused routing (skipping intent classification before routing)."""
+
+import pytest
+
+from app.config import settings
+from app.services.fused_routing import FusedRoutingPolicy
+from app.services.llm_router import ProviderEnum, LLMRouter
+
+
+class IntentAwareRouter(LLMRouter):
+    """Router that sends "command" intents to Anthropic."""
+
+    def select_provider(self, intent=None, user_preference=None, adaptive=None):
+        """Route commands to a different provider than the default."""
+        if intent == "command":
+            return ProviderEnum.ANTHROPIC
+        return super().select_provider(
+            intent=intent, user_preference=user_preference, adaptive=adaptive
+        )
+
+
+def make_policy(mode="auto"):
+    """Policy with the configured greeting rules."""
+    return FusedRoutingPolicy(
+        mode=mode,
+        greeting_pattern=settings.fused_routing_greeting_pattern,
+        greeting_max_chars=settings.fused_routing_greeting_max_chars,
+    )
+
+
+def test_fuses_when_no_intent_changes_provider():
+    """Intents the classifier emits never change the default provider."""
+    policy = make_policy()
+    router = LLMRouter()
+
+    assert policy.provider_sensitive_intents(router) == set()
+    assert policy.decide("explain how tides work", router) == (
+        True,
+        "intent cannot change provider",
+    )
+
+
+def test_classifies_first_when_intent_may_change_provider():
+    """Only greetings skip classification when an intent changes routing."""
+    policy = make_policy()
+    router = IntentAwareRouter()
+
+    assert policy.provider_sensitive_intents(router) == {"command"}
+    assert policy.decide("delete my last message", router) == (
+        False,
+        "intent may change provider",
+    )
+    assert policy.decide("Hi there!", router) == (True, "greeting")
+    assert policy.stats()["decisions"] == {
+        "intent may change provider": 1,
+        "greeting": 1,
+    }
+
+
+@pytest.mark.parametrize(
+    "message,expected",
+    [
+        ("Hello", True),
+        ("  Thank you so much!! ", True),
+        ("Good morning.", True),
+        ("hello, can you summarize this article for me", False),
+        ("hi " * 20, False),
+    ],
+)
+def test_greeting_detection(message, expected):
+    """Short greeting-like messages are recognized after normalization."""
+    assert make_policy().is_greeting(message) is expected
+
+
+def test_modes():
+    """ "never" keeps the classify-first flow, "always" always fuses."""
+    router = IntentAwareRouter()
+
+    assert make_policy("never").decide("Hello", router) == (False, "disabled")
+    assert make_policy("always").decide("delete it", router) == (True, "always")
+    with pytest.raises(ValueError):
+        FusedRoutingPolicy(mode="sometimes")
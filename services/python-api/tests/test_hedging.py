@@ -0,0 +1,115 @@
+"""Tests for hedged primary/fallback requests."""
+
+import asyncio
+import time
+import pytest
+from app.services.hedging import HedgeFailed, Hedger, LatencyTracker
+
+
+def answer(value, delay):
+    """Coroutine factory returning ``value`` after ``delay`` seconds."""
+
+    async def call():
+        await asyncio.sleep(delay)
+        return value
+
+    return call
+
+
+def failure(delay):
+    """Coroutine factory raising after ``delay`` seconds."""
+
+    async def call():
+        await asyncio.sleep(delay)
+        raise RuntimeError("provider error")
+
+    return call
+
+
+def test_latency_tracker_quantiles():
+    """Quantiles appear once enough samples exist and follow the window."""
+    tracker = LatencyTracker(window=100, min_samples=10)
+    for i in range(1, 10):
+        tracker.record("m", i / 100)
+    assert tracker.quantile("m", 0.95) is None
+
+    for i in range(10, 101):
+        tracker.record("m", i / 100)
+    assert tracker.quantile("m", 0.95) == pytest.approx(0.95)
+    assert tracker.quantile("m", 0.5) == pytest.approx(0.5)
+    assert tracker.stats()["m"]["samples"] == 100
+
+
+async def test_fast_primary_never_hedges():
+    """A primary that answers before the delay is returned without a hedge."""
+    hedger = Hedger(delay_seconds=0.2)
+    result = await hedger.run("p", answer("primary", 0.01), "f", answer("fb", 0.0))
+
+    assert result == "primary"
+    assert hedger.hedges_fired == 0
+
+
+async def test_slow_primary_is_hedged_and_cancelled():
+    """The fallback wins against a stuck primary, which is then cancelled."""
+    cancelled = asyncio.Event()
+
+    async def stuck():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    hedger = Hedger(delay_seconds=0.05)
+    started = time.monotonic()
+    result = await hedger.run("p", stuck, "f", answer("fallback", 0.01))
+
+    assert result == "fallback"
+    assert time.monotonic() - started < 1
+    await asyncio.wait_for(cancelled.wait(), 1)
+    stats = hedger.stats()
+    assert stats["hedges_fired"] == 1
+    assert stats["hedge_wins"] == 1
+    # The cancelled primary is tracked as a lower bound of its latency
+    assert hedger.tracker._samples["p"][0] >= 0.05
+
+
+async def test_invalid_hedge_answer_does_not_win():
+    """A failing fallback lets the slower primary finish."""
+    hedger = Hedger(delay_seconds=0.02)
+    result = await hedger.run("p", answer("primary", 0.1), "f", failure(0.0))
+
+    assert result == "primary"
+    assert hedger.hedge_wins == 0
+
+
+async def test_primary_error_fails_over_and_both_errors_raise():
+    """Outright primary failures still fail over; two failures raise HedgeFailed."""
+    hedger = Hedger(delay_seconds=1.0)
+    assert await hedger.run("p", failure(0), "f", answer("fb", 0)) == "fb"
+    assert hedger.failovers == 1
+
+    with pytest.raises(HedgeFailed) as exc_info:
+        await hedger.run("p", failure(0), "f", failure(0))
+    assert "provider error" in str(exc_info.value.primary_error)
+
+
+async def test_delay_follows_live_p95_and_ratio_caps_hedges():
+    """The delay is the primary's p95; hedging stops beyond max_hedge_ratio."""
+    hedger = Hedger(
+        tracker=LatencyTracker(min_samples=5),
+        initial_delay_seconds=2.0,
+        min_delay_seconds=0.01,
+        max_hedge_ratio=0.0,
+    )
+    assert hedger.hedge_delay("p") == 2.0
+    for _ in range(5):
+        hedger.tracker.record("p", 0.02)
+    assert hedger.hedge_delay("p") == pytest.approx(0.02)
+
+    # First hedge is allowed, the ratio budget (0) blocks the second
+    await hedger.run("p", answer("a", 0.06), "f", answer("b", 0.0))
+    result = await hedger.run("p", answer("a", 0.06), "f", answer("b", 0.0))
+    assert result == "a"
+    assert hedger.hedges_fired == 1
+    assert hedger.hedges_skipped == 1
@@ -0,0 +1,125 @@
+"""Tests for incremental session-history compression."""
+
+from typing import Dict, List
+from app.db_models import Message, MessageCompression
+from app.services.compression_gate import CompressionGate, ModelCost
+from app.services.history_compressor import HistoryCompressor
+
+
+class FakeCompressionService:
+    """Records which prompts were compressed."""
+
+    def __init__(self):
+        self.calls: List[List[str]] = []
+
+    async def compress_many(self, prompts: List[str], rate: float = 0.5) -> List[str]:
+        self.calls.append(list(prompts))
+        return [prompt[: len(prompt) // 2] for prompt in prompts]
+
+
+class InMemoryCompressionRepository:
+    """Dict-backed stand-in for MessageCompressionRepository."""
+
+    def __init__(self):
+        self.rows: Dict[str, MessageCompression] = {}
+
+    async def get_for_messages(self, message_ids):
+        return {i: self.rows[i] for i in message_ids if i in self.rows}
+
+    async def save_many(self, rows):
+        for row in rows:
+            self.rows[row.messageId] = row
+
+    async def prune_session(self, session_id, keep):
+        newest = sorted(self.rows.values(), key=lambda r: r.createdAt)[-keep:]
+        removed = len(self.rows) - len(newest)
+        self.rows = {row.messageId: row for row in newest}
+        return removed
+
+
+def make_message(index: int, content: str) -> Message:
+    role = "user" if index % 2 == 0 else "assistant"
+    return Message(
+        id=f"m{index}", sessionId="s1", userId="u1", role=role, content=content
+    )
+
+
+async def test_each_turn_only_compresses_new_messages():
+    """Stored compressions are reused; only the newly added message is compressed."""
+    service = FakeCompressionService()
+    repo = InMemoryCompressionRepository()
+    compressor = HistoryCompressor(service=service, min_chars=10, max_chars=10**6)
+    messages = [make_message(i, f"long message number {i} " * 5) for i in range(3)]
+
+    await compressor.compress_messages(messages, repo)
+    messages.append(make_message(3, "another long message " * 5))
+    history = await compressor.compress_messages(messages, repo)
+
+    assert [len(call) for call in service.calls] == [3, 1]
+    assert len(history) == 4
+    assert history[0]["content"] == messages[0].content[: len(messages[0].content) // 2]
+
+
+async def test_edited_message_is_recompressed_and_short_ones_skipped():
+    """A content change invalidates the stored compression; short messages pass through."""
+    service = FakeCompressionService()
+    repo = InMemoryCompressionRepository()
+    compressor = HistoryCompressor(service=service, min_chars=10, max_chars=10**6)
+    messages = [make_message(0, "original long content here"), make_message(1, "hi")]
+
+    await compressor.compress_messages(messages, repo)
+    messages[0].content = "edited long content, quite different"
+    history = await compressor.compress_messages(messages, repo)
+
+    assert service.calls[-1] == ["edited long content, quite different"]
+    assert history[1] == {"role": "assistant", "content": "hi"}
+
+
+async def test_history_budget_and_per_session_cap():
+    """Oldest messages are dropped to fit the budget; stored rows are capped."""
+    repo = InMemoryCompressionRepository()
+    compressor = HistoryCompressor(
+        service=FakeCompressionService(), min_chars=10, max_chars=25, max_per_session=2
+    )
+    messages = [make_message(i, "x" * 20) for i in range(4)]
+
+    history = await compressor.compress_messages(messages, repo)
+
+    assert len(history) == 2  # 10 compressed chars each
+    assert len(repo.rows) == 2
+
+
+async def test_gate_decides_new_compressions_but_stored_ones_are_reused():
+    """New messages compress only when the gate approves; stored rows always apply."""
+    service = FakeCompressionService()
+    repo = InMemoryCompressionRepository()
+    gate = CompressionGate(
+        rate_tiers=[(0, 0.5)],
+        model_costs={"cheap": ModelCost(0.0, 0.0), "pricey": ModelCost(0.01, 0.1)},
+    )
+    compressor = HistoryCompressor(
+        service=service, min_chars=10, max_chars=10**6, gate=gate
+    )
+    messages = [make_message(0, "long message " * 200)]
+
+    history = await compressor.compress_messages(messages, repo, model="cheap")
+    assert service.calls == [] and history[0]["content"] == messages[0].content
+
+    await compressor.compress_messages(messages, repo, model="pricey")
+    history = await compressor.compress_messages(messages, repo, model="cheap")
+    assert len(service.calls) == 1
+    assert history[0]["content"] == repo.rows["m0"].compressedContent
+
+
+async def test_trimmed_history_never_starts_with_an_assistant_turn():
+    """Budget trimming drops the leading assistant reply it would leave behind."""
+    compressor = HistoryCompressor(
+        service=FakeCompressionService(), min_chars=1000, max_chars=25
+    )
+    messages = [make_message(i, "x" * 10) for i in range(3)]
+
+    history = await compressor.compress_messages(
+        messages, InMemoryCompressionRepository()
+    )
+
+    assert [entry["role"] for entry in history] == ["user"]
@@ -0,0 +1,150 @@
+"""Tests for the dedicated inference executor."""
+
+import asyncio
+import sys
+import threading
+import time
+import pytest
+from fastapi import Response
+from app.models import LLMLinguaModel
+from app.services.inference_executor import InferenceExecutor
+
+
+@pytest.fixture
+def fresh_model_singleton(monkeypatch):
+    """Unloaded LLMLinguaModel; the class state is restored after the test."""
+    monkeypatch.setattr(LLMLinguaModel, "_instance", None)
+    monkeypatch.setattr(LLMLinguaModel, "_loaded_pid", None)
+    return LLMLinguaModel
+
+
+async def test_thread_mode_runs_off_the_event_loop():
+    """Work submitted to the executor never runs on the event loop thread."""
+    executor = InferenceExecutor(mode="thread", workers=2)
+    try:
+        worker_thread = await executor.run(threading.get_ident)
+        assert worker_thread != threading.get_ident()
+        assert executor.status()["started"] is True
+    finally:
+        executor.shutdown()
+    assert executor.status()["started"] is False
+
+
+def test_rejects_unknown_mode():
+    """Only process and thread pools are supported."""
+    with pytest.raises(ValueError):
+        InferenceExecutor(mode="gpu")
+
+
+def test_model_singleton_loads_once_under_concurrency(
+    monkeypatch, fresh_model_singleton
+):
+    """Threads racing on get_instance() construct the model exactly once."""
+    created = []
+
+    def slow_create(intra_op_threads=None):
+        time.sleep(0.05)
+        created.append(object())
+        return created[-1]
+
+    monkeypatch.setattr(LLMLinguaModel, "_create", staticmethod(slow_create))
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(LLMLinguaModel.get_instance()))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(created) == 1
+    assert all(result is created[0] for result in results)
+    assert LLMLinguaModel.is_loaded()
+    assert not LLMLinguaModel.loaded_in_parent()
+
+
+async def test_concurrent_warmups_share_one_load(monkeypatch):
+    """Startup and early requests await the same load; status reports the phase."""
+    module = sys.modules[InferenceExecutor.__module__]
+    loads = []
+
+    def fake_ready(intra_op_threads=None):
+        time.sleep(0.05)
+        loads.append(threading.get_ident())
+        return 1
+
+    monkeypatch.setattr(module, "_worker_ready", fake_ready)
+    executor = InferenceExecutor(mode="thread", workers=1)
+    try:
+        assert executor.load_status()["phase"] == "not_started"
+        pending = asyncio.gather(*(executor.warmup() for _ in range(5)))
+        await asyncio.sleep(0.01)
+        assert executor.load_status()["phase"] == "loading"
+        await pending
+
+        assert len(loads) == 1
+        status = executor.load_status()
+        assert status["phase"] == "ready"
+        assert status["elapsed_seconds"] >= 0.05
+    finally:
+        executor.shutdown()
+
+
+async def test_failed_load_is_reported_and_retried(monkeypatch):
+    """A failed load surfaces in load_status and the next caller retries."""
+    module = sys.modules[InferenceExecutor.__module__]
+    attempts = []
+
+    def flaky_ready(intra_op_threads=None):
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("download failed")
+        return 1
+
+    monkeypatch.setattr(module, "_worker_ready", flaky_ready)
+    executor = InferenceExecutor(mode="thread", workers=1)
+    try:
+        with pytest.raises(RuntimeError):
+            await executor.warmup()
+        assert executor.load_status()["phase"] == "failed"
+        assert executor.load_status()["error"] == "download failed"
+
+        await executor.warmup()
+        assert executor.ready is True
+        assert len(attempts) == 2
+    finally:
+        executor.shutdown()
+
+
+async def test_health_turns_ready_when_a_later_warmup_succeeds(monkeypatch):
+    """A failed startup load keeps /health at 503 only until a retry succeeds."""
+    from app import main
+
+    module = sys.modules[InferenceExecutor.__module__]
+    attempts = []
+
+    def flaky_ready(intra_op_threads=None):
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("download failed")
+        return 1
+
+    monkeypatch.setattr(module, "_worker_ready", flaky_ready)
+    executor = InferenceExecutor(mode="thread", workers=1)
+    monkeypatch.setattr(main, "inference_executor", executor)
+    try:
+        await main.load_models_background(main.app)
+        response = Response()
+        body = await main.health(response)
+        assert response.status_code == 503
+        assert body["status"] == "model_load_failed"
+
+        await executor.warmup()  # e.g. the first compression request
+        response = Response()
+        body = await main.health(response)
+        assert response.status_code == 200
+        assert body["status"] == "healthy"
+    finally:
+        executor.shutdown()
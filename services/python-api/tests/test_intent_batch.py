@@ -0,0 +1,133 @@
+"""Tests for batched intent classification."""
+
+import asyncio
+from types import SimpleNamespace
+import pytest
+from app.routers import intent_router
+from app.services.intent_cache import IntentCache
+from app.services.micro_batcher import MicroBatcher
+
+
+def completion(content):
+    """Minimal litellm-shaped response."""
+    message = SimpleNamespace(content=content)
+    return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+@pytest.fixture
+def llm_only(monkeypatch):
+    """No local model, fresh cache/batcher, no classification log writes."""
+
+    async def record(text, result):
+        pass
+
+    monkeypatch.setattr(
+        intent_router.intent_classifier, "local_intent_classifier", None
+    )
+    monkeypatch.setattr(
+        intent_router.intent_classifier.classification_log, "record", record
+    )
+    monkeypatch.setattr(intent_router, "intent_cache", IntentCache())
+    monkeypatch.setattr(
+        intent_router,
+        "intent_batcher",
+        MicroBatcher(
+            lambda key, texts: intent_router.classify_batch_with_llm(texts),
+            max_batch_size=8,
+            max_wait_ms=20,
+        ),
+    )
+
+
+def test_parse_batch_answer_handles_fences_and_bad_items():
+    """Valid items are kept by index; missing or malformed ones become None."""
+    content = (
+        "```json\n"
+        '[{"index": 1, "intent": "help", "confidence": 0.9},'
+        ' {"index": 0, "intent": "greeting"},'
+        ' {"index": 7, "intent": "other", "confidence": 0.5}]\n'
+        "```"
+    )
+    results = intent_router.parse_batch_answer(content, 3)
+
+    assert results[0] is None  # no confidence
+    assert results[1]["intent"] == "help"
+    assert results[2] is None  # not in the answer
+    assert intent_router.parse_batch_answer("not json", 2) == [None, None]
+
+
+async def test_concurrent_jobs_share_one_llm_call(monkeypatch, llm_only):
+    """Texts arriving within the window are classified with one call."""
+    calls = []
+
+    async def acompletion(model, messages, **kwargs):
+        calls.append(messages[1]["content"])
+        return completion(
+            '[{"index": 0, "intent": "greeting", "confidence": 0.9},'
+            ' {"index": 1, "intent": "question", "confidence": 0.8},'
+            ' {"index": 2, "intent": "command", "confidence": 0.7}]'
+        )
+
+    monkeypatch.setattr(intent_router.litellm, "acompletion", acompletion)
+    results = await asyncio.gather(
+        *(
+            intent_router.classify_intent(text, batch=True)
+            for text in ["hello", "what time is it?", "delete my account"]
+        )
+    )
+
+    assert len(calls) == 1
+    assert [r["intent"] for r in results] == ["greeting", "question", "command"]
+    assert all(r["source_model"] == "gpt-4o-mini" for r in results)
+
+
+async def test_malformed_items_fall_back_to_single_calls(monkeypatch, llm_only):
+    """Only the items missing from the batch answer are retried singly."""
+    singles = []
+
+    async def acompletion(model, messages, **kwargs):
+        return completion('[{"index": 0, "intent": "greeting", "confidence": 0.9}]')
+
+    async def classify_with_llm(text):
+        singles.append(text)
+        if text == "broken":
+            raise intent_router.IntentClassificationUnavailable(
+                RuntimeError("p"), RuntimeError("f")
+            )
+        return {"intent": "help", "confidence": 0.6, "source_model": "gpt-4o-mini"}
+
+    monkeypatch.setattr(intent_router.litellm, "acompletion", acompletion)
+    monkeypatch.setattr(intent_router, "classify_with_llm", classify_with_llm)
+    results = await intent_router.classify_batch_with_llm(["hi", "help me", "broken"])
+
+    assert singles == ["help me", "broken"]
+    assert results[0]["intent"] == "greeting"
+    assert results[1]["intent"] == "help"
+    assert isinstance(results[2], intent_router.IntentClassificationUnavailable)
+
+
+def test_batch_endpoint_reports_per_item_errors(client, auth_headers, monkeypatch):
+    """A failing text gets an error entry; the others are classified."""
+
+    async def classify_intent(text, batch=False):
+        if text == "fail":
+            raise RuntimeError("both models down")
+        return {
+            "intent": "other",
+            "confidence": 0.5,
+            "target_model": "gpt-4o",
+            "source_model": "gpt-4o-mini",
+        }
+
+    monkeypatch.setattr(intent_router, "classify_intent", classify_intent)
+    response = client.post(
+        "/api/v1/intent-router/batch",
+        json={"texts": ["ok", "fail"]},
+        headers=auth_headers,
+    )
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert results[0]["intent"] == "other"
+    assert results[1]["error"] == "both models down"
+    assert results[1]["intent"] is None
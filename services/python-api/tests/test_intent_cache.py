@@ -0,0 +1,116 @@
+"""Tests for the intent classification cache and request coalescing."""
+
+import asyncio
+import pytest
+from app.routers import intent_router
+from app.services.cache import SingleFlight
+from app.services.intent_cache import (
+    IntentCache,
+    make_intent_key,
+    normalize_intent_text,
+)
+
+
+def test_normalization_ignores_case_whitespace_and_punctuation():
+    """Variants of the same short message share one key."""
+    assert normalize_intent_text("  Hi!!  THERE ") == "hi there"
+    assert normalize_intent_text("Thanks.") == normalize_intent_text("thanks")
+    assert normalize_intent_text("Help??") == "help?"
+    assert normalize_intent_text("help ?") == "help?"
+    assert make_intent_key("help?") != make_intent_key("help")
+    assert make_intent_key("x" * 1000).startswith("sha256:")
+
+
+async def test_concurrent_identical_texts_share_one_call():
+    """N concurrent misses make one LLM call; later calls hit the cache."""
+    calls = []
+
+    async def classify(text):
+        calls.append(text)
+        await asyncio.sleep(0.05)
+        return {"intent": "greeting", "confidence": 0.9}
+
+    cache = IntentCache()
+    results = await asyncio.gather(
+        *(cache.get_or_classify(text, classify) for text in ["hi", "Hi!", " HI "] * 5)
+    )
+    again = await cache.get_or_classify("hi.", classify)
+
+    assert len(calls) == 1
+    assert all(r["intent"] == "greeting" for r in results)
+    assert again == {"intent": "greeting", "confidence": 0.9}
+    stats = cache.stats()
+    assert stats["coalescing"] == {"calls": 1, "shared": 14, "in_flight": 0}
+    assert stats["hits"] == 1
+
+
+async def test_failures_are_shared_but_not_cached():
+    """A failed call propagates to every waiter and the next call retries."""
+    attempts = 0
+
+    async def classify(text):
+        nonlocal attempts
+        attempts += 1
+        await asyncio.sleep(0.01)
+        if attempts == 1:
+            raise RuntimeError("provider down")
+        return {"intent": "help"}
+
+    cache = IntentCache()
+    results = await asyncio.gather(
+        cache.get_or_classify("help", classify),
+        cache.get_or_classify("HELP", classify),
+        return_exceptions=True,
+    )
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert (await cache.get_or_classify("help", classify))["intent"] == "help"
+    assert attempts == 2
+
+
+async def test_cancelled_caller_does_not_cancel_shared_call():
+    """The shared call keeps running for the remaining waiters."""
+    flight: SingleFlight[str] = SingleFlight()
+
+    async def slow():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    first = asyncio.ensure_future(flight.do("k", slow))
+    second = asyncio.ensure_future(flight.do("k", slow))
+    await asyncio.sleep(0.01)
+    first.cancel()
+
+    assert await second == "done"
+    with pytest.raises(asyncio.CancelledError):
+        await first
+
+
+async def test_classify_intent_uses_cache(monkeypatch):
+    """Repeated texts in the router only reach the primary LLM once."""
+    calls = []
+
+    async def primary(text):
+        calls.append(text)
+        return {
+            "intent": "feedback",
+            "confidence": 0.9,
+            "target_model": "gpt-4o",
+            "source_model": "gpt-4o-mini",
+        }
+
+    async def record(text, result):
+        pass
+
+    monkeypatch.setattr(
+        intent_router.intent_classifier, "local_intent_classifier", None
+    )
+    monkeypatch.setattr(
+        intent_router.intent_classifier.classification_log, "record", record
+    )
+    monkeypatch.setattr(intent_router, "classify_with_primary", primary)
+    monkeypatch.setattr(intent_router, "intent_cache", IntentCache())
+
+    for text in ["Thanks!", "thanks", "THANKS!!"]:
+        result = await intent_router.classify_intent(text)
+        assert result["intent"] == "feedback"
+    assert calls == ["Thanks!"]
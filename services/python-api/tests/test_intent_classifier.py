@@ -0,0 +1,123 @@
+"""Tests for the local first-tier intent classifier."""
+
+import time
+import pytest
+from app.routers import intent_router
+from app.services import intent_classifier
+from app.services.intent_cache import IntentCache
+from app.services.intent_classifier import HashedNgramClassifier, evaluate
+
+TRAINING = {
+    "greeting": [
+        "hello",
+        "hi there",
+        "good morning",
+        "hey how are you",
+        "hello friend",
+    ],
+    "question": [
+        "what is the capital of france?",
+        "how does photosynthesis work?",
+        "why is the sky blue?",
+        "when was rome founded?",
+        "who wrote hamlet?",
+    ],
+    "command": [
+        "write a poem about cats",
+        "translate this to german",
+        "summarize the following text",
+        "generate a list of names",
+        "create a python script",
+    ],
+    "feedback": [
+        "thanks that was great",
+        "this answer is wrong",
+        "i love this response",
+        "that was not helpful",
+        "great job thank you",
+    ],
+    "help": [
+        "help me please",
+        "i need help with my account",
+        "can you help me",
+        "how do i use this app",
+        "help",
+    ],
+    "other": ["asdf", "banana", "42", "ok", "hmm"],
+}
+
+
+def train_small() -> HashedNgramClassifier:
+    texts = [text for texts in TRAINING.values() for text in texts]
+    labels = [label for label, texts in TRAINING.items() for _ in texts]
+    return HashedNgramClassifier(n_buckets=2**14).fit(texts, labels, epochs=30)
+
+
+def test_trained_model_fits_training_data_fast():
+    """The model separates the intents and predicts in well under a millisecond."""
+    classifier = train_small()
+    texts = [text for texts in TRAINING.values() for text in texts]
+    labels = [label for label, texts in TRAINING.items() for _ in texts]
+
+    report = evaluate(classifier, texts, labels, threshold=0.5)
+
+    assert report["accuracy"] >= 0.9
+    assert report["avg_latency_us"] < 1000
+    assert set(report["per_class"]) == set(TRAINING)
+
+
+def test_save_load_round_trip(tmp_path):
+    """An exported model predicts exactly like the trained one."""
+    classifier = train_small()
+    path = str(tmp_path / "intent.npz")
+    classifier.save(path)
+    loaded = HashedNgramClassifier.load(path)
+
+    for text in ["hello there", "why is water wet?"]:
+        assert loaded.predict(text) == pytest.approx(classifier.predict(text))
+
+
+async def test_confident_local_answer_skips_llm(monkeypatch):
+    """Above the threshold the LLM is never called."""
+
+    async def fail(text):
+        raise AssertionError("LLM tier must not be called")
+
+    monkeypatch.setattr(intent_classifier, "local_intent_classifier", train_small())
+    monkeypatch.setattr(
+        intent_router.settings, "intent_local_confidence_threshold", 0.2
+    )
+    monkeypatch.setattr(intent_router, "classify_with_primary", fail)
+
+    started = time.perf_counter()
+    result = await intent_router.classify_intent("hello there")
+
+    assert result["intent"] == "greeting"
+    assert result["source_model"] == "local-ngram"
+    assert time.perf_counter() - started < 0.05
+
+
+async def test_low_confidence_escalates_and_logs(monkeypatch, tmp_path):
+    """Below the threshold the LLM answers and its label is logged for training."""
+
+    async def primary(text):
+        return {
+            "intent": "question",
+            "confidence": 0.9,
+            "target_model": "gpt-4o",
+            "source_model": "gpt-4o-mini",
+        }
+
+    log = intent_classifier.ClassificationLog(str(tmp_path / "log.jsonl"))
+    monkeypatch.setattr(intent_classifier, "local_intent_classifier", train_small())
+    monkeypatch.setattr(intent_classifier, "classification_log", log)
+    monkeypatch.setattr(
+        intent_router.settings, "intent_local_confidence_threshold", 1.1
+    )
+    monkeypatch.setattr(intent_router, "classify_with_primary", primary)
+    monkeypatch.setattr(intent_router, "intent_cache", IntentCache())
+
+    result = await intent_router.classify_intent("is this thing on")
+
+    assert result["source_model"] == "gpt-4o-mini"
+    assert '"intent": "question"' in (tmp_path / "log.jsonl").read_text()
@@ -0,0 +1,60 @@
+"""Tests for the app-scoped LLM router and its pooled provider clients."""
+
+import httpx
+
+from app.services.llm_router import (
+    LLMRouter,
+    ProviderEnum,
+    close_llm_router,
+    get_llm_router,
+)
+
+
+def mock_transport(router, provider, handler):
+    """Route a provider's pooled client through an httpx mock transport."""
+    router._http_clients[provider]._transport = httpx.MockTransport(handler)
+
+
+async def test_router_is_shared_per_loop():
+    """Jobs get the same router (and connection pools) until shutdown."""
+    router = get_llm_router()
+    assert get_llm_router() is router
+
+    await close_llm_router()
+    assert get_llm_router() is not router
+    await close_llm_router()
+
+
+async def test_sdk_clients_use_pooled_http_clients():
+    """Provider SDKs send through the router's long-lived HTTP clients."""
+    router = LLMRouter()
+    try:
+        assert router.openai_client._client is router._http_clients[ProviderEnum.OPENAI]
+        assert (
+            router.anthropic_client._client
+            is router._http_clients[ProviderEnum.ANTHROPIC]
+        )
+    finally:
+        await router.aclose()
+    assert router._http_clients == {}
+
+
+async def test_prewarm_reports_each_provider():
+    """Any HTTP status warms the pool; connection errors are reported."""
+    router = LLMRouter()
+    seen = []
+
+    def answer(request):
+        seen.append(request.method)
+        return httpx.Response(404)
+
+    def refuse(request):
+        raise httpx.ConnectError("refused", request=request)
+
+    mock_transport(router, ProviderEnum.OPENAI, answer)
+    mock_transport(router, ProviderEnum.ANTHROPIC, refuse)
+    try:
+        assert await router.prewarm() == {"openai": True, "anthropic": False}
+        assert seen == ["HEAD"]
+    finally:
+        await router.aclose()
@@ -0,0 +1,149 @@
+"""Tests for streamed replies (LLMRouter.stream) and their publication to subscribers."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from app.routers import jobs_router
+from app.routers.jobs_router import AIJobRequest, generate_reply
+from app.services.event_bus import EventBus
+from app.services.llm_router import LLMRouter, to_gemini_contents
+from tests.fake_provider import REPLY_PARTS, attach_fake_provider
+
+
+async def collect(router, provider):
+    """Return all events of a streamed reply."""
+    messages = [{"role": "user", "content": "Hi"}]
+    return [event async for event in router.stream(provider, messages)]
+
+
+@pytest.mark.parametrize(
+    "provider,model,prompt_tokens",
+    [
+        ("openai", "gpt-4o", 7),
+        ("anthropic", "claude-3-7-sonnet-20250219", 9),
+    ],
+)
+async def test_stream_yields_deltas_then_usage(provider, model, prompt_tokens):
+    """Deltas arrive one by one, followed by the full reply and token usage."""
+    router = LLMRouter()
+    attach_fake_provider(router)
+
+    events = await collect(router, provider)
+
+    assert [e["content"] for e in events[:-1]] == REPLY_PARTS
+    assert all(e["type"] == "delta" for e in events[:-1])
+    done = events[-1]
+    assert done["type"] == "done"
+    assert done["content"] == "".join(REPLY_PARTS)
+    assert done["provider"] == provider
+    assert done["model"] == model
+    assert done["tokens"]["prompt"] == prompt_tokens
+    assert done["tokens"]["completion"] == len(REPLY_PARTS)
+
+
+async def test_stream_gemini_chunks():
+    """Gemini chunks without text are skipped; usage comes from the last chunk."""
+
+    async def chunks():
+        for text in ["Hi", "", " there"]:
+            yield SimpleNamespace(
+                text=text, parts=[text] if text else [], usage_metadata=None
+            )
+        yield SimpleNamespace(
+            text="",
+            parts=[],
+            usage_metadata=SimpleNamespace(
+                prompt_token_count=3, candidates_token_count=2, total_token_count=5
+            ),
+        )
+
+    async def generate_content_async(*args, stream=False, **kwargs):
+        assert stream
+        return chunks()
+
+    router = LLMRouter()
+    router.gemini_model = SimpleNamespace(generate_content_async=generate_content_async)
+
+    events = await collect(router, "google")
+
+    assert [e["content"] for e in events] == ["Hi", " there", "Hi there"]
+    assert events[-1]["tokens"] == {"prompt": 3, "completion": 2, "total": 5}
+
+
+async def test_gemini_receives_the_whole_conversation():
+    """History goes to Gemini as user/model turns, system text separately."""
+    sent = {}
+
+    async def generate_content_async(contents, **kwargs):
+        sent["contents"] = contents
+        return SimpleNamespace(
+            text="Sure",
+            usage_metadata=SimpleNamespace(
+                prompt_token_count=9, candidates_token_count=1, total_token_count=10
+            ),
+        )
+
+    router = LLMRouter()
+    router.gemini_model = SimpleNamespace(generate_content_async=generate_content_async)
+    messages = [
+        {"role": "user", "content": "My name is Ada."},
+        {"role": "assistant", "content": "Hello Ada!"},
+        {"role": "user", "content": "What is my name?"},
+    ]
+
+    response = await router.route("google", messages)
+
+    assert response["content"] == "Sure"
+    assert sent["contents"] == [
+        {"role": "user", "parts": ["My name is Ada."]},
+        {"role": "model", "parts": ["Hello Ada!"]},
+        {"role": "user", "parts": ["What is my name?"]},
+    ]
+    system, contents = to_gemini_contents(
+        [{"role": "system", "content": "Be brief."}, *messages, messages[-1]]
+    )
+    assert system == "Be brief."
+    assert contents[-1]["parts"] == ["What is my name?", "What is my name?"]
+
+
+async def test_generate_reply_publishes_deltas(monkeypatch):
+    """The jobs pipeline forwards deltas to the session and returns the full reply."""
+    bus = EventBus()
+    monkeypatch.setattr(jobs_router, "event_bus", bus)
+    subscription = await bus.subscribe("session-1")
+    other = await bus.subscribe("session-2")
+    router = LLMRouter()
+    attach_fake_provider(router)
+    job = AIJobRequest(
+        sessionId="session-1",
+        userId="user-1",
+        messageId="message-1",
+        message="Hi",
+        timestamp="2025-01-01T00:00:00Z",
+    )
+
+    reply = await generate_reply(
+        router, "openai", [{"role": "user", "content": "Hi"}], job
+    )
+
+    assert reply["content"] == "".join(REPLY_PARTS)
+    events = [subscription.queue.get_nowait() for _ in REPLY_PARTS]
+    assert [e["content"] for e in events] == REPLY_PARTS
+    assert [e["index"] for e in events] == list(range(len(REPLY_PARTS)))
+    assert {e["replyTo"] for e in events} == {"message-1"}
+    assert other.queue.empty()
+
+
+async def test_event_bus_drops_events_for_lagging_subscriber():
+    """A full subscriber queue drops new events instead of blocking the publisher."""
+    bus = EventBus(max_queue=2)
+    subscription = await bus.subscribe("s")
+
+    delivered = [await bus.publish("s", {"n": n}) for n in range(3)]
+
+    assert delivered == [1, 1, 0]
+    assert subscription.dropped == 1
+    assert bus.stats()["dropped"] == 1
+    await bus.unsubscribe(subscription)
+    assert bus.stats()["channels"] == 0
@@ -0,0 +1,51 @@
+"""Tests for the asyncio micro-batcher used by the compression service."""
+
+import asyncio
+import pytest
+from app.services.micro_batcher import MicroBatcher
+
+
+async def test_concurrent_submissions_share_one_batch():
+    """Concurrent items with the same key are handled in a single call."""
+    calls = []
+
+    async def handler(key, items):
+        calls.append(list(items))
+        return [item.upper() for item in items]
+
+    batcher = MicroBatcher(handler, max_batch_size=8, max_wait_ms=5)
+    results = await asyncio.gather(*(batcher.submit("k", s) for s in ["a", "b", "c"]))
+
+    assert results == ["A", "B", "C"]
+    assert calls == [["a", "b", "c"]]
+
+
+async def test_batches_split_by_key_and_size():
+    """Different keys never mix and full batches flush immediately."""
+    calls = []
+
+    async def handler(key, items):
+        calls.append((key, list(items)))
+        return [f"{key}:{item}" for item in items]
+
+    batcher = MicroBatcher(handler, max_batch_size=2, max_wait_ms=50)
+    results = await asyncio.gather(
+        batcher.submit_many("x", ["1", "2", "3"]), batcher.submit("y", "4")
+    )
+
+    assert results == [["x:1", "x:2", "x:3"], "y:4"]
+    assert ("x", ["1", "2"]) in calls
+    assert ("x", ["3"]) in calls
+    assert ("y", ["4"]) in calls
+    assert batcher.stats()["largest_batch"] == 2
+
+
+async def test_handler_errors_propagate_to_every_caller():
+    """A failing batch fails all of its callers."""
+
+    async def handler(key, items):
+        raise RuntimeError("model unavailable")
+
+    batcher = MicroBatcher(handler, max_batch_size=4, max_wait_ms=1)
+    with pytest.raises(RuntimeError, match="model unavailable"):
+        await batcher.submit_many("k", ["a", "b"])
@@ -0,0 +1,110 @@
+"""Tests for the ONNX Runtime LLMLingua-2 backend."""
+
+import os
+import pytest
+import torch
+from app.config import settings
+
+onnx = pytest.importorskip("onnx")
+pytest.importorskip("onnxruntime")
+
+from onnx import TensorProto, helper  # noqa: E402
+from app.onnx_backend import (  # noqa: E402
+    INT8_MODEL_FILE,
+    OnnxPromptCompressor,
+    OnnxTokenClassifier,
+)
+
+PARITY_TEXTS = [
+    "The quarterly revenue grew by 12 percent, driven mostly by the new enterprise plan.",
+    "Please summarize the meeting notes and list every action item with its owner.",
+    "Item 15, report from the city manager recommended action: adopt the resolution.",
+]
+
+
+def _write_toy_classifier(path: str) -> None:
+    """Write a tiny graph with the exported model's signature: logits = [-id, id]."""
+    ids = helper.make_tensor_value_info("input_ids", TensorProto.INT64, ["b", "s"])
+    mask = helper.make_tensor_value_info(
+        "attention_mask", TensorProto.INT64, ["b", "s"]
+    )
+    logits = helper.make_tensor_value_info("logits", TensorProto.FLOAT, ["b", "s", 2])
+    axes = helper.make_tensor("axes", TensorProto.INT64, [1], [2])
+    nodes = [
+        helper.make_node("Mul", ["input_ids", "attention_mask"], ["masked"]),
+        helper.make_node("Cast", ["masked"], ["as_float"], to=TensorProto.FLOAT),
+        helper.make_node("Unsqueeze", ["as_float", "axes"], ["keep"]),
+        helper.make_node("Neg", ["keep"], ["drop"]),
+        helper.make_node("Concat", ["drop", "keep"], ["logits"], axis=2),
+    ]
+    graph = helper.make_graph(nodes, "toy", [ids, mask], [logits], initializer=[axes])
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 17)])
+    onnx.save(model, path)
+
+
+def test_onnx_classifier_matches_torch_model_interface(tmp_path):
+    """The wrapper returns torch logits shaped (batch, sequence, 2)."""
+    path = str(tmp_path / "toy.onnx")
+    _write_toy_classifier(path)
+    model = OnnxTokenClassifier(path, vocab_size=10)
+
+    input_ids = torch.tensor([[1, 2, 3]], dtype=torch.long)
+    attention_mask = torch.tensor([[1, 1, 0]]) == 1  # LLMLingua passes a bool mask
+    outputs = model(input_ids=input_ids, attention_mask=attention_mask)
+
+    assert isinstance(outputs.logits, torch.Tensor)
+    assert outputs.logits.shape == (1, 3, 2)
+    assert outputs.logits[0, :, 1].tolist() == [1.0, 2.0, 0.0]
+
+
+def test_onnx_classifier_rejects_vocabulary_mismatch(tmp_path):
+    """A tokenizer that does not match the export is caught at load time."""
+    path = str(tmp_path / "toy.onnx")
+    _write_toy_classifier(path)
+    model = OnnxTokenClassifier(path, vocab_size=10)
+
+    model.resize_token_embeddings(10)
+    with pytest.raises(ValueError):
+        model.resize_token_embeddings(11)
+
+
+@pytest.mark.skipif(
+    not os.path.exists(os.path.join(settings.onnx_model_dir, INT8_MODEL_FILE)),
+    reason="Exported model not found - run python -m app.scripts.export_onnx",
+)
+def test_int8_onnx_parity_with_pytorch():
+    """Quantized keep probabilities and keep/drop decisions track PyTorch."""
+    from llmlingua import PromptCompressor
+
+    reference = PromptCompressor(
+        model_name=settings.llmlingua_model_name, device_map="cpu", use_llmlingua2=True
+    )
+    candidate = OnnxPromptCompressor(
+        model_dir=settings.onnx_model_dir, model_name=settings.llmlingua_model_name
+    )
+
+    encoded = reference.tokenizer(PARITY_TEXTS, padding=True, return_tensors="pt")
+    mask = encoded["attention_mask"] == 1
+    with torch.no_grad():
+        ref_logits = reference.model(
+            input_ids=encoded["input_ids"], attention_mask=mask
+        ).logits
+    onnx_logits = candidate.model(
+        input_ids=encoded["input_ids"], attention_mask=mask
+    ).logits
+
+    ref_keep = torch.softmax(ref_logits, dim=-1)[..., 1][mask]
+    onnx_keep = torch.softmax(onnx_logits, dim=-1)[..., 1][mask]
+    assert (ref_keep - onnx_keep).abs().mean().item() < 0.05
+    agreement = ((ref_keep > 0.5) == (onnx_keep > 0.5)).float().mean().item()
+    assert agreement >= 0.95
+
+    for text in PARITY_TEXTS:
+        ref_words = set(
+            reference.compress_prompt([text], rate=0.5)["compressed_prompt"].split()
+        )
+        onnx_words = set(
+            candidate.compress_prompt([text], rate=0.5)["compressed_prompt"].split()
+        )
+        overlap = len(ref_words & onnx_words) / max(len(ref_words | onnx_words), 1)
+        assert overlap >= 0.8
@@ -0,0 +1,134 @@
+"""Tests for RPM/TPM provider rate limiting (local buckets and Redis via fakeredis)."""
+
+import asyncio
+import time
+
+import pytest
+
+from app.services import llm_router as llm_router_module
+from app.services.llm_router import LLMRouter
+from app.services.rate_limiter import (
+    RateLimit,
+    RateLimiter,
+    RateLimitExceeded,
+    RedisRateStore,
+)
+from tests.fake_provider import attach_fake_provider
+
+ROUTE = "openai:gpt-4o"
+
+
+def limiter(rpm=6000, tpm=0, burst_seconds=0.01, **kwargs):
+    """Limiter for ROUTE: by default 100 requests/s with room for one."""
+    return RateLimiter(
+        limits={ROUTE: RateLimit(rpm=rpm, tpm=tpm)},
+        burst_seconds=burst_seconds,
+        **kwargs,
+    )
+
+
+def redis_store(server):
+    """A worker's Redis store on a shared fakeredis server."""
+    fakeredis = pytest.importorskip("fakeredis")
+    client = fakeredis.aioredis.FakeRedis(server=server, decode_responses=True)
+    return RedisRateStore(lambda: client)
+
+
+async def test_bursts_queue_in_order_instead_of_failing():
+    """Calls beyond the bucket wait for their turn, spaced at the refill rate."""
+    rate = limiter()
+    started = time.monotonic()
+
+    await asyncio.gather(*(rate.acquire(ROUTE, tokens=10) for _ in range(4)))
+
+    assert time.monotonic() - started >= 0.025  # 3 turns of 10ms each
+    counters = rate.counters[ROUTE]
+    assert (counters.granted, counters.waited, counters.rejected) == (4, 3, 0)
+
+
+async def test_fails_fast_beyond_max_wait_and_ignores_unlimited_routes():
+    """A turn further away than max_wait is refused without reserving it."""
+    rate = limiter(rpm=60, burst_seconds=1, max_wait_seconds=0.5)
+    await rate.acquire(ROUTE, tokens=10)
+
+    with pytest.raises(RateLimitExceeded) as error:
+        await rate.acquire(ROUTE, tokens=10)
+    assert error.value.retry_after == pytest.approx(1.0, abs=0.05)
+    assert rate.counters[ROUTE].rejected == 1
+    assert await rate.acquire("google:gemini-2.0-flash-exp", tokens=10) is None
+
+
+async def test_usage_corrects_the_token_bucket():
+    """Unused max_tokens are returned, so the next call does not wait for them."""
+    rate = limiter(rpm=0, tpm=60_000, burst_seconds=1, max_wait_seconds=0.1)
+    reservation = await rate.acquire(ROUTE, tokens=1000)  # the whole bucket
+
+    with pytest.raises(RateLimitExceeded):
+        await rate.acquire(ROUTE, tokens=500)
+
+    await rate.settle(reservation, actual_tokens=300)
+    assert await rate.acquire(ROUTE, tokens=500) is not None
+    assert rate.counters[ROUTE].corrected_tokens == -700
+
+
+async def test_cancelled_wait_gives_the_turn_back():
+    """A caller cancelled while queued does not keep its reservation."""
+    rate = limiter(rpm=60, burst_seconds=1, max_wait_seconds=5)
+    await rate.acquire(ROUTE, tokens=10)
+    waiter = asyncio.create_task(rate.acquire(ROUTE, tokens=10))
+    await asyncio.sleep(0.01)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    rate.max_wait_seconds = 0.5
+    with pytest.raises(RateLimitExceeded) as error:
+        await rate.acquire(ROUTE, tokens=10)
+    assert error.value.retry_after < 1.05  # one turn ahead, not two
+
+
+async def test_workers_share_the_budget_through_redis():
+    """Reservations made by one worker count against every other worker."""
+    fakeredis = pytest.importorskip("fakeredis")
+    server = fakeredis.FakeServer()
+    first = limiter(rpm=60, burst_seconds=2, max_wait_seconds=0.5)
+    second = limiter(rpm=60, burst_seconds=2, max_wait_seconds=0.5)
+    first.store, second.store = redis_store(server), redis_store(server)
+
+    await first.acquire(ROUTE, tokens=10)
+    await second.acquire(ROUTE, tokens=10)
+
+    with pytest.raises(RateLimitExceeded):
+        await first.acquire(ROUTE, tokens=10)
+    assert first.stats()["store"]["available"] is True
+
+
+async def test_redis_outage_falls_back_to_local_share():
+    """Without Redis each process keeps to its local share of the quota."""
+    fakeredis = pytest.importorskip("fakeredis")
+    server = fakeredis.FakeServer()
+    server.connected = False
+    rate = limiter(rpm=120, burst_seconds=1, max_wait_seconds=0.5, local_share=0.5)
+    rate.store = redis_store(server)
+
+    await rate.acquire(ROUTE, tokens=10)
+    with pytest.raises(RateLimitExceeded):
+        await rate.acquire(ROUTE, tokens=10)
+    assert rate.store.errors == 1
+    assert not rate.store.available()
+
+
+async def test_router_reserves_estimate_and_settles_usage(monkeypatch):
+    """Streamed calls reserve prompt + max_tokens and give back the unused part."""
+    rate = limiter(rpm=0, tpm=600_000)
+    monkeypatch.setattr(llm_router_module, "rate_limiter", rate)
+    router = LLMRouter()
+    attach_fake_provider(router)
+    messages = [{"role": "user", "content": "Hi"}]
+
+    events = [e async for e in router.stream("openai", messages, max_tokens=1000)]
+
+    counters = rate.counters[ROUTE]
+    assert counters.reserved_tokens == RateLimiter.estimate_tokens(messages, 1000)
+    used = events[-1]["tokens"]["total"]
+    assert counters.corrected_tokens == used - counters.reserved_tokens
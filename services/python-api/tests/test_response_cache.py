@@ -0,0 +1,126 @@
+"""Tests for the exact-match LLM response cache."""
+
+import pytest
+
+from app.services import llm_router as llm_router_module
+from app.services.llm_router import LLMRouter
+from app.services.response_cache import ResponseCache, make_response_key
+
+MESSAGES = [{"role": "user", "content": "What are your opening hours?"}]
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    """An enabled in-memory cache installed in the router module."""
+    cache = ResponseCache(enabled=True, max_temperature=0.2, ttl_seconds=60)
+    monkeypatch.setattr(llm_router_module, "response_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def router():
+    """Router whose OpenAI call is a counting fake."""
+    router = LLMRouter()
+    router.calls = 0
+
+    async def fake_openai(messages, model, temperature, max_tokens, **kwargs):
+        router.calls += 1
+        return {
+            "content": f"answer {router.calls}",
+            "model": model or "gpt-4o",
+            "provider": "openai",
+            "tokens": {"prompt": 10, "completion": 5, "total": 15},
+        }
+
+    router._call_openai = fake_openai
+    return router
+
+
+def test_key_is_canonical():
+    """Parameter order does not matter; any request difference does."""
+    key = make_response_key("openai", "gpt-4o", MESSAGES, 0.0, 100, {"a": 1, "b": 2})
+    assert key == make_response_key(
+        "openai", "gpt-4o", MESSAGES, 0.0, 100, {"b": 2, "a": 1}
+    )
+    assert key != make_response_key(
+        "openai", "gpt-4o-mini", MESSAGES, 0.0, 100, {"a": 1, "b": 2}
+    )
+    assert key != make_response_key(
+        "openai", "gpt-4o", MESSAGES, 0.0, 200, {"a": 1, "b": 2}
+    )
+
+
+async def test_repeated_deterministic_call_is_served_from_cache(cache, router):
+    """The second identical low-temperature call spends no tokens."""
+    first = await router.route("openai", MESSAGES, temperature=0.0)
+    second = await router.route("openai", MESSAGES, temperature=0.0)
+
+    assert router.calls == 1
+    assert second["content"] == first["content"]
+    assert second["cached"] is True
+    assert "cached" not in first
+    stats = cache.status()
+    assert (stats["hits"], stats["misses"], stats["tokens_saved"]) == (1, 1, 15)
+
+
+async def test_temperature_and_cache_options(cache, router):
+    """Sampled calls and "no-store" bypass the cache, "no-cache" refreshes it."""
+    await router.route("openai", MESSAGES, temperature=0.7)
+    await router.route("openai", MESSAGES, temperature=0.7)
+    assert router.calls == 2
+    assert cache.stats.bypassed == 2
+
+    await router.route("openai", MESSAGES, temperature=0.0, cache="no-store")
+    assert len(cache.memory) == 0
+
+    await router.route("openai", MESSAGES, temperature=0.0)
+    refreshed = await router.route(
+        "openai", MESSAGES, temperature=0.0, cache="no-cache"
+    )
+    assert refreshed["content"] == "answer 5"
+    cached = await router.route("openai", MESSAGES, temperature=0.0)
+    assert cached["content"] == "answer 5"
+
+    with pytest.raises(ValueError):
+        await router.route("openai", MESSAGES, temperature=0.0, cache="sometimes")
+
+
+async def test_stream_replays_cached_answer(cache, router):
+    """A cached answer is streamed as a single delta and a done event."""
+    answer = await router.route("openai", MESSAGES, temperature=0.0)
+
+    events = [e async for e in router.stream("openai", MESSAGES, temperature=0.0)]
+
+    assert [e["type"] for e in events] == ["delta", "done"]
+    assert events[0]["content"] == answer["content"]
+    assert events[1]["cached"] is True
+    assert router.calls == 1
+
+
+def test_route_ttls():
+    """Model routes override provider routes, which override the default."""
+    cache = ResponseCache(
+        ttl_seconds=600, route_ttls={"openai": 60, "openai:gpt-4o-mini": 5}
+    )
+    assert cache.ttl_for("openai:gpt-4o-mini") == 5
+    assert cache.ttl_for("openai:gpt-4o") == 60
+    assert cache.ttl_for("google:gemini-2.0-flash-exp") == 600
+
+
+async def test_redis_tier_is_shared_between_workers():
+    """An answer cached by one worker is a Redis hit for another."""
+    fakeredis = pytest.importorskip("fakeredis")
+    server = fakeredis.FakeServer()
+
+    def worker():
+        client = fakeredis.aioredis.FakeRedis(server=server, decode_responses=True)
+        return ResponseCache(enabled=True, client_factory=lambda: client)
+
+    first, second = worker(), worker()
+    response = {"content": "9-17", "tokens": {"total": 15}}
+    await first.set("k", response, ttl_seconds=30)
+
+    assert await second.get("k") == response
+    assert second.stats.redis_hits == 1
+    expires_at, _ = second.memory._data["k"]
+    assert expires_at is not None  # the promoted copy expires with the Redis entry
@@ -0,0 +1,133 @@
+"""Tests for adaptive provider selection (routing policy)."""
+
+import json
+
+import pytest
+
+from app.services import llm_router as llm_router_module
+from app.services.llm_router import LLMRouter, ProviderEnum
+from app.services.routing_policy import RoutingPolicy, replay_traces
+from tests.fake_provider import attach_fake_provider
+
+GEMINI = "google:gemini-2.0-flash-exp"
+GPT = "openai:gpt-4o"
+
+USAGE = {"prompt": 100, "completion": 50, "total": 150}
+
+
+def warm(policy, route, latency, n=3, **kwargs):
+    """Feed n identical observations."""
+    for _ in range(n):
+        policy.observe(route, latency, tokens=USAGE, **kwargs)
+
+
+def test_picks_fastest_and_follows_slowdowns():
+    """The route with the lowest EWMA latency wins; a slowdown moves traffic."""
+    policy = RoutingPolicy(objective="latency", exploration_rate=0.0, seed=0)
+    warm(policy, GEMINI, 0.3, ttft=0.3)
+    warm(policy, GPT, 0.6, ttft=0.6)
+
+    assert policy.choose([GEMINI, GPT]) == (GEMINI, "best")
+
+    warm(policy, GEMINI, 2.5, n=10, ttft=2.5)
+    assert policy.choose([GEMINI, GPT]) == (GPT, "best")
+
+
+def test_warmup_exploration_and_eligibility():
+    """Unmeasured routes are tried first; unavailable or erroring ones are skipped."""
+    policy = RoutingPolicy(exploration_rate=0.0, min_samples=2, seed=0)
+    warm(policy, GEMINI, 0.3)
+
+    assert policy.choose([GEMINI, GPT]) == (GPT, "warmup")
+    assert policy.choose([GEMINI], available=lambda r: True) == (GEMINI, "only")
+    assert policy.choose([GEMINI, GPT], available=lambda r: r == GPT) == (GPT, "only")
+
+    warm(policy, GPT, 0.1, n=4, failed=True)
+    assert policy.routes[GPT].error_rate > policy.max_error_rate
+    assert policy.choose([GEMINI, GPT]) == (GEMINI, "best")
+
+    policy.exploration_rate = 1.0
+    assert policy.choose([GEMINI, GPT]) == (GPT, "explore")
+    assert policy.stats()["decisions"] == {
+        "warmup": 1,
+        "only": 2,
+        "best": 1,
+        "explore": 1,
+    }
+
+
+def test_cost_and_balanced_objectives():
+    """Cost prefers the cheap route; balanced weighs both relative to the best."""
+    policy = RoutingPolicy(objective="cost", exploration_rate=0.0)
+    warm(policy, GEMINI, 2.0)
+    warm(policy, GPT, 0.5)
+    assert policy.choose([GEMINI, GPT])[0] == GEMINI
+
+    policy.objective = "balanced"
+    policy.latency_weight = 1.0
+    assert policy.choose([GEMINI, GPT])[0] == GPT
+    scores = policy.scores([GEMINI, GPT])
+    assert scores[GPT] == pytest.approx(1.0)
+    assert scores[GEMINI] == pytest.approx(4.0)
+
+    with pytest.raises(ValueError):
+        RoutingPolicy(objective="fastest")
+
+
+def test_replay_moves_traffic_after_a_recorded_slowdown():
+    """In the replay, the latency policy beats sending everything to one route."""
+    traces = {
+        GEMINI: [
+            {"latency": 0.3 if i < 50 else 3.0, "tokens": USAGE} for i in range(100)
+        ],
+        GPT: [{"latency": 0.8, "tokens": USAGE} for _ in range(100)],
+    }
+    adaptive = replay_traces(
+        RoutingPolicy(latency_metric="total", exploration_rate=0.05, seed=1),
+        traces,
+        100,
+    )
+    static = replay_traces(
+        RoutingPolicy(latency_metric="total"), {GEMINI: traces[GEMINI]}, 100
+    )
+
+    assert adaptive["mean_latency_ms"] < static["mean_latency_ms"]
+    assert 0.3 < adaptive["share"][GEMINI] < 0.7
+    assert static["usd"] < adaptive["usd"]
+
+
+async def test_router_reports_calls_and_routes_adaptively(monkeypatch, tmp_path):
+    """Provider calls feed the policy (and trace); select_provider consults it."""
+    trace = tmp_path / "trace.jsonl"
+    policy = RoutingPolicy(exploration_rate=0.0, min_samples=1, trace_path=str(trace))
+    monkeypatch.setattr(llm_router_module, "routing_policy", policy)
+    router = LLMRouter()
+    attach_fake_provider(router)
+    messages = [{"role": "user", "content": "Hi"}]
+
+    for provider in ("openai", "anthropic"):
+        [event async for event in router.stream(provider, messages)]
+
+    openai = policy.routes[GPT]
+    assert openai.samples == 1 and openai.ttft is not None
+    assert openai.usd_per_1k is not None
+    records = [json.loads(line) for line in trace.read_text().splitlines()]
+    assert [r["route"] for r in records] == [
+        GPT,
+        "anthropic:claude-3-7-sonnet-20250219",
+    ]
+
+    async def failing_openai(*args, **kwargs):
+        raise RuntimeError("upstream 500")
+
+    router._call_openai = failing_openai
+    with pytest.raises(RuntimeError):
+        await router.route("openai", messages)
+    assert policy.routes[GPT].failures == 1
+
+    assert (
+        router.select_provider(intent="code", adaptive=True) == ProviderEnum.ANTHROPIC
+    )
+    assert router.select_provider(adaptive=False) == ProviderEnum.GOOGLE
+    choice = router.select_provider(adaptive=True)
+    assert choice in router.available_providers()
@@ -0,0 +1,182 @@
+"""Tests for the semantic tier of the response cache (hashing encoder)."""
+
+import numpy as np
+import pytest
+
+from app.services import llm_router as llm_router_module
+from app.services.llm_router import LLMRouter
+from app.services.response_cache import ResponseCache, semantic_query
+from app.services.semantic_cache import (
+    HashingEncoder,
+    SemanticCache,
+    VectorIndex,
+    evaluate_thresholds,
+)
+
+
+def unit(*values):
+    """A normalized float32 vector."""
+    vector = np.asarray(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    """An enabled exact + semantic cache installed in the router module."""
+    semantic = SemanticCache(HashingEncoder(dim=1024), enabled=True, threshold=0.85)
+    cache = ResponseCache(enabled=True, semantic=semantic)
+    monkeypatch.setattr(llm_router_module, "response_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def router():
+    """Router whose OpenAI call is a counting fake."""
+    router = LLMRouter()
+    router.calls = 0
+
+    async def fake_openai(messages, model, temperature, max_tokens, **kwargs):
+        router.calls += 1
+        return {
+            "content": f"answer {router.calls}",
+            "model": model or "gpt-4o",
+            "provider": "openai",
+            "tokens": {"prompt": 10, "completion": 5, "total": 15},
+        }
+
+    router._call_openai = fake_openai
+    return router
+
+
+def ask(question, system=None):
+    """Single-turn messages, optionally with a system prompt."""
+    messages = [{"role": "system", "content": system}] if system else []
+    return messages + [{"role": "user", "content": question}]
+
+
+async def test_paraphrase_is_answered_from_cache(cache, router):
+    """A similar question reuses the answer; an unrelated one does not."""
+    first = await router.route(
+        "openai", ask("What are your opening hours?"), temperature=0.0
+    )
+    second = await router.route(
+        "openai", ask("what are your opening hours"), temperature=0.0
+    )
+    third = await router.route(
+        "openai", ask("How do I reset my password?"), temperature=0.0
+    )
+
+    assert second["content"] == first["content"]
+    assert second["cached"] is True
+    assert second["similarity"] >= 0.85
+    assert third["content"] == "answer 2"
+    status = cache.status()
+    assert status["semantic_hits"] == 1
+    assert status["semantic"]["entries"] == 2
+
+    # The paraphrase now has its own exact entry
+    again = await router.route(
+        "openai", ask("what are your opening hours"), temperature=0.0
+    )
+    assert "similarity" not in again
+    assert router.calls == 2
+
+
+async def test_stream_replays_semantic_hit(cache, router):
+    """Streaming a paraphrase replays the cached answer."""
+    answer = await router.route(
+        "openai", ask("What are your opening hours?"), temperature=0.0
+    )
+
+    events = [
+        e
+        async for e in router.stream(
+            "openai", ask("what are your opening hours"), temperature=0.0
+        )
+    ]
+
+    assert [e["type"] for e in events] == ["delta", "done"]
+    assert events[1]["content"] == answer["content"]
+    assert router.calls == 1
+
+
+def test_only_single_turn_requests_with_equal_context_share_answers():
+    """History disqualifies a request; system prompt and params split namespaces."""
+    history = [
+        {"role": "user", "content": "Hi"},
+        {"role": "assistant", "content": "Hello"},
+        {"role": "user", "content": "What are your opening hours?"},
+    ]
+    assert semantic_query("openai", "gpt-4o", history, 0.0, 100) is None
+    assert semantic_query("openai", "gpt-4o", [], 0.0, 100) is None
+
+    plain = semantic_query("openai", "gpt-4o", ask("Hours?"), 0.0, 100)
+    support = semantic_query("openai", "gpt-4o", ask("Hours?", "Support"), 0.0, 100)
+    longer = semantic_query("openai", "gpt-4o", ask("Hours?"), 0.0, 500)
+    assert plain is not None and plain[1] == "Hours?"
+    assert len({plain[0], support[0], longer[0]}) == 3
+
+
+def test_index_top_k_namespaces_and_lru_eviction():
+    """Search ranks by cosine similarity within a namespace; full indexes evict LRU."""
+    index = VectorIndex(dim=2, capacity=3)
+    a = index.add("ns", unit(1, 0), "a", ttl_seconds=60)
+    b = index.add("ns", unit(1, 1), "b", ttl_seconds=60)
+    index.add("other", unit(1, 0), "c", ttl_seconds=60)
+
+    matches = index.search("ns", unit(1, 0.1), k=2)
+    assert [slot for slot, _ in matches] == [a, b]
+    assert matches[0][1] > matches[1][1]
+    assert index.search("missing", unit(1, 0)) == []
+
+    index.touch(a)
+    slot = index.add("ns", unit(0, 1), "d", ttl_seconds=60)
+    assert slot == b  # least recently used
+    assert index.evictions == 1
+    assert len(index) == 3
+
+
+def test_index_expired_rows_are_skipped_and_reused():
+    """Expired rows are invisible to searches and reused before evicting."""
+    index = VectorIndex(dim=2, capacity=2)
+    stale = index.add("ns", unit(1, 0), "stale", ttl_seconds=-1)
+    index.add("ns", unit(0, 1), "fresh", ttl_seconds=60)
+
+    assert [slot for slot, _ in index.search("ns", unit(1, 0))] == [1]
+    assert index.add("ns", unit(1, 1), "new", ttl_seconds=60) == stale
+    assert index.evictions == 0
+
+
+def test_ivf_search_finds_nearest_in_probed_lists():
+    """After training, probing the nearest partitions still finds near neighbours."""
+    rng = np.random.default_rng(1)
+    centers = rng.normal(size=(4, 16))
+    index = VectorIndex(dim=16, capacity=400, n_lists=4, n_probe=1)
+    vectors = []
+    for i in range(200):
+        vector = centers[i % 4] + 0.05 * rng.normal(size=16)
+        vector = (vector / np.linalg.norm(vector)).astype(np.float32)
+        vectors.append(vector)
+        index.add("ns", vector, i, ttl_seconds=60)
+    index.train()
+
+    assert index.centroids is not None
+    for i in range(0, 200, 17):
+        slot, similarity = index.search("ns", vectors[i], k=1)[0]
+        assert index.payloads[slot] == i
+        assert similarity == pytest.approx(1.0, abs=1e-5)
+
+
+def test_evaluate_thresholds():
+    """Higher thresholds trade recall for precision."""
+    rows = evaluate_thresholds(
+        [0.99, 0.95, 0.91, 0.85], [True, True, False, True], [0.9, 0.96]
+    )
+    assert rows[0] == {
+        "threshold": 0.9,
+        "precision": round(2 / 3, 4),
+        "recall": round(2 / 3, 4),
+        "f1": round(2 / 3, 4),
+        "hit_rate": 0.75,
+    }
+    assert (rows[1]["precision"], rows[1]["recall"]) == (1.0, round(1 / 3, 4))
@@ -0,0 +1,124 @@
+"""Tests for the preload-and-fork server helpers."""
+
+import asyncio
+import os
+from app import database, serve
+from app.models import LLMLinguaModel
+from app.services.compression_cache import CompressionCache
+from app.services.inference_executor import InferenceExecutor
+
+
+def test_torch_threads_are_split_between_workers(monkeypatch):
+    """Each worker gets an equal share of the cores (at least one)."""
+    monkeypatch.setattr(serve.settings, "serve_torch_threads", None)
+    monkeypatch.setattr(os, "cpu_count", lambda: 8)
+
+    assert serve.worker_torch_threads(4) == 2
+    assert serve.worker_torch_threads(16) == 1
+
+
+def test_forked_worker_sees_preloaded_model(monkeypatch):
+    """A model loaded before fork() is reported as inherited in the child."""
+    monkeypatch.setattr(LLMLinguaModel, "_instance", object())
+    monkeypatch.setattr(LLMLinguaModel, "_loaded_pid", os.getpid())
+    assert LLMLinguaModel.loaded_in_parent() is False
+
+    pid = os.fork()
+    if pid == 0:
+        os._exit(0 if LLMLinguaModel.loaded_in_parent() else 1)
+    _, status = os.waitpid(pid, 0)
+
+    assert os.waitstatus_to_exitcode(status) == 0
+
+
+def test_reconfigure_switches_to_in_process_threads():
+    """Workers run inference on the inherited model instead of a process pool."""
+    executor = InferenceExecutor(mode="process", workers=4)
+    executor.reconfigure(mode="thread", workers=1, intra_op_threads=2)
+
+    status = executor.status()
+    assert status["mode"] == "thread"
+    assert status["workers"] == 1
+    assert status["intra_op_threads"] == 2
+    assert status["pid"] == os.getpid()
+
+
+def test_preload_passes_thread_count_without_touching_settings(monkeypatch):
+    """The master loads with one intra-op thread; shared config stays as set."""
+    requested = []
+    monkeypatch.setattr(serve.settings, "compression_backend", "pytorch")
+    monkeypatch.setattr(serve.settings, "torch_intra_op_threads", None)
+    monkeypatch.setattr(
+        LLMLinguaModel,
+        "get_instance",
+        classmethod(
+            lambda cls, intra_op_threads=None: requested.append(intra_op_threads)
+        ),
+    )
+
+    assert serve.preload_model() is True
+    assert requested == [1]
+    assert serve.settings.torch_intra_op_threads is None
+
+
+def test_forked_worker_opens_its_own_cache_connection(tmp_path):
+    """The SQLite tier never uses a connection inherited through fork()."""
+    cache = CompressionCache(disk_path=str(tmp_path / "compression.db"))
+    assert cache.disk is not None
+    cache.disk.set("master", "compressed in master")
+    inherited = cache.disk._conn
+
+    pid = os.fork()
+    if pid == 0:
+        exit_code = 1
+        try:
+            own = cache.disk.get("master") == "compressed in master"
+            cache.disk.set("worker", "compressed in worker")
+            exit_code = 0 if own and cache.disk._conn is not inherited else 1
+        finally:
+            os._exit(exit_code)
+    _, status = os.waitpid(pid, 0)
+
+    assert os.waitstatus_to_exitcode(status) == 0
+    assert cache.disk._conn is inherited
+    assert cache.disk.get("worker") == "compressed in worker"
+
+
+def test_tables_are_created_once_before_forking(monkeypatch):
+    """The master creates the schema; workers' init_db() is then a no-op."""
+    created = []
+
+    class FakeConnection:
+        async def run_sync(self, fn):
+            created.append(fn)
+
+    class FakeBegin:
+        async def __aenter__(self):
+            return FakeConnection()
+
+        async def __aexit__(self, *exc):
+            return False
+
+    class FakeEngine:
+        def begin(self):
+            return FakeBegin()
+
+        async def dispose(self):
+            pass
+
+    monkeypatch.setattr(database, "async_engine", FakeEngine())
+    monkeypatch.setattr(database, "_tables_created", False)
+
+    serve.create_tables()
+    pid = os.fork()
+    if pid == 0:
+        exit_code = 1
+        try:
+            asyncio.run(database.init_db())
+            exit_code = 0 if len(created) == 1 else 1
+        finally:
+            os._exit(exit_code)
+    _, status = os.waitpid(pid, 0)
+
+    assert os.waitstatus_to_exitcode(status) == 0
+    assert len(created) == 1
@@ -0,0 +1,116 @@
+"""Tests for live session events: SSE stream and the Redis event relay (fakeredis)."""
+
+import asyncio
+import json
+
+import pytest
+
+from app.routers import sessions_router
+from app.routers.sessions_router import format_sse, sse_stream
+from app.services.event_bus import EventBus, RedisEventRelay
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+class FakeRequest:
+    """Request stand-in whose client disconnects on demand."""
+
+    def __init__(self):
+        """Start connected."""
+        self.disconnected = False
+
+    async def is_disconnected(self):
+        """Report the client's connection state."""
+        return self.disconnected
+
+
+def worker(server):
+    """An event bus as one worker process would build it, on a shared server."""
+    client = fakeredis.aioredis.FakeRedis(server=server, decode_responses=True)
+    return EventBus(relay=RedisEventRelay(lambda: client))
+
+
+async def next_event(subscription, timeout=2.0):
+    """Wait for the next event of a subscription."""
+    return await subscription.get(timeout=timeout)
+
+
+def test_session_events_requires_auth(client):
+    """The SSE endpoint is protected like every other endpoint."""
+    response = client.get("/api/v1/sessions/clxxx123/events")
+    assert response.status_code == 403
+
+
+async def test_sse_stream_pushes_events_and_keepalives(monkeypatch):
+    """Events are SSE frames named after their type; idle periods send comments."""
+    bus = EventBus()
+    monkeypatch.setattr(sessions_router, "event_bus", bus)
+    monkeypatch.setattr(sessions_router.settings, "sse_keepalive_seconds", 0.05)
+    request = FakeRequest()
+    subscription = await bus.subscribe("s1")
+    frames = sse_stream(request, subscription)
+
+    assert (await frames.__anext__()).startswith("retry: ")
+    event = {"type": "job.state", "state": "processing", "replyTo": "m1"}
+    await bus.publish("s1", event)
+    assert await frames.__anext__() == format_sse(event)
+    assert await frames.__anext__() == ": keepalive\n\n"
+
+    request.disconnected = True
+    with pytest.raises(StopAsyncIteration):
+        await frames.__anext__()
+    assert bus.subscriber_count("s1") == 0
+
+
+def test_format_sse():
+    """The event type becomes the SSE event name, the event the JSON data."""
+    frame = format_sse({"type": "message.delta", "content": "Hi"})
+    name, data = frame.strip().split("\n")
+    assert name == "event: message.delta"
+    assert json.loads(data[len("data: ") :]) == {
+        "type": "message.delta",
+        "content": "Hi",
+    }
+
+
+async def test_events_reach_subscribers_on_other_workers():
+    """A job processed by one worker is pushed to a subscriber on another."""
+    server = fakeredis.FakeServer()
+    web, job = worker(server), worker(server)
+    subscription = await web.subscribe("s1")
+    other = await web.subscribe("s2")
+
+    await job.publish("s1", {"type": "message.delta", "content": "Hi"})
+
+    assert await next_event(subscription) == {"type": "message.delta", "content": "Hi"}
+    await asyncio.sleep(0.05)
+    assert other.queue.empty()
+    await web.close()
+    await job.close()
+
+
+async def test_publisher_with_local_subscriber_delivers_once():
+    """Relayed events are not also delivered directly to local subscribers."""
+    bus = worker(fakeredis.FakeServer())
+    subscription = await bus.subscribe("s1")
+
+    await bus.publish("s1", {"n": 1})
+
+    assert await next_event(subscription) == {"n": 1}
+    await asyncio.sleep(0.05)
+    assert subscription.queue.empty()
+    await bus.close()
+
+
+async def test_redis_outage_falls_back_to_in_process_delivery():
+    """Without Redis, events still reach subscribers of the same process."""
+    server = fakeredis.FakeServer()
+    server.connected = False
+    bus = worker(server)
+    subscription = await bus.subscribe("s1")
+
+    assert await bus.publish("s1", {"n": 1}) == 1
+    assert subscription.queue.get_nowait() == {"n": 1}
+    assert not bus.relay.available()
+    assert bus.stats()["relay"]["errors"] >= 1
+    await bus.close()